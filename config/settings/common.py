@@ -100,6 +100,7 @@ MI_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS + MI_APPS
 
 MIDDLEWARE = [
+    'datahub.core.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -233,6 +234,11 @@ if SSO_ENABLED:
     OAUTH2_PROVIDER['RESOURCE_SERVER_INTROSPECTION_URL'] = env('RESOURCE_SERVER_INTROSPECTION_URL')
     OAUTH2_PROVIDER['RESOURCE_SERVER_AUTH_TOKEN'] = env('RESOURCE_SERVER_AUTH_TOKEN')
 
+# Maximum number of seconds to cache the results of validating valid and invalid access tokens
+# for (see datahub.oauth.cache)
+OAUTH2_TOKEN_CACHE_TIMEOUT = env.int('OAUTH2_TOKEN_CACHE_TIMEOUT', default=60)
+OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT = env.int('OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT', default=10)
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.9/topics/i18n/
 
@@ -295,6 +301,23 @@ ES_VERIFY_CERTS = env.bool('ES_VERIFY_CERTS', True)
 ES_INDEX_PREFIX = env('ES_INDEX_PREFIX')
 ES_INDEX_SETTINGS = {}
 ES_BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # 10MB
+# Thresholds for flushing the per-process bulk indexer used when syncing individual objects
+ES_BULK_INDEXER_MAX_ACTIONS = env.int('ES_BULK_INDEXER_MAX_ACTIONS', default=500)
+ES_BULK_INDEXER_MAX_BYTES = env.int('ES_BULK_INDEXER_MAX_BYTES', default=5 * 1024 * 1024)
+ES_BULK_INDEXER_MAX_BUFFER_SECS = env.float('ES_BULK_INDEXER_MAX_BUFFER_SECS', default=2)
+ES_BULK_INDEXER_MAX_RETRIES = env.int('ES_BULK_INDEXER_MAX_RETRIES', default=5)
+ES_BULK_INDEXER_INITIAL_BACKOFF_SECS = 0.5
+ES_BULK_INDEXER_MAX_BACKOFF_SECS = 30
+# Total number of threads used to resync search apps during a migration (shared between apps)
+ES_MIGRATION_MAX_WORKERS = env.int('ES_MIGRATION_MAX_WORKERS', default=4)
+# Maximum number of concurrent bulk requests sent by migration resyncs (in all processes)
+ES_MIGRATION_MAX_BULK_REQUESTS = env.int('ES_MIGRATION_MAX_BULK_REQUESTS', default=4)
+# Minimum number of seconds between refreshes of a new index (in bulk-load mode) when
+# documents are deleted from the old indices during a migration (in all processes)
+ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS = env.int(
+    'ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS',
+    default=10,
+)
 ES_SEARCH_REQUEST_TIMEOUT = env.int('ES_SEARCH_REQUEST_TIMEOUT', default=20)  # seconds
 ES_SEARCH_REQUEST_WARNING_THRESHOLD = env.int(
     'ES_SEARCH_REQUEST_WARNING_THRESHOLD',
@@ -307,7 +330,30 @@ SEARCH_CONNECT_SIGNAL_RECEIVERS_ON_READY = True
 CHAR_FIELD_MAX_LENGTH = 255
 BULK_INSERT_BATCH_SIZE = env.int('BULK_INSERT_BATCH_SIZE', default=25000)
 
+# Per-request performance metrics (see datahub.core.instrumentation)
+LOG_REQUEST_METRICS = env.bool('LOG_REQUEST_METRICS', False)
+QUERY_BUDGET_RAISE_ON_EXCEEDED = False
+
+# Thread pools used to run tasks in the background of web processes (see
+# datahub.core.thread_pool)
+THREAD_POOLS = {
+    'default': {
+        'max_workers': env.int('THREAD_POOL_MAX_WORKERS', default=10),
+        'max_queue_size': env.int('THREAD_POOL_MAX_QUEUE_SIZE', default=100),
+        'rejection_policy': 'caller_runs',
+    },
+    'omis-notifications': {
+        'max_workers': env.int('OMIS_NOTIFICATION_THREAD_POOL_MAX_WORKERS', default=4),
+        'max_queue_size': env.int('OMIS_NOTIFICATION_THREAD_POOL_MAX_QUEUE_SIZE', default=200),
+        'rejection_policy': 'caller_runs',
+    },
+}
+# Maximum number of seconds to wait for each thread pool to finish its tasks on shutdown
+THREAD_POOL_SHUTDOWN_TIMEOUT = env.int('THREAD_POOL_SHUTDOWN_TIMEOUT', default=30)
+
 AV_V2_SERVICE_URL = env('AV_V2_SERVICE_URL', default=None)
+# Maximum number of concurrent requests to the AV service (in total, across all processes)
+AV_V2_SERVICE_MAX_CONCURRENT_SCANS = env.int('AV_V2_SERVICE_MAX_CONCURRENT_SCANS', default=4)
 
 
 def _build_redis_url(base_url, db_number, **query_args):
@@ -366,8 +412,8 @@ if REDIS_BASE_URL:
         }
     }
     if env.bool('ENABLE_DAILY_ES_SYNC', False):
-        CELERY_BEAT_SCHEDULE['sync_es'] = {
-            'task': 'datahub.search.tasks.sync_all_models',
+        CELERY_BEAT_SCHEDULE['reconcile_es'] = {
+            'task': 'datahub.search.tasks.reconcile_all_models',
             'schedule': crontab(minute=0, hour=1),
         }
 
@@ -453,6 +499,12 @@ OMIS_NOTIFICATION_OVERRIDE_RECIPIENT_EMAIL = env(
 OMIS_NOTIFICATION_ADMIN_EMAIL = env('OMIS_NOTIFICATION_ADMIN_EMAIL', default='')
 OMIS_NOTIFICATION_API_KEY = env('OMIS_NOTIFICATION_API_KEY', default='')
 OMIS_NOTIFICATION_TEST_API_KEY = env('OMIS_NOTIFICATION_TEST_API_KEY', default='')
+# Can be changed to the URL of a fake GOV.UK Notify server (see the run_fake_notify_server
+# management command) for load testing
+OMIS_NOTIFICATION_API_BASE_URL = env(
+    'OMIS_NOTIFICATION_API_BASE_URL',
+    default='https://api.notifications.service.gov.uk',
+)
 OMIS_PUBLIC_BASE_URL = env('OMIS_PUBLIC_BASE_URL', default='http://localhost:4000')
 OMIS_PUBLIC_ORDER_URL = f'{OMIS_PUBLIC_BASE_URL}/{{public_token}}'
 
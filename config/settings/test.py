@@ -29,6 +29,8 @@ ES_INDEX_SETTINGS = {
     'number_of_shards': 1,
     'number_of_replicas': 0,
 }
+# Flush the bulk indexer immediately so that synced objects can be searched straight away
+ES_BULK_INDEXER_MAX_ACTIONS = 1
 DOCUMENT_BUCKET = 'test-bucket'
 AV_V2_SERVICE_URL = 'http://av-service/'
 
@@ -53,6 +55,9 @@ CACHES = {
 
 CELERY_TASK_ALWAYS_EAGER = True
 
+# Make tests fail if a view makes more database queries than its query budget allows
+QUERY_BUDGET_RAISE_ON_EXCEEDED = True
+
 # Stop WhiteNoise emitting warnings when running tests without running collectstatic first
 WHITENOISE_AUTOREFRESH = True
 WHITENOISE_USE_FINDERS = True
@@ -21,6 +21,44 @@ from datahub.search.elasticsearch import (
 )
 
 
+def pytest_addoption(parser):
+    """Adds options for the benchmark suite (see datahub/benchmarks)."""
+    group = parser.getgroup('benchmarks')
+    group.addoption(
+        '--benchmark',
+        action='store_true',
+        help='Run the benchmark suite (which is skipped by default).',
+    )
+    group.addoption(
+        '--update-benchmark-baseline',
+        action='store_true',
+        help='Write the benchmark results to the baseline file (instead of comparing them).',
+    )
+    group.addoption(
+        '--benchmark-repeats',
+        type=int,
+        default=20,
+        help='The number of times to make each benchmarked request.',
+    )
+    group.addoption(
+        '--benchmark-latency-tolerance',
+        type=float,
+        default=0.5,
+        help='The allowed increase in latency (as a fraction of the baseline latency).',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skips benchmarks unless --benchmark or --update-benchmark-baseline was specified."""
+    if config.getoption('benchmark') or config.getoption('update_benchmark_baseline'):
+        return
+
+    skip_marker = pytest.mark.skip(reason='Benchmarks are only run with --benchmark')
+    for item in items:
+        if item.get_closest_marker('benchmark'):
+            item.add_marker(skip_marker)
+
+
 def pytest_sessionstart(session):
     """
     Set tests to use all databases.
@@ -140,7 +178,7 @@ def synchronous_on_commit(monkeypatch):
     monkeypatch.setattr('django.db.transaction.on_commit', _synchronous_on_commit)
 
 
-def _synchronous_submit_to_thread_pool(fn, *args, **kwargs):
+def _synchronous_submit_to_thread_pool(pool, fn, *args, **kwargs):
     fn(*args, **kwargs)
 
 
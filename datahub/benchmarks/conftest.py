@@ -0,0 +1,119 @@
+import pytest
+import reversion
+
+from datahub.benchmarks.utils import get_regressions, load_baseline, run_benchmark, save_baseline
+from datahub.company.test.factories import CompanyFactory, ContactFactory
+from datahub.interaction.test.factories import CompanyInteractionFactory
+from datahub.investment.project.proposition.test.factories import PropositionFactory
+from datahub.investment.project.test.factories import (
+    InvestmentProjectFactory,
+    InvestmentProjectTeamMemberFactory,
+)
+
+NUM_COMPANIES = 100
+NUM_CONTACTS_PER_COMPANY = 200
+NUM_INTERACTIONS_PER_COMPANY = 200
+NUM_INVESTMENT_PROJECTS = 50
+NUM_TEAM_MEMBERS_PER_PROJECT = 5
+NUM_PROPOSITIONS_PER_PROJECT = 5
+NUM_REVISIONS = 20
+
+
+@pytest.fixture(scope='session')
+def benchmark_results(request):
+    """
+    Collects benchmark results, and writes them to the baseline file at the end of the session
+    if --update-benchmark-baseline was specified.
+    """
+    results = {}
+    yield results
+
+    if request.config.getoption('update_benchmark_baseline') and results:
+        save_baseline(results)
+
+
+@pytest.fixture
+def benchmark(request, benchmark_results):
+    """
+    Fixture that benchmarks a request and compares the result with the baseline.
+
+    Usage:
+
+        benchmark('company-detail', lambda: self.api_client.get(url))
+    """
+    config = request.config
+
+    def _benchmark(name, make_request, expected_status_code=200):
+        result = run_benchmark(
+            make_request,
+            config.getoption('benchmark_repeats'),
+            expected_status_code=expected_status_code,
+        )
+        benchmark_results[name] = result
+
+        if config.getoption('update_benchmark_baseline'):
+            return result
+
+        baseline = load_baseline().get(name)
+        if baseline is None:
+            pytest.fail(f'There is no baseline for {name} (use --update-benchmark-baseline)')
+
+        regressions = get_regressions(
+            result,
+            baseline,
+            config.getoption('benchmark_latency_tolerance'),
+        )
+        if regressions:
+            pytest.fail(f'{name} regressed: ' + '; '.join(regressions))
+
+        return result
+
+    return _benchmark
+
+
+@pytest.fixture
+def companies():
+    """Creates companies for list endpoints."""
+    yield CompanyFactory.create_batch(NUM_COMPANIES)
+
+
+@pytest.fixture
+def company_with_history():
+    """Creates a company with many contacts, interactions and revisions."""
+    company = CompanyFactory()
+    contacts = ContactFactory.create_batch(NUM_CONTACTS_PER_COMPANY, company=company)
+    CompanyInteractionFactory.create_batch(
+        NUM_INTERACTIONS_PER_COMPANY,
+        company=company,
+        contacts=contacts[:2],
+    )
+
+    for index in range(NUM_REVISIONS):
+        with reversion.create_revision():
+            company.description = f'Description {index}'
+            company.save()
+
+    yield company
+
+
+@pytest.fixture
+def investment_projects():
+    """Creates investment projects with team members and propositions."""
+    projects = InvestmentProjectFactory.create_batch(NUM_INVESTMENT_PROJECTS)
+
+    for project in projects:
+        InvestmentProjectTeamMemberFactory.create_batch(
+            NUM_TEAM_MEMBERS_PER_PROJECT,
+            investment_project=project,
+        )
+        PropositionFactory.create_batch(
+            NUM_PROPOSITIONS_PER_PROJECT,
+            investment_project=project,
+        )
+
+    for index in range(NUM_REVISIONS):
+        with reversion.create_revision():
+            projects[0].description = f'Description {index}'
+            projects[0].save()
+
+    yield projects
@@ -0,0 +1,87 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from datahub.benchmarks.utils import (
+    BenchmarkResult,
+    get_percentile,
+    get_regressions,
+    run_benchmark,
+    save_baseline,
+)
+
+BASELINE = {'query_count': 10, 'p50_ms': 100.0, 'p95_ms': 200.0}
+
+
+@pytest.mark.parametrize(
+    'percent,expected_value',
+    (
+        (50, 5),
+        (95, 10),
+        (100, 10),
+        (0, 1),
+    ),
+)
+def test_get_percentile(percent, expected_value):
+    """Test that percentiles are calculated using the nearest-rank method."""
+    assert get_percentile([10, 9, 8, 7, 6, 5, 4, 3, 2, 1], percent) == expected_value
+
+
+@pytest.mark.parametrize(
+    'result,expected_regression_prefixes',
+    (
+        (BenchmarkResult(10, 100.0, 200.0), []),
+        (BenchmarkResult(9, 150.0, 300.0), []),
+        (BenchmarkResult(11, 100.0, 200.0), ['query count increased from 10 to 11']),
+        (BenchmarkResult(10, 151.0, 200.0), ['p50_ms increased from 100.0 to 151.0']),
+        (
+            BenchmarkResult(12, 100.0, 301.0),
+            ['query count increased from 10 to 12', 'p95_ms increased from 200.0 to 301.0'],
+        ),
+    ),
+)
+def test_get_regressions(result, expected_regression_prefixes):
+    """Test that query count increases and latency increases over the tolerance are reported."""
+    regressions = get_regressions(result, BASELINE, 0.5)
+
+    assert len(regressions) == len(expected_regression_prefixes)
+    for regression, expected_prefix in zip(regressions, expected_regression_prefixes):
+        assert regression.startswith(expected_prefix)
+
+
+@pytest.mark.django_db
+def test_run_benchmark_consumes_streaming_responses():
+    """Test that requests are repeated (after a warm-up request) and responses consumed."""
+    streaming_content = Mock()
+    streaming_content.__iter__ = Mock(side_effect=lambda: iter([b'a', b'b']))
+    response = Mock(status_code=200, streaming=True, streaming_content=streaming_content)
+    make_request = Mock(return_value=response)
+
+    result = run_benchmark(make_request, 3)
+
+    assert make_request.call_count == 4
+    assert streaming_content.__iter__.call_count == 4
+    assert result.query_count == 0
+
+
+@pytest.mark.django_db
+def test_run_benchmark_checks_status_code():
+    """Test that an unexpected status code fails the benchmark."""
+    make_request = Mock(return_value=Mock(status_code=404, streaming=False))
+
+    with pytest.raises(AssertionError):
+        run_benchmark(make_request, 3)
+
+
+def test_save_baseline(tmp_path):
+    """Test that results are merged into the existing baseline."""
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps({'a': BASELINE, 'b': BASELINE}))
+
+    save_baseline({'b': BenchmarkResult(5, 50.0, 60.0)}, path=path)
+
+    assert json.loads(path.read_text()) == {
+        'a': BASELINE,
+        'b': {'query_count': 5, 'p50_ms': 50.0, 'p95_ms': 60.0},
+    }
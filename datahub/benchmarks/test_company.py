@@ -0,0 +1,25 @@
+import pytest
+from rest_framework.reverse import reverse
+
+from datahub.core.test_utils import APITestMixin
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+class TestCompanyBenchmarks(APITestMixin):
+    """Benchmarks for the company endpoints."""
+
+    def test_list(self, benchmark, companies):
+        """Benchmarks the company list endpoint."""
+        url = reverse('api-v4:company:collection')
+        benchmark('company-list', lambda: self.api_client.get(url))
+
+    def test_detail(self, benchmark, company_with_history):
+        """Benchmarks the company detail endpoint for a company with many contacts."""
+        url = reverse('api-v4:company:item', kwargs={'pk': company_with_history.pk})
+        benchmark('company-detail', lambda: self.api_client.get(url))
+
+    def test_audit(self, benchmark, company_with_history):
+        """Benchmarks the company audit history endpoint."""
+        url = reverse('api-v4:company:audit-item', kwargs={'pk': company_with_history.pk})
+        benchmark('company-audit', lambda: self.api_client.get(url))
@@ -0,0 +1,24 @@
+import pytest
+from rest_framework.reverse import reverse
+
+from datahub.core.test_utils import APITestMixin
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+class TestInteractionBenchmarks(APITestMixin):
+    """Benchmarks for the interaction endpoints."""
+
+    def test_list_for_company(self, benchmark, company_with_history):
+        """Benchmarks the interaction list endpoint filtered by a company."""
+        url = reverse('api-v3:interaction:collection')
+        benchmark(
+            'interaction-list-for-company',
+            lambda: self.api_client.get(url, data={'company_id': company_with_history.pk}),
+        )
+
+    def test_detail(self, benchmark, company_with_history):
+        """Benchmarks the interaction detail endpoint."""
+        interaction = company_with_history.interactions.first()
+        url = reverse('api-v3:interaction:item', kwargs={'pk': interaction.pk})
+        benchmark('interaction-detail', lambda: self.api_client.get(url))
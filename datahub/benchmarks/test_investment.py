@@ -0,0 +1,28 @@
+import pytest
+from rest_framework.reverse import reverse
+
+from datahub.core.test_utils import APITestMixin
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+class TestInvestmentProjectBenchmarks(APITestMixin):
+    """Benchmarks for the investment project endpoints."""
+
+    def test_list(self, benchmark, investment_projects):
+        """Benchmarks the investment project list endpoint."""
+        url = reverse('api-v3:investment:investment-collection')
+        benchmark('investment-project-list', lambda: self.api_client.get(url))
+
+    def test_detail(self, benchmark, investment_projects):
+        """Benchmarks the investment project detail endpoint."""
+        url = reverse(
+            'api-v3:investment:investment-item',
+            kwargs={'pk': investment_projects[0].pk},
+        )
+        benchmark('investment-project-detail', lambda: self.api_client.get(url))
+
+    def test_audit(self, benchmark, investment_projects):
+        """Benchmarks the investment project audit history endpoint."""
+        url = reverse('api-v3:investment:audit-item', kwargs={'pk': investment_projects[0].pk})
+        benchmark('investment-project-audit', lambda: self.api_client.get(url))
@@ -0,0 +1,42 @@
+import pytest
+from rest_framework.reverse import reverse
+
+from datahub.core.test_utils import APITestMixin
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.fixture
+def indexed_objects(setup_es, companies, company_with_history, investment_projects):
+    """Creates and indexes companies, contacts, interactions and investment projects."""
+    setup_es.indices.refresh()
+
+
+@pytest.mark.usefixtures('indexed_objects')
+class TestSearchBenchmarks(APITestMixin):
+    """Benchmarks for the search and export endpoints."""
+
+    def test_basic_search(self, benchmark):
+        """Benchmarks the global search endpoint."""
+        url = reverse('api-v3:search:basic')
+        benchmark(
+            'search-basic',
+            lambda: self.api_client.get(url, data={'term': '', 'entity': 'company'}),
+        )
+
+    @pytest.mark.parametrize(
+        'name,url_name',
+        (
+            ('search-company', 'api-v4:search:company'),
+            ('search-contact', 'api-v3:search:contact'),
+            ('search-interaction', 'api-v3:search:interaction'),
+            ('search-investment-project', 'api-v3:search:investment_project'),
+            ('export-company', 'api-v4:search:company-export'),
+            ('export-interaction', 'api-v3:search:interaction-export'),
+            ('export-investment-project', 'api-v3:search:investment_project-export'),
+        ),
+    )
+    def test_entity_search(self, benchmark, name, url_name):
+        """Benchmarks the entity search and export endpoints."""
+        url = reverse(url_name)
+        benchmark(name, lambda: self.api_client.post(url, data={}))
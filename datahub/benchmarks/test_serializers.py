@@ -0,0 +1,69 @@
+from time import perf_counter
+
+import pytest
+from rest_framework.serializers import ListSerializer
+
+from datahub.benchmarks.utils import get_percentile
+from datahub.company.serializers import CompanySerializerV4
+from datahub.company.views import CompanyViewSetV4
+from datahub.core.compiled_serializers import CompiledListSerializer
+from datahub.interaction.serializers import InteractionSerializer
+from datahub.interaction.views import InteractionViewSet
+from datahub.investment.project.serializers import IProjectSerializer
+from datahub.investment.project.views import IProjectViewSet
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def _get_p50_ms(func, repeats):
+    func()
+
+    timings = []
+    for _ in range(repeats):
+        start_time = perf_counter()
+        func()
+        timings.append(perf_counter() - start_time)
+
+    return round(get_percentile(timings, 50) * 1000, 1)
+
+
+def _compare_serializers(request, serializer_class, instances):
+    """
+    Checks that the compiled representation of a list of (already fetched) objects is faster
+    than the standard DRF representation and produces the same output.
+    """
+    repeats = request.config.getoption('benchmark_repeats')
+
+    def _serialize_standard():
+        return ListSerializer(instances, child=serializer_class()).data
+
+    def _serialize_compiled():
+        return CompiledListSerializer(instances, child=serializer_class()).data
+
+    assert _serialize_compiled() == _serialize_standard()
+
+    standard_p50_ms = _get_p50_ms(_serialize_standard, repeats)
+    compiled_p50_ms = _get_p50_ms(_serialize_compiled, repeats)
+
+    assert compiled_p50_ms <= standard_p50_ms, (
+        f'{serializer_class.__name__}: compiled p50 {compiled_p50_ms} ms, standard p50 '
+        f'{standard_p50_ms} ms'
+    )
+
+
+def test_company_serializer(request, companies):
+    """Benchmarks the compiled representation for the company list."""
+    instances = list(CompanyViewSetV4.queryset.all())
+    _compare_serializers(request, CompanySerializerV4, instances)
+
+
+def test_interaction_serializer(request, company_with_history):
+    """Benchmarks the compiled representation for the interaction list."""
+    instances = list(InteractionViewSet.queryset.all())
+    _compare_serializers(request, InteractionSerializer, instances)
+
+
+def test_investment_project_serializer(request, investment_projects):
+    """Benchmarks the compiled representation for the investment project list."""
+    instances = list(IProjectViewSet.queryset.all())
+    _compare_serializers(request, IProjectSerializer, instances)
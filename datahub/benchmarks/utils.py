@@ -0,0 +1,104 @@
+import json
+from collections import namedtuple
+from math import ceil
+from pathlib import Path
+from time import perf_counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+BenchmarkResult = namedtuple('BenchmarkResult', ('query_count', 'p50_ms', 'p95_ms'))
+
+
+def run_benchmark(make_request, repeats, expected_status_code=200):
+    """
+    Benchmarks a request.
+
+    The request is made once to warm up any caches, and then repeats times. Streaming
+    responses are consumed (as the response content is generated while it's streamed).
+
+    :param make_request: function that makes the request and returns the response
+    :returns: BenchmarkResult (with the highest query count seen)
+    """
+    _make_request_and_consume_response(make_request, expected_status_code)
+
+    query_counts = []
+    timings = []
+
+    for _ in range(repeats):
+        with CaptureQueriesContext(connection) as query_context:
+            start_time = perf_counter()
+            _make_request_and_consume_response(make_request, expected_status_code)
+            timings.append(perf_counter() - start_time)
+
+        query_counts.append(len(query_context.captured_queries))
+
+    return BenchmarkResult(
+        query_count=max(query_counts),
+        p50_ms=round(get_percentile(timings, 50) * 1000, 1),
+        p95_ms=round(get_percentile(timings, 95) * 1000, 1),
+    )
+
+
+def get_percentile(values, percent):
+    """Gets a percentile of a list of values (using the nearest-rank method)."""
+    sorted_values = sorted(values)
+    rank = max(ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def get_regressions(result, baseline, latency_tolerance):
+    """
+    Compares a benchmark result with its baseline.
+
+    :param baseline: dict with query_count, p50_ms and p95_ms keys
+    :param latency_tolerance: the allowed increase in latency (as a fraction of the baseline)
+    :returns: list of messages describing any regressions
+    """
+    regressions = []
+
+    if result.query_count > baseline['query_count']:
+        regressions.append(
+            f'query count increased from {baseline["query_count"]} to {result.query_count}',
+        )
+
+    for field in ('p50_ms', 'p95_ms'):
+        max_latency = baseline[field] * (1 + latency_tolerance)
+        latency = getattr(result, field)
+        if latency > max_latency:
+            regressions.append(
+                f'{field} increased from {baseline[field]} to {latency} (maximum allowed: '
+                f'{max_latency:.1f})',
+            )
+
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Loads the baseline results (as a dict of benchmark name to dict of metrics)."""
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """
+    Updates the baseline results.
+
+    :param results: dict of benchmark name to BenchmarkResult
+    """
+    baseline = load_baseline(path)
+    baseline.update((name, result._asdict()) for name, result in results.items())
+
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def _make_request_and_consume_response(make_request, expected_status_code):
+    response = make_request()
+    assert response.status_code == expected_status_code
+
+    if response.streaming:
+        b''.join(response.streaming_content)
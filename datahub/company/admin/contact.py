@@ -5,28 +5,43 @@ import reversion
 from django.contrib import admin, messages as django_messages
 from django.contrib.admin.templatetags.admin_urls import admin_urlname
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models.functions import Upper
 from django.http import HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
+from django.utils.timezone import now
 from reversion.admin import VersionAdmin
 
 from datahub.company.models import Contact
 from datahub.core.admin import BaseModelAdminMixin
 from datahub.core.admin_csv_import import BaseCSVImportForm
-from datahub.search.signals import disable_search_signal_receivers
+from datahub.core.reversion import add_to_revision_in_bulk
+from datahub.core.utils import slice_iterable_into_chunks
+from datahub.search.apps import get_search_app_by_model
+from datahub.search.sync_object import sync_objects_async
 
 
 logger = getLogger(__name__)
 
 
 class LoadEmailMarketingOptOutsForm(BaseCSVImportForm):
-    """Form used for loading a CSV file to opt out contacts from email marketing."""
+    """
+    Form used for loading a CSV file to opt out contacts from email marketing.
+
+    Email addresses are processed in batches of OPT_OUT_BATCH_SIZE. Each batch is matched
+    against contacts using one query (which uses the index on UPPER(email)), and matching
+    contacts that accept email marketing are updated using one UPDATE query.
+
+    Each distinct email address (ignoring case) is only processed once.
+    """
+
+    OPT_OUT_BATCH_SIZE = 5000
 
     csv_file_field_label = 'Email list (CSV file)'
     required_columns = {'email'}
 
     @reversion.create_revision()
-    @disable_search_signal_receivers(Contact)
     def save(self, user):
         """Persists the data to the database."""
         reversion.set_user(user)
@@ -39,37 +54,91 @@ class LoadEmailMarketingOptOutsForm(BaseCSVImportForm):
 
     def _save(self, dict_reader, user):
         num_contacts_matched = 0
-        num_contacts_updated = 0
         num_non_matching_email_addresses = 0
+        updated_contact_pks = []
 
-        for row in dict_reader:
-            email = row['email'].strip()
+        email_batches = slice_iterable_into_chunks(
+            _get_distinct_emails(dict_reader),
+            self.OPT_OUT_BATCH_SIZE,
+        )
 
-            if not email:
-                continue
+        for email_batch in email_batches:
+            emails = dict(email_batch)
+            matched_contacts = Contact.objects.annotate(
+                email_upper=Upper('email'),
+            ).filter(
+                email_upper__in=emails.keys(),
+            ).values_list(
+                'pk',
+                'email_upper',
+                'accepts_dit_email_marketing',
+            )
 
-            contacts = Contact.objects.filter(email__iexact=email)
+            matched_emails = set()
+            contact_pks_to_update = []
 
-            for contact in contacts:
+            for pk, email_upper, accepts_dit_email_marketing in matched_contacts:
                 num_contacts_matched += 1
+                matched_emails.add(email_upper)
 
-                if contact.accepts_dit_email_marketing:
-                    num_contacts_updated += 1
-                    contact.accepts_dit_email_marketing = False
-                    contact.modified_by = user
-                    contact.save()
+                if accepts_dit_email_marketing:
+                    contact_pks_to_update.append(pk)
 
-            if not contacts:
-                logger.warning(f'Could not find a contact with email address {email}')
-                num_non_matching_email_addresses += 1
+            for email_upper, email in emails.items():
+                if email_upper not in matched_emails:
+                    logger.warning(f'Could not find a contact with email address {email}')
+                    num_non_matching_email_addresses += 1
+
+            _opt_out_contacts(contact_pks_to_update, user)
+            updated_contact_pks.extend(contact_pks_to_update)
+
+        if updated_contact_pks:
+            contact_search_app = get_search_app_by_model(Contact)
+            transaction.on_commit(
+                lambda: sync_objects_async(contact_search_app, updated_contact_pks),
+            )
 
         return _ProcessOptOutResult(
             num_contacts_matched,
-            num_contacts_updated,
+            len(updated_contact_pks),
             num_non_matching_email_addresses,
         )
 
 
+def _get_distinct_emails(dict_reader):
+    """
+    Yields (upper-case email address, email address) pairs for the distinct, non-blank email
+    addresses in a CSV file.
+    """
+    seen_emails = set()
+
+    for row in dict_reader:
+        email = row['email'].strip()
+        email_upper = email.upper()
+
+        if not email or email_upper in seen_emails:
+            continue
+
+        seen_emails.add(email_upper)
+        yield email_upper, email
+
+
+def _opt_out_contacts(contact_pks, user):
+    """Opts out contacts from email marketing using one UPDATE query."""
+    if not contact_pks:
+        return
+
+    contacts = Contact.objects.filter(pk__in=contact_pks)
+    contacts.update(
+        accepts_dit_email_marketing=False,
+        modified_by=user,
+        modified_on=now(),
+    )
+    # As post_save signals are not sent by update(), the contacts are explicitly added to
+    # the current revision
+    add_to_revision_in_bulk(contacts)
+
+
 class _ProcessOptOutResult(NamedTuple):
     num_contacts_matched: int
     num_contacts_updated: int
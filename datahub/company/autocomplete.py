@@ -3,8 +3,13 @@ from functools import reduce
 from operator import or_
 
 from django.db.models import Case, CharField, IntegerField, Q, When
+from django.db.models.constants import LOOKUP_SEP
 from django_filters import CharFilter
 
+# The maximum number of related objects (e.g. teams) that a token can match for the match to be
+# performed using a list of foreign key values (rather than via a join)
+MAX_RELATED_PKS_PER_TOKEN = 1000
+
 
 class AutocompleteFilter(CharFilter):
     """
@@ -62,9 +67,14 @@ def _apply_autocomplete_filter_to_queryset(queryset, autocomplete_fields, search
     Note that special care should be taken to ensure that orderings from other places (e.g.
     default orderings on views) don't override the ordering performed by the filter.
 
-    It also also possible to significantly speed up this filter by creating GIN indexes using
-    the gin_trgm_ops operator class from the pg_trgm PostgreSQL extension. However, this will
-    typically only work if all search fields are on the same table.
+    The search fields should have GIN indexes using the gin_trgm_ops operator class (from the
+    pg_trgm PostgreSQL extension), as these allow PostgreSQL to narrow down candidate rows for
+    the regular expressions using the index (for tokens of at least three characters).
+
+    As the indexes can only be combined if the conditions for each token are all on the same
+    table, tokens are matched against fields of related models (e.g. dit_team__name) using a
+    separate query first. The condition is then expressed as a list of foreign key values (e.g.
+    dit_team_id IN (...)), which can use the foreign key index.
     """
     escaped_tokens = [re.escape(token) for token in search_string.split()]
 
@@ -76,7 +86,7 @@ def _apply_autocomplete_filter_to_queryset(queryset, autocomplete_fields, search
         )
 
     filter_q_objects_for_tokens = (
-        _make_filter_q_for_token(autocomplete_fields, escaped_token)
+        _make_filter_q_for_token(queryset.model, autocomplete_fields, escaped_token)
         for escaped_token in escaped_tokens
     )
 
@@ -123,27 +133,76 @@ def _make_ordering_q_for_field(field, escaped_tokens):
     )
 
 
-def _make_filter_q_for_token(fields, escaped_token):
+def _make_filter_q_for_token(model, fields, escaped_token):
     r"""
     Creates a Q object that checks if a token appears in a list of fields (as a prefix).
 
     For example::
 
-        _make_filter_q_for_token(['first_name', 'last_name'], 'Joh')
+        _make_filter_q_for_token(Advisor, ['first_name', 'last_name', 'dit_team__name'], 'Joh')
 
     would return a Q object equivalent to::
 
-        Q(first_name__iregex='\mJoh') | Q(last_name__iregex='\mJoh')
+        Q(first_name__iregex='\mJoh')
+        | Q(last_name__iregex='\mJoh')
+        | Q(dit_team__in=[<IDs of teams with names matching '\mJoh'>])
+
+    (Fields of related models are only matched using a join if the token matches more than
+    MAX_RELATED_PKS_PER_TOKEN related objects.)
     """
     return reduce(
         or_,
         (
-            Q(_make_prefix_match_q(field, escaped_token))
+            _make_field_filter_q(model, field, escaped_token)
             for field in fields
         ),
     )
 
 
+def _make_field_filter_q(model, field, escaped_token):
+    """
+    Creates a Q object that checks if a token appears in a field (as a prefix).
+
+    For a field of a model related via a foreign key, the primary keys of the matching related
+    objects are looked up first so that the condition can use an index on the model's table.
+    """
+    foreign_key_name, related_model, related_field = _split_foreign_key_field(model, field)
+    if not foreign_key_name:
+        return _make_prefix_match_q(field, escaped_token)
+
+    related_pks = list(
+        related_model._base_manager.filter(
+            _make_prefix_match_q(related_field, escaped_token),
+        ).values_list(
+            'pk',
+            flat=True,
+        )[:MAX_RELATED_PKS_PER_TOKEN + 1],
+    )
+    if len(related_pks) > MAX_RELATED_PKS_PER_TOKEN:
+        return _make_prefix_match_q(field, escaped_token)
+
+    return Q(**{f'{foreign_key_name}__in': related_pks})
+
+
+def _split_foreign_key_field(model, field):
+    """
+    Splits a field path of the form <foreign key>__<field> into the foreign key name, the
+    related model and the related field name.
+
+    (None, None, None) is returned for other fields (including paths spanning multiple
+    relationships).
+    """
+    parts = field.split(LOOKUP_SEP)
+    if len(parts) != 2:
+        return None, None, None
+
+    model_field = model._meta.get_field(parts[0])
+    if not (model_field.many_to_one and model_field.concrete):
+        return None, None, None
+
+    return parts[0], model_field.related_model, parts[1]
+
+
 def _make_prefix_match_q(field, escaped_token):
     r"""
     Generates a Q object that performs a case-insensitive match of a token with prefixes
@@ -0,0 +1,123 @@
+import random
+from statistics import median
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from datahub.company.models import Advisor
+from datahub.company.views import AdviserFilter
+from datahub.metadata.models import Team
+
+DEFAULT_NUM_ADVISERS = 100_000
+DEFAULT_REPEATS = 5
+DEFAULT_TERMS = ('jo', 'john', 'john sm', 'smith', 'new york', 'zzzz')
+# Matches the default page size of the API
+PAGE_SIZE = 100
+
+FIRST_NAMES = (
+    'Amy', 'Ben', 'Chloe', 'David', 'Emma', 'Fiona', 'George', 'Hannah', 'Isaac', 'Jessica',
+    'John', 'Jonathan', 'Karen', 'Liam', 'Mary', 'Nigel', 'Olivia', 'Peter', 'Sarah', 'Tom',
+)
+LAST_NAMES = (
+    'Brown', 'Clarke', 'Davies', 'Evans', "O'Conner", 'Green', 'Hughes', 'Johnson', 'Jones',
+    'Lewis', 'Morgan', 'Patel', 'Roberts', 'Samson-James', 'Smith', 'Taylor', 'Walker',
+    'White', 'Williams', 'Wilson',
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the adviser autocomplete.
+
+    Advisers with random names are temporarily created (and deleted again afterwards, as all
+    changes are rolled back). The median time to fetch the first page of results (and the
+    count) is then reported for each search term.
+
+    This should not be run against a production database.
+    """
+
+    help = 'Benchmarks the adviser autocomplete using temporarily created advisers.'
+
+    def add_arguments(self, parser):
+        """Define extra arguments."""
+        parser.add_argument(
+            '--num-advisers',
+            type=int,
+            default=DEFAULT_NUM_ADVISERS,
+            help='The number of advisers to temporarily create.',
+        )
+        parser.add_argument(
+            '--repeats',
+            type=int,
+            default=DEFAULT_REPEATS,
+            help='The number of times to run each search.',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Also print the query plan for each search term.',
+        )
+        parser.add_argument(
+            'terms',
+            nargs='*',
+            default=DEFAULT_TERMS,
+            help='The search terms to benchmark.',
+        )
+
+    def handle(self, *args, **options):
+        """Runs the benchmark and then rolls back all changes."""
+        try:
+            with transaction.atomic():
+                self._create_advisers(options['num_advisers'])
+                for term in options['terms']:
+                    self._benchmark_term(term, options['repeats'], options['explain'])
+
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _create_advisers(self, num_advisers):
+        teams = list(Team.objects.all()) or [None]
+        advisers = (
+            Advisor(
+                email=f'{uuid4()}@benchmark.test',
+                first_name=random.choice(FIRST_NAMES),
+                last_name=random.choice(LAST_NAMES),
+                dit_team=random.choice(teams),
+            )
+            for _ in range(num_advisers)
+        )
+        Advisor.objects.bulk_create(advisers, batch_size=5000)
+
+        # Make sure that the query planner knows about the new rows
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Advisor._meta.db_table}')
+
+        self.stdout.write(f'Created {num_advisers} advisers')
+
+    def _benchmark_term(self, term, repeats, explain):
+        timings = []
+
+        for _ in range(repeats):
+            start_time = perf_counter()
+            queryset = AdviserFilter(
+                {'autocomplete': term},
+                queryset=Advisor.objects.select_related('dit_team'),
+            ).qs
+            count = queryset.count()
+            list(queryset[:PAGE_SIZE])
+            timings.append(perf_counter() - start_time)
+
+        self.stdout.write(
+            f'{term!r}: {count} results, median {median(timings) * 1000:.1f}ms '
+            f'(min {min(timings) * 1000:.1f}ms, max {max(timings) * 1000:.1f}ms)',
+        )
+
+        if explain:
+            self.stdout.write(queryset[:PAGE_SIZE].explain(analyze=True))
@@ -1,8 +1,10 @@
 """Various services."""
 import csv
 import io
+import os
 import tempfile
 import zipfile
+from concurrent.futures import as_completed, ProcessPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 from logging import getLogger
@@ -11,8 +13,9 @@ from urllib.parse import urlparse
 import requests
 from django.conf import settings
 from django.core.management import call_command
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connection, reset_queries, transaction
+from django_pglocks import advisory_lock
 from lxml import etree
 from raven.contrib.django.raven_compat.models import client
 
@@ -21,12 +24,107 @@ from datahub.company.ch_constants import (
     CSV_FIELD_NAMES,
     CSV_RELEVANT_FIELDS,
 )
+from datahub.company.models import CompaniesHouseCompany
 from datahub.core import constants
 from datahub.core.utils import slice_iterable_into_chunks, stream_to_file_pointer
+from datahub.search.apps import get_search_app
+from datahub.search.companieshousecompany.apps import CompaniesHouseCompanySearchApp
+from datahub.search.deletion import delete_documents
+from datahub.search.sync_object import sync_objects_by_pk
 
 logger = getLogger(__name__)
 
+UPSERT_LOADER = 'upsert'
+COPY_LOADER = 'copy'
+LOADERS = (UPSERT_LOADER, COPY_LOADER)
+DEFAULT_NUM_WORKERS = 4
+
+CH_COLUMNS = (
+    'company_number',
+    'company_category',
+    'company_status',
+    'incorporation_date',
+    'name',
+    'registered_address_1',
+    'registered_address_2',
+    'registered_address_country_id',
+    'registered_address_county',
+    'registered_address_postcode',
+    'registered_address_town',
+    'sic_code_1',
+    'sic_code_2',
+    'sic_code_3',
+    'sic_code_4',
+    'uri',
+)
+_QUOTED_CH_COLUMNS = ', '.join(f'"{column}"' for column in CH_COLUMNS)
+_QUOTED_CH_UPDATE_COLUMNS = ', '.join(
+    f'"{column}"' for column in CH_COLUMNS if column != 'company_number'
+)
+_EXCLUDED_CH_UPDATE_COLUMNS = ', '.join(
+    f'EXCLUDED."{column}"' for column in CH_COLUMNS if column != 'company_number'
+)
+
+STAGING_TABLE_NAME = 'company_companieshousecompany_staging'
+LOADED_COMPANY_NUMBERS_TABLE_NAME = 'company_companieshousecompany_loaded'
+
+CREATE_STAGING_TABLES_SQL_STATEMENT = f"""
+DROP TABLE IF EXISTS {STAGING_TABLE_NAME}, {LOADED_COMPANY_NUMBERS_TABLE_NAME};
+CREATE UNLOGGED TABLE {STAGING_TABLE_NAME} AS
+SELECT {_QUOTED_CH_COLUMNS}
+FROM company_companieshousecompany
+WITH NO DATA;
+CREATE UNLOGGED TABLE {LOADED_COMPANY_NUMBERS_TABLE_NAME} (
+    company_number varchar(255) PRIMARY KEY
+)
+"""
+
+DROP_STAGING_TABLES_SQL_STATEMENT = f"""
+DROP TABLE IF EXISTS {STAGING_TABLE_NAME}, {LOADED_COMPANY_NUMBERS_TABLE_NAME}
+"""
+
+COPY_TO_STAGING_SQL_STATEMENT = f"""
+COPY {STAGING_TABLE_NAME} ({_QUOTED_CH_COLUMNS}) FROM STDIN
+"""
+
+# Only rows whose content hash has changed are inserted or updated.
+#
+# DISTINCT ON is used as ON CONFLICT DO UPDATE cannot update the same row twice. xmax is 0 for
+# newly-inserted rows.
+MERGE_FROM_STAGING_SQL_STATEMENT = f"""
+INSERT INTO company_companieshousecompany ({_QUOTED_CH_COLUMNS}, content_hash)
+SELECT DISTINCT ON (company_number)
+    {_QUOTED_CH_COLUMNS},
+    md5(ROW({_QUOTED_CH_COLUMNS})::text)
+FROM {STAGING_TABLE_NAME}
+ORDER BY company_number
+ON CONFLICT (company_number)
+DO UPDATE SET ({_QUOTED_CH_UPDATE_COLUMNS}, content_hash) = (
+    {_EXCLUDED_CH_UPDATE_COLUMNS},
+    EXCLUDED.content_hash
+)
+WHERE company_companieshousecompany.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+RETURNING company_number, xmax = 0 AS inserted
+"""
 
+RECORD_LOADED_COMPANY_NUMBERS_SQL_STATEMENT = f"""
+INSERT INTO {LOADED_COMPANY_NUMBERS_TABLE_NAME} (company_number)
+SELECT DISTINCT company_number
+FROM {STAGING_TABLE_NAME}
+ON CONFLICT DO NOTHING
+"""
+
+DELETE_MISSING_SQL_STATEMENT = f"""
+DELETE FROM company_companieshousecompany
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM {LOADED_COMPANY_NUMBERS_TABLE_NAME} loaded
+    WHERE loaded.company_number = company_companieshousecompany.company_number
+)
+RETURNING id
+"""
+
+# content_hash is reset so that the next sync using the copy loader updates the record
 UPSERT_SQL_STATEMENT = """
 INSERT INTO company_companieshousecompany (
     company_number,
@@ -79,7 +177,8 @@ DO UPDATE SET (
     sic_code_2,
     sic_code_3,
     sic_code_4,
-    uri
+    uri,
+    content_hash
 ) = (
     %(company_category)s,
     %(company_status)s,
@@ -95,7 +194,8 @@ DO UPDATE SET (
     %(sic_code_2)s,
     %(sic_code_3)s,
     %(sic_code_4)s,
-    %(uri)s
+    %(uri)s,
+    NULL
 )
 """
 
@@ -205,24 +305,93 @@ def process_row(row):
             yield transform_ch_row(row)
 
 
+def write_ch_rows_for_copy(rows, fp):
+    """
+    Writes transformed CH rows to a file in the PostgreSQL COPY text format.
+
+    :returns: the number of rows written
+    """
+    count = 0
+    for row in rows:
+        fp.write('\t'.join(_format_copy_value(row[column]) for column in CH_COLUMNS))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def transform_ch_file(url, tmp_file_creator, output_path):
+    """
+    Downloads and transforms a CH zipped CSV, writing the rows to be loaded to output_path
+    in the PostgreSQL COPY text format.
+
+    This does not access the database, so that it can be run in a worker process.
+
+    :returns: the number of rows written
+    """
+    with open(output_path, 'w', encoding='utf-8') as output_fp:
+        return write_ch_rows_for_copy(iter_ch_csv_from_url(url, tmp_file_creator), output_fp)
+
+
+def _format_copy_value(value):
+    if value is None:
+        return '\\N'
+
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
 class CHSynchroniser:
     """
     Updates the records in our Companies House table with the latest data from Companies House.
 
     As this is a large data set (over 4 million records), this is a time-consuming job.
 
-    For speed and as this is a bulk operation, the ORM is not used and native PostgreSQL
-    INSERT ... ON CONFLICT (upsert) statements are used instead.
+    For speed and as this is a bulk operation, the ORM is not used. Two loaders are available:
 
-    This is also so the sync can be done without any downtime.
+    - upsert: rows are loaded in batches using native PostgreSQL INSERT ... ON CONFLICT
+      (upsert) statements, in a single transaction
+    - copy: the CH files are downloaded and transformed in parallel worker processes. The rows
+      of each file are then streamed into an unlogged staging table using COPY ... FROM STDIN,
+      and merged into the Companies House table using one upsert statement (and transaction)
+      per file
+
+    Both loaders allow the sync to be done without any downtime.
+
+    The copy loader stores a hash of the data of each record, and only inserts or updates
+    records whose hash has changed. The company numbers of inserted and updated records are
+    collected in changed_company_numbers, so that only those records need to be synced to
+    Elasticsearch. It can also optionally delete records for companies that were not in any of
+    the CH files (the IDs of which are collected in deleted_ids).
     """
 
-    def __init__(self, simulate=False):
-        """Initialises the operation, setting whether database operations should be skipped."""
+    def __init__(self, simulate=False, loader=UPSERT_LOADER, num_workers=1, delete_missing=False):
+        """
+        Initialises the operation, setting whether database operations should be skipped,
+        the loader to use and (for the copy loader) the number of worker processes to use and
+        whether records missing from the CH files should be deleted.
+        """
+        if loader not in LOADERS:
+            raise ValueError(f'Unknown loader {loader}')
+
+        if delete_missing and loader != COPY_LOADER:
+            raise ValueError('delete_missing is only supported by the copy loader')
+
         self.count = 0
         self.simulate = simulate
+        self.loader = loader
+        self.num_workers = num_workers
+        self.delete_missing = delete_missing
+
+        self.num_inserted = 0
+        self.num_updated = 0
+        self.changed_company_numbers = set()
+        self.deleted_ids = []
 
-    @transaction.atomic
     def run(self, tmp_file_creator, endpoint=None):
         """Runs the synchronisation operation."""
         logger.info('Starting CH load...')
@@ -230,6 +399,22 @@ class CHSynchroniser:
         ch_csv_urls = get_ch_latest_dump_file_list(endpoint)
         logger.info('Found the following Companies House CSV URLs: %s', ch_csv_urls)
 
+        if self.loader == COPY_LOADER:
+            self._run_copy(ch_csv_urls, tmp_file_creator)
+            logger.info(
+                'Companies House load complete, %s records loaded (%s inserted, %s updated, '
+                '%s deleted)',
+                self.count,
+                self.num_inserted,
+                self.num_updated,
+                len(self.deleted_ids),
+            )
+        else:
+            self._run_upsert(ch_csv_urls, tmp_file_creator)
+            logger.info('Companies House load complete, %s records loaded', self.count)
+
+    @transaction.atomic
+    def _run_upsert(self, ch_csv_urls, tmp_file_creator):
         for csv_url in ch_csv_urls:
             ch_company_rows = iter_ch_csv_from_url(csv_url, tmp_file_creator)
 
@@ -240,7 +425,107 @@ class CHSynchroniser:
                 for batch in batch_iter:
                     self._process_batch(cursor, batch)
 
-        logger.info('Companies House load complete, %s records loaded', self.count)
+    def _run_copy(self, ch_csv_urls, tmp_file_creator):
+        with tempfile.TemporaryDirectory() as output_dir:
+            transformed_files = self._iter_transformed_files(
+                ch_csv_urls,
+                tmp_file_creator,
+                output_dir,
+            )
+
+            if not self.simulate:
+                with connection.cursor() as cursor:
+                    cursor.execute(CREATE_STAGING_TABLES_SQL_STATEMENT)
+
+            try:
+                for csv_url, output_path, count in transformed_files:
+                    if not self.simulate:
+                        self._load_file_using_copy(output_path)
+
+                    os.remove(output_path)
+                    self.count += count
+                    logger.info(
+                        '%d Companies House records loaded from %s (%d in total)...',
+                        count,
+                        csv_url,
+                        self.count,
+                    )
+
+                if self.delete_missing and not self.simulate:
+                    self._delete_missing_records()
+            finally:
+                if not self.simulate:
+                    with connection.cursor() as cursor:
+                        cursor.execute(DROP_STAGING_TABLES_SQL_STATEMENT)
+
+    @transaction.atomic
+    def _load_file_using_copy(self, path):
+        with connection.cursor() as cursor, open(path, encoding='utf-8') as fp:
+            cursor.execute(f'TRUNCATE {STAGING_TABLE_NAME}')
+            cursor.copy_expert(COPY_TO_STAGING_SQL_STATEMENT, fp)
+            cursor.execute(MERGE_FROM_STAGING_SQL_STATEMENT)
+            changed_rows = cursor.fetchall()
+
+            if self.delete_missing:
+                cursor.execute(RECORD_LOADED_COMPANY_NUMBERS_SQL_STATEMENT)
+
+        for company_number, inserted in changed_rows:
+            if inserted:
+                self.num_inserted += 1
+            else:
+                self.num_updated += 1
+            self.changed_company_numbers.add(company_number)
+
+        reset_queries()
+
+    @transaction.atomic
+    def _delete_missing_records(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {LOADED_COMPANY_NUMBERS_TABLE_NAME})')
+            if not cursor.fetchone()[0]:
+                # Guard against deleting every record if the CH files were unexpectedly empty
+                logger.warning('No Companies House records loaded, skipping deletion')
+                return
+
+            cursor.execute(DELETE_MISSING_SQL_STATEMENT)
+            deleted_rows = cursor.fetchall()
+
+        self.deleted_ids.extend(row[0] for row in deleted_rows)
+
+    def _iter_transformed_files(self, ch_csv_urls, tmp_file_creator, output_dir):
+        """
+        Downloads and transforms CH files (in parallel if more than one worker is being used),
+        yielding (URL, output path, row count) tuples as each file is ready.
+        """
+        output_paths = {
+            csv_url: os.path.join(output_dir, f'{index}.tsv')
+            for index, csv_url in enumerate(ch_csv_urls)
+        }
+
+        if self.num_workers <= 1:
+            for csv_url, output_path in output_paths.items():
+                count = transform_ch_file(csv_url, tmp_file_creator, output_path)
+                yield csv_url, output_path, count
+            return
+
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            futures = {
+                executor.submit(
+                    transform_ch_file,
+                    csv_url,
+                    tmp_file_creator,
+                    output_path,
+                ): csv_url
+                for csv_url, output_path in output_paths.items()
+            }
+
+            try:
+                for future in as_completed(futures):
+                    csv_url = futures[future]
+                    yield csv_url, output_paths[csv_url], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
     def _process_batch(self, cursor, rows):
         if not self.simulate:
@@ -260,7 +545,12 @@ def _upsert_ch_records(cursor, rows):
 
 
 class Command(BaseCommand):
-    """Companies House sync command."""
+    """
+    Companies House sync command.
+
+    Only one instance of the command can run at a time (as the copy loader uses staging tables
+    with fixed names). If another instance is already running, the command aborts.
+    """
 
     def add_arguments(self, parser):
         """Define extra arguments."""
@@ -277,11 +567,84 @@ class Command(BaseCommand):
             default=False,
             help='Skips running sync_es after the Companies House load finishes.',
         )
+        parser.add_argument(
+            '--loader',
+            choices=LOADERS,
+            default=UPSERT_LOADER,
+            help=(
+                'The loader to use. upsert loads rows in batches in a single transaction. '
+                'copy loads each file into a staging table using COPY and then merges it '
+                'into the Companies House table.'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_NUM_WORKERS,
+            help='The number of worker processes used to download and transform files '
+                 '(only used by the copy loader).',
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            default=False,
+            help='Deletes records for companies not in the Companies House files (only '
+                 'supported by the copy loader).',
+        )
 
     def handle(self, *args, **options):
         """Handle."""
-        syncer = CHSynchroniser(simulate=options['simulate'])
+        if options['delete_missing'] and options['loader'] != COPY_LOADER:
+            raise CommandError('--delete-missing is only supported by the copy loader.')
+
+        with advisory_lock('leeloo-sync_ch', wait=False) as lock_held:
+            if not lock_held:
+                raise CommandError('Another sync_ch command is in progress. Aborting...')
+
+            self._sync(options)
+
+    def _sync(self, options):
+        syncer = CHSynchroniser(
+            simulate=options['simulate'],
+            loader=options['loader'],
+            num_workers=options['workers'],
+            delete_missing=options['delete_missing'],
+        )
         syncer.run(tmp_file_creator=tempfile.TemporaryFile)
 
-        if not options['skip_sync_es']:
+        if options['skip_sync_es']:
+            return
+
+        if syncer.loader == COPY_LOADER:
+            # Only changed records need to be synced
+            sync_ch_changes_to_es(syncer.changed_company_numbers, syncer.deleted_ids)
+        else:
             call_command('sync_es', model=['companieshousecompany'])
+
+
+def sync_ch_changes_to_es(changed_company_numbers, deleted_ids):
+    """Syncs changed Companies House records to Elasticsearch and deletes deleted ones."""
+    search_app = get_search_app(CompaniesHouseCompanySearchApp.name)
+
+    for company_numbers in slice_iterable_into_chunks(
+        sorted(changed_company_numbers),
+        search_app.bulk_batch_size,
+    ):
+        pks = CompaniesHouseCompany.objects.filter(
+            company_number__in=company_numbers,
+        ).values_list('pk', flat=True)
+        sync_objects_by_pk(search_app, list(pks))
+
+    if deleted_ids:
+        es_model = search_app.es_model
+        read_indices, write_index = es_model.get_read_and_write_indices()
+        es_docs = [{'_type': es_model._doc_type.name, '_id': pk} for pk in deleted_ids]
+
+        for index in {*read_indices, write_index}:
+            delete_documents(index, es_docs)
+
+    logger.info(
+        '%d changed and %d deleted Companies House records synced to Elasticsearch',
+        len(changed_company_numbers),
+        len(deleted_ids),
+    )
@@ -1,11 +1,19 @@
 from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
 
 from datahub.company.models import Company, Contact
 from datahub.core.exceptions import DataHubException
 from datahub.core.model_helpers import get_related_fields, get_self_referential_relations
+from datahub.core.reversion import add_to_revision_in_bulk
 from datahub.interaction.models import Interaction
 from datahub.investment.project.models import InvestmentProject
 from datahub.omis.order.models import Order
+from datahub.search.apps import get_search_app_by_model
+from datahub.search.sync_object import sync_objects_async
 
 
 ALLOWED_RELATIONS_FOR_MERGING = {
@@ -69,7 +77,7 @@ def is_company_a_valid_merge_source(company: Company):
     relations = get_related_fields(Company)
 
     has_related_objects = any(
-        getattr(company, relation.name).count()
+        getattr(company, relation.name).exists()
         for relation in relations
         if relation.remote_field not in ALLOWED_RELATIONS_FOR_MERGING
     )
@@ -117,6 +125,11 @@ def merge_companies(source_company: Company, target_company: Company, user):
     """
     Merges the source company into the target company.
 
+    Objects are moved using one UPDATE query per model and field. As this bypasses post_save
+    signals, the moved objects are added to the current django-reversion revision (if there
+    is one) and a single task per search app is scheduled to resync them once the
+    transaction has been committed.
+
     MergeNotAllowedError will be raised if the merge is not allowed.
     """
     if not (
@@ -125,17 +138,24 @@ def merge_companies(source_company: Company, target_company: Company, user):
     ):
         raise MergeNotAllowedError()
 
-    results = _process_all_objects(
-        _update_objects,
-        source=source_company,
-        target=target_company,
-    )
+    with transaction.atomic():
+        moved_object_pks = _process_all_objects(_get_object_pks, source=source_company)
 
-    source_company.mark_as_transferred(
-        target_company,
-        Company.TRANSFER_REASONS.duplicate,
-        user,
-    )
+        results = _process_all_objects(
+            _update_objects,
+            source=source_company,
+            target=target_company,
+        )
+
+        _add_objects_to_revision(moved_object_pks)
+
+        source_company.mark_as_transferred(
+            target_company,
+            Company.TRANSFER_REASONS.duplicate,
+            user,
+        )
+
+        transaction.on_commit(lambda: _sync_objects_to_es(moved_object_pks))
 
     return results
 
@@ -165,13 +185,40 @@ def _update_objects(configuration: MergeConfiguration, source, target):
     objects_updated = {field: 0 for field in configuration.fields}
 
     for field, filtered_objects in _get_objects_from_configuration(configuration, source):
-        for obj in filtered_objects.iterator():
-            setattr(obj, field, target)
-            obj.save(update_fields=(field,))
-            objects_updated[field] += 1
+        objects_updated[field] = filtered_objects.update(**{field: target})
     return objects_updated
 
 
+def _get_object_pks(configuration: MergeConfiguration, source):
+    """Gets the primary keys of the objects from given model that reference the source."""
+    query = reduce(or_, (Q(**{field: source}) for field in configuration.fields))
+    return list(configuration.model.objects.filter(query).values_list('pk', flat=True))
+
+
+def _add_objects_to_revision(object_pks_by_model):
+    """Adds objects to the current revision (as their post_save signals are not sent)."""
+    for model, pks in object_pks_by_model.items():
+        add_to_revision_in_bulk(model.objects.filter(pk__in=pks))
+
+
+def _sync_objects_to_es(object_pks_by_model):
+    """
+    Schedules the resync of objects (and the interactions of moved contacts and investment
+    projects, which would otherwise be resynced by their post_save signal receivers).
+    """
+    interaction_pks = set(object_pks_by_model[Interaction])
+    interaction_pks.update(
+        Interaction.objects.filter(
+            Q(contacts__pk__in=object_pks_by_model[Contact])
+            | Q(investment_project_id__in=object_pks_by_model[InvestmentProject]),
+        ).values_list('pk', flat=True),
+    )
+    object_pks_by_model = {**object_pks_by_model, Interaction: interaction_pks}
+
+    for model, pks in object_pks_by_model.items():
+        sync_objects_async(get_search_app_by_model(model), pks)
+
+
 def _count_objects(configuration: MergeConfiguration, source):
     """Count objects for each field from given model with the target value."""
     objects_updated = {field: 0 for field in configuration.fields}
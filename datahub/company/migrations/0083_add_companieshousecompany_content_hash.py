@@ -0,0 +1,18 @@
+# Generated by Django 2.2 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0082_make_registered_address_country_optional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companieshousecompany',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
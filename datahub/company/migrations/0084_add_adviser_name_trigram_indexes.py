@@ -0,0 +1,23 @@
+# Generated by Django 2.2 on 2026-10-19 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0028_add_team_name_trigram_index'),
+        ('company', '0083_add_companieshousecompany_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='advisor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['first_name'], name='company_adv_first_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='advisor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['last_name'], name='company_adv_last_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
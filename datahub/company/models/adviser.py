@@ -4,6 +4,7 @@ from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.postgres.fields import CICharField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.mail import send_mail
 from django.db import models
 from django.utils.functional import cached_property
@@ -118,5 +119,16 @@ class Advisor(AbstractBaseUser, PermissionsMixin):
     class Meta:
         indexes = [
             models.Index(fields=['first_name', 'last_name']),
+            # Used by the adviser autocomplete (see datahub.company.autocomplete)
+            GinIndex(
+                fields=['first_name'],
+                name='company_adv_first_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+            GinIndex(
+                fields=['last_name'],
+                name='company_adv_last_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
         ]
         verbose_name = 'adviser'
@@ -432,6 +432,10 @@ class CompaniesHouseCompany(models.Model):
     )
     registered_address_postcode = models.CharField(max_length=MAX_LENGTH, blank=True)
 
+    # Hash of the data last loaded from Companies House, used by sync_ch to skip unchanged
+    # records (null if not loaded using the copy loader)
+    content_hash = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
     def __str__(self):
         """Admin displayed human readable name."""
         return self.name
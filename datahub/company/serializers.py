@@ -22,6 +22,7 @@ from datahub.company.validators import (
     has_no_invalid_company_number_characters,
     has_uk_establishment_number_prefix,
 )
+from datahub.core.compiled_serializers import CompiledListSerializer
 from datahub.core.constants import Country
 from datahub.core.constants import HeadquarterType
 from datahub.core.serializers import (
@@ -436,6 +437,7 @@ class BaseCompanySerializer(PermittedFieldsModelSerializer):
 
     class Meta:
         model = Company
+        list_serializer_class = CompiledListSerializer
         fields = (
             'id',
             'reference_code',
@@ -1,5 +1,6 @@
 import io
 from datetime import datetime
+from unittest.mock import patch
 
 import factory
 import pytest
@@ -15,6 +16,7 @@ from reversion.models import Version
 from datahub.company.models import Contact, ContactPermission
 from datahub.company.test.factories import ContactFactory
 from datahub.core.test_utils import AdminTestMixin, create_test_user
+from datahub.search.contact import ContactSearchApp
 
 pytestmark = pytest.mark.django_db
 
@@ -252,3 +254,76 @@ test1@datahub\r
 
         versions = Version.objects.get_for_object(contact_already_opted_out)
         assert versions.count() == 0
+
+    def test_processes_each_email_address_once(self):
+        """
+        Test that email addresses that appear more than once in the file (ignoring case) are
+        only processed once.
+        """
+        contact = ContactFactory(email='test1@datahub', accepts_dit_email_marketing=True)
+
+        file = io.BytesIO("""email\r
+test1@datahub\r
+TEST1@datahub\r
+\r
+test2@datahub\r
+Test2@datahub\r
+""".encode())
+        file.name = 'test.csv'
+
+        url = reverse(
+            admin_urlname(Contact._meta, 'load-email-marketing-opt-outs'),
+        )
+        response = self.client.post(
+            url,
+            follow=True,
+            data={
+                'csv_file': file,
+            },
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+        contact.refresh_from_db()
+        assert not contact.accepts_dit_email_marketing
+
+        messages = list(response.context['messages'])
+        assert len(messages) == 2
+        assert messages[0].message == (
+            '1 contacts opted out of marketing emails and 0 contacts already opted out'
+        )
+        assert messages[1].message == '1 email addresses did not match a contact'
+
+    @pytest.mark.usefixtures('synchronous_on_commit')
+    @patch('datahub.company.admin.contact.sync_objects_async')
+    def test_resyncs_updated_contacts(self, sync_objects_async_mock):
+        """Test that a single search resync is scheduled for the updated contacts."""
+        contacts_to_update = ContactFactory.create_batch(
+            2,
+            email=factory.Iterator(['test1@datahub', 'test2@datahub']),
+            accepts_dit_email_marketing=True,
+        )
+        ContactFactory(email='test3@datahub', accepts_dit_email_marketing=False)
+
+        file = io.BytesIO("""email\r
+test1@datahub\r
+test2@datahub\r
+test3@datahub\r
+""".encode())
+        file.name = 'test.csv'
+
+        url = reverse(
+            admin_urlname(Contact._meta, 'load-email-marketing-opt-outs'),
+        )
+        response = self.client.post(
+            url,
+            data={
+                'csv_file': file,
+            },
+        )
+
+        assert response.status_code == status.HTTP_302_FOUND
+        sync_objects_async_mock.assert_called_once()
+        search_app, pks = sync_objects_async_mock.call_args[0]
+        assert search_app is ContactSearchApp
+        assert set(pks) == {contact.pk for contact in contacts_to_update}
@@ -0,0 +1,68 @@
+import pytest
+from django.db.models import Q
+
+from datahub.company import autocomplete
+from datahub.company.autocomplete import (
+    _apply_autocomplete_filter_to_queryset,
+    _make_field_filter_q,
+)
+from datahub.company.models import Advisor
+from datahub.company.test.factories import AdviserFactory
+from datahub.metadata.test.factories import TeamFactory
+
+pytestmark = pytest.mark.django_db
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'dit_team__name')
+
+
+class TestMakeFieldFilterQ:
+    """Tests for _make_field_filter_q()."""
+
+    def test_local_field(self):
+        """Test that fields of the model itself are matched using a regular expression."""
+        assert _make_field_filter_q(Advisor, 'first_name', 'Joh') == Q(
+            first_name__iregex=r'\mJoh',
+        )
+
+    def test_related_field(self):
+        """Test that fields of related models are matched using a list of foreign key values."""
+        team = TeamFactory(name='Johannesburg')
+        TeamFactory(name='London')
+
+        assert _make_field_filter_q(Advisor, 'dit_team__name', 'Joh') == Q(
+            dit_team__in=[team.pk],
+        )
+
+    def test_related_field_with_too_many_matches(self, monkeypatch):
+        """
+        Test that fields of related models are matched using a join if the token matches too
+        many related objects.
+        """
+        monkeypatch.setattr(autocomplete, 'MAX_RELATED_PKS_PER_TOKEN', 1)
+        TeamFactory.create_batch(2, name='Johannesburg')
+
+        assert _make_field_filter_q(Advisor, 'dit_team__name', 'Joh') == Q(
+            dit_team__name__iregex=r'\mJoh',
+        )
+
+
+@pytest.mark.parametrize('max_related_pks', (0, 1000))
+def test_results_do_not_depend_on_related_field_strategy(monkeypatch, max_related_pks):
+    """Test that matches via a join and via foreign key values give the same results."""
+    monkeypatch.setattr(autocomplete, 'MAX_RELATED_PKS_PER_TOKEN', max_related_pks)
+    johannesburg = TeamFactory(name='Johannesburg')
+    london = TeamFactory(name='London')
+    advisers = [
+        AdviserFactory(first_name='Anna', last_name='Jones', dit_team=london),
+        AdviserFactory(first_name='Elisabeth', last_name='Gravy', dit_team=johannesburg),
+        AdviserFactory(first_name='John', last_name='Gravy', dit_team=johannesburg),
+        AdviserFactory(first_name='John', last_name='Smith', dit_team=None),
+    ]
+
+    queryset = _apply_autocomplete_filter_to_queryset(
+        Advisor.objects.all(),
+        SEARCH_FIELDS,
+        'Jo',
+    )
+
+    assert list(queryset) == [advisers[2], advisers[3], advisers[0], advisers[1]]
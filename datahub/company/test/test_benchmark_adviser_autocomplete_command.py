@@ -0,0 +1,29 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from datahub.company.models import Advisor
+
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_adviser_autocomplete():
+    """Test that timings are reported for each term and that the advisers are removed."""
+    num_advisers_before = Advisor.objects.count()
+    stdout = StringIO()
+
+    call_command(
+        'benchmark_adviser_autocomplete',
+        'john',
+        'zzzz',
+        num_advisers=50,
+        repeats=2,
+        stdout=stdout,
+    )
+
+    output_lines = stdout.getvalue().splitlines()
+    assert output_lines[0] == 'Created 50 advisers'
+    assert output_lines[1].startswith("'john': ")
+    assert output_lines[2].startswith("'zzzz': 0 results, median ")
+    assert Advisor.objects.count() == num_advisers_before
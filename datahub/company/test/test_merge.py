@@ -3,8 +3,10 @@ from itertools import chain
 from unittest.mock import patch
 
 import pytest
+import reversion
 from django.utils.timezone import utc
 from freezegun import freeze_time
+from reversion.models import Version
 
 from datahub.company.merge import (
     get_planned_changes,
@@ -20,11 +22,15 @@ from datahub.company.test.factories import (
     ContactFactory,
 )
 from datahub.interaction.models import Interaction
-from datahub.interaction.test.factories import CompanyInteractionFactory
+from datahub.interaction.test.factories import (
+    CompanyInteractionFactory,
+    InvestmentProjectInteractionFactory,
+)
 from datahub.investment.project.models import InvestmentProject
 from datahub.investment.project.test.factories import InvestmentProjectFactory
 from datahub.omis.order.models import Order
 from datahub.omis.order.test.factories import OrderFactory
+from datahub.search.apps import get_search_app_by_model
 
 
 def company_with_interactions_and_contacts_factory():
@@ -304,6 +310,75 @@ class TestDuplicateCompanyMerger:
         assert source_company.transferred_on == merge_time
         assert source_company.transferred_to == target_company
 
+    @pytest.mark.usefixtures('synchronous_on_commit')
+    @patch('datahub.company.merge.sync_objects_async')
+    def test_merge_resyncs_moved_objects(self, sync_objects_async_mock):
+        """
+        Test that merge_companies() schedules one resync per search app for the moved objects
+        (including interactions of moved contacts and investment projects).
+        """
+        source_company = _company_factory(
+            num_interactions=2,
+            num_contacts=1,
+            num_orders=1,
+        )
+        investment_project = InvestmentProjectFactory(investor_company=source_company)
+        project_interaction = InvestmentProjectInteractionFactory(
+            investment_project=investment_project,
+        )
+        contact_interaction = CompanyInteractionFactory(
+            contacts=[source_company.contacts.first()],
+        )
+        target_company = CompanyFactory()
+        user = AdviserFactory()
+
+        expected_pks = {
+            Contact: set(source_company.contacts.values_list('pk', flat=True)),
+            Interaction: {
+                *source_company.interactions.values_list('pk', flat=True),
+                project_interaction.pk,
+                contact_interaction.pk,
+            },
+            InvestmentProject: {investment_project.pk},
+            Order: set(source_company.orders.values_list('pk', flat=True)),
+        }
+
+        merge_companies(source_company, target_company, user)
+
+        assert sync_objects_async_mock.call_count == len(expected_pks)
+        assert {
+            call_args[0][0]: set(call_args[0][1])
+            for call_args in sync_objects_async_mock.call_args_list
+        } == {
+            get_search_app_by_model(model): pks
+            for model, pks in expected_pks.items()
+        }
+
+    def test_merge_adds_moved_objects_to_revision(self):
+        """
+        Test that merge_companies() creates versions for moved objects (of models registered
+        with django-reversion).
+        """
+        source_company = _company_factory(
+            num_interactions=1,
+            num_contacts=1,
+            num_orders=0,
+        )
+        moved_objects = [
+            *source_company.interactions.all(),
+            *source_company.contacts.all(),
+        ]
+        target_company = CompanyFactory()
+        user = AdviserFactory()
+
+        with reversion.create_revision():
+            merge_companies(source_company, target_company, user)
+
+        for obj in moved_objects:
+            versions = Version.objects.get_for_object(obj)
+            assert versions.count() == 1
+            assert str(versions[0].field_dict['company_id']) == str(target_company.pk)
+
     @pytest.mark.parametrize(
         'valid_source,valid_target',
         (
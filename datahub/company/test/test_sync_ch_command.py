@@ -1,9 +1,13 @@
+import io
 from datetime import date
+from functools import partial
 from os import path
 from unittest import mock
 from uuid import UUID
 
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db import connection
 
 from datahub.company.ch_constants import CSV_RELEVANT_FIELDS
@@ -183,33 +187,253 @@ def test_process_rows_record():
     assert actual_new_data == new_record_data
 
 
+def test_write_ch_rows_for_copy():
+    """Test that rows are written in the PostgreSQL COPY text format."""
+    row = {
+        **dict.fromkeys(sync_ch.CH_COLUMNS, ''),
+        'company_number': '00000001',
+        'incorporation_date': None,
+        'name': 'name\twith\nspecial\\characters',
+        'registered_address_country_id': UUID(Country.united_kingdom.value.id),
+    }
+    fp = io.StringIO()
+
+    assert sync_ch.write_ch_rows_for_copy([row, row], fp) == 2
+
+    lines = fp.getvalue().split('\n')
+    assert len(lines) == 3
+    assert lines[2] == ''
+
+    values = dict(zip(sync_ch.CH_COLUMNS, lines[0].split('\t')))
+    assert values['company_number'] == '00000001'
+    assert values['incorporation_date'] == '\\N'
+    assert values['name'] == 'name\\twith\\nspecial\\\\characters'
+    assert values['registered_address_country_id'] == Country.united_kingdom.value.id
+    assert values['uri'] == ''
+
+
+def _make_ch_record_data(company_number, **kwargs):
+    return {
+        **dict.fromkeys(sync_ch.CH_COLUMNS, ''),
+        'company_number': company_number,
+        'incorporation_date': date(2017, 1, 1),
+        'name': f'name {company_number}',
+        'registered_address_1': 'add 1-1',
+        'registered_address_country_id': UUID(Country.united_kingdom.value.id),
+        'registered_address_town': 'town 1',
+        **kwargs,
+    }
+
+
+def _load_using_copy(tmp_path, rows, delete_missing=False):
+    output_path = tmp_path / 'ch.tsv'
+    with open(output_path, 'w') as fp:
+        sync_ch.write_ch_rows_for_copy(rows, fp)
+
+    syncer = sync_ch.CHSynchroniser(
+        loader=sync_ch.COPY_LOADER,
+        delete_missing=delete_missing,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sync_ch.CREATE_STAGING_TABLES_SQL_STATEMENT)
+
+    syncer._load_file_using_copy(output_path)
+    if delete_missing:
+        syncer._delete_missing_records()
+
+    return syncer
+
+
+class TestCopyLoader:
+    """Tests for loading Companies House records using the copy loader."""
+
+    def test_merges_records(self, tmp_path):
+        """Test that records are updated or inserted as needed."""
+        existing_ch_company = CompaniesHouseCompanyFactory(
+            company_number='00000001',
+            name='old name',
+        )
+        rows = [
+            _make_ch_record_data('00000001', name='new name'),
+            _make_ch_record_data('00000002', incorporation_date=None),
+        ]
+
+        syncer = _load_using_copy(tmp_path, rows)
+
+        existing_ch_company.refresh_from_db()
+        new_ch_company = CompaniesHouseCompany.objects.get(company_number='00000002')
+
+        assert CompaniesHouseCompany.objects.count() == 2
+        assert existing_ch_company.name == 'new name'
+        assert existing_ch_company.incorporation_date == date(2017, 1, 1)
+        assert existing_ch_company.content_hash
+        assert new_ch_company.name == 'name 00000002'
+        assert new_ch_company.incorporation_date is None
+
+        assert syncer.num_inserted == 1
+        assert syncer.num_updated == 1
+        assert syncer.changed_company_numbers == {'00000001', '00000002'}
+
+    def test_skips_unchanged_records(self, tmp_path):
+        """Test that only records whose data has changed are updated."""
+        rows = [
+            _make_ch_record_data('00000001'),
+            _make_ch_record_data('00000002'),
+        ]
+        _load_using_copy(tmp_path, rows)
+        unchanged_ch_company = CompaniesHouseCompany.objects.get(company_number='00000001')
+
+        rows[1]['name'] = 'new name'
+        syncer = _load_using_copy(tmp_path, rows)
+
+        assert syncer.num_inserted == 0
+        assert syncer.num_updated == 1
+        assert syncer.changed_company_numbers == {'00000002'}
+
+        changed_ch_company = CompaniesHouseCompany.objects.get(company_number='00000002')
+        assert changed_ch_company.name == 'new name'
+        assert CompaniesHouseCompany.objects.get(
+            company_number='00000001',
+        ).content_hash == unchanged_ch_company.content_hash
+
+    def test_updates_records_last_loaded_using_upsert_loader(self, tmp_path):
+        """
+        Test that records last loaded using the upsert loader are updated (as their content
+        hash is reset).
+        """
+        rows = [_make_ch_record_data('00000001')]
+        _load_using_copy(tmp_path, rows)
+
+        with connection.cursor() as cursor:
+            sync_ch.CHSynchroniser()._process_batch(cursor, rows)
+
+        assert CompaniesHouseCompany.objects.get(company_number='00000001').content_hash is None
+
+        syncer = _load_using_copy(tmp_path, rows)
+        assert syncer.changed_company_numbers == {'00000001'}
+
+    def test_deletes_missing_records(self, tmp_path):
+        """Test that records not in the CH files are deleted if delete_missing is True."""
+        missing_ch_company = CompaniesHouseCompanyFactory(company_number='00000003')
+
+        syncer = _load_using_copy(
+            tmp_path,
+            [_make_ch_record_data('00000001')],
+            delete_missing=True,
+        )
+
+        assert syncer.deleted_ids == [missing_ch_company.pk]
+        assert list(
+            CompaniesHouseCompany.objects.values_list('company_number', flat=True),
+        ) == ['00000001']
+
+    def test_does_not_delete_records_if_no_records_loaded(self, tmp_path):
+        """Test that no records are deleted if the CH files contained no relevant records."""
+        CompaniesHouseCompanyFactory()
+
+        syncer = _load_using_copy(tmp_path, [], delete_missing=True)
+
+        assert syncer.deleted_ids == []
+        assert CompaniesHouseCompany.objects.count() == 1
+
+
+@mock.patch('datahub.company.management.commands.sync_ch.delete_documents')
+@mock.patch('datahub.company.management.commands.sync_ch.sync_objects_by_pk')
+def test_sync_ch_changes_to_es(mock_sync_objects_by_pk, mock_delete_documents, monkeypatch):
+    """Test that only changed records are synced to Elasticsearch."""
+    monkeypatch.setattr(
+        'datahub.search.companieshousecompany.models.CompaniesHouseCompany'
+        '.get_read_and_write_indices',
+        mock.Mock(return_value=({'index1', 'index2'}, 'index2')),
+    )
+    changed_ch_companies = CompaniesHouseCompanyFactory.create_batch(2)
+    CompaniesHouseCompanyFactory()
+
+    sync_ch.sync_ch_changes_to_es(
+        {ch_company.company_number for ch_company in changed_ch_companies},
+        [123],
+    )
+
+    assert mock_sync_objects_by_pk.call_count == 1
+    assert set(mock_sync_objects_by_pk.call_args[0][1]) == {
+        ch_company.pk for ch_company in changed_ch_companies
+    }
+
+    expected_es_docs = [{'_type': 'companieshousecompany', '_id': 123}]
+    assert mock_delete_documents.call_count == 2
+    mock_delete_documents.assert_has_calls(
+        [
+            mock.call('index1', expected_es_docs),
+            mock.call('index2', expected_es_docs),
+        ],
+        any_order=True,
+    )
+
+
 @pytest.mark.django_db
+@pytest.mark.parametrize(
+    'loader,num_workers',
+    (
+        (sync_ch.UPSERT_LOADER, 1),
+        (sync_ch.COPY_LOADER, 1),
+        (sync_ch.COPY_LOADER, 2),
+    ),
+)
 @mock.patch('datahub.company.management.commands.sync_ch.stream_to_file_pointer', mock.MagicMock())
 @mock.patch('datahub.company.management.commands.sync_ch.get_ch_latest_dump_file_list')
-def test_full_ch_sync(file_list_mock, settings):
+def test_full_ch_sync(file_list_mock, settings, loader, num_workers):
     """Test the whole process."""
     settings.BULK_INSERT_BATCH_SIZE = 2
-    file_list_mock.return_value = ['irrelevant']
+    file_list_mock.return_value = ['irrelevant1', 'irrelevant2']
     fixture_loc = path.join(path.dirname(__file__), 'fixtures', 'CH_data_test.zip')
 
-    syncer = sync_ch.CHSynchroniser()
-    syncer.run(tmp_file_creator=lambda: open(fixture_loc, 'rb'))
+    syncer = sync_ch.CHSynchroniser(loader=loader, num_workers=num_workers)
+    # partial() is used as the file creator must be picklable when using worker processes
+    syncer.run(tmp_file_creator=partial(open, fixture_loc, 'rb'))
 
-    # Two companies with irrelevant types excluded
+    # Two companies with irrelevant types excluded (the same file is loaded twice)
     assert CompaniesHouseCompany.objects.count() == 198
+    assert syncer.count == 396
 
 
 @pytest.mark.django_db
+@pytest.mark.parametrize('loader', sync_ch.LOADERS)
 @mock.patch('datahub.company.management.commands.sync_ch.stream_to_file_pointer', mock.MagicMock())
 @mock.patch('datahub.company.management.commands.sync_ch.get_ch_latest_dump_file_list')
-def test_simulated_ch_sync(file_list_mock, settings):
+def test_simulated_ch_sync(file_list_mock, settings, loader):
     """Test the whole process."""
     settings.BULK_INSERT_BATCH_SIZE = 2
     file_list_mock.return_value = ['irrelevant']
     fixture_loc = path.join(path.dirname(__file__), 'fixtures', 'CH_data_test.zip')
 
-    syncer = sync_ch.CHSynchroniser(simulate=True)
+    syncer = sync_ch.CHSynchroniser(simulate=True, loader=loader)
     syncer.run(tmp_file_creator=lambda: open(fixture_loc, 'rb'))
 
     # No companies house companies should have been synced
     assert CompaniesHouseCompany.objects.count() == 0
+
+
+@mock.patch('datahub.company.management.commands.sync_ch.CHSynchroniser')
+def test_command_aborts_if_another_sync_is_in_progress(mock_synchroniser, monkeypatch):
+    """Test that the command aborts if another instance of it is running."""
+    advisory_lock_mock = mock.MagicMock()
+    advisory_lock_mock.return_value.__enter__.return_value = False
+    monkeypatch.setattr(
+        'datahub.company.management.commands.sync_ch.advisory_lock',
+        advisory_lock_mock,
+    )
+
+    with pytest.raises(CommandError) as excinfo:
+        call_command('sync_ch', skip_sync_es=True)
+
+    assert str(excinfo.value) == 'Another sync_ch command is in progress. Aborting...'
+    advisory_lock_mock.assert_called_once_with('leeloo-sync_ch', wait=False)
+    mock_synchroniser.assert_not_called()
+
+
+@mock.patch('datahub.company.management.commands.sync_ch.CHSynchroniser')
+def test_command_runs_when_not_in_progress(mock_synchroniser):
+    """Test that the command runs the sync if no other instance of it is running."""
+    call_command('sync_ch', skip_sync_es=True)
+
+    mock_synchroniser.return_value.run.assert_called_once()
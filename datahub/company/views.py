@@ -33,6 +33,7 @@ from datahub.core.hawk_receiver import (
     HawkScopePermission,
 )
 from datahub.core.mixins import ArchivableViewSetMixin
+from datahub.core.pagination import EstimatedCountPagination
 from datahub.core.viewsets import CoreViewSet
 from datahub.investment.project.queryset import get_slim_investment_project_queryset
 from datahub.oauth.scopes import Scope
@@ -46,6 +47,12 @@ class BaseCompanyViewSet(ArchivableViewSetMixin, CoreViewSet):
     filter_backends = (DjangoFilterBackend, OrderingFilter)
     filterset_fields = ('global_headquarters_id',)
     ordering_fields = ('name', 'created_on')
+    pagination_class = EstimatedCountPagination
+    # See datahub.core.instrumentation
+    query_budget = {
+        'list': 40,
+        'retrieve': 40,
+    }
     queryset = Company.objects.select_related(
         'address_country',
         'archived_by',
@@ -74,8 +81,6 @@ class BaseCompanyViewSet(ArchivableViewSetMixin, CoreViewSet):
         Prefetch('investor_investment_projects', queryset=get_slim_investment_project_queryset()),
         'export_to_countries',
         'future_interest_countries',
-        'sector__parent__parent',
-        'sector__parent',
         'sector',
     )
 
@@ -123,8 +128,6 @@ class PublicCompanyViewSet(HawkResponseSigningMixin, mixins.RetrieveModelMixin,
         'export_to_countries',
         'future_interest_countries',
         'sector',
-        'sector__parent',
-        'sector__parent__parent',
     )
 
 
@@ -201,6 +204,7 @@ class ContactViewSet(ArchivableViewSetMixin, CoreViewSet):
     )
     filterset_fields = ['company_id']
     ordering = ('-created_on',)
+    pagination_class = EstimatedCountPagination
 
     def get_additional_data(self, create):
         """Set adviser to the user on model instance creation."""
@@ -1,8 +1,9 @@
 import atexit
 
 from django.apps import AppConfig
+from django.conf import settings
 
-from datahub.core.thread_pool import shut_down_thread_pool
+from datahub.core.thread_pool import shut_down_thread_pools
 
 
 class CoreConfig(AppConfig):
@@ -11,9 +12,12 @@ class CoreConfig(AppConfig):
     name = 'datahub.core'
 
     def ready(self):
-        """Registers an atexit handler to (cleanly) shut down the thread pool.
+        """Registers an atexit handler to (cleanly) drain and shut down the thread pools,
+        and registers the signals for this app.
 
         I haven't found a better way to do this; this won't get called when using runserver_plus,
         but will be when using gunicorn.
         """
-        atexit.register(shut_down_thread_pool)
+        atexit.register(shut_down_thread_pools, timeout=settings.THREAD_POOL_SHUTDOWN_TIMEOUT)
+
+        import datahub.core.signals  # noqa: F401
@@ -1,6 +1,8 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import Permission
 
+from datahub.core.permission_cache import get_cached_permissions
+
 
 class TeamModelPermissionsBackend(ModelBackend):
     """Extension of CDMSUserBackend to include a team based permissions for user"""
@@ -28,11 +30,20 @@ class TeamModelPermissionsBackend(ModelBackend):
         """
         Because of using cache in the parent class, its hard to extend using super()
         so the code is slightly duplicated
+
+        Permissions are also cached across requests (see datahub.core.permission_cache).
         """
         if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
             return set()
         if not hasattr(user_obj, '_perm_cache'):
-            user_obj._perm_cache = self.get_user_permissions(user_obj).copy()
-            user_obj._perm_cache.update(self.get_group_permissions(user_obj))
-            user_obj._perm_cache.update(self.get_team_permissions(user_obj))
+            user_obj._perm_cache = get_cached_permissions(
+                user_obj.pk,
+                lambda: self._load_all_permissions(user_obj),
+            )
         return user_obj._perm_cache
+
+    def _load_all_permissions(self, user_obj):
+        permissions = self.get_user_permissions(user_obj).copy()
+        permissions.update(self.get_group_permissions(user_obj))
+        permissions.update(self.get_team_permissions(user_obj))
+        return permissions
@@ -0,0 +1,471 @@
+"""
+Compiled read-only representations for list endpoints.
+
+DRF works out how to represent an object field by field, for every object:
+Serializer.to_representation() iterates over the readable fields and dispatches to each field's
+get_attribute() and to_representation() methods (handling SkipField and PKOnlyObject as it goes).
+For list endpoints using serialisers with many nested fields (NestedRelatedField in
+particular), this dominates the CPU time of the request.
+
+Instead, a representation plan is built once per serialiser class (and set of readable
+fields, as these can depend on the user's permissions). This records how each field is
+represented (e.g. as a plain value, a string, a nested related object or a nested
+serialiser). Each time a list of objects is serialised, the plan is bound to the serialiser
+instances in use, producing a flat list of accessor functions that are then applied to each
+object. (Binding to the serialiser instance in use means that field sources, defaults and
+serialiser methods behave as they do normally.)
+
+The output is the same as that of the serialiser's to_representation() method. Serialisers
+that override to_representation() (apart from AddressSerializer, which has explicit support)
+fall back to that method.
+
+To use, set list_serializer_class = CompiledListSerializer in the Meta class of a serialiser.
+
+values() rows can also be serialised as long as they include all the (related) fields that are
+needed (e.g. uk_company__name for uk_company.name). To-many relations are not supported for rows.
+"""
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache, partial
+from types import FunctionType, MethodType
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.utils.functional import cached_property
+from rest_framework.fields import (
+    CharField,
+    EmailField,
+    Field,
+    ReadOnlyField,
+    SerializerMethodField,
+    SkipField,
+    URLField,
+    UUIDField,
+)
+from rest_framework.relations import ManyRelatedField, PKOnlyObject, RelatedField
+from rest_framework.serializers import ListSerializer, Serializer
+
+from datahub.core.instrumentation import time_serializer
+from datahub.core.serializers import AddressSerializer, NestedRelatedField
+
+_SKIP = object()
+
+# The types of attribute values that rest_framework.fields.get_attribute() may call
+_CALLABLE_ATTRIBUTE_TYPES = (FunctionType, MethodType, partial)
+
+# Field classes whose to_representation() method is equivalent to str() for non-None values
+_STR_FIELD_CLASSES = {CharField, EmailField, URLField}
+
+# The serialiser to_representation() methods that plans can replicate, mapped to the name of
+# the serialiser method (if any) that post-processes the representation
+_COMPILABLE_TO_REPRESENTATION_OWNERS = {
+    Serializer: None,
+    AddressSerializer: 'finalise_representation',
+}
+
+
+class CompiledListSerializer(ListSerializer):
+    """
+    List serialiser that uses a compiled representation plan for the child serialiser.
+
+    Lists of model instances (ideally with related objects fetched using select_related()
+    and prefetch_related()) and lists of values() rows are supported.
+    """
+
+    def to_representation(self, data):
+        """Converts a list of objects to a list of dicts."""
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        represent = bind_representation(self.child)
+        model = getattr(getattr(self.child, 'Meta', None), 'model', None)
+
+        with time_serializer():
+            if model is None:
+                return [represent(item) for item in iterable]
+
+            return [
+                represent(ValuesRow(item, model) if isinstance(item, Mapping) else item)
+                for item in iterable
+            ]
+
+
+class ValuesRow:
+    """
+    Wraps a values() row so that it can be serialised like a model instance.
+
+    Related object fields are looked up using prefixed keys (e.g. uk_company__name for
+    uk_company.name). Model properties (including cached properties) are evaluated against the
+    row.
+    """
+
+    __slots__ = ('_row', '_model', '_prefix', '_pk')
+
+    def __init__(self, row, model, prefix='', pk=_SKIP):
+        """Initialises the row."""
+        self._row = row
+        self._model = model
+        self._prefix = prefix
+        self._pk = pk
+
+    def __getattr__(self, name):
+        """Gets the value of a field (or related object or property) from the row."""
+        meta = self._model._meta
+        if name in ('pk', meta.pk.name):
+            return self._get_pk()
+
+        field = _get_model_field(self._model, name)
+        if field and field.is_relation:
+            return self._get_related_object(field)
+
+        key = f'{self._prefix}{name}'
+        if key in self._row:
+            return self._row[key]
+
+        model_attr = getattr(self._model, name, None)
+        if isinstance(model_attr, property):
+            return model_attr.fget(self)
+
+        if isinstance(model_attr, cached_property):
+            return model_attr.func(self)
+
+        raise AttributeError(f'{key} is not in the row')
+
+    def _get_pk(self):
+        if self._pk is not _SKIP:
+            return self._pk
+
+        for name in (self._model._meta.pk.name, 'pk'):
+            key = f'{self._prefix}{name}'
+            if key in self._row:
+                return self._row[key]
+
+        raise AttributeError(f'{self._prefix}pk is not in the row')
+
+    def _get_related_object(self, field):
+        if not (field.many_to_one or field.one_to_one) or not field.concrete:
+            raise TypeError(f'{field.name} is a to-many relation, which is not supported for rows')
+
+        key = f'{self._prefix}{field.name}'
+        related_meta = field.related_model._meta
+        pk_keys = (key, f'{key}__{related_meta.pk.name}', f'{key}__pk')
+        pk_key = next((pk_key for pk_key in pk_keys if pk_key in self._row), None)
+
+        if pk_key is None:
+            raise AttributeError(f'{key} is not in the row')
+
+        pk = self._row[pk_key]
+        if pk is None:
+            return None
+
+        return ValuesRow(self._row, field.related_model, prefix=f'{key}__', pk=pk)
+
+
+def bind_representation(serializer):
+    """
+    Gets a function that represents an object in the same way as serializer.to_representation().
+
+    The compiled representation plan is used if the serialiser supports it.
+    """
+    plan = get_representation_plan(serializer)
+    if plan is None:
+        return serializer.to_representation
+
+    fields = serializer.fields
+    bound_fields = tuple(
+        (field_name, bind_field(fields[field_name]))
+        for field_name, bind_field in plan.field_binders
+    )
+    finalise_method_name = plan.finalise_method_name
+    finalise = getattr(serializer, finalise_method_name) if finalise_method_name else None
+
+    def represent(instance):
+        data = OrderedDict()
+        for field_name, represent_field in bound_fields:
+            value = represent_field(instance)
+            if value is not _SKIP:
+                data[field_name] = value
+
+        return finalise(data) if finalise else data
+
+    return represent
+
+
+class RepresentationPlan:
+    """How to represent each readable field of a serialiser."""
+
+    def __init__(self, field_binders, finalise_method_name=None):
+        """
+        Initialises the plan.
+
+        :param field_binders: sequence of (field name, function) tuples, where the function
+            takes a bound field and returns a function that represents that field for an object
+        :param finalise_method_name: name of a serialiser method to call with the
+            representation of each object, if any
+        """
+        self.field_binders = field_binders
+        self.finalise_method_name = finalise_method_name
+
+
+def get_representation_plan(serializer):
+    """
+    Gets the representation plan for a serialiser instance.
+
+    :returns: RepresentationPlan, or None if the serialiser does not support compiled
+        representations
+    """
+    readable_fields = tuple(
+        (field_name, type(field))
+        for field_name, field in serializer.fields.items()
+        if not field.write_only
+    )
+    return _get_representation_plan(type(serializer), readable_fields)
+
+
+@lru_cache(maxsize=None)
+def _get_representation_plan(serializer_class, readable_fields):
+    owner = _get_to_representation_owner(serializer_class)
+    if owner not in _COMPILABLE_TO_REPRESENTATION_OWNERS:
+        return None
+
+    field_binders = tuple(
+        (field_name, _get_field_binder(field_class))
+        for field_name, field_class in readable_fields
+    )
+    return RepresentationPlan(field_binders, _COMPILABLE_TO_REPRESENTATION_OWNERS[owner])
+
+
+def _get_to_representation_owner(serializer_class):
+    """
+    Gets the class that defines the to_representation() method of a serialiser class.
+
+    Classes that only time calls to to_representation() (see datahub.core.instrumentation) are
+    skipped.
+    """
+    for klass in serializer_class.__mro__:
+        if 'to_representation' in vars(klass) and not vars(klass).get('only_times_representation'):
+            return klass
+
+    return None
+
+
+def _get_field_binder(field_class):
+    if field_class is SerializerMethodField:
+        return _bind_method_field
+    if field_class is ReadOnlyField:
+        return _make_attribute_getter
+    if field_class in _STR_FIELD_CLASSES:
+        return _bind_str_field
+    if _is_compilable_related_field_class(field_class):
+        return _bind_related_field
+    if field_class is ManyRelatedField:
+        return _bind_many_related_field
+    if issubclass(field_class, ListSerializer):
+        return _bind_list_serializer
+    if issubclass(field_class, Serializer):
+        return _bind_serializer
+    return _bind_field
+
+
+def _is_compilable_related_field_class(field_class):
+    return (
+        issubclass(field_class, NestedRelatedField)
+        and field_class.to_representation is NestedRelatedField.to_representation
+    )
+
+
+def _make_attribute_getter(field):
+    """Returns a function that gets the attribute for a field (or _SKIP) from an object."""
+    def get_attribute(instance):
+        try:
+            return field.get_attribute(instance)
+        except SkipField:
+            return _SKIP
+
+    if not _has_standard_get_attribute(field):
+        return get_attribute
+
+    source_attrs = field.source_attrs
+    is_many_related_field = isinstance(field, ManyRelatedField)
+
+    def get_attribute_quickly(instance):
+        if is_many_related_field and getattr(instance, 'pk', _SKIP) is None:
+            return get_attribute(instance)
+
+        value = _get_plain_attribute(instance, source_attrs)
+        if value is _SKIP:
+            # Let the field deal with callables, missing attributes and defaults
+            return get_attribute(instance)
+
+        if is_many_related_field and hasattr(value, 'all'):
+            return value.all()
+
+        return value
+
+    return get_attribute_quickly
+
+
+def _has_standard_get_attribute(field):
+    """
+    Whether the get_attribute() method of a field is equivalent to calling
+    rest_framework.fields.get_attribute() with the field's source attributes.
+
+    (ManyRelatedField.get_attribute() also calls all() on the value, which
+    _make_attribute_getter() replicates.)
+    """
+    if not field.source_attrs:
+        return False
+
+    get_attribute = type(field).get_attribute
+    if get_attribute is RelatedField.get_attribute:
+        return not field.use_pk_only_optimization()
+
+    return get_attribute in (Field.get_attribute, ManyRelatedField.get_attribute)
+
+
+def _get_plain_attribute(instance, attrs):
+    """
+    Follows attrs from a model instance (or other object that isn't a mapping) in the same way as
+    rest_framework.fields.get_attribute(), but without the overhead of its checks for
+    callables and mappings.
+
+    Returns _SKIP if the value can't be got this way (e.g. a callable or mapping is
+    encountered, or an attribute is missing).
+    """
+    for attr in attrs:
+        if instance is None:
+            # get_attribute() raises AttributeError for attributes of None
+            return _SKIP
+
+        if not isinstance(instance, models.Model) and isinstance(instance, Mapping):
+            return _SKIP
+
+        try:
+            instance = getattr(instance, attr)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            return _SKIP
+
+        if isinstance(instance, _CALLABLE_ATTRIBUTE_TYPES):
+            return _SKIP
+
+    return instance
+
+
+def _bind_field(field):
+    """Binds any field, replicating Serializer.to_representation()."""
+    get_attribute = _make_attribute_getter(field)
+
+    def represent(instance):
+        attribute = get_attribute(instance)
+        if attribute is _SKIP:
+            return _SKIP
+
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        if check_for_none is None:
+            return None
+
+        return field.to_representation(attribute)
+
+    return represent
+
+
+def _bind_method_field(field):
+    # SerializerMethodField has a source of '*', so the method is called with the object
+    return getattr(field.parent, field.method_name)
+
+
+def _bind_str_field(field):
+    return _make_converting_field(field, str)
+
+
+def _bind_related_field(field):
+    return _make_converting_field(field, _get_related_converter(field))
+
+
+def _bind_many_related_field(field):
+    child_relation = field.child_relation
+    if not _is_compilable_related_field_class(type(child_relation)):
+        return _bind_field(field)
+
+    convert_item = _get_related_converter(child_relation)
+    return _make_converting_field(field, lambda value: [convert_item(item) for item in value])
+
+
+def _bind_list_serializer(field):
+    if _get_to_representation_owner(type(field)) not in (ListSerializer, CompiledListSerializer):
+        return _bind_field(field)
+
+    represent_child = bind_representation(field.child)
+
+    def convert(value):
+        iterable = value.all() if isinstance(value, models.Manager) else value
+        return [represent_child(item) for item in iterable]
+
+    return _make_converting_field(field, convert)
+
+
+def _bind_serializer(field):
+    return _make_converting_field(field, bind_representation(field))
+
+
+def _make_converting_field(field, convert):
+    """
+    Returns a function that gets the attribute for a field from an object and converts it
+    using convert (unless the field is skipped or the attribute is None).
+    """
+    get_attribute = _make_attribute_getter(field)
+
+    def represent(instance):
+        value = get_attribute(instance)
+        if value is None or value is _SKIP:
+            return value
+
+        return convert(value)
+
+    return represent
+
+
+def _get_related_converter(field):
+    """Gets a function that replicates NestedRelatedField.to_representation()."""
+    extra_converters = tuple(
+        (field_name, _get_value_converter(extra_field))
+        for field_name, extra_field in field._fields
+    )
+    convert_pk = _get_value_converter(field.pk_field)
+
+    def convert(value):
+        if not value:
+            return value
+
+        data = {
+            field_name: convert_extra(getattr(value, field_name))
+            for field_name, convert_extra in extra_converters
+        }
+        data['id'] = convert_pk(value.pk)
+        return data
+
+    return convert
+
+
+def _get_value_converter(field):
+    """Gets a function equivalent to field.to_representation() (including for None)."""
+    field_class = type(field)
+
+    if field_class is ReadOnlyField:
+        return _identity
+    if field_class is UUIDField and field.uuid_format == 'hex_verbose':
+        return str
+    if _is_compilable_related_field_class(field_class):
+        return _get_related_converter(field)
+    return field.to_representation
+
+
+def _get_model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _identity(value):
+    return value
@@ -0,0 +1,276 @@
+"""
+Per-request performance instrumentation.
+
+RequestInstrumentationMiddleware records the following for each request:
+
+- the number of database queries and the time spent running them
+- the number of Elasticsearch requests, the time spent making them and the total time
+  reported by Elasticsearch (took)
+- the time spent in serializers (for views using SerializerTimingMixin)
+- the size of the response body
+
+These are added to the response as a Server-Timing header, and (if settings.LOG_REQUEST_METRICS
+is True) logged with the metrics as extra (structured) log record fields.
+
+Views can also specify the maximum number of database queries they're expected to make using
+a query_budget class attribute. This can be an int, or a dict of action (for view sets) or
+lower-case HTTP method (for other views) to int. When the budget is exceeded, a warning is
+logged, or if settings.QUERY_BUDGET_RAISE_ON_EXCEEDED is True (as it is in tests),
+QueryBudgetExceededError is raised.
+
+Metrics are stored in a thread-local variable, so work done in other threads (e.g. in thread
+pools) is not included.
+"""
+from collections.abc import Mapping
+from contextlib import contextmanager, ExitStack
+from functools import lru_cache
+from logging import getLogger
+from threading import local
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from datahub.core.exceptions import DataHubException
+
+logger = getLogger(__name__)
+
+_local = local()
+
+
+class QueryBudgetExceededError(DataHubException):
+    """Raised when a view makes more database queries than its query budget allows."""
+
+
+class RequestMetrics:
+    """Performance metrics for a single request."""
+
+    def __init__(self):
+        """Initialises the metrics."""
+        self.db_query_count = 0
+        self.db_time = 0.0
+        self.es_request_count = 0
+        self.es_time = 0.0
+        self.es_took = 0
+        self.serializer_time = 0.0
+        self.response_size = None
+        self.query_budget = None
+        self._serializer_depth = 0
+        self._start_time = perf_counter()
+
+    @property
+    def total_time(self):
+        """The time since the metrics were created (in seconds)."""
+        return perf_counter() - self._start_time
+
+    def get_server_timing(self):
+        """Returns the metrics as a Server-Timing header value."""
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_query_count} queries"',
+            f'es;dur={self.es_time * 1000:.1f};desc="{self.es_request_count} requests"',
+            f'es-took;dur={self.es_took}',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ))
+
+    def get_log_fields(self):
+        """Returns the metrics as a dict (for use as structured log record fields)."""
+        return {
+            'db_query_count': self.db_query_count,
+            'db_time_ms': round(self.db_time * 1000, 1),
+            'es_request_count': self.es_request_count,
+            'es_time_ms': round(self.es_time * 1000, 1),
+            'es_took_ms': self.es_took,
+            'serializer_time_ms': round(self.serializer_time * 1000, 1),
+            'response_size': self.response_size,
+            'total_time_ms': round(self.total_time * 1000, 1),
+        }
+
+
+def get_current_metrics():
+    """Returns the metrics of the request being processed in this thread (or None)."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def collect_request_metrics():
+    """
+    Context manager that records metrics for the work done in a block in this thread.
+
+    :returns: RequestMetrics instance
+    """
+    metrics = RequestMetrics()
+    _local.metrics = metrics
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_record_query))
+
+            yield metrics
+    finally:
+        _local.metrics = None
+
+
+def record_es_request(duration, took=None):
+    """
+    Records an Elasticsearch request against the current request (if there is one).
+
+    :param duration: the time spent making the request (in seconds)
+    :param took: the time reported by Elasticsearch in the response (in milliseconds), if any
+    """
+    metrics = get_current_metrics()
+    if metrics is None:
+        return
+
+    metrics.es_request_count += 1
+    metrics.es_time += duration
+    if took is not None:
+        metrics.es_took += took
+
+
+@contextmanager
+def time_serializer():
+    """
+    Context manager that records the time spent in a block against the current request.
+
+    Nested blocks are not counted twice.
+    """
+    metrics = get_current_metrics()
+    if metrics is None or metrics._serializer_depth:
+        yield
+        return
+
+    metrics._serializer_depth += 1
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += perf_counter() - start_time
+        metrics._serializer_depth -= 1
+
+
+class _SerializerTimingMixin:
+    # Lets datahub.core.compiled_serializers know that the serialiser's representation is
+    # unchanged
+    only_times_representation = True
+
+    def to_representation(self, instance):
+        with time_serializer():
+            return super().to_representation(instance)
+
+
+@lru_cache(maxsize=None)
+def _get_timed_serializer_class(serializer_class):
+    return type(
+        serializer_class.__name__,
+        (_SerializerTimingMixin, serializer_class),
+        {
+            '__module__': serializer_class.__module__,
+            '__qualname__': serializer_class.__qualname__,
+        },
+    )
+
+
+class SerializerTimingMixin:
+    """
+    DRF view mixin that records the time spent converting objects to their serialized
+    representations (e.g. in serializer.data).
+
+    (Time spent running database queries triggered by serializers is included.)
+    """
+
+    def get_serializer_class(self):
+        """Returns the serializer class, with timing added."""
+        return _get_timed_serializer_class(super().get_serializer_class())
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Middleware that records performance metrics for each request.
+
+    This should be near the start of MIDDLEWARE so that as much of the request is covered as
+    possible.
+    """
+
+    def __init__(self, get_response):
+        """Initialises the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Processes a request, recording metrics and adding them to the response."""
+        with collect_request_metrics() as metrics:
+            response = self.get_response(request)
+
+        if not response.streaming:
+            metrics.response_size = len(response.content)
+
+        response['Server-Timing'] = metrics.get_server_timing()
+
+        if settings.LOG_REQUEST_METRICS:
+            _log_metrics(request, response, metrics)
+
+        _check_query_budget(request, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Looks up the query budget of the view (if it has one)."""
+        metrics = get_current_metrics()
+        if metrics is not None:
+            metrics.query_budget = _get_query_budget(request, view_func)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = get_current_metrics()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start_time = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_query_count += 1
+        metrics.db_time += perf_counter() - start_time
+
+
+def _log_metrics(request, response, metrics):
+    log_fields = metrics.get_log_fields()
+    formatted_log_fields = ', '.join(f'{key}={value}' for key, value in log_fields.items())
+
+    logger.info(
+        f'{request.method} {request.path} {response.status_code}: {formatted_log_fields}',
+        extra={
+            'request_method': request.method,
+            'request_path': request.path,
+            'response_status_code': response.status_code,
+            **log_fields,
+        },
+    )
+
+
+def _get_query_budget(request, view_func):
+    view_class = getattr(view_func, 'cls', None)
+    query_budget = getattr(view_class, 'query_budget', None)
+
+    if not isinstance(query_budget, Mapping):
+        return query_budget
+
+    method = request.method.lower()
+    # Only view sets have actions
+    actions = getattr(view_func, 'actions', None) or {}
+    return query_budget.get(actions.get(method, method))
+
+
+def _check_query_budget(request, metrics):
+    if metrics.query_budget is None or metrics.db_query_count <= metrics.query_budget:
+        return
+
+    message = (
+        f'{request.method} {request.path} made {metrics.db_query_count} database queries '
+        f'(query budget: {metrics.query_budget})'
+    )
+
+    if settings.QUERY_BUDGET_RAISE_ON_EXCEEDED:
+        raise QueryBudgetExceededError(message)
+
+    logger.warning(message)
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from random import sample
+from time import sleep
+
+from django_pglocks import advisory_lock
+
+ADVISORY_LOCK_POOL_POLL_INTERVAL_SECS = 0.1
+
+
+@contextmanager
+def advisory_lock_pool(name, size, wait=True):
+    """
+    Returns a context manager that holds one of a pool of PostgreSQL advisory locks.
+
+    This works like a semaphore shared between all threads and processes using the same
+    database: at most size blocks of code using the same name can run at the same time.
+
+    As advisory locks belong to database sessions, each concurrent user of the pool must use a
+    different database connection (e.g. each thread or process has its own connection).
+
+    If wait is False and all locks in the pool are held, False is yielded. Otherwise, this
+    waits until one of the locks is free and yields True.
+
+    Usage example:
+        with advisory_lock_pool('leeloo-an-operation', 4):
+            ...
+    """
+    while True:
+        # Try the locks in a random order so that they are evenly used
+        for slot in sample(range(size), size):
+            with advisory_lock(f'{name}-{slot}', wait=False) as acquired:
+                if acquired:
+                    yield True
+                    return
+
+        if not wait:
+            yield False
+            return
+
+        sleep(ADVISORY_LOCK_POOL_POLL_INTERVAL_SECS)
@@ -0,0 +1,328 @@
+"""
+Pagination with cheap (estimated) counts and keyset next links.
+
+Exact counts of large, filtered and joined query sets can be more expensive than fetching a
+page of results. EstimatedCountPagination instead counts at most exact_count_threshold + 1 rows.
+If there are more rows than that, the count is estimated by PostgreSQL (using the table
+statistics in pg_class for unfiltered query sets, and the query planner otherwise) and
+is_estimate is set to true in the response.
+
+As offsets also get expensive for later pages, next links use keyset pagination (where the
+next page starts after the values of the ordering fields of the last result) where the ordering
+allows it. Offset-based links are used otherwise (and for previous links).
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from datetime import datetime, time
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_EXACT_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """
+    Limit-offset pagination with estimated counts for large result sets, and keyset next
+    links.
+
+    The response has the same keys as LimitOffsetPagination, plus is_estimate.
+    """
+
+    exact_count_threshold = DEFAULT_EXACT_COUNT_THRESHOLD
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Returns a page of results (or None if pagination is disabled)."""
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.request = request
+        self.keyset_ordering = _get_keyset_ordering(queryset)
+        self.count, self.is_estimate = self.get_count_and_is_estimate(queryset)
+
+        if self.keyset_ordering:
+            queryset = queryset.order_by(*_get_order_by(self.keyset_ordering))
+
+        cursor = self._get_cursor()
+        if cursor:
+            self.offset = None
+            queryset = queryset.filter(_get_keyset_filter(self.keyset_ordering, cursor))
+            results = list(queryset[:self.limit + 1])
+        else:
+            self.offset = self.get_offset(request)
+            results = list(queryset[self.offset:self.offset + self.limit + 1])
+
+        # The browsable API page controls are offset-based
+        if self.offset is not None and self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        self.has_next = len(results) > self.limit
+        self.results = results[:self.limit]
+        return self.results
+
+    def get_count_and_is_estimate(self, queryset):
+        """
+        Gets the number of results, which is estimated if there are more than
+        exact_count_threshold results.
+
+        :returns: (count, is_estimate) tuple
+        """
+        max_exact_count = self.exact_count_threshold + 1
+        count = queryset.order_by()[:max_exact_count].count()
+
+        if count < max_exact_count:
+            return count, False
+
+        # Estimates are never lower than the number of rows that have already been counted
+        return max(_estimate_count(queryset), max_exact_count), True
+
+    def get_paginated_response(self, data):
+        """Returns the response for a page of results."""
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('is_estimate', self.is_estimate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        """
+        Returns the URL of the next page.
+
+        A keyset link is returned if the ordering allows it.
+        """
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+
+        if not self.keyset_ordering:
+            return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+        url = remove_query_param(url, self.offset_query_param)
+        cursor = _encode_cursor(self.keyset_ordering, self.results[-1])
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        """Returns the URL of the previous page (or None for keyset pages)."""
+        if self.offset is None:
+            return None
+
+        return super().get_previous_link()
+
+    def _get_cursor(self):
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        if not self.keyset_ordering:
+            raise NotFound('Invalid cursor.')
+
+        try:
+            return _decode_cursor(cursor, len(self.keyset_ordering))
+        except ValueError:
+            raise NotFound('Invalid cursor.')
+
+
+def _get_keyset_ordering(queryset):
+    """
+    Gets the ordering of a query set as a list of (field path, descending) tuples, with the
+    primary key added as a tie-breaker.
+
+    None is returned if the ordering can't be used for keyset pagination (e.g. if it uses
+    expressions or ordering by relations).
+    """
+    query = queryset.query
+    if query.extra_order_by:
+        return None
+
+    if query.order_by:
+        order_by = query.order_by
+    elif query.default_ordering:
+        order_by = queryset.model._meta.ordering
+    else:
+        order_by = ()
+
+    ordering = []
+    for item in order_by:
+        if not isinstance(item, str) or item == '?':
+            return None
+
+        descending = item.startswith('-')
+        field_path = item.lstrip('-')
+
+        if field_path in ('pk', queryset.model._meta.pk.name):
+            ordering.append(('pk', descending))
+            return ordering
+
+        if not _is_keyset_field(queryset, field_path):
+            return None
+
+        ordering.append((field_path, descending))
+
+    ordering.append(('pk', False))
+    return ordering
+
+
+def _is_keyset_field(queryset, field_path):
+    """Checks if a field path refers to an annotation or a non-relation field."""
+    if field_path in queryset.query.annotations:
+        return True
+
+    model = queryset.model
+    field = None
+    for field_name in field_path.split(LOOKUP_SEP):
+        if field is not None:
+            if not field.is_relation:
+                return False
+            model = field.related_model
+
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return False
+
+    return field.concrete and not field.is_relation
+
+
+def _get_order_by(ordering):
+    return [f'-{field_path}' if descending else field_path for field_path, descending in ordering]
+
+
+def _get_keyset_filter(ordering, values):
+    """
+    Creates a filter for the rows that come after a set of ordering field values.
+
+    For example, for an ordering of (('name', False), ('pk', False)), this returns a filter
+    equivalent to:
+
+        Q(name__gt=name) | Q(name__isnull=True) | Q(name=name, pk__gt=pk)
+
+    (PostgreSQL sorts nulls last in ascending order and first in descending order.)
+    """
+    keyset_filter = None
+
+    for (field_path, descending), value in reversed(list(zip(ordering, values))):
+        after_filter, equal_filter = _get_field_filters(field_path, descending, value)
+
+        if keyset_filter is not None:
+            equal_and_after_filter = equal_filter & keyset_filter
+            keyset_filter = (
+                after_filter | equal_and_after_filter if after_filter else equal_and_after_filter
+            )
+        else:
+            keyset_filter = after_filter or Q(pk__in=[])
+
+    return keyset_filter
+
+
+def _get_field_filters(field_path, descending, value):
+    """
+    Gets filters for the rows that come after a value of a field, and that have the same
+    value.
+
+    :returns: (after filter or None if no rows come after the value, equal filter) tuple
+    """
+    if value is None:
+        equal_filter = Q(**{f'{field_path}__isnull': True})
+        after_filter = Q(**{f'{field_path}__isnull': False}) if descending else None
+        return after_filter, equal_filter
+
+    equal_filter = Q(**{field_path: value})
+    if descending:
+        return Q(**{f'{field_path}__lt': value}), equal_filter
+
+    after_filter = Q(**{f'{field_path}__gt': value}) | Q(**{f'{field_path}__isnull': True})
+    return after_filter, equal_filter
+
+
+def _encode_cursor(ordering, obj):
+    """Encodes the ordering field values of an object as a continuation token."""
+    values = [_get_value(obj, field_path) for field_path, _ in ordering]
+    data = json.dumps(values, cls=_CursorJSONEncoder)
+    return urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+class _CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder for cursor values.
+
+    Unlike DjangoJSONEncoder, this keeps the microseconds of datetimes and times (which
+    DjangoJSONEncoder truncates to milliseconds), so that cursor values match the values of
+    the last result exactly.
+    """
+
+    def default(self, o):
+        """Encodes datetimes and times in full (and other values as DjangoJSONEncoder does)."""
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+
+        return super().default(o)
+
+
+def _decode_cursor(cursor, num_values):
+    """
+    Decodes a continuation token as a list of ordering field values.
+
+    :raises ValueError: if the token is invalid
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+    except (BinasciiError, TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+    if not isinstance(values, list) or len(values) != num_values or values[-1] is None:
+        raise ValueError('Invalid cursor')
+
+    return values
+
+
+def _get_value(obj, field_path):
+    value = obj
+    for attr_name in field_path.split(LOOKUP_SEP):
+        value = getattr(value, attr_name)
+        if value is None:
+            return None
+
+    return value
+
+
+def _estimate_count(queryset):
+    """
+    Gets PostgreSQL's estimate of the number of rows in a query set.
+
+    The table statistics in pg_class are used for unfiltered query sets, and the query
+    planner's estimate (from EXPLAIN) otherwise.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            return int(cursor.fetchone()[0])
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,75 @@
+"""
+Cache of the permissions of advisers, shared across requests and processes.
+
+Django's ModelBackend only caches permissions on the user object, so they are loaded from the
+database on every request. Instead, the permissions of each adviser are stored in the Django
+cache, keyed by adviser ID and a permissions version.
+
+Changes that can affect any adviser (e.g. changes to the permissions of a group, or to the
+groups of a team role) change the version (which makes all cached permissions out of date).
+Changes that only affect a single adviser (e.g. adding the adviser to a group) delete that
+adviser's cached permissions.
+
+Invalidation happens both immediately and once the current transaction has been committed (so
+that permissions cached by other requests while the transaction was in progress are not
+reused).
+
+Changes made without sending signals (e.g. using QuerySet.update()) are not detected, so
+cached permissions also expire after PERMISSIONS_CACHE_TIMEOUT seconds.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+PERMISSIONS_VERSION_CACHE_KEY = 'core-permissions-version'
+PERMISSIONS_CACHE_TIMEOUT = 60 * 60
+
+
+def get_cached_permissions(adviser_id, load_permissions):
+    """
+    Gets the permissions of an adviser from the cache, loading and caching them if they are
+    not cached.
+
+    :param adviser_id: the ID of the adviser
+    :param load_permissions: function that loads the adviser's permissions from the database
+    :returns: set of permission names (in the format app_label.codename)
+    """
+    cache_key = _get_permissions_cache_key(adviser_id)
+    permissions = cache.get(cache_key)
+
+    if permissions is None:
+        permissions = load_permissions()
+        cache.set(cache_key, permissions, timeout=PERMISSIONS_CACHE_TIMEOUT)
+
+    return permissions
+
+
+def invalidate_all_cached_permissions():
+    """Makes the cached permissions of all advisers out of date."""
+    _change_version()
+    transaction.on_commit(_change_version)
+
+
+def invalidate_cached_permissions(adviser_id):
+    """Deletes the cached permissions of an adviser."""
+    _delete_permissions(adviser_id)
+    transaction.on_commit(lambda: _delete_permissions(adviser_id))
+
+
+def _get_permissions_cache_key(adviser_id):
+    version = cache.get(PERMISSIONS_VERSION_CACHE_KEY)
+    if version is None:
+        # Use the stored version if another process set one in the meantime
+        cache.add(PERMISSIONS_VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(PERMISSIONS_VERSION_CACHE_KEY)
+
+    return f'core-permissions-{version}-{adviser_id}'
+
+
+def _change_version():
+    cache.set(PERMISSIONS_VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+
+
+def _delete_permissions(adviser_id):
+    cache.delete(_get_permissions_cache_key(adviser_id))
@@ -35,6 +35,22 @@ def register_base_model(extra_exclude=None, **kwargs):
     return reversion.register(**kwargs)
 
 
+def add_to_revision_in_bulk(queryset):
+    """
+    Adds the objects in a query set to the current revision (if there is one and the model is
+    registered with django-reversion).
+
+    This is intended for use after QuerySet.update(), which does not send post_save signals
+    (and hence does not add the updated objects to the current revision). The objects are
+    loaded using a single query.
+    """
+    if not reversion.is_active() or not reversion.is_registered(queryset.model):
+        return
+
+    for obj in queryset.iterator():
+        reversion.add_to_revision(obj)
+
+
 class NonAtomicRevisionMiddleware(RevisionMiddleware):
     """
     Same as reversion.middleware.RevisionMiddleware but with atomic == False.
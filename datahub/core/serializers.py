@@ -397,7 +397,15 @@ class AddressSerializer(serializers.ModelSerializer):
             }
         }
         """
-        address_dict = super().to_representation(value)
+        return self.finalise_representation(super().to_representation(value))
+
+    def finalise_representation(self, address_dict):
+        """
+        Converts the representations of the individual address fields into the
+        representation of the address (as described in to_representation()).
+
+        (This is also used by datahub.core.compiled_serializers.)
+        """
         if not any(address_dict.values()):
             return None
 
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from datahub.core.permission_cache import (
+    invalidate_all_cached_permissions,
+    invalidate_cached_permissions,
+)
+from datahub.metadata.models import Team, TeamRole
+
+User = get_user_model()
+
+M2M_CHANGE_ACTIONS = {'post_add', 'post_remove', 'post_clear'}
+
+
+@receiver(
+    m2m_changed,
+    sender=Group.permissions.through,
+    dispatch_uid='group_permissions_m2m_changed',
+)
+@receiver(
+    m2m_changed,
+    sender=TeamRole.groups.through,
+    dispatch_uid='team_role_groups_m2m_changed',
+)
+def group_permissions_or_team_role_groups_m2m_changed(sender, action, **kwargs):
+    """
+    Invalidates all cached permissions when the permissions of a group or the groups of a
+    team role change.
+    """
+    if action in M2M_CHANGE_ACTIONS:
+        invalidate_all_cached_permissions()
+
+
+@receiver(
+    m2m_changed,
+    sender=User.groups.through,
+    dispatch_uid='adviser_groups_m2m_changed',
+)
+@receiver(
+    m2m_changed,
+    sender=User.user_permissions.through,
+    dispatch_uid='adviser_user_permissions_m2m_changed',
+)
+def adviser_groups_or_permissions_m2m_changed(
+    sender,
+    instance,
+    action,
+    reverse,
+    pk_set,
+    **kwargs,
+):
+    """Invalidates the cached permissions of advisers whose groups or permissions change."""
+    if action not in M2M_CHANGE_ACTIONS:
+        return
+
+    if not reverse:
+        invalidate_cached_permissions(instance.pk)
+    elif pk_set is None:
+        # The relation was cleared from the group or permission side, so we don't know which
+        # advisers were affected
+        invalidate_all_cached_permissions()
+    else:
+        for adviser_id in pk_set:
+            invalidate_cached_permissions(adviser_id)
+
+
+@receiver(post_save, sender=User, dispatch_uid='adviser_post_save_permissions')
+def adviser_post_save(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidates the cached permissions of an adviser when their team may have changed."""
+    if created or (update_fields is not None and 'dit_team' not in update_fields):
+        return
+
+    invalidate_cached_permissions(instance.pk)
+
+
+@receiver(post_save, sender=Team, dispatch_uid='team_post_save_permissions')
+@receiver(post_delete, sender=Team, dispatch_uid='team_post_delete_permissions')
+@receiver(post_delete, sender=TeamRole, dispatch_uid='team_role_post_delete_permissions')
+@receiver(post_delete, sender=Group, dispatch_uid='group_post_delete_permissions')
+@receiver(post_save, sender=Permission, dispatch_uid='permission_post_save_permissions')
+@receiver(post_delete, sender=Permission, dispatch_uid='permission_post_delete_permissions')
+def permission_source_post_save_or_delete(sender, **kwargs):
+    """
+    Invalidates all cached permissions when a team (whose role may have changed), team role,
+    group or permission is saved or deleted.
+    """
+    invalidate_all_cached_permissions()
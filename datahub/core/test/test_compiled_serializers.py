@@ -0,0 +1,216 @@
+import pytest
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from datahub.company.models import Advisor, Company, ContactPermission
+from datahub.company.serializers import CompanySerializerV4, ContactSerializer
+from datahub.company.test.factories import (
+    AdviserFactory,
+    CompanyFactory,
+    ContactFactory,
+    SubsidiaryFactory,
+)
+from datahub.company.views import CompanyViewSetV4
+from datahub.core.compiled_serializers import (
+    CompiledListSerializer,
+    get_representation_plan,
+)
+from datahub.core.instrumentation import _get_timed_serializer_class
+from datahub.core.serializers import NestedRelatedField
+from datahub.core.test.support.factories import MultiAddressModelFactory
+from datahub.core.test.support.serializers import MultiAddressModelSerializer
+from datahub.core.test_utils import assert_compiled_representation_matches, create_test_user
+from datahub.interaction.serializers import InteractionSerializer
+from datahub.interaction.test.factories import (
+    CompanyInteractionFactory,
+    CompanyInteractionFactoryWithPolicyFeedback,
+    InvestmentProjectInteractionFactory,
+)
+from datahub.interaction.views import InteractionViewSet
+from datahub.investment.project.serializers import IProjectSerializer
+from datahub.investment.project.test.factories import (
+    ActiveInvestmentProjectFactory,
+    InvestmentProjectFactory,
+    WonInvestmentProjectFactory,
+)
+from datahub.investment.project.views import IProjectViewSet
+from datahub.metadata.test.factories import TeamFactory
+
+factory = APIRequestFactory()
+
+pytestmark = pytest.mark.django_db
+
+
+class _AdviserSerializer(serializers.ModelSerializer):
+    name = serializers.CharField()
+    dit_team = NestedRelatedField('metadata.Team', extra_fields=('name', 'disabled_on'))
+    initials = serializers.SerializerMethodField()
+
+    def get_initials(self, obj):
+        return f'{obj.first_name[:1]}{obj.last_name[:1]}'
+
+    class Meta:
+        model = Advisor
+        fields = ('id', 'name', 'first_name', 'last_name', 'dit_team', 'initials', 'is_active')
+
+
+class _OverriddenAdviserSerializer(_AdviserSerializer):
+    def to_representation(self, instance):
+        return {'id': str(instance.pk)}
+
+
+def _make_context(user=None):
+    request = Request(factory.get('/'))
+    request.user = user
+    return {'request': request}
+
+
+class TestParity:
+    """Tests that compiled representations match the standard DRF representations."""
+
+    def test_nested_related_fields_and_method_fields(self):
+        """Test nested related fields (including null ones) and serialiser method fields."""
+        advisers = [
+            AdviserFactory(),
+            AdviserFactory(dit_team=None),
+            AdviserFactory(first_name='', last_name=''),
+        ]
+
+        assert_compiled_representation_matches(_AdviserSerializer, advisers)
+
+    def test_addresses(self):
+        """Test address serialisers, including addresses that are blank."""
+        instances = [
+            MultiAddressModelFactory(),
+            MultiAddressModelFactory(
+                secondary_address_1='',
+                secondary_address_2=None,
+                secondary_address_town='',
+                secondary_address_county='',
+                secondary_address_postcode='',
+                secondary_address_country_id=None,
+            ),
+        ]
+
+        assert_compiled_representation_matches(MultiAddressModelSerializer, instances)
+
+    def test_companies(self):
+        """Test the company serialiser using the company list query set."""
+        global_headquarters = CompanyFactory(one_list_account_owner=AdviserFactory())
+        SubsidiaryFactory(global_headquarters=global_headquarters)
+        CompanyFactory(registered_address_1='', registered_address_country_id=None)
+
+        assert_compiled_representation_matches(
+            CompanySerializerV4,
+            CompanyViewSetV4.queryset.all(),
+        )
+
+    def test_contacts(self):
+        """Test the contact serialiser, including fields that depend on permissions."""
+        ContactFactory.create_batch(2)
+        user = create_test_user(permission_codenames=(ContactPermission.view_contact_document,))
+
+        assert_compiled_representation_matches(
+            ContactSerializer,
+            ContactSerializer.Meta.model.objects.all(),
+            context=_make_context(user),
+        )
+
+    def test_interactions(self):
+        """Test the interaction serialiser using the interaction list query set."""
+        CompanyInteractionFactory()
+        CompanyInteractionFactoryWithPolicyFeedback()
+        InvestmentProjectInteractionFactory()
+
+        assert_compiled_representation_matches(
+            InteractionSerializer,
+            InteractionViewSet.queryset.all(),
+        )
+
+    def test_investment_projects(self):
+        """Test the investment project serialiser using the project list query set."""
+        InvestmentProjectFactory()
+        ActiveInvestmentProjectFactory()
+        WonInvestmentProjectFactory()
+
+        assert_compiled_representation_matches(
+            IProjectSerializer,
+            IProjectViewSet.queryset.all(),
+        )
+
+
+class TestRepresentationPlan:
+    """Tests for representation plans."""
+
+    def test_plan_is_cached(self):
+        """Test that the plan is only built once for a serialiser class and set of fields."""
+        plan = get_representation_plan(_AdviserSerializer())
+        assert get_representation_plan(_AdviserSerializer()) is plan
+
+    def test_plan_depends_on_readable_fields(self):
+        """Test that fields removed due to a lack of permissions are not in the plan."""
+        user = create_test_user(permission_codenames=(ContactPermission.view_contact_document,))
+        user_without_permissions = create_test_user()
+
+        plan = get_representation_plan(ContactSerializer(context=_make_context(user)))
+        other_plan = get_representation_plan(
+            ContactSerializer(context=_make_context(user_without_permissions)),
+        )
+
+        field_names = {field_name for field_name, _ in plan.field_binders}
+        other_field_names = {field_name for field_name, _ in other_plan.field_binders}
+        assert other_field_names < field_names
+
+    def test_overridden_to_representation_is_not_compiled(self):
+        """Test that serialisers that override to_representation() fall back to it."""
+        adviser = AdviserFactory()
+
+        assert get_representation_plan(_OverriddenAdviserSerializer()) is None
+
+        serializer = CompiledListSerializer([adviser], child=_OverriddenAdviserSerializer())
+        assert serializer.data == [{'id': str(adviser.pk)}]
+
+    def test_timed_serializers_are_compiled(self):
+        """Test that serialisers wrapped for timing by SerializerTimingMixin are compiled."""
+        timed_serializer_class = _get_timed_serializer_class(_AdviserSerializer)
+        assert get_representation_plan(timed_serializer_class()) is not None
+
+
+class TestValuesRows:
+    """Tests for serialising values() rows."""
+
+    def test_rows_match_instances(self):
+        """Test that values() rows have the same representation as model instances."""
+        AdviserFactory(dit_team=TeamFactory())
+        AdviserFactory(dit_team=None)
+        queryset = Advisor.objects.order_by('pk')
+
+        rows = queryset.values(
+            'id',
+            'first_name',
+            'last_name',
+            'is_active',
+            'dit_team',
+            'dit_team__name',
+            'dit_team__disabled_on',
+        )
+
+        row_serializer = CompiledListSerializer(rows, child=_AdviserSerializer())
+        instance_serializer = CompiledListSerializer(queryset, child=_AdviserSerializer())
+        assert row_serializer.data == instance_serializer.data
+
+    def test_to_many_relations_are_not_supported(self):
+        """Test that an error is raised if a to-many relation is accessed for a row."""
+        class CompanySerializer(serializers.ModelSerializer):
+            export_to_countries = NestedRelatedField('metadata.Country', many=True)
+
+            class Meta:
+                model = Company
+                fields = ('id', 'export_to_countries')
+
+        CompanyFactory()
+        rows = Company.objects.values('id')
+
+        with pytest.raises(TypeError):
+            CompiledListSerializer(rows, child=CompanySerializer()).data
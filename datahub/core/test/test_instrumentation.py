@@ -0,0 +1,213 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from rest_framework import serializers
+
+from datahub.company.models import Advisor
+from datahub.core.instrumentation import (
+    _get_timed_serializer_class,
+    collect_request_metrics,
+    QueryBudgetExceededError,
+    record_es_request,
+    RequestInstrumentationMiddleware,
+    SerializerTimingMixin,
+    time_serializer,
+)
+
+factory = RequestFactory()
+
+
+class _AdviserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Advisor
+        fields = ('id', 'first_name')
+
+
+def _make_view_func(query_budget=None, actions=None):
+    view_func = Mock(spec=['cls', 'actions'])
+    view_func.cls = Mock(spec=['query_budget'], query_budget=query_budget)
+    view_func.actions = actions
+    return view_func
+
+
+def _run_middleware(get_response, view_func=None, method='get'):
+    request = getattr(factory, method)('/test-path/')
+    middleware = RequestInstrumentationMiddleware(None)
+
+    def _get_response(request):
+        if view_func:
+            middleware.process_view(request, view_func, (), {})
+        return get_response(request)
+
+    middleware.get_response = _get_response
+    return middleware(request)
+
+
+@pytest.mark.django_db
+class TestRequestInstrumentationMiddleware:
+    """Tests for RequestInstrumentationMiddleware."""
+
+    def test_records_db_queries(self):
+        """Test that database queries are counted."""
+        def get_response(request):
+            Advisor.objects.count()
+            Advisor.objects.count()
+            return HttpResponse()
+
+        response = _run_middleware(get_response)
+
+        assert 'db;dur=' in response['Server-Timing']
+        assert 'desc="2 queries"' in response['Server-Timing']
+
+    def test_records_es_requests(self):
+        """Test that Elasticsearch requests are counted and took values summed."""
+        def get_response(request):
+            record_es_request(0.01, took=4)
+            record_es_request(0.01, took=5)
+            record_es_request(0.01)
+            return HttpResponse()
+
+        response = _run_middleware(get_response)
+
+        assert 'desc="3 requests"' in response['Server-Timing']
+        assert 'es-took;dur=9' in response['Server-Timing']
+
+    @pytest.mark.parametrize(
+        'response,expected_size',
+        (
+            (HttpResponse(b'12345'), 5),
+            (StreamingHttpResponse(iter([b'12345'])), None),
+        ),
+    )
+    def test_logs_metrics(self, caplog, settings, response, expected_size):
+        """Test that metrics are logged (as extra log record fields) if enabled."""
+        settings.LOG_REQUEST_METRICS = True
+        caplog.set_level(logging.INFO, 'datahub.core.instrumentation')
+
+        _run_middleware(lambda request: response)
+
+        assert len(caplog.records) == 1
+        record = caplog.records[0]
+        assert record.message.startswith('GET /test-path/ 200: db_query_count=0, ')
+        assert record.request_path == '/test-path/'
+        assert record.db_query_count == 0
+        assert record.response_size == expected_size
+
+    def test_does_not_log_metrics_if_disabled(self, caplog, settings):
+        """Test that metrics are not logged by default."""
+        settings.LOG_REQUEST_METRICS = False
+        caplog.set_level(logging.INFO, 'datahub.core.instrumentation')
+
+        _run_middleware(lambda request: HttpResponse())
+
+        assert not caplog.records
+
+    @pytest.mark.parametrize(
+        'query_budget,actions,method,should_exceed',
+        (
+            (None, None, 'get', False),
+            (2, None, 'get', False),
+            (1, None, 'get', True),
+            ({'list': 1}, {'get': 'list'}, 'get', True),
+            ({'list': 1}, {'post': 'create'}, 'post', False),
+            ({'post': 1}, None, 'post', True),
+            ({'post': 1}, None, 'get', False),
+        ),
+    )
+    def test_query_budget_raises_in_tests(
+        self,
+        settings,
+        query_budget,
+        actions,
+        method,
+        should_exceed,
+    ):
+        """Test that QueryBudgetExceededError is raised if enabled and the budget is exceeded."""
+        settings.QUERY_BUDGET_RAISE_ON_EXCEEDED = True
+
+        def get_response(request):
+            Advisor.objects.count()
+            Advisor.objects.count()
+            return HttpResponse()
+
+        view_func = _make_view_func(query_budget=query_budget, actions=actions)
+
+        if should_exceed:
+            with pytest.raises(QueryBudgetExceededError):
+                _run_middleware(get_response, view_func=view_func, method=method)
+        else:
+            _run_middleware(get_response, view_func=view_func, method=method)
+
+    def test_query_budget_logs_warning(self, caplog, settings):
+        """Test that a warning is logged if the budget is exceeded and raising is disabled."""
+        settings.QUERY_BUDGET_RAISE_ON_EXCEEDED = False
+
+        def get_response(request):
+            Advisor.objects.count()
+            Advisor.objects.count()
+            return HttpResponse()
+
+        response = _run_middleware(get_response, view_func=_make_view_func(query_budget=1))
+
+        assert response.status_code == 200
+        assert [record.message for record in caplog.records if record.levelname == 'WARNING'] == [
+            'GET /test-path/ made 2 database queries (query budget: 1)',
+        ]
+
+
+def test_record_es_request_without_request():
+    """Test that record_es_request() does nothing outside of a request."""
+    record_es_request(0.01, took=5)
+
+
+def test_time_serializer_does_not_count_nested_blocks_twice(monkeypatch):
+    """Test that nested time_serializer() blocks are only counted once."""
+    times = iter([1.0, 2.0, 3.0, 4.0])
+    monkeypatch.setattr('datahub.core.instrumentation.perf_counter', lambda: next(times))
+
+    with collect_request_metrics() as metrics:
+        with time_serializer():
+            with time_serializer():
+                pass
+
+    # The metrics' own start time uses the first value
+    assert metrics.serializer_time == 1.0
+
+
+@pytest.mark.django_db
+class TestSerializerTiming:
+    """Tests for SerializerTimingMixin."""
+
+    def test_timed_serializer_class(self):
+        """Test that the timed serializer class is a subclass with the same name."""
+        timed_class = _get_timed_serializer_class(_AdviserSerializer)
+
+        assert issubclass(timed_class, _AdviserSerializer)
+        assert timed_class.__name__ == _AdviserSerializer.__name__
+        assert _get_timed_serializer_class(_AdviserSerializer) is timed_class
+
+    @pytest.mark.parametrize('many', (False, True))
+    def test_records_serializer_time(self, many):
+        """Test that the time spent serialising objects is recorded."""
+        class BaseView:
+            def get_serializer_class(self):
+                return _AdviserSerializer
+
+        class View(SerializerTimingMixin, BaseView):
+            pass
+
+        adviser = Advisor.objects.create(email='test@test.test', first_name='Test')
+        serializer_class = View().get_serializer_class()
+
+        with collect_request_metrics() as metrics:
+            instance = [adviser] if many else adviser
+            data = serializer_class(instance, many=many).data
+
+        assert metrics.serializer_time > 0
+        assert data == ([{'id': str(adviser.pk), 'first_name': 'Test'}] if many else {
+            'id': str(adviser.pk),
+            'first_name': 'Test',
+        })
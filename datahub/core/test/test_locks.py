@@ -0,0 +1,41 @@
+from threading import Thread
+
+import pytest
+from django.db import connection
+
+from datahub.core.locks import advisory_lock_pool
+
+pytestmark = pytest.mark.django_db
+
+
+def _try_acquire_in_other_connection(name, size):
+    """Tries to acquire a lock from a pool using a new database connection (in a thread)."""
+    results = []
+
+    def _try_acquire():
+        try:
+            with advisory_lock_pool(name, size, wait=False) as acquired:
+                results.append(acquired)
+        finally:
+            connection.close()
+
+    thread = Thread(target=_try_acquire)
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+@pytest.mark.parametrize('size,expected_acquired', ((1, False), (2, True)))
+def test_advisory_lock_pool_limits_concurrent_holders(size, expected_acquired):
+    """Test that at most size holders of a pool can hold a lock at the same time."""
+    with advisory_lock_pool('test-pool', size) as acquired:
+        assert acquired
+        assert _try_acquire_in_other_connection('test-pool', size) == expected_acquired
+
+
+def test_advisory_lock_pool_releases_lock():
+    """Test that locks are released when the context manager exits."""
+    with advisory_lock_pool('test-pool', 1):
+        pass
+
+    assert _try_acquire_in_other_connection('test-pool', 1)
@@ -0,0 +1,211 @@
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db.models import F
+from django.utils.timezone import utc
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from datahub.company.models import Advisor
+from datahub.company.test.factories import AdviserFactory
+from datahub.core.pagination import (
+    _decode_cursor,
+    _encode_cursor,
+    _get_keyset_ordering,
+    EstimatedCountPagination,
+)
+
+factory = APIRequestFactory()
+
+pytestmark = pytest.mark.django_db
+
+
+def _paginate(queryset, query_params=None, exact_count_threshold=None):
+    request = Request(factory.get('/test-path/', data=query_params or {}))
+    paginator = EstimatedCountPagination()
+    if exact_count_threshold is not None:
+        paginator.exact_count_threshold = exact_count_threshold
+
+    results = paginator.paginate_queryset(queryset, request)
+    return paginator, results
+
+
+def _get_query_params(url):
+    return {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+
+
+def _paginate_all(queryset, limit):
+    """Follows next links until the last page, and returns all results."""
+    query_params = {'limit': limit}
+    all_results = []
+    max_num_results = queryset.count()
+
+    while query_params:
+        paginator, results = _paginate(queryset, query_params=query_params)
+        all_results.extend(results)
+        # Stop if results are being repeated (rather than following next links forever)
+        assert len(all_results) <= max_num_results
+
+        next_link = paginator.get_next_link()
+        query_params = _get_query_params(next_link) if next_link else None
+
+    return all_results
+
+
+@pytest.fixture
+def advisers():
+    """
+    Creates advisers with some duplicate names, some null last_login values and some
+    date_joined values that only differ in their microseconds.
+    """
+    last_logins = [None, datetime(2019, 1, 1, tzinfo=utc), datetime(2019, 1, 2, tzinfo=utc)]
+    yield [
+        AdviserFactory(
+            first_name=f'Name {index % 4}',
+            last_login=last_logins[index % 3],
+            date_joined=datetime(2019, 1, 1, 12, 0, 0, 123456 + index % 5, tzinfo=utc),
+            email=f'pagination-{index}@test.test',
+        )
+        for index in range(13)
+    ]
+
+
+@pytest.fixture
+def adviser_queryset(advisers):
+    """Returns a query set of only the advisers created by the advisers fixture."""
+    yield Advisor.objects.filter(email__startswith='pagination-')
+
+
+class TestCount:
+    """Tests for the count and is_estimate values."""
+
+    def test_exact_count_below_threshold(self, adviser_queryset):
+        """Test that the count is exact if it does not exceed the threshold."""
+        paginator, _ = _paginate(adviser_queryset, exact_count_threshold=13)
+
+        response = paginator.get_paginated_response([])
+
+        assert response.data['count'] == 13
+        assert response.data['is_estimate'] is False
+
+    def test_estimated_count_above_threshold(self, adviser_queryset):
+        """
+        Test that the count is estimated if it exceeds the threshold.
+
+        The estimate is never lower than the number of rows counted.
+        """
+        paginator, _ = _paginate(adviser_queryset, exact_count_threshold=5)
+
+        response = paginator.get_paginated_response([])
+
+        assert response.data['count'] >= 6
+        assert response.data['is_estimate'] is True
+
+    def test_estimated_count_for_unfiltered_queryset(self, advisers):
+        """Test that table statistics are used for unfiltered query sets."""
+        paginator, _ = _paginate(Advisor.objects.all(), exact_count_threshold=5)
+
+        assert paginator.count >= 6
+        assert paginator.is_estimate
+
+
+class TestLinks:
+    """Tests for next and previous links."""
+
+    @pytest.mark.parametrize(
+        'ordering',
+        (
+            ('first_name',),
+            ('-first_name',),
+            ('last_login', 'first_name'),
+            ('-last_login', '-first_name'),
+            ('date_joined',),
+            ('-date_joined',),
+            ('-pk',),
+            (),
+        ),
+    )
+    def test_keyset_links_return_all_results_in_order(self, adviser_queryset, ordering):
+        """Test that following keyset next links returns every result once, in order."""
+        queryset = adviser_queryset.order_by(*ordering)
+        expected_results = list(queryset.order_by(*ordering, 'pk'))
+
+        assert _paginate_all(queryset, limit=3) == expected_results
+
+    def test_keyset_next_link(self, adviser_queryset):
+        """Test that the next link uses a cursor and that keyset pages have no previous link."""
+        queryset = adviser_queryset.order_by('first_name')
+        paginator, _ = _paginate(queryset, query_params={'limit': 3, 'offset': 3})
+
+        query_params = _get_query_params(paginator.get_next_link())
+        assert query_params.keys() == {'limit', 'cursor'}
+        assert paginator.get_previous_link() is not None
+
+        paginator, _ = _paginate(queryset, query_params=query_params)
+        assert paginator.get_previous_link() is None
+
+    def test_offset_next_link_for_expression_ordering(self, adviser_queryset):
+        """Test that offset links are used when the ordering does not support keysets."""
+        queryset = adviser_queryset.order_by(F('first_name').desc())
+        paginator, _ = _paginate(queryset, query_params={'limit': 3})
+
+        assert _get_query_params(paginator.get_next_link()) == {'limit': '3', 'offset': '3'}
+
+    def test_no_next_link_on_last_page(self, adviser_queryset):
+        """Test that there is no next link on the last page."""
+        paginator, results = _paginate(adviser_queryset, query_params={'limit': 13})
+
+        assert len(results) == 13
+        assert paginator.get_next_link() is None
+
+    @pytest.mark.parametrize(
+        'cursor',
+        (
+            'invalid',
+            _encode_cursor((('pk', False),), Advisor(first_name='test', id=None)),
+            # Wrong number of values
+            _encode_cursor((('first_name', False),), Advisor(first_name='test')),
+        ),
+    )
+    def test_invalid_cursor(self, adviser_queryset, cursor):
+        """Test that invalid cursors result in a 404."""
+        queryset = adviser_queryset.order_by('first_name')
+
+        with pytest.raises(NotFound):
+            _paginate(queryset, query_params={'cursor': cursor})
+
+
+@pytest.mark.parametrize(
+    'ordering,expected_ordering',
+    (
+        (('first_name',), [('first_name', False), ('pk', False)]),
+        (('-id', 'first_name'), [('pk', True)]),
+        (('dit_team__name',), [('dit_team__name', False), ('pk', False)]),
+        (('dit_team',), None),
+        (('?',), None),
+        ((F('first_name').asc(),), None),
+    ),
+)
+def test_get_keyset_ordering(ordering, expected_ordering):
+    """Test that orderings are converted to keyset orderings where possible."""
+    queryset = Advisor.objects.order_by(*ordering)
+    assert _get_keyset_ordering(queryset) == expected_ordering
+
+
+def test_decode_cursor_round_trip():
+    """Test that cursor values survive encoding and decoding."""
+    adviser = Advisor(first_name='test')
+    ordering = (('first_name', False), ('pk', False))
+
+    assert _decode_cursor(_encode_cursor(ordering, adviser), 2) == ['test', str(adviser.pk)]
+
+
+def test_encode_cursor_keeps_microseconds():
+    """Test that datetimes in cursors are not truncated to milliseconds."""
+    adviser = Advisor(date_joined=datetime(2019, 1, 1, 12, 0, 0, 123456, tzinfo=utc))
+    ordering = (('date_joined', False), ('pk', False))
+
+    values = _decode_cursor(_encode_cursor(ordering, adviser), 2)
+    assert values[0] == '2019-01-01T12:00:00.123456+00:00'
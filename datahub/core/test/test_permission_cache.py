@@ -0,0 +1,152 @@
+import pytest
+from django.contrib.auth.models import Permission
+
+from datahub.company.models import Advisor
+from datahub.core.permission_cache import get_cached_permissions
+from datahub.core.test.factories import GroupFactory
+from datahub.core.test_utils import create_test_user
+from datahub.metadata.test.factories import TeamFactory, TeamRoleFactory
+
+PERMISSION_CODENAME = 'view_permissionmodel'
+PERMISSION_NAME = f'support.{PERMISSION_CODENAME}'
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('local_memory_cache'),
+]
+
+
+def _has_perm(user):
+    # Use a new object each time, as permissions are also cached on the user object
+    return Advisor.objects.get(pk=user.pk).has_perm(PERMISSION_NAME)
+
+
+@pytest.fixture
+def permission():
+    """Returns the permission used in these tests."""
+    yield Permission.objects.get(codename=PERMISSION_CODENAME)
+
+
+def test_permissions_are_cached_across_user_objects(django_assert_num_queries, permission):
+    """Test that permissions are not loaded from the database again for a new user object."""
+    user = create_test_user(permission_codenames=(PERMISSION_CODENAME,))
+    assert _has_perm(user)
+
+    user = Advisor.objects.get(pk=user.pk)
+    with django_assert_num_queries(0):
+        assert user.has_perm(PERMISSION_NAME)
+
+
+def test_get_cached_permissions_only_loads_once():
+    """Test that permissions are only loaded when not already cached."""
+    calls = []
+
+    def load_permissions():
+        calls.append(None)
+        return {PERMISSION_NAME}
+
+    assert get_cached_permissions('adviser-id', load_permissions) == {PERMISSION_NAME}
+    assert get_cached_permissions('adviser-id', load_permissions) == {PERMISSION_NAME}
+    assert len(calls) == 1
+
+
+class TestInvalidation:
+    """Tests that cached permissions are invalidated when the underlying data changes."""
+
+    def test_user_permissions_added(self, permission):
+        """Test adding a permission to a user."""
+        user = create_test_user()
+        assert not _has_perm(user)
+
+        user.user_permissions.add(permission)
+        assert _has_perm(user)
+
+    def test_user_added_to_group(self, permission):
+        """Test adding a user to a group."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        user = create_test_user()
+        assert not _has_perm(user)
+
+        user.groups.add(group)
+        assert _has_perm(user)
+
+    def test_group_users_added(self, permission):
+        """Test adding users to a group from the group side of the relation."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        user = create_test_user()
+        assert not _has_perm(user)
+
+        group.user_set.add(user)
+        assert _has_perm(user)
+
+    def test_group_users_cleared(self, permission):
+        """Test clearing the users of a group from the group side of the relation."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        user = create_test_user()
+        user.groups.add(group)
+        assert _has_perm(user)
+
+        group.user_set.clear()
+        assert not _has_perm(user)
+
+    def test_group_permission_added(self, permission):
+        """Test adding a permission to a group that a user is in."""
+        group = GroupFactory()
+        user = create_test_user()
+        user.groups.add(group)
+        assert not _has_perm(user)
+
+        group.permissions.add(permission)
+        assert _has_perm(user)
+
+    def test_team_role_group_added(self, permission):
+        """Test adding a group to the role of the team of a user."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        team = TeamFactory()
+        user = create_test_user(dit_team=team)
+        assert not _has_perm(user)
+
+        team.role.groups.add(group)
+        assert _has_perm(user)
+
+    def test_team_role_changed(self, permission):
+        """Test changing the role of the team of a user."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        role = TeamRoleFactory()
+        role.groups.add(group)
+        team = TeamFactory()
+        user = create_test_user(dit_team=team)
+        assert not _has_perm(user)
+
+        team.role = role
+        team.save()
+        assert _has_perm(user)
+
+    def test_user_team_changed(self, permission):
+        """Test changing the team of a user."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        team = TeamFactory()
+        team.role.groups.add(group)
+        user = create_test_user(dit_team=TeamFactory())
+        assert not _has_perm(user)
+
+        user.dit_team = team
+        user.save(update_fields=('dit_team',))
+        assert _has_perm(user)
+
+    def test_group_deleted(self, permission):
+        """Test deleting a group that a user is in."""
+        group = GroupFactory()
+        group.permissions.add(permission)
+        user = create_test_user()
+        user.groups.add(group)
+        assert _has_perm(user)
+
+        group.delete()
+        assert not _has_perm(user)
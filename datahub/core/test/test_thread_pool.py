@@ -1,26 +1,139 @@
+from threading import Event
 from unittest import mock
 
 import pytest
 
-from datahub.core.thread_pool import submit_to_thread_pool
+from datahub.core.thread_pool import (
+    CALLER_RUNS,
+    get_thread_pool,
+    get_thread_pool_stats,
+    REJECT,
+    shut_down_thread_pools,
+    submit_to_thread_pool,
+    ThreadPool,
+    ThreadPoolRejectedError,
+)
 
 pytestmark = pytest.mark.django_db
 
 
-def _synchronous_executor_submit(fn, *args, **kwargs):
-    fn(*args, **kwargs)
+@pytest.fixture
+def pool():
+    """Creates a thread pool with one worker and a queue of one task."""
+    pool = ThreadPool('test', max_workers=1, max_queue_size=1, rejection_policy=REJECT)
+    yield pool
+    pool.shut_down(timeout=5)
+
+
+def _blocking_task(started, release):
+    started.set()
+    assert release.wait(5)
 
 
-@mock.patch('datahub.core.thread_pool._executor.submit', _synchronous_executor_submit)
 @mock.patch('datahub.core.thread_pool.client')
-def test_error_raises_exception(mock_raven_client):
+def test_error_raises_exception(mock_raven_client, pool):
     """
     Test that if an error occurs whilst executing a thread pool task,
     the exception is raised and sent to sentry.
     """
     mock_task = mock.Mock(__name__='mock_task', side_effect=ValueError())
 
+    future = pool.submit(mock_task)
+
     with pytest.raises(ValueError):
-        submit_to_thread_pool(mock_task)
+        future.result(timeout=5)
 
     assert mock_raven_client.captureException.called
+    assert pool.get_stats()['failed'] == 1
+
+
+def test_runs_task(pool):
+    """Test that a task is run and its result returned via the future."""
+    future = pool.submit(sum, (1, 2))
+
+    assert future.result(timeout=5) == 3
+    assert pool.shut_down(timeout=5)
+
+    stats = pool.get_stats()
+    assert stats['submitted'] == 1
+    assert stats['completed'] == 1
+    assert stats['queue_depth'] == 0
+    assert stats['running'] == 0
+
+
+def test_reject_policy(pool):
+    """Test that tasks are rejected once the pool and its queue are full."""
+    started = Event()
+    release = Event()
+
+    pool.submit(_blocking_task, started, release)
+    assert started.wait(5)
+    queued_future = pool.submit(sum, (1, 2))
+
+    assert pool.get_stats()['queue_depth'] == 1
+
+    with pytest.raises(ThreadPoolRejectedError):
+        pool.submit(sum, (3, 4))
+
+    release.set()
+    assert queued_future.result(timeout=5) == 3
+    assert pool.get_stats()['rejected'] == 1
+
+
+def test_caller_runs_policy():
+    """Test that tasks are run in the submitting thread once the pool and its queue are full."""
+    pool = ThreadPool('test', max_workers=1, max_queue_size=0, rejection_policy=CALLER_RUNS)
+    started = Event()
+    release = Event()
+
+    pool.submit(_blocking_task, started, release)
+    assert started.wait(5)
+
+    future = pool.submit(sum, (1, 2))
+    # The task has already been run by this thread
+    assert future.done()
+    assert future.result() == 3
+    assert pool.get_stats()['caller_runs'] == 1
+
+    release.set()
+    assert pool.shut_down(timeout=5)
+
+
+def test_shut_down_drains_tasks(pool):
+    """Test that shutting down waits for queued tasks, and that later tasks are rejected."""
+    started = Event()
+    release = Event()
+    task = mock.Mock(__name__='task')
+
+    pool.submit(_blocking_task, started, release)
+    assert started.wait(5)
+    pool.submit(task)
+
+    # Times out as the first task is still running
+    assert not pool._idle.wait(0.1)
+    release.set()
+    assert pool.shut_down(timeout=5)
+    assert task.called
+
+    with pytest.raises(ThreadPoolRejectedError):
+        pool.submit(task)
+
+
+def test_named_pools(settings):
+    """Test that named pools are created using settings, and that shut down pools are removed."""
+    settings.THREAD_POOLS = {
+        'default': {'max_workers': 1, 'max_queue_size': 1},
+        'other': {'max_workers': 2, 'max_queue_size': 3, 'rejection_policy': REJECT},
+    }
+    shut_down_thread_pools()
+
+    other_pool = get_thread_pool('other')
+    assert get_thread_pool('other') is other_pool
+    assert other_pool.max_workers == 2
+    assert other_pool.rejection_policy == REJECT
+
+    assert submit_to_thread_pool(sum, (1, 2)).result(timeout=5) == 3
+    assert set(get_thread_pool_stats()) == {'default', 'other'}
+
+    shut_down_thread_pools(timeout=5)
+    assert get_thread_pool_stats() == {}
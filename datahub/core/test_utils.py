@@ -18,8 +18,11 @@ from django.utils.http import urlencode
 from django.utils.timezone import now
 from oauth2_provider.models import AccessToken, Application
 from rest_framework.fields import DateField, DateTimeField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
 from rest_framework.test import APIClient
 
+from datahub.core.compiled_serializers import CompiledListSerializer
 from datahub.core.utils import join_truthy_strings
 from datahub.metadata.models import Team
 from datahub.oauth.scopes import Scope
@@ -410,6 +413,28 @@ def _format_csv_value(value):
     return str(value)
 
 
+def assert_compiled_representation_matches(serializer_class, instances, context=None):
+    """
+    Asserts that the compiled representation of a list of objects (see
+    datahub.core.compiled_serializers) is the same JSON as the standard DRF representation.
+    """
+    context = context or {}
+    renderer = JSONRenderer()
+
+    standard_serializer = ListSerializer(
+        instances,
+        child=serializer_class(context=context),
+        context=context,
+    )
+    compiled_serializer = CompiledListSerializer(
+        instances,
+        child=serializer_class(context=context),
+        context=context,
+    )
+
+    assert renderer.render(compiled_serializer.data) == renderer.render(standard_serializer.data)
+
+
 def construct_mock(**props):
     """
     Same as mock.Mock() but using configure_mock as
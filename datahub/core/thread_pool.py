@@ -1,31 +1,242 @@
-from concurrent.futures import ThreadPoolExecutor
+"""
+Named, bounded thread pools for running tasks in the background of a web process.
 
+Each pool is configured in settings.THREAD_POOLS with:
+    max_workers: the maximum number of threads
+    max_queue_size: the maximum number of tasks waiting for a thread
+    rejection_policy: what to do with a task when the queue is full (REJECT raises
+        ThreadPoolRejectedError, CALLER_RUNS runs the task in the submitting thread)
+
+Pools are created when first used, and are drained when the process exits.
+"""
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Event, Lock
+
+from django.conf import settings
 from django.db import close_old_connections
 from raven.contrib.django.models import client
 
+from datahub.core.exceptions import DataHubException
 from datahub.core.utils import logger
 
-_executor = ThreadPoolExecutor()
+DEFAULT_POOL_NAME = 'default'
+
+REJECT = 'reject'
+CALLER_RUNS = 'caller_runs'
+REJECTION_POLICIES = (REJECT, CALLER_RUNS)
+
+
+class ThreadPoolRejectedError(DataHubException):
+    """Raised when a task is submitted to a full (or shut down) pool using the reject policy."""
+
+
+class ThreadPool:
+    """
+    Thread pool with a maximum number of queued tasks and per-pool metrics.
+
+    Tasks are run with exception handling and old- and broken-connection clean-up (see
+    _make_thread_pool_task()).
+    """
+
+    def __init__(self, name, max_workers, max_queue_size, rejection_policy=CALLER_RUNS):
+        """Initialises the pool (threads are started as tasks are submitted)."""
+        if rejection_policy not in REJECTION_POLICIES:
+            raise ValueError(f'Invalid rejection policy: {rejection_policy}')
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.rejection_policy = rejection_policy
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f'thread-pool-{name}',
+        )
+        # Bounds the number of tasks that are either queued or running
+        self._slots = BoundedSemaphore(max_workers + max_queue_size)
+        self._lock = Lock()
+        self._stats = Counter()
+        self._queue_depth = 0
+        self._num_running = 0
+        self._idle = Event()
+        self._idle.set()
+        self._is_shut_down = False
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Submits a function to be run in the pool.
+
+        :returns: a Future
+        :raises ThreadPoolRejectedError: if the pool is full (or has been shut down) and the
+            rejection policy is REJECT
+        """
+        return _submit_to_thread_pool(self, fn, *args, **kwargs)
+
+    def get_stats(self):
+        """
+        Returns the metrics for this pool.
+
+        The metrics are:
+            queue_depth: number of tasks waiting for a thread
+            running: number of tasks currently running
+            submitted: number of tasks accepted by the pool
+            completed: number of tasks that completed successfully
+            failed: number of tasks that raised an exception
+            rejected: number of tasks rejected because the pool was full
+            caller_runs: number of tasks run in the submitting thread because the pool was full
+            wait_secs: total time tasks spent waiting for a thread
+            run_secs: total time spent running tasks
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                'queue_depth': self._queue_depth,
+                'running': self._num_running,
+            }
+
+    def shut_down(self, timeout=None):
+        """
+        Stops accepting new tasks and waits for queued and running tasks to finish.
+
+        :param timeout: the maximum number of seconds to wait (or None to wait indefinitely)
+        :returns: True if all tasks finished within the timeout
+        """
+        with self._lock:
+            self._is_shut_down = True
+
+        logger.info(f'Shutting down thread pool {self.name}...')
+        is_drained = self._idle.wait(timeout)
+        if not is_drained:
+            logger.warning(
+                f'Thread pool {self.name} did not finish its tasks within {timeout} seconds',
+            )
+
+        self._executor.shutdown(wait=is_drained)
+        return is_drained
+
+    def _submit(self, fn, *args, **kwargs):
+        task = _make_thread_pool_task(fn, *args, **kwargs)
+
+        if self._is_shut_down or not self._slots.acquire(blocking=False):
+            return self._handle_rejection(fn, task)
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._queue_depth += 1
+            self._idle.clear()
+
+        submitted_on = time.monotonic()
+        try:
+            return self._executor.submit(self._run, task, submitted_on)
+        except RuntimeError:
+            # The executor was shut down after the check above
+            self._on_task_finished(None)
+            self._slots.release()
+            return self._handle_rejection(fn, task)
+
+    def _handle_rejection(self, fn, task):
+        if self.rejection_policy == REJECT:
+            self._increment_stats(rejected=1)
+            raise ThreadPoolRejectedError(
+                f'Thread pool {self.name} is full; task {fn.__name__} rejected',
+            )
+
+        self._increment_stats(caller_runs=1)
+        future = Future()
+        try:
+            future.set_result(task())
+        except Exception as exc:
+            self._increment_stats(failed=1)
+            future.set_exception(exc)
+        return future
+
+    def _run(self, task, submitted_on):
+        started_on = time.monotonic()
+        with self._lock:
+            self._queue_depth -= 1
+            self._num_running += 1
+            self._stats['wait_secs'] += started_on - submitted_on
+
+        succeeded = False
+        try:
+            result = task()
+            succeeded = True
+            return result
+        finally:
+            self._on_task_finished(succeeded, run_secs=time.monotonic() - started_on)
+            self._slots.release()
+
+    def _on_task_finished(self, succeeded, run_secs=0):
+        with self._lock:
+            if succeeded is None:
+                # The task was never run
+                self._stats['submitted'] -= 1
+                self._queue_depth -= 1
+            else:
+                self._num_running -= 1
+                self._stats['completed' if succeeded else 'failed'] += 1
+                self._stats['run_secs'] += run_secs
+
+            if not self._queue_depth and not self._num_running:
+                self._idle.set()
+
+    def _increment_stats(self, **counts):
+        with self._lock:
+            self._stats.update(counts)
+
+
+_pools = {}
+_pools_lock = Lock()
+
+
+def get_thread_pool(name=DEFAULT_POOL_NAME):
+    """
+    Gets a thread pool by name, creating it (using settings.THREAD_POOLS) if necessary.
+
+    :raises KeyError: if the pool is not configured
+    """
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ThreadPool(name, **settings.THREAD_POOLS[name])
+        return _pools[name]
+
+
+def get_thread_pool_stats():
+    """Returns the metrics for each thread pool that has been created, keyed by pool name."""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    return {pool.name: pool.get_stats() for pool in pools}
 
 
 def submit_to_thread_pool(fn, *args, **kwargs):
-    """Submits a function to be run in the thread pool."""
-    return _submit_to_thread_pool(fn, *args, **kwargs)
+    """Submits a function to be run in the default thread pool."""
+    return get_thread_pool().submit(fn, *args, **kwargs)
+
 
+def shut_down_thread_pools(timeout=None):
+    """
+    Drains and shuts down all thread pools that have been created.
+
+    :param timeout: the maximum number of seconds to wait for each pool
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
 
-def shut_down_thread_pool():
-    """Shuts down the thread pool."""
-    logger.info('Shutting down thread pool...')
-    _executor.shutdown()
+    for pool in pools:
+        pool.shut_down(timeout=timeout)
 
 
-def _submit_to_thread_pool(fn, *args, **kwargs):
+def _submit_to_thread_pool(pool, fn, *args, **kwargs):
     """
-    Implementation of submit_to_thread_pool().
+    Implementation of ThreadPool.submit().
 
     Gives tests a centralised place to patch task submission for synchronous execution.
     """
-    return _executor.submit(_make_thread_pool_task(fn, *args, **kwargs))
+    return pool._submit(fn, *args, **kwargs)
 
 
 def _make_thread_pool_task(fn, *args, **kwargs):
@@ -38,7 +249,7 @@ def _make_thread_pool_task(fn, *args, **kwargs):
     def _task():
         try:
             close_old_connections()
-            fn(*args, **kwargs)
+            return fn(*args, **kwargs)
         except Exception:
             msg = f'Error running thread pool task {fn.__name__}'
             logger.exception(msg)
@@ -2,6 +2,8 @@ from django.core.exceptions import FieldDoesNotExist
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 
+from datahub.core.instrumentation import SerializerTimingMixin
+
 
 def has_fields(model, *fields):
     """Returns True if model has all the fields, False otherwise."""
@@ -16,6 +18,7 @@ def has_fields(model, *fields):
 
 
 class CoreViewSet(
+    SerializerTimingMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
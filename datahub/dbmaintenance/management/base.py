@@ -1,14 +1,24 @@
 import codecs
 import csv
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from contextlib import closing
 from logging import getLogger
 
+import reversion
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 
+from datahub.core.reversion import add_to_revision_in_bulk
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.documents.utils import get_s3_client_for_bucket
+from datahub.search.apps import get_search_app_by_model
+from datahub.search.dependencies import sync_dependent_objects_async
+from datahub.search.sync_object import sync_objects_async
 
 logger = getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 1000
+
 
 class CSVBaseCommand(BaseCommand):
     """
@@ -17,6 +27,11 @@ class CSVBaseCommand(BaseCommand):
     manages basic logging and failures.
     The operation is not atomic and each row is processed individually.
 
+    The CSV file is streamed and processed in batches of rows (of --batch-size rows). Batches
+    can be processed concurrently on a thread pool (of --workers threads), in which case each
+    thread uses its own database connection. Only failed rows and a summary of each batch are
+    logged.
+
     Usage:
         class Command(CSVBaseCommand):
             def _process_row(self, row, **options):
@@ -25,6 +40,9 @@ class CSVBaseCommand(BaseCommand):
                 ...
 
         ./manage.py <command-name> <bucket> <object_key>
+
+    Subclasses can instead override _process_batch() to process a whole batch of rows at once
+    (e.g. using in_bulk() and bulk_update()). See also CSVBulkUpdateBaseCommand.
     """
 
     def add_arguments(self, parser):
@@ -37,6 +55,18 @@ class CSVBaseCommand(BaseCommand):
             default=False,
             help='If True it only simulates the command without saving the changes.',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='The number of rows to process at a time.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='The number of threads to use to process batches concurrently.',
+        )
 
     def _handle(self, *args, **options):
         """
@@ -55,12 +85,54 @@ class CSVBaseCommand(BaseCommand):
         with closing(response):
             csvfile = codecs.getreader('utf-8')(response)
             reader = csv.DictReader(csvfile)
+            batches = slice_iterable_into_chunks(reader, options['batch_size'])
 
-            for row in reader:
-                succeeded = self.process_row(row, **options)
-                result[succeeded] += 1
+            for num_rows, num_failed in self._process_batches(batches, options):
+                result[True] += num_rows - num_failed
+                result[False] += num_failed
+                logger.info(
+                    f'Processed {result[True] + result[False]} rows - '
+                    f'succeeded: {result[True]}, failed: {result[False]}',
+                )
         return result
 
+    def _process_batches(self, batches, options):
+        """
+        Processes batches of rows, using a thread pool if more than one worker is being used.
+
+        The number of batches in flight is bounded so that the file does not have to be read
+        into memory.
+
+        :returns: iterator of (number of rows, number of failed rows) tuples
+        """
+        num_workers = options['workers']
+
+        if num_workers <= 1:
+            for batch in batches:
+                yield len(batch), self.process_batch(batch, **options)
+            return
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            pending = set()
+
+            for batch in batches:
+                if len(pending) >= num_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+
+                pending.add(executor.submit(self._process_batch_in_thread, batch, options))
+
+            for future in pending:
+                yield future.result()
+
+    def _process_batch_in_thread(self, batch, options):
+        try:
+            return len(batch), self.process_batch(batch, **options)
+        finally:
+            # Each thread has its own database connection, which is closed once the batch
+            # has been processed
+            connection.close()
+
     def handle(self, *args, **options):
         """Process the CSV file."""
         logger.info(f'Started')
@@ -69,6 +141,29 @@ class CSVBaseCommand(BaseCommand):
 
         logger.info(f'Finished - succeeded: {result[True]}, failed: {result[False]}')
 
+    def process_batch(self, rows, **options):
+        """
+        Process a batch of rows.
+
+        :returns: the number of rows that were not processed successfully
+        """
+        try:
+            return self._process_batch(rows, **options)
+        except Exception:
+            logger.exception(f'Batch of {len(rows)} rows starting with row {rows[0]} - Failed')
+            return len(rows)
+
+    def _process_batch(self, rows, **options):
+        """
+        Processes a batch of rows by calling process_row() for each row.
+
+        Subclasses can override this to process the rows more efficiently. Failures of
+        individual rows should be logged and counted (rather than raised).
+
+        :returns: the number of rows that were not processed successfully
+        """
+        return sum(not self.process_row(row, **options) for row in rows)
+
     def process_row(self, row, **options):
         """
         Process one single row.
@@ -81,7 +176,6 @@ class CSVBaseCommand(BaseCommand):
             logger.exception(f'Row {row} - Failed')
             return False
         else:
-            logger.info(f'Row {row} - OK')
             return True
 
     def _process_row(self, row, **options):
@@ -93,3 +187,103 @@ class CSVBaseCommand(BaseCommand):
         :param options: same as the django command options
         """
         raise NotImplementedError()
+
+
+class CSVBulkUpdateBaseCommand(CSVBaseCommand):
+    """
+    Base class for commands that update fields of existing objects referenced by ID in a CSV
+    file.
+
+    The objects for each batch of rows are loaded using in_bulk() and changed objects are saved
+    using bulk_update() in a single revision. As bulk_update() does not send post_save signals,
+    changed objects are explicitly added to the revision and synced to Elasticsearch (if the
+    model has a search app), along with any search documents that depend on the updated fields.
+
+    Usage:
+        class Command(CSVBulkUpdateBaseCommand):
+            model = InvestmentProject
+            update_fields = ('comments',)
+            revision_comment = 'Comments migration.'
+
+            def _update_object(self, obj, row, **options):
+                # update obj from the row, returning True if it was changed
+                ...
+    """
+
+    model = None
+    id_column = 'id'
+    update_fields = ()
+    revision_comment = None
+
+    def _update_object(self, obj, row, **options):
+        """
+        To be implemented by a subclass, it should update obj (in memory) using the row.
+
+        It should propagate exceptions so that the row is logged as failed.
+
+        :returns: True if obj was changed
+        """
+        raise NotImplementedError()
+
+    def _process_batch(self, rows, simulate=False, **options):
+        """
+        Loads the objects for a batch of rows using one query, and saves any changes in bulk.
+
+        :returns: the number of rows that were not processed successfully
+        """
+        num_failed = 0
+        rows_and_pks = []
+
+        for row in rows:
+            try:
+                pk = self.model._meta.pk.to_python(row[self.id_column])
+            except Exception:
+                logger.exception(f'Row {row} - Failed')
+                num_failed += 1
+            else:
+                rows_and_pks.append((row, pk))
+
+        objects = self.model.objects.in_bulk([pk for _, pk in rows_and_pks])
+        changed_objects = {}
+
+        for row, pk in rows_and_pks:
+            try:
+                obj = objects.get(pk)
+                if obj is None:
+                    raise self.model.DoesNotExist(
+                        f'{self.model._meta.object_name} matching query does not exist.',
+                    )
+
+                if self._update_object(obj, row, simulate=simulate, **options):
+                    changed_objects[pk] = obj
+            except Exception:
+                logger.exception(f'Row {row} - Failed')
+                num_failed += 1
+
+        if changed_objects and not simulate:
+            self._save_in_bulk(list(changed_objects.values()))
+
+        return num_failed
+
+    def _save_in_bulk(self, objects):
+        pks = [obj.pk for obj in objects]
+
+        with transaction.atomic(), reversion.create_revision():
+            self.model.objects.bulk_update(objects, self.update_fields)
+            reversion.set_comment(self.revision_comment)
+            add_to_revision_in_bulk(self.model.objects.filter(pk__in=pks))
+
+            transaction.on_commit(
+                lambda: sync_dependent_objects_async(
+                    self.model,
+                    pks,
+                    changed_fields=self.update_fields,
+                ),
+            )
+
+            try:
+                search_app = get_search_app_by_model(self.model)
+            except LookupError:
+                return
+
+            transaction.on_commit(lambda: sync_objects_async(search_app, pks))
@@ -1,21 +1,20 @@
-import reversion
-
 from datahub.company.models import Advisor
-from datahub.dbmaintenance.management.base import CSVBaseCommand
+from datahub.dbmaintenance.management.base import CSVBulkUpdateBaseCommand
 
 
-class Command(CSVBaseCommand):
+class Command(CSVBulkUpdateBaseCommand):
     """Command to update adviser.telephone_number."""
 
-    def _process_row(self, row, simulate=False, **options):
-        """Process one single row."""
-        adviser = Advisor.objects.get(pk=row['id'])
+    model = Advisor
+    update_fields = ('telephone_number',)
+    revision_comment = 'Telephone number migration.'
+
+    def _update_object(self, adviser, row, **options):
+        """Update the telephone number of an adviser."""
         telephone_number = row['telephone_number']
 
-        if adviser.telephone_number != telephone_number:
-            adviser.telephone_number = telephone_number
+        if adviser.telephone_number == telephone_number:
+            return False
 
-            if not simulate:
-                with reversion.create_revision():
-                    adviser.save(update_fields=('telephone_number',))
-                    reversion.set_comment('Telephone number migration.')
+        adviser.telephone_number = telephone_number
+        return True
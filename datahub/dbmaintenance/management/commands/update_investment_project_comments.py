@@ -1,22 +1,22 @@
-import reversion
-
-from datahub.dbmaintenance.management.base import CSVBaseCommand
+from datahub.dbmaintenance.management.base import CSVBulkUpdateBaseCommand
 from datahub.investment.project.models import InvestmentProject
 
 
-class Command(CSVBaseCommand):
+class Command(CSVBulkUpdateBaseCommand):
     """Command to update investment_project.description."""
 
-    def _process_row(self, row, simulate=False, **options):
-        """Process one single row."""
-        # "Id" is not a typo
-        investment_project = InvestmentProject.objects.get(pk=row['Id'])
+    model = InvestmentProject
+    # "Id" is not a typo
+    id_column = 'Id'
+    update_fields = ('comments',)
+    revision_comment = 'Comments migration.'
+
+    def _update_object(self, investment_project, row, **options):
+        """Update the comments of an investment project."""
         comments = row['comments'].strip()
 
-        if investment_project.comments != comments:
-            investment_project.comments = comments
+        if investment_project.comments == comments:
+            return False
 
-            if not simulate:
-                with reversion.create_revision():
-                    investment_project.save(update_fields=('comments',))
-                    reversion.set_comment('Comments migration.')
+        investment_project.comments = comments
+        return True
@@ -0,0 +1,147 @@
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+from django.core.management import call_command
+from reversion.models import Version
+
+from datahub.company.test.factories import AdviserFactory
+from datahub.dbmaintenance.management.base import CSVBaseCommand
+from datahub.investment.project.test.factories import InvestmentProjectFactory
+from datahub.search.investment.apps import InvestmentSearchApp
+
+
+class _RecordingCommand(CSVBaseCommand):
+    """Command that records the rows it processes, failing rows with a value of 'fail'."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.processed_rows = []
+
+    def _process_row(self, row, **options):
+        if row['value'] == 'fail':
+            raise ValueError('Invalid value')
+
+        self.processed_rows.append(row['value'])
+
+
+def _add_csv_response(s3_stubber, csv_content):
+    s3_stubber.add_response(
+        'get_object',
+        {
+            'Body': BytesIO(csv_content.encode('utf-8')),
+        },
+        expected_params={
+            'Bucket': 'test_bucket',
+            'Key': 'test_key',
+        },
+    )
+
+
+class TestCSVBaseCommand:
+    """Tests for the batched processing of rows by CSVBaseCommand."""
+
+    @pytest.mark.parametrize('batch_size', (1, 2, 10))
+    @pytest.mark.parametrize('workers', (1, 3))
+    def test_processes_all_rows(self, s3_stubber, caplog, batch_size, workers):
+        """Test that each row is processed once for various batch sizes and numbers of workers."""
+        caplog.set_level('INFO')
+        _add_csv_response(s3_stubber, 'value\na\nfail\nb\nc\nd\n')
+
+        command = _RecordingCommand()
+        call_command(command, 'test_bucket', 'test_key', batch_size=batch_size, workers=workers)
+
+        assert sorted(command.processed_rows) == ['a', 'b', 'c', 'd']
+        assert "Row {'value': 'fail'} - Failed" in caplog.text
+        assert 'Finished - succeeded: 4, failed: 1' in caplog.text
+        # Only failed rows and batch summaries are logged
+        assert 'OK' not in caplog.text
+
+    def test_failed_batch(self, s3_stubber, caplog):
+        """Test that if a whole batch fails, all of its rows are counted as failed."""
+        caplog.set_level('INFO')
+        _add_csv_response(s3_stubber, 'value\na\nb\nc\n')
+
+        command = _RecordingCommand()
+        command._process_batch = Mock(side_effect=[0, ValueError('Batch failed')])
+        call_command(command, 'test_bucket', 'test_key', batch_size=2)
+
+        assert 'Batch of 1 rows starting with row' in caplog.text
+        assert 'Finished - succeeded: 2, failed: 1' in caplog.text
+
+
+@pytest.mark.django_db
+class TestCSVBulkUpdateBaseCommand:
+    """Tests for the bulk updating of objects by CSVBulkUpdateBaseCommand."""
+
+    def test_run(self, s3_stubber, caplog):
+        """
+        Test that changed objects are saved with a revision, and that invalid and
+        non-existent IDs are logged as failures.
+        """
+        caplog.set_level('ERROR')
+        advisers = AdviserFactory.create_batch(3, telephone_number='123')
+        csv_rows = '\n'.join(f'{adviser.pk},456' for adviser in advisers)
+        csv_content = f"""id,telephone_number
+invalid,123
+00000000-0000-0000-0000-000000000000,123
+{csv_rows}
+"""
+        _add_csv_response(s3_stubber, csv_content)
+
+        call_command('update_adviser_telephone_number', 'test_bucket', 'test_key')
+
+        for adviser in advisers:
+            adviser.refresh_from_db()
+            assert adviser.telephone_number == '456'
+
+            versions = Version.objects.get_for_object(adviser)
+            assert len(versions) == 1
+            assert versions[0].revision.get_comment() == 'Telephone number migration.'
+
+        assert 'is not a valid UUID' in caplog.text
+        assert 'Advisor matching query does not exist' in caplog.text
+        assert len(caplog.records) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_workers_sync_changes_to_es(self, s3_stubber, monkeypatch):
+        """
+        Test that batches are processed concurrently using separate connections, and that
+        changed objects are synced to Elasticsearch once each batch has been committed.
+        """
+        sync_objects_async_mock = Mock()
+        monkeypatch.setattr(
+            'datahub.dbmaintenance.management.base.sync_objects_async',
+            sync_objects_async_mock,
+        )
+
+        investment_projects = InvestmentProjectFactory.create_batch(4, comments='old')
+        csv_rows = '\n'.join(f'{project.pk},new' for project in investment_projects[:3])
+        _add_csv_response(s3_stubber, f'Id,comments\n{csv_rows}\n')
+
+        call_command(
+            'update_investment_project_comments',
+            'test_bucket',
+            'test_key',
+            batch_size=2,
+            workers=2,
+        )
+
+        for project in investment_projects:
+            project.refresh_from_db()
+
+        assert [project.comments for project in investment_projects] == [
+            'new', 'new', 'new', 'old',
+        ]
+
+        assert sync_objects_async_mock.call_count == 2
+        synced_pks = {
+            pk
+            for call in sync_objects_async_mock.call_args_list
+            for pk in call[0][1]
+        }
+        assert synced_pks == {project.pk for project in investment_projects[:3]}
+        assert all(
+            call[0][0] is InvestmentSearchApp
+            for call in sync_objects_async_mock.call_args_list
+        )
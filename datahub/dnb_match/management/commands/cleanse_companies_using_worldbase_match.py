@@ -1,20 +1,43 @@
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from logging import getLogger
 
 import reversion
 from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.fields.jsonb import KeyTextTransform, KeyTransform
 from django.core.management.base import BaseCommand
+from django.db import connections, transaction
 from django.db.models import Count, Exists, OuterRef, Q
 from django.db.models.functions import Cast
 
 from datahub.company.models import Company
+from datahub.core.reversion import add_to_revision_in_bulk
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.dnb_match.models import DnBMatchingResult
 from datahub.dnb_match.utils import update_company_from_wb_record
+from datahub.search.apps import get_search_app_by_model
 from datahub.search.signals import disable_search_signal_receivers
+from datahub.search.sync_object import sync_objects_by_pk
 
 
 logger = getLogger(__name__)
 
+REVISION_COMMENT = 'Updated from Dun & Bradstreet data.'
+
+# Result of cleansing a batch of companies in batched mode, where archived_with_related_objects
+# is a list of (company URL, list of related field names) pairs and num_not_synced is the
+# number of cleansed companies that could not be synced to Elasticsearch
+BatchResult = namedtuple(
+    'BatchResult',
+    [
+        'num_succeeded',
+        'num_failed',
+        'num_archived',
+        'archived_with_related_objects',
+        'num_not_synced',
+    ],
+)
+
 # list of (related field, query annotation name)
 # where the 'query annotation name' can be used to access a bool value indicating
 # if the company has any related field objects)
@@ -38,6 +61,50 @@ RELATED_FIELDS_MAPPING = [
 ]
 
 
+def get_companies_queryset():
+    """
+    :returns: a QuerySet of the companies to cleanse (companies without a D-U-N-S number
+        that have a unique Worldbase match whose D-U-N-S number isn't already in use)
+    """
+    # subquery used to only get the matches without duplicates
+    subquery_for_matched_duns_numbers = DnBMatchingResult.objects.filter(
+        company__archived=False,
+    ).annotate(
+        dnb_match=KeyTransform('dnb_match', 'data'),
+        matched_duns_number=KeyTextTransform(
+            'duns_number',
+            Cast('dnb_match', JSONField()),
+        ),
+    ).values(
+        'matched_duns_number',
+    ).annotate(
+        group_count=Count('matched_duns_number'),
+    ).filter(
+        matched_duns_number__isnull=False,
+        group_count=1,
+    ).values('matched_duns_number')
+
+    # subquery used to exclude all the duns_numbers already being used
+    # (there's a unique constraint on the Company.duns_number field)
+    subquery_for_existing_duns_numbers = Company.objects.filter(
+        duns_number__isnull=False,
+    ).values('duns_number')
+
+    return Company.objects.annotate(
+        wb_record=KeyTransform('wb_record', 'dnbmatchingresult__data'),
+        matched_duns_number=KeyTextTransform(
+            'DUNS Number',
+            Cast('wb_record', JSONField()),
+        ),
+    ).filter(
+        duns_number__isnull=True,
+        archived=False,
+        matched_duns_number__in=subquery_for_matched_duns_numbers,
+    ).exclude(
+        matched_duns_number__in=subquery_for_existing_duns_numbers,
+    )
+
+
 def _filter_by_existing_related_objects(companies):
     """
     Can be used to check if archived companies need to be manually checked
@@ -67,6 +134,124 @@ def _filter_by_existing_related_objects(companies):
     return qs.filter(filters)
 
 
+def _get_related_objects_of_archived_companies(archived_companies):
+    """
+    :returns: a list of (company URL, list of related field names) pairs for the companies in
+        archived_companies that have any of the related objects defined in
+        RELATED_FIELDS_MAPPING
+    """
+    if not archived_companies:
+        return []
+
+    return [
+        (
+            company.get_absolute_url(),
+            [
+                field_name
+                for field_name, annotation_name in RELATED_FIELDS_MAPPING
+                if getattr(company, annotation_name)
+            ],
+        )
+        for company in _filter_by_existing_related_objects(archived_companies)
+    ]
+
+
+def cleanse_batch(company_pks, simulate=False):
+    """
+    Cleanses a batch of companies (in batched mode).
+
+    If the batch can't be saved (or fails in any other way), the error is logged and all
+    companies in the batch are counted as failed, so that the remaining batches are still
+    processed.
+
+    If the batch was saved but the updated companies can't be synced to Elasticsearch, the
+    error is logged and the companies are counted as not synced (rather than as failed, as the
+    changes have already been committed).
+
+    This is a module-level function so that it can be run in a worker process.
+
+    :param simulate: if True, the changes will not be saved
+    :returns: a BatchResult
+    """
+    try:
+        batch_result, updated_pks = _cleanse_batch(company_pks, simulate=simulate)
+    except Exception as exc:
+        logger.exception(f'Batch of {len(company_pks)} companies failed: {repr(exc)}')
+        return BatchResult(0, len(company_pks), 0, [], 0)
+
+    if not updated_pks:
+        return batch_result
+
+    try:
+        sync_objects_by_pk(get_search_app_by_model(Company), updated_pks)
+    except Exception as exc:
+        logger.exception(
+            f'Syncing a batch of {len(updated_pks)} companies to Elasticsearch failed: '
+            f'{repr(exc)}',
+        )
+        return batch_result._replace(num_not_synced=len(updated_pks))
+
+    return batch_result
+
+
+def _cleanse_batch(company_pks, simulate=False):
+    """
+    Cleanses a batch of companies.
+
+    The Worldbase record of each company is taken from the companies query (rather than loaded
+    separately for each company) and the changes are built in memory. They are then saved
+    using one bulk_update() per set of updated fields, in a single revision.
+
+    :returns: tuple of a BatchResult and a list of the primary keys of the updated companies
+        (which is empty if nothing was saved)
+    """
+    companies = get_companies_queryset().filter(pk__in=company_pks)
+    companies_by_updated_fields = defaultdict(list)
+    num_failed = 0
+
+    for company in companies:
+        try:
+            updated_fields = update_company_from_wb_record(
+                company,
+                company.wb_record,
+                commit=False,
+            )
+        except Exception as exc:
+            num_failed += 1
+            logger.exception(f'Company {company.name} - {company.id} failed: {repr(exc)}')
+        else:
+            companies_by_updated_fields[tuple(updated_fields)].append(company)
+
+    updated_companies = [
+        company
+        for companies_for_fields in companies_by_updated_fields.values()
+        for company in companies_for_fields
+    ]
+    # Only non-archived companies are cleansed, so any archived company was archived here
+    archived_companies = [company for company in updated_companies if company.archived]
+
+    updated_pks = []
+
+    if updated_companies and not simulate:
+        updated_pks = [company.pk for company in updated_companies]
+
+        with transaction.atomic(), reversion.create_revision():
+            for updated_fields, companies_for_fields in companies_by_updated_fields.items():
+                Company.objects.bulk_update(companies_for_fields, updated_fields)
+
+            reversion.set_comment(REVISION_COMMENT)
+            add_to_revision_in_bulk(Company.objects.filter(pk__in=updated_pks))
+
+    batch_result = BatchResult(
+        len(updated_companies),
+        num_failed,
+        len(archived_companies),
+        _get_related_objects_of_archived_companies(archived_companies),
+        0,
+    )
+    return batch_result, updated_pks
+
+
 class Command(BaseCommand):
     """
     Loops over all Data Hub companies with duns_number == NULL and D&B match and updates company
@@ -82,6 +267,11 @@ class Command(BaseCommand):
     NOTE: The command disables search signals so avoid overloading the queue.
     After it completes, you need to run `sync_es` manually to make sure
     all documents are up-to-date.
+
+    If --batch-size is specified, companies are instead processed in batches (see
+    cleanse_batch()), optionally spread across a number of worker processes. In this mode,
+    the updated companies are synced to Elasticsearch as each batch is processed (so
+    `sync_es` does not need to be run afterwards).
     """
 
     def add_arguments(self, parser):
@@ -91,44 +281,16 @@ class Command(BaseCommand):
             action='store_true',
             help='Simulates the command by performing the cleansing and rolling things back.',
         )
-
-    def _get_companies_queryset(self):
-        # subquery used to only get the matches without duplicates
-        subquery_for_matched_duns_numbers = DnBMatchingResult.objects.filter(
-            company__archived=False,
-        ).annotate(
-            dnb_match=KeyTransform('dnb_match', 'data'),
-            matched_duns_number=KeyTextTransform(
-                'duns_number',
-                Cast('dnb_match', JSONField()),
-            ),
-        ).values(
-            'matched_duns_number',
-        ).annotate(
-            group_count=Count('matched_duns_number'),
-        ).filter(
-            matched_duns_number__isnull=False,
-            group_count=1,
-        ).values('matched_duns_number')
-
-        # subquery used to exclude all the duns_numbers already being used
-        # (there's a unique constraint on the Company.duns_number field)
-        subquery_for_existing_duns_numbers = Company.objects.filter(
-            duns_number__isnull=False,
-        ).values('duns_number')
-
-        return Company.objects.annotate(
-            wb_record=KeyTransform('wb_record', 'dnbmatchingresult__data'),
-            matched_duns_number=KeyTextTransform(
-                'DUNS Number',
-                Cast('wb_record', JSONField()),
-            ),
-        ).filter(
-            duns_number__isnull=True,
-            archived=False,
-            matched_duns_number__in=subquery_for_matched_duns_numbers,
-        ).exclude(
-            matched_duns_number__in=subquery_for_existing_duns_numbers,
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Processes companies in batches of this size (using bulk updates).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='The number of worker processes to use in batched mode.',
         )
 
     @disable_search_signal_receivers(Company)
@@ -136,10 +298,18 @@ class Command(BaseCommand):
         """Handles the command."""
         logger.info('Started')
 
+        if options['batch_size']:
+            self._handle_in_batches(
+                options['batch_size'],
+                options['workers'],
+                simulate=options['simulate'],
+            )
+            return
+
         result = {True: 0, False: 0}
         archived_companies = []
 
-        for company in self._get_companies_queryset().iterator():
+        for company in get_companies_queryset().iterator():
             succeeded_or_not, archived = self.process_company(
                 company,
                 simulate=options['simulate'],
@@ -149,7 +319,49 @@ class Command(BaseCommand):
             if archived:
                 archived_companies.append(company)
 
-        self._print_results(result, archived_companies)
+        self._print_results(
+            result,
+            len(archived_companies),
+            _get_related_objects_of_archived_companies(archived_companies),
+        )
+
+    def _handle_in_batches(self, batch_size, num_workers, simulate=False):
+        company_pks = get_companies_queryset().values_list('pk', flat=True)
+        batches = slice_iterable_into_chunks(company_pks.iterator(), batch_size)
+
+        if num_workers > 1:
+            # Make sure worker processes do not share the connection of this process (they
+            # will open their own connections as needed)
+            batches = list(batches)
+            connections.close_all()
+
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                batch_results = list(
+                    executor.map(cleanse_batch, batches, [simulate] * len(batches)),
+                )
+        else:
+            batch_results = [cleanse_batch(batch, simulate=simulate) for batch in batches]
+
+        result = {
+            True: sum(batch_result.num_succeeded for batch_result in batch_results),
+            False: sum(batch_result.num_failed for batch_result in batch_results),
+        }
+        self._print_results(
+            result,
+            sum(batch_result.num_archived for batch_result in batch_results),
+            [
+                item
+                for batch_result in batch_results
+                for item in batch_result.archived_with_related_objects
+            ],
+        )
+
+        num_not_synced = sum(batch_result.num_not_synced for batch_result in batch_results)
+        if num_not_synced:
+            logger.warning(
+                f'{num_not_synced} cleansed companies could not be synced to Elasticsearch. '
+                'Please run sync_es to sync them.',
+            )
 
     def _process_company(self, company, simulate=False):
         """
@@ -166,7 +378,7 @@ class Command(BaseCommand):
             )
 
             if not simulate:
-                reversion.set_comment('Updated from Dun & Bradstreet data.')
+                reversion.set_comment(REVISION_COMMENT)
 
             return 'archived' in updated_fields
 
@@ -191,27 +403,19 @@ class Command(BaseCommand):
 
         return (succeeded, archived)
 
-    def _print_results(self, result, archived_companies):
+    def _print_results(self, result, num_archived, archived_with_related_objects):
         logger.info(
             'Finished - '
             f'succeeded: {result[True]}, '
             f'failed: {result[False]}, '
-            f'archived: {len(archived_companies)}',
+            f'archived: {num_archived}',
         )
 
-        archived_companies_with_related_objects = _filter_by_existing_related_objects(
-            archived_companies,
-        )
-        if len(archived_companies_with_related_objects):
+        if archived_with_related_objects:
             logger.info(
                 'The following companies were archived but have related objects '
                 'so they might require futher offline work. '
                 'Please check with your Product Manager:',
             )
-            for company in archived_companies_with_related_objects:
-                existing_related_fields = (
-                    field_name
-                    for field_name, annotation_name in RELATED_FIELDS_MAPPING
-                    if getattr(company, annotation_name)
-                )
-                logger.info(f'{company.get_absolute_url()}: {", ".join(existing_related_fields)}')
+            for url, existing_related_fields in archived_with_related_objects:
+                logger.info(f'{url}: {", ".join(existing_related_fields)}')
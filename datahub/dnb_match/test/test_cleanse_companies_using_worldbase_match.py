@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from unittest.mock import Mock
 
 import pytest
 from django.conf import settings
@@ -11,8 +12,9 @@ from reversion.models import Version
 from datahub.company.models import Company
 from datahub.company.test.factories import CompanyFactory
 from datahub.core.constants import Country as CountryConstant
+from datahub.core.reversion import add_to_revision_in_bulk
 from datahub.dnb_match.management.commands.cleanse_companies_using_worldbase_match import (
-    Command as CleanseCommand,
+    get_companies_queryset,
 )
 from datahub.dnb_match.test.factories import DnBMatchingResultFactory
 from datahub.dnb_match.utils import (
@@ -31,6 +33,7 @@ pytestmark = pytest.mark.django_db
 FROZEN_TIME = datetime(2019, 1, 1, 1, tzinfo=utc)
 UNITED_KINGDOM_COUNTRY_UUID = uuid.UUID(CountryConstant.united_kingdom.value.id)
 DATAHUB_FRONTEND_COMPANY_PREFIX = settings.DATAHUB_FRONTEND_URL_PREFIXES['company']
+COMMAND_MODULE = 'datahub.dnb_match.management.commands.cleanse_companies_using_worldbase_match'
 
 
 TEST_DATA = [
@@ -282,11 +285,9 @@ def test_run(caplog, monkeypatch, simulate):
     """
     # add ordering to command queryset so that we can trigger an error
     # with the last record being processed
-    original_get_companies_queryset = CleanseCommand._get_companies_queryset
     monkeypatch.setattr(
-        CleanseCommand,
-        '_get_companies_queryset',
-        lambda self: original_get_companies_queryset(self).order_by('id'),
+        f'{COMMAND_MODULE}.get_companies_queryset',
+        lambda: get_companies_queryset().order_by('id'),
     )
 
     caplog.set_level('INFO')
@@ -353,6 +354,175 @@ def test_run(caplog, monkeypatch, simulate):
             assert versions.count() == 0
 
 
+@pytest.mark.parametrize('simulate', (False, True))
+@freeze_time(FROZEN_TIME)
+def test_run_in_batches(caplog, monkeypatch, simulate):
+    """
+    Test that the matched Worldbase records are used to cleanse Data Hub companies in batched
+    mode, and that the updated companies are synced to Elasticsearch.
+    """
+    monkeypatch.setattr(
+        f'{COMMAND_MODULE}.get_companies_queryset',
+        lambda: get_companies_queryset().order_by('id'),
+    )
+    sync_objects_by_pk_mock = Mock()
+    monkeypatch.setattr(f'{COMMAND_MODULE}.sync_objects_by_pk', sync_objects_by_pk_mock)
+
+    caplog.set_level('INFO')
+
+    for test_data_item in TEST_DATA:
+        company = CompanyFactory(**test_data_item['company'])
+        InvestmentProjectFactory(investor_company=company)
+        InvestmentProjectFactory(intermediate_company=company)
+        InvestmentProjectFactory(uk_company=company)
+        OrderFactory(company=company)
+
+        DnBMatchingResultFactory(company=company, data=test_data_item['dnbmatchingresult_data'])
+
+    CompanyFactory(duns_number='000000007')
+
+    call_command('cleanse_companies_using_worldbase_match', simulate=simulate, batch_size=2)
+
+    assert caplog.messages == [
+        'Started',
+        (
+            'Company Dean-Gordon - 00000000-0000-0000-0000-000000000002 '
+            "failed: KeyError('Business Name')"
+        ),
+        'Finished - succeeded: 2, failed: 1, archived: 1',
+        (
+            'The following companies were archived but have related objects '
+            'so they might require futher offline work. Please check with your Product Manager:'
+        ),
+        (
+            f'{DATAHUB_FRONTEND_COMPANY_PREFIX}/00000000-0000-0000-0000-000000000006: '
+            'intermediate_investment_projects, investee_projects, investor_investment_projects, '
+            'orders'
+        ),
+    ]
+
+    for test_data_item in TEST_DATA:
+        company = Company.objects.get(id=test_data_item['company']['id'])
+        versions = Version.objects.get_for_object(company)
+
+        if not simulate:
+            actual_fields = {
+                field_name: getattr(company, field_name)
+                for field_name in test_data_item['expected_fields']
+            }
+            assert actual_fields == test_data_item['expected_fields']
+
+            if company.duns_number == test_data_item['company']['duns_number']:
+                assert versions.count() == 0
+            else:
+                assert versions.count() == 1
+                assert versions[0].revision.get_comment() == 'Updated from Dun & Bradstreet data.'
+        else:
+            assert company.duns_number == test_data_item['company']['duns_number']
+            assert versions.count() == 0
+
+    if simulate:
+        assert not sync_objects_by_pk_mock.called
+    else:
+        synced_pks = {
+            pk
+            for call in sync_objects_by_pk_mock.call_args_list
+            for pk in call[0][1]
+        }
+        assert synced_pks == {
+            uuid.UUID('00000000-0000-0000-0000-000000000001'),
+            uuid.UUID('00000000-0000-0000-0000-000000000006'),
+        }
+
+
+@freeze_time(FROZEN_TIME)
+def test_run_in_batches_with_batch_error(caplog, monkeypatch):
+    """
+    Test that if a batch can't be saved in batched mode, its companies are counted as failed
+    and the remaining batches are still processed.
+    """
+    monkeypatch.setattr(
+        f'{COMMAND_MODULE}.get_companies_queryset',
+        lambda: get_companies_queryset().order_by('id'),
+    )
+    monkeypatch.setattr(f'{COMMAND_MODULE}.sync_objects_by_pk', Mock())
+
+    original_add_to_revision_in_bulk = add_to_revision_in_bulk
+    num_calls = 0
+
+    def _add_to_revision_in_bulk(*args, **kwargs):
+        nonlocal num_calls
+
+        num_calls += 1
+        if num_calls == 1:
+            raise ValueError('Test error')
+        return original_add_to_revision_in_bulk(*args, **kwargs)
+
+    monkeypatch.setattr(f'{COMMAND_MODULE}.add_to_revision_in_bulk', _add_to_revision_in_bulk)
+
+    caplog.set_level('INFO')
+
+    for test_data_item in TEST_DATA:
+        company = CompanyFactory(**test_data_item['company'])
+        DnBMatchingResultFactory(company=company, data=test_data_item['dnbmatchingresult_data'])
+
+    CompanyFactory(duns_number='000000007')
+
+    call_command('cleanse_companies_using_worldbase_match', batch_size=1)
+
+    assert "Batch of 1 companies failed: ValueError('Test error')" in caplog.messages
+    assert 'Finished - succeeded: 1, failed: 2, archived: 1' in caplog.messages
+
+    # The first batch was rolled back
+    company = Company.objects.get(id=TEST_DATA[0]['company']['id'])
+    assert company.duns_number == TEST_DATA[0]['company']['duns_number']
+
+
+@freeze_time(FROZEN_TIME)
+def test_run_in_batches_with_sync_error(caplog, monkeypatch):
+    """
+    Test that if the companies in a batch are saved but can't be synced to Elasticsearch in
+    batched mode, they are still counted as succeeded and the sync failure is reported
+    separately.
+    """
+    monkeypatch.setattr(
+        f'{COMMAND_MODULE}.get_companies_queryset',
+        lambda: get_companies_queryset().order_by('id'),
+    )
+    monkeypatch.setattr(
+        f'{COMMAND_MODULE}.sync_objects_by_pk',
+        Mock(side_effect=ValueError('Test error')),
+    )
+
+    caplog.set_level('INFO')
+
+    for test_data_item in TEST_DATA:
+        company = CompanyFactory(**test_data_item['company'])
+        InvestmentProjectFactory(investor_company=company)
+        DnBMatchingResultFactory(company=company, data=test_data_item['dnbmatchingresult_data'])
+
+    CompanyFactory(duns_number='000000007')
+
+    call_command('cleanse_companies_using_worldbase_match', batch_size=1)
+
+    assert caplog.messages.count(
+        "Syncing a batch of 1 companies to Elasticsearch failed: ValueError('Test error')",
+    ) == 2
+    assert 'Finished - succeeded: 2, failed: 1, archived: 1' in caplog.messages
+    assert (
+        f'{DATAHUB_FRONTEND_COMPANY_PREFIX}/00000000-0000-0000-0000-000000000006: '
+        'investor_investment_projects'
+    ) in caplog.messages
+    assert (
+        '2 cleansed companies could not be synced to Elasticsearch. Please run sync_es to '
+        'sync them.'
+    ) in caplog.messages
+
+    # The changes were still committed
+    company = Company.objects.get(id=TEST_DATA[0]['company']['id'])
+    assert company.duns_number != TEST_DATA[0]['company']['duns_number']
+
+
 @pytest.mark.parametrize('simulate', (False, True))
 def test_run_without_any_matches(caplog, simulate):
     """
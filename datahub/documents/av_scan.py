@@ -1,15 +1,29 @@
+import hashlib
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
 from logging import getLogger
+from tempfile import SpooledTemporaryFile
+from threading import Lock
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 
+from datahub.core.locks import advisory_lock_pool
 from datahub.documents.exceptions import VirusScanException
 from datahub.documents.utils import get_document_by_pk
 
 logger = getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+SCAN_SLOT_LOCK_NAME = 'leeloo-av-scan-slot'
+# Files larger than this are spooled to disk (rather than kept in memory) while being scanned
+MAX_IN_MEMORY_FILE_SIZE = 10 * 1024 * 1024
+
 
 class StreamWrapper:
     """Stream wrapper that plays nice with MultipartEncoder."""
@@ -34,10 +48,111 @@ class StreamWrapper:
         return self._remaining_bytes
 
 
+class ScanMetrics:
+    """
+    Thread-safe counters and timings for virus scans performed by the current process.
+
+    The counters are:
+        scans: number of documents processed
+        cache_hits: number of documents whose content hash had already been scanned clean (so
+            the AV service was not called)
+        cache_misses: number of documents sent to the AV service
+        failures: number of scans that failed
+        download_secs: total time spent downloading and hashing files
+        scan_secs: total time spent waiting for and calling the AV service
+    """
+
+    def __init__(self):
+        """Initialises the metrics."""
+        self._lock = Lock()
+        self._counters = Counter()
+
+    def increment(self, **counts):
+        """Increments one or more counters."""
+        with self._lock:
+            self._counters.update(counts)
+
+    @contextmanager
+    def time(self, counter_name):
+        """Context manager that adds the time taken by a block of code to a counter."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.increment(**{counter_name: time.monotonic() - start})
+
+    def get_stats(self):
+        """Returns a copy of the counters, along with the cache hit rate."""
+        with self._lock:
+            stats = dict(self._counters)
+
+        lookups = stats.get('cache_hits', 0) + stats.get('cache_misses', 0)
+        stats['cache_hit_rate'] = stats.get('cache_hits', 0) / lookups if lookups else None
+        return stats
+
+    def reset(self):
+        """Resets all counters."""
+        with self._lock:
+            self._counters.clear()
+
+
+scan_metrics = ScanMetrics()
+
+_session = None
+_session_pid = None
+_process_state_lock = Lock()
+
+
+def get_av_session():
+    """
+    Gets the pooled HTTP session for the current process, creating it if necessary.
+
+    The session is used both to download files and to send them to the AV service, so that
+    connections are reused between scans. A new session is created after a fork (e.g. in each
+    Celery worker process).
+    """
+    _ensure_process_state()
+    return _session
+
+
+def scan_slot():
+    """
+    Returns a context manager that waits for (and holds) one of the
+    AV_V2_SERVICE_MAX_CONCURRENT_SCANS slots for calling the AV service.
+
+    The slots are shared by all processes (e.g. all Celery worker processes) using a pool of
+    PostgreSQL advisory locks, so the limit applies to all scans in total.
+    """
+    return advisory_lock_pool(SCAN_SLOT_LOCK_NAME, settings.AV_V2_SERVICE_MAX_CONCURRENT_SCANS)
+
+
+def _ensure_process_state():
+    global _session, _session_pid
+
+    with _process_state_lock:
+        if _session is not None and _session_pid == os.getpid():
+            return
+
+        max_concurrent_scans = settings.AV_V2_SERVICE_MAX_CONCURRENT_SCANS
+        adapter = HTTPAdapter(pool_maxsize=max_concurrent_scans)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        _session = session
+        _session_pid = os.getpid()
+
+
 def perform_virus_scan(document_pk: str, download_url: str):
     """
     Virus scans an uploaded document.
 
+    The file is downloaded (and spooled) while its SHA-256 hash is computed. If a document
+    with the same content hash has already been scanned clean, the document is marked as
+    clean without calling the AV service. Otherwise, the spooled file is sent to the AV
+    service once a scan slot (limited by AV_V2_SERVICE_MAX_CONCURRENT_SCANS in total across all
+    processes) is available.
+
     :param document_pk: pk of a document to be scanned
     :param download_url: URL to a file to be scanned
 
@@ -59,10 +174,12 @@ def perform_virus_scan(document_pk: str, download_url: str):
         return
 
     document.mark_scan_initiated()
+    scan_metrics.increment(scans=1)
 
     try:
-        result = _download_and_scan_file(str(document.pk), download_url)
+        result = _download_and_scan_document(document, download_url)
     except Exception as exc:
+        scan_metrics.increment(failures=1)
         document.mark_scan_failed(str(exc))
         logger.error(f'Virus scanning of document with ID {document_pk} failed.')
         raise
@@ -76,9 +193,50 @@ def perform_virus_scan(document_pk: str, download_url: str):
     )
 
 
-def _download_and_scan_file(document_pk: str, download_url: str):
-    """Virus scans a file stored on remote server."""
-    with requests.get(download_url, stream=True) as response:
+def _download_and_scan_document(document, download_url):
+    """
+    Downloads and hashes a file, and virus scans it unless its content hash has already been
+    scanned clean.
+    """
+    document_pk = str(document.pk)
+
+    with SpooledTemporaryFile(max_size=MAX_IN_MEMORY_FILE_SIZE) as file:
+        with scan_metrics.time('download_secs'):
+            content_hash, content_length, content_type = _download_file(
+                document_pk,
+                download_url,
+                file,
+            )
+
+        document.content_hash = content_hash
+        document.save(update_fields=('content_hash',))
+
+        if _is_content_hash_clean(document):
+            scan_metrics.increment(cache_hits=1)
+            logger.info(
+                f'Document with ID {document_pk} matches previously scanned clean content; '
+                f'skipping AV service.',
+            )
+            return {'malware': False, 'reason': None}
+
+        scan_metrics.increment(cache_misses=1)
+        file.seek(0)
+        content = StreamWrapper(file, content_length)
+
+        with scan_metrics.time('scan_secs'), scan_slot():
+            return _scan_stream(document_pk, content, content_type)
+
+
+def _download_file(document_pk, download_url, file):
+    """
+    Downloads a file to a file-like object, computing its hash.
+
+    :returns: tuple of (SHA-256 hex digest, content length, content type)
+    """
+    hasher = hashlib.sha256()
+    content_length = 0
+
+    with get_av_session().get(download_url, stream=True) as response:
         try:
             response.raise_for_status()
         except HTTPError as exc:
@@ -86,8 +244,23 @@ def _download_and_scan_file(document_pk: str, download_url: str):
                 f'Unable to download the document with ID {document_pk} '
                 f'for scanning (status_code={exc.response.status_code}).',
             ) from exc
-        content = StreamWrapper(response.raw, response.headers['content-length'])
-        return _scan_stream(document_pk, content, response.headers['content-type'])
+
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            file.write(chunk)
+            content_length += len(chunk)
+
+        return hasher.hexdigest(), content_length, response.headers['content-type']
+
+
+def _is_content_hash_clean(document):
+    """Checks if another document with the same content hash has been scanned clean."""
+    return document._meta.model.objects.filter(
+        content_hash=document.content_hash,
+        av_clean=True,
+    ).exclude(
+        pk=document.pk,
+    ).exists()
 
 
 def _multipart_encoder(document_pk, content, content_type):
@@ -105,7 +278,7 @@ def _multipart_encoder(document_pk, content, content_type):
 def _scan_stream(document_pk, content, content_type):
     """Virus scans a file-like object."""
     encoder = _multipart_encoder(document_pk, content, content_type)
-    response = requests.post(
+    response = get_av_session().post(
         # Assumes HTTP Basic auth in URL
         # see: https://github.com/uktrade/dit-clamav-rest
         settings.AV_V2_SERVICE_URL,
@@ -42,6 +42,9 @@ class Document(BaseModel, ArchivableModel):
 
     av_clean = models.BooleanField(null=True, db_index=True)
     av_reason = models.TextField(blank=True)
+    # SHA-256 hash of the file contents (set when the file is virus scanned), used to avoid
+    # scanning identical files more than once
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     status = models.CharField(
         max_length=settings.CHAR_FIELD_MAX_LENGTH,
@@ -1,12 +1,22 @@
+import hashlib
 from io import BytesIO
+from threading import Thread
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
 from requests.exceptions import HTTPError
 from requests_toolbelt.multipart.decoder import MultipartDecoder
 from rest_framework import status
 
-from datahub.documents.av_scan import _multipart_encoder, StreamWrapper, VirusScanException
+from datahub.core.locks import advisory_lock_pool
+from datahub.documents.av_scan import (
+    _multipart_encoder,
+    scan_metrics,
+    scan_slot,
+    StreamWrapper,
+    VirusScanException,
+)
 from datahub.documents.models import Document, UPLOAD_STATUSES
 from datahub.documents.tasks import virus_scan_document
 from datahub.documents.test.factories import DocumentFactory
@@ -14,6 +24,13 @@ from datahub.documents.test.factories import DocumentFactory
 pytestmark = pytest.mark.django_db
 
 
+@pytest.fixture(autouse=True)
+def reset_scan_metrics():
+    """Resets the virus scan metrics before each test."""
+    scan_metrics.reset()
+    yield
+
+
 @patch.object(Document, 'get_signed_url')
 def test_virus_scan_document_clean(get_signed_url_mock, requests_mock):
     """Tests virus scanning a clean file."""
@@ -39,6 +56,61 @@ def test_virus_scan_document_clean(get_signed_url_mock, requests_mock):
     virus_scan_document.apply(args=(str(document.id), )).get()
     document.refresh_from_db()
     assert document.av_clean is True
+    assert document.content_hash == hashlib.sha256(b'hello!').hexdigest()
+
+
+@pytest.mark.parametrize(
+    'existing_document_kwargs,expected_av_requests',
+    (
+        # Identical content previously scanned clean
+        ({'av_clean': True}, 0),
+        # Identical content previously found to be infected
+        ({'av_clean': False}, 1),
+        # Identical content not scanned yet
+        ({'av_clean': None}, 1),
+    ),
+)
+@patch.object(Document, 'get_signed_url')
+def test_virus_scan_document_deduplication(
+    get_signed_url_mock,
+    requests_mock,
+    existing_document_kwargs,
+    expected_av_requests,
+):
+    """Tests that files with content already scanned clean are not sent to the AV service."""
+    get_signed_url_mock.return_value = 'http://url'
+    DocumentFactory(
+        content_hash=hashlib.sha256(b'hello!').hexdigest(),
+        **existing_document_kwargs,
+    )
+    document = DocumentFactory()
+    requests_mock.get(
+        'http://url',
+        text='hello!',
+        headers={
+            'Content-Type': 'text/plain',
+            'Content-Length': '6',
+        },
+    )
+    av_matcher = requests_mock.post(
+        'http://av-service/',
+        json={
+            'malware': False,
+            'reason': None,
+            'time': 0.2,
+        },
+    )
+
+    virus_scan_document.apply(args=(str(document.id), )).get()
+    document.refresh_from_db()
+    assert document.av_clean is True
+    assert document.status == UPLOAD_STATUSES.virus_scanned
+    assert av_matcher.call_count == expected_av_requests
+
+    stats = scan_metrics.get_stats()
+    assert stats['scans'] == 1
+    assert stats['cache_hits'] == 1 - expected_av_requests
+    assert stats['cache_hit_rate'] == 1 - expected_av_requests
 
 
 @patch.object(Document, 'get_signed_url')
@@ -103,6 +175,7 @@ def test_virus_scan_document_bad_response_body(get_signed_url_mock, requests_moc
     assert document.av_clean is None
     assert document.status == UPLOAD_STATUSES.virus_scanning_failed
     assert document.av_reason == error_message
+    assert scan_metrics.get_stats()['failures'] == 1
 
 
 @patch.object(Document, 'get_signed_url')
@@ -160,3 +233,31 @@ def test_file_is_being_encoded():
     decoder = MultipartDecoder(response_data, form.content_type)
 
     assert decoder.parts[0].content == data
+
+
+def test_scan_slots_are_shared_between_connections(settings):
+    """
+    Test that the AV_V2_SERVICE_MAX_CONCURRENT_SCANS limit applies across database
+    connections (and hence across processes).
+    """
+    settings.AV_V2_SERVICE_MAX_CONCURRENT_SCANS = 1
+    results = []
+
+    def _try_scan_slot():
+        try:
+            with scan_slot() as acquired:
+                results.append(acquired)
+        finally:
+            connection.close()
+
+    with scan_slot():
+        # Use a non-blocking attempt in another connection to check that the slot is taken
+        with patch('datahub.documents.av_scan.advisory_lock_pool') as advisory_lock_pool_mock:
+            advisory_lock_pool_mock.side_effect = (
+                lambda name, size: advisory_lock_pool(name, size, wait=False)
+            )
+            thread = Thread(target=_try_scan_slot)
+            thread.start()
+            thread.join()
+
+    assert results == [False]
@@ -8,6 +8,7 @@ from rest_framework.settings import api_settings
 
 from datahub.company.models import Company, Contact
 from datahub.company.serializers import NestedAdviserField
+from datahub.core.compiled_serializers import CompiledListSerializer
 from datahub.core.serializers import NestedRelatedField
 from datahub.core.validate_utils import DataCombiner, is_blank, is_not_blank
 from datahub.core.validators import (
@@ -333,6 +334,7 @@ class InteractionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Interaction
+        list_serializer_class = CompiledListSerializer
         extra_kwargs = {
             # Date is a datetime in the model, but only the date component is used
             # (at present). Setting the formats as below effectively makes the field
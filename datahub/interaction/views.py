@@ -3,6 +3,7 @@ from oauth2_provider.contrib.rest_framework import IsAuthenticatedOrTokenHasScop
 from rest_framework.filters import OrderingFilter
 
 from datahub.core.mixins import ArchivableViewSetMixin
+from datahub.core.pagination import EstimatedCountPagination
 from datahub.core.viewsets import CoreViewSet
 from datahub.interaction.permissions import (
     InteractionModelPermissions,
@@ -45,3 +46,9 @@ class InteractionViewSet(ArchivableViewSetMixin, CoreViewSet):
         'subject',
     )
     ordering = ('-date', '-created_on')
+    pagination_class = EstimatedCountPagination
+    # See datahub.core.instrumentation
+    query_budget = {
+        'list': 30,
+        'retrieve': 30,
+    }
@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investment', '0062_auto_20190405_1338'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investmentproject',
+            index=models.Index(fields=['modified_on', 'id'], name='investment__modifie_30238e_idx'),
+        ),
+    ]
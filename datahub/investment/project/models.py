@@ -528,6 +528,10 @@ class InvestmentProject(
             'delete',
             'view_all',
         )
+        indexes = [
+            # For keyset pagination in the modified-since view
+            models.Index(fields=['modified_on', 'id']),
+        ]
 
     def get_associated_advisers(self):
         """Get the advisers associated with the project."""
@@ -0,0 +1,432 @@
+"""
+Lean representation of investment projects for the modified-since endpoint.
+
+Rather than using IProjectSerializer (which needs every related object to be loaded as a
+model instance), each page of projects is built from a values() query with annotations for
+the fields of related objects. To-many fields, team members and stage logs are loaded using
+one values() query each per page, and the completeness fields (incomplete_fields,
+value_complete etc.) are worked out using the same stage validation rules as
+IProjectSerializer. Projects have the same representation as in IProjectSerializer.
+
+Results are ordered by (modified_on, id) and paginated using keyset pagination, with the last
+(modified_on, id) pair of a page encoded in a continuation token (the cursor query parameter).
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from uuid import UUID
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+from datahub.core.query_utils import get_full_name_expression
+from datahub.investment.project.models import (
+    InvestmentProject,
+    InvestmentProjectStageLog,
+    InvestmentProjectTeamMember,
+)
+from datahub.investment.project.query_utils import get_project_code_expression
+from datahub.investment.project.serializers import (
+    REQUIREMENTS_FIELDS,
+    TEAM_FIELDS,
+    VALUE_FIELDS,
+)
+from datahub.investment.project.validate import InvestmentProjectStageValidationConfig, validate
+from datahub.mi_dashboard.query_utils import get_level_of_involvement_simplified_expression
+
+PAGE_SIZE = 1000
+
+# The fields of related objects in their representations, as (key, field name) pairs (or
+# (key, function returning an expression for the path of the related object) pairs)
+NAME_FIELDS = (('name', 'name'),)
+PERSON_FIELDS = (('name', get_full_name_expression),)
+ADVISER_FIELDS = (
+    ('name', get_full_name_expression),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+)
+SECTOR_FIELDS = (('name', 'full_name'),)
+PROJECT_FIELDS = (
+    ('name', 'name'),
+    ('project_code', get_project_code_expression),
+)
+
+SCALAR_FIELDS = (
+    'id',
+    'name',
+    'description',
+    'comments',
+    'anonymous_description',
+    'allow_blank_estimated_land_date',
+    'estimated_land_date',
+    'actual_land_date',
+    'quotable_as_public_case_study',
+    'priority',
+    'approved_commitment_to_invest',
+    'approved_fdi',
+    'approved_good_value',
+    'approved_high_value',
+    'approved_landed',
+    'approved_non_fdi',
+    'status',
+    'reason_delayed',
+    'reason_abandoned',
+    'date_abandoned',
+    'reason_lost',
+    'date_lost',
+    'referral_source_activity_event',
+    'other_business_activity',
+    'client_cannot_provide_total_investment',
+    'total_investment',
+    'client_cannot_provide_foreign_investment',
+    'foreign_equity_investment',
+    'government_assistance',
+    'some_new_jobs',
+    'number_new_jobs',
+    'will_new_jobs_last_two_years',
+    'number_safeguarded_jobs',
+    'r_and_d_budget',
+    'non_fdi_r_and_d_budget',
+    'new_tech_to_uk',
+    'export_revenue',
+    'gross_value_added',
+    'client_requirements',
+    'site_decided',
+    'address_1',
+    'address_2',
+    'address_town',
+    'address_postcode',
+    'client_considering_other_countries',
+    'uk_company_decided',
+    'allow_blank_possible_uk_regions',
+    'project_manager_requested_on',
+    'project_arrived_in_triage_on',
+    'proposal_deadline',
+    'archived',
+    'archived_on',
+    'archived_reason',
+    'created_on',
+    'modified_on',
+)
+
+# Mapping of output key to (path of the related object, fields of the related object)
+TO_ONE_FIELDS = {
+    'investment_type': ('investment_type', NAME_FIELDS),
+    'likelihood_to_land': ('likelihood_to_land', NAME_FIELDS),
+    'stage': ('stage', NAME_FIELDS),
+    'country_lost_to': ('country_lost_to', NAME_FIELDS),
+    'country_investment_originates_from': ('country_investment_originates_from', NAME_FIELDS),
+    'investor_company': ('investor_company', NAME_FIELDS),
+    'investor_company_country': ('investor_company__address_country', NAME_FIELDS),
+    'investor_type': ('investor_type', NAME_FIELDS),
+    'intermediate_company': ('intermediate_company', NAME_FIELDS),
+    'level_of_involvement': ('level_of_involvement', NAME_FIELDS),
+    'specific_programme': ('specific_programme', NAME_FIELDS),
+    'client_relationship_manager': ('client_relationship_manager', ADVISER_FIELDS),
+    'client_relationship_manager_team': ('client_relationship_manager__dit_team', NAME_FIELDS),
+    'referral_source_adviser': ('referral_source_adviser', ADVISER_FIELDS),
+    'referral_source_activity': ('referral_source_activity', NAME_FIELDS),
+    'referral_source_activity_website': ('referral_source_activity_website', NAME_FIELDS),
+    'referral_source_activity_marketing': ('referral_source_activity_marketing', NAME_FIELDS),
+    'fdi_type': ('fdi_type', NAME_FIELDS),
+    'sector': ('sector', SECTOR_FIELDS),
+    'archived_by': ('archived_by', ADVISER_FIELDS),
+    'project_manager_request_status': ('project_manager_request_status', NAME_FIELDS),
+    'fdi_value': ('fdi_value', NAME_FIELDS),
+    'average_salary': ('average_salary', NAME_FIELDS),
+    'associated_non_fdi_r_and_d_project': ('associated_non_fdi_r_and_d_project', PROJECT_FIELDS),
+    'uk_company': ('uk_company', NAME_FIELDS),
+    'project_manager': ('project_manager', ADVISER_FIELDS),
+    'project_assurance_adviser': ('project_assurance_adviser', ADVISER_FIELDS),
+    'project_manager_team': ('project_manager__dit_team', NAME_FIELDS),
+    'project_assurance_team': ('project_assurance_adviser__dit_team', NAME_FIELDS),
+}
+
+# Mapping of many-to-many field to the fields of the related model
+TO_MANY_FIELDS = {
+    'business_activities': NAME_FIELDS,
+    'client_contacts': PERSON_FIELDS,
+    'competitor_countries': NAME_FIELDS,
+    'uk_region_locations': NAME_FIELDS,
+    'actual_uk_regions': NAME_FIELDS,
+    'delivery_partners': NAME_FIELDS,
+    'strategic_drivers': NAME_FIELDS,
+}
+
+# Stand-in for related objects when validating projects (as validate() only uses the IDs
+# of related objects and the order of the stage)
+_RelatedObject = namedtuple('_RelatedObject', ('id', 'order'), defaults=(None,))
+
+
+def get_modified_since_queryset(queryset, page_size, after=None):
+    """
+    Gets a values() query set for one page of results.
+
+    :param queryset: the (filtered) InvestmentProject query set
+    :param page_size: the maximum number of projects to return
+    :param after: the (modified_on, id) pair of the last project of the previous page, if any
+    """
+    if after:
+        queryset = queryset.filter(_get_keyset_filter(*after))
+
+    annotations = {
+        'project_code': get_project_code_expression(),
+        'level_of_involvement_simplified': get_level_of_involvement_simplified_expression(),
+        '_stage_order': F('stage__order'),
+    }
+    for key, (field_path, related_fields) in TO_ONE_FIELDS.items():
+        annotations[f'_{key}_id'] = F(f'{field_path}__pk')
+        annotations.update(
+            (f'_{key}_{related_key}', _get_expression(field_path, related_field))
+            for related_key, related_field in related_fields
+        )
+
+    # modified_on is nullable, and PostgreSQL sorts nulls last in ascending order
+    return queryset.order_by(
+        'modified_on',
+        'pk',
+    ).values(
+        *SCALAR_FIELDS,
+        **annotations,
+    )[:page_size]
+
+
+def get_projects(values_queryset):
+    """
+    Evaluates a query set returned by get_modified_since_queryset(), returning a list of
+    projects as dicts.
+    """
+    rows = list(values_queryset)
+    project_ids = [row['id'] for row in rows]
+
+    to_many_values = {
+        field_name: _get_to_many_values(field_name, related_fields, project_ids)
+        for field_name, related_fields in TO_MANY_FIELDS.items()
+    }
+    team_members = _get_team_members(project_ids)
+    stage_logs = _get_stage_logs(project_ids)
+    validation_config = InvestmentProjectStageValidationConfig()
+
+    projects = []
+    for row in rows:
+        project = {
+            **{field: row[field] for field in SCALAR_FIELDS},
+            'project_code': row['project_code'],
+            'level_of_involvement_simplified': row['level_of_involvement_simplified'],
+            **{
+                key: _format_related_object(row[f'_{key}_id'], row, f'_{key}_', related_fields)
+                for key, (_, related_fields) in TO_ONE_FIELDS.items()
+            },
+            **{
+                field_name: values[row['id']]
+                for field_name, values in to_many_values.items()
+            },
+            'team_members': team_members[row['id']],
+            'stage_log': stage_logs[row['id']],
+        }
+        project.update(_get_completeness_fields(row, project, validation_config))
+        projects.append(project)
+
+    return projects
+
+
+def encode_json_page(count, projects, next_url):
+    """
+    Encodes a page of projects as a JSON document of the form
+    {"count": ..., "next": ..., "results": [...]}.
+
+    :returns: list of the parts of the document (one per project, plus the start and end)
+    """
+    encoder = _JSONEncoder()
+    parts = [f'{{"count": {count}, "next": {encoder.encode(next_url)}, "results": [']
+
+    for index, project in enumerate(projects):
+        separator = ', ' if index else ''
+        parts.append(f'{separator}{encoder.encode(project)}')
+
+    parts.append(']}')
+    return parts
+
+
+def encode_cursor(project):
+    """Encodes the (modified_on, id) pair of a project as a continuation token."""
+    modified_on = project['modified_on']
+    data = [modified_on.isoformat() if modified_on else None, str(project['id'])]
+    return urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a continuation token as a (modified_on, id) pair.
+
+    :raises ValueError: if the token is invalid
+    """
+    try:
+        raw_modified_on, raw_id = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+        modified_on = parse_datetime(raw_modified_on) if raw_modified_on is not None else None
+        pk = UUID(raw_id)
+    except (BinasciiError, TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+    if raw_modified_on is not None and modified_on is None:
+        raise ValueError('Invalid cursor')
+
+    return modified_on, pk
+
+
+class _JSONEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder that formats datetimes in the same way as Django REST framework (i.e. in
+    full, rather than truncated to milliseconds as DjangoJSONEncoder does).
+    """
+
+    def default(self, o):
+        """Encodes datetimes as DRF does (and other values as DjangoJSONEncoder does)."""
+        if isinstance(o, datetime):
+            value = o.isoformat()
+            if value.endswith('+00:00'):
+                value = f'{value[:-6]}Z'
+            return value
+
+        return super().default(o)
+
+
+def _get_keyset_filter(modified_on, pk):
+    if modified_on is None:
+        return Q(modified_on__isnull=True, pk__gt=pk)
+
+    return (
+        Q(modified_on__gt=modified_on)
+        | Q(modified_on=modified_on, pk__gt=pk)
+        | Q(modified_on__isnull=True)
+    )
+
+
+def _get_expression(field_path, related_field):
+    if callable(related_field):
+        return related_field(field_path)
+    return F(f'{field_path}__{related_field}')
+
+
+def _format_related_object(pk, values, prefix, related_fields):
+    """
+    Formats a related object in the same way as NestedRelatedField.
+
+    :param values: dict containing the values of the fields of the related object (with keys
+        of the form <prefix><key>)
+    """
+    if pk is None:
+        return None
+
+    return {
+        **{key: values[f'{prefix}{key}'] for key, _ in related_fields},
+        'id': str(pk),
+    }
+
+
+def _get_completeness_fields(row, project, validation_config):
+    """
+    Gets the values of the fields that indicate whether the fields needed to move to the next
+    stage have been filled in (as returned by IProjectSerializer).
+    """
+    data = {
+        **{field: row[field] for field in SCALAR_FIELDS},
+        **{
+            key: _RelatedObject(row[f'_{key}_id']) if row[f'_{key}_id'] is not None else None
+            for key in TO_ONE_FIELDS
+        },
+        **{
+            field_name: [value['id'] for value in project[field_name]]
+            for field_name in TO_MANY_FIELDS
+        },
+        'stage': _RelatedObject(row['_stage_id'], row['_stage_order']),
+    }
+    errors = validate(update_data=data, next_stage=True, validation_config=validation_config)
+
+    return {
+        'incomplete_fields': list(errors),
+        'value_complete': errors.keys().isdisjoint(VALUE_FIELDS),
+        'requirements_complete': errors.keys().isdisjoint(REQUIREMENTS_FIELDS),
+        'team_complete': errors.keys().isdisjoint(TEAM_FIELDS),
+    }
+
+
+def _get_to_many_values(field_name, related_fields, project_ids):
+    field = InvestmentProject._meta.get_field(field_name)
+    source_field_name = field.m2m_field_name()
+    target_field_name = field.m2m_reverse_field_name()
+
+    rows = field.remote_field.through.objects.filter(
+        **{f'{source_field_name}__in': project_ids},
+    ).values(
+        _project_id=F(source_field_name),
+        _id=F(target_field_name),
+        **{
+            f'_{key}': _get_expression(target_field_name, related_field)
+            for key, related_field in related_fields
+        },
+    )
+
+    values = defaultdict(list)
+    for row in rows:
+        values[row['_project_id']].append(
+            _format_related_object(row['_id'], row, '_', related_fields),
+        )
+
+    for project_values in values.values():
+        project_values.sort(key=lambda item: (item['name'] or '', item['id']))
+
+    return values
+
+
+def _get_team_members(project_ids):
+    rows = InvestmentProjectTeamMember.objects.filter(
+        investment_project__in=project_ids,
+    ).values(
+        'investment_project',
+        'adviser',
+        'role',
+        **{
+            f'_adviser_{key}': _get_expression('adviser', related_field)
+            for key, related_field in ADVISER_FIELDS
+        },
+    )
+
+    team_members = defaultdict(list)
+    for row in rows:
+        team_members[row['investment_project']].append({
+            'adviser': _format_related_object(row['adviser'], row, '_adviser_', ADVISER_FIELDS),
+            'role': row['role'],
+        })
+
+    for project_team_members in team_members.values():
+        project_team_members.sort(
+            key=lambda item: (item['adviser']['name'] or '', item['adviser']['id']),
+        )
+
+    return team_members
+
+
+def _get_stage_logs(project_ids):
+    rows = InvestmentProjectStageLog.objects.filter(
+        investment_project__in=project_ids,
+    ).order_by(
+        'created_on',
+    ).values_list(
+        'investment_project',
+        'stage',
+        'stage__name',
+        'created_on',
+    )
+
+    stage_logs = defaultdict(list)
+    for project_id, stage_id, stage_name, created_on in rows:
+        stage_logs[project_id].append({
+            'stage': {'name': stage_name, 'id': str(stage_id)},
+            'created_on': created_on,
+        })
+
+    return stage_logs
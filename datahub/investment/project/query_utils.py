@@ -2,13 +2,20 @@ from django.db.models import Func, TextField, Value
 from django.db.models.functions import Coalesce, Concat
 
 
-def get_project_code_expression():
-    """Gets an SQL expression that returns the formatted project code for an investment project."""
+def get_project_code_expression(field_path=None):
+    """
+    Gets an SQL expression that returns the formatted project code for an investment project.
+
+    :param field_path: the path of the investment project (if the expression is being used
+        on a related model's query set)
+    """
+    prefix = f'{field_path}__' if field_path else ''
+
     return Coalesce(
-        'cdms_project_code',
+        f'{prefix}cdms_project_code',
         Concat(
             Value('DHP-'),
-            Func('investmentprojectcode', Value('fm00000000'), function='to_char'),
+            Func(f'{prefix}investmentprojectcode', Value('fm00000000'), function='to_char'),
         ),
         output_field=TextField(),
     )
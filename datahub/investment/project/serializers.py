@@ -4,6 +4,7 @@ from functools import partial
 
 import reversion
 from django.db.transaction import atomic
+from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy
 from rest_framework import serializers
@@ -11,6 +12,7 @@ from rest_framework import serializers
 import datahub.metadata.models as meta_models
 from datahub.company.models import Company, Contact
 from datahub.company.serializers import NestedAdviserField
+from datahub.core.compiled_serializers import CompiledListSerializer
 from datahub.core.constants import InvestmentProjectStage
 from datahub.core.serializers import NestedRelatedField, PermittedFieldsModelSerializer
 from datahub.core.validate_utils import DataCombiner
@@ -32,7 +34,11 @@ from datahub.investment.project.models import (
     ProjectManagerRequestStatus,
     SpecificProgramme,
 )
-from datahub.investment.project.validate import REQUIRED_MESSAGE, validate
+from datahub.investment.project.validate import (
+    InvestmentProjectStageValidationConfig,
+    REQUIRED_MESSAGE,
+    validate,
+)
 
 CORE_FIELDS = (
     'id',
@@ -460,26 +466,51 @@ class IProjectSerializer(PermittedFieldsModelSerializer, NoteAwareModelSerialize
         """Returns the names of the fields that still need to be completed in order to
         move to the next stage.
         """
-        return tuple(validate(instance=instance, next_stage=True))
+        return tuple(
+            validate(
+                instance=instance,
+                next_stage=True,
+                validation_config=self._validation_config,
+            ),
+        )
 
     def get_value_complete(self, instance):
         """Whether the value fields required to move to the next stage are complete."""
         return not validate(
-            instance=instance, fields=VALUE_FIELDS, next_stage=True,
+            instance=instance,
+            fields=VALUE_FIELDS,
+            next_stage=True,
+            validation_config=self._validation_config,
         )
 
     def get_requirements_complete(self, instance):
         """Whether the requirements fields required to move to the next stage are complete."""
         return not validate(
-            instance=instance, fields=REQUIREMENTS_FIELDS, next_stage=True,
+            instance=instance,
+            fields=REQUIREMENTS_FIELDS,
+            next_stage=True,
+            validation_config=self._validation_config,
         )
 
     def get_team_complete(self, instance):
         """Whether the team fields required to move to the next stage are complete."""
         return not validate(
-            instance=instance, fields=TEAM_FIELDS, next_stage=True,
+            instance=instance,
+            fields=TEAM_FIELDS,
+            next_stage=True,
+            validation_config=self._validation_config,
         )
 
+    @cached_property
+    def _validation_config(self):
+        """
+        The stage validation config used for the completeness fields.
+
+        This is created once per serializer (rather than once per field and object) as it
+        checks feature flags using the database.
+        """
+        return InvestmentProjectStageValidationConfig()
+
     def _update_status(self, data):
         """Updates the project status when the stage changes to or from Won."""
         old_stage = self.instance.stage if self.instance else None
@@ -502,6 +533,7 @@ class IProjectSerializer(PermittedFieldsModelSerializer, NoteAwareModelSerialize
     class Meta:
         model = InvestmentProject
         fields = ALL_FIELDS
+        list_serializer_class = CompiledListSerializer
         permissions = {
             f'investment.{InvestmentProjectPermission.view_investmentproject_document}':
                 'archived_documents_url_path',
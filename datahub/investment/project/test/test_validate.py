@@ -383,7 +383,8 @@ def set_streamlined_flow_feature_flag_active():
 )
 def test_get_desired_stage_order(desired_stage, next_stage, expected_stage_order):
     """Tests get desired stage order when streamlined investment flow flag is not set."""
-    assert _get_desired_stage_order(desired_stage, next_stage) == expected_stage_order
+    stage_order = _get_desired_stage_order(desired_stage, next_stage, False)
+    assert stage_order == expected_stage_order
 
 
 class TestValidationConfig:
@@ -440,4 +441,5 @@ class TestValidationConfigWithStreamlinedFeature(TestValidationConfig):
             self, desired_stage, next_stage, expected_stage_order,
     ):
         """Tests get desired stage order when streamlined investment flow feature is active."""
-        assert _get_desired_stage_order(desired_stage, next_stage) == expected_stage_order
+        stage_order = _get_desired_stage_order(desired_stage, next_stage, True)
+        assert stage_order == expected_stage_order
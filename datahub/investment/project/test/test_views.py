@@ -1,5 +1,6 @@
 """Tests for investment views."""
 
+import json
 import re
 import uuid
 from collections import Counter
@@ -15,6 +16,7 @@ from django.utils.timezone import now, utc
 from freezegun import freeze_time
 from oauth2_provider.models import Application
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
 from reversion.models import Version
 
@@ -40,8 +42,10 @@ from datahub.investment.project.models import (
     InvestmentDeliveryPartner,
     InvestmentProject,
     InvestmentProjectPermission,
+    InvestmentProjectStageLog,
     InvestmentProjectTeamMember,
 )
+from datahub.investment.project.serializers import IProjectSerializer
 from datahub.investment.project.test.factories import (
     ActiveInvestmentProjectFactory,
     AssignPMInvestmentProjectFactory,
@@ -2335,14 +2339,18 @@ class TestInvestmentProjectVersioning(APITestMixin):
 class TestModifiedSinceView(APITestMixin):
     """Tests for the modified-since view."""
 
-    def _make_request(self, data=None):
-        url = reverse('api-v3:investment:investment-modified-since-collection')
+    def _make_request(self, data=None, url=None):
+        url = url or reverse('api-v3:investment:investment-modified-since-collection')
         client = self.create_api_client(
             scope=Scope.mi,
             grant_type=Application.GRANT_CLIENT_CREDENTIALS,
         )
         return client.get(url, data=data)
 
+    @staticmethod
+    def _get_response_data(response):
+        return json.loads(b''.join(response.streaming_content))
+
     @pytest.mark.parametrize(
         'timestamp,num_results',
         (
@@ -2363,8 +2371,10 @@ class TestModifiedSinceView(APITestMixin):
         })
 
         assert response.status_code == status.HTTP_200_OK
-        response_data = response.json()
+        response_data = self._get_response_data(response)
         assert response_data['count'] == num_results
+        assert len(response_data['results']) == num_results
+        assert response_data['next'] is None
 
     @pytest.mark.parametrize(
         'timestamp,num_results',
@@ -2386,8 +2396,9 @@ class TestModifiedSinceView(APITestMixin):
         })
 
         assert response.status_code == status.HTTP_200_OK
-        response_data = response.json()
+        response_data = self._get_response_data(response)
         assert response_data['count'] == num_results
+        assert len(response_data['results']) == num_results
 
     @pytest.mark.parametrize(
         'from_,until,num_results',
@@ -2413,8 +2424,9 @@ class TestModifiedSinceView(APITestMixin):
         })
 
         assert response.status_code == status.HTTP_200_OK
-        response_data = response.json()
+        response_data = self._get_response_data(response)
         assert response_data['count'] == num_results
+        assert len(response_data['results']) == num_results
 
     def test_get_all(self):
         """Test that all results are returned if no filter value is provided."""
@@ -2423,8 +2435,197 @@ class TestModifiedSinceView(APITestMixin):
         response = self._make_request()
 
         assert response.status_code == status.HTTP_200_OK
-        response_data = response.json()
-        assert response_data['count'] == 9
+        response_data = self._get_response_data(response)
+        assert len(response_data['results']) == 9
+
+    @pytest.mark.parametrize('page_size', (1, 2, 3, 5))
+    def test_keyset_pagination(self, monkeypatch, page_size):
+        """
+        Test that following the next links returns every project once, ordered by
+        modified_on and then ID (with null modified_on values last).
+        """
+        monkeypatch.setattr(views.IProjectModifiedSinceViewSet, 'page_size', page_size)
+
+        with freeze_time(datetime(2018, 1, 1)):
+            projects = InvestmentProjectFactory.create_batch(3)
+        with freeze_time(datetime(2017, 1, 1)):
+            projects.append(InvestmentProjectFactory())
+        InvestmentProject.objects.filter(pk=projects[0].pk).update(modified_on=None)
+
+        expected_ids = [
+            str(projects[3].pk),
+            *sorted(str(project.pk) for project in projects[1:3]),
+            str(projects[0].pk),
+        ]
+
+        ids = []
+        url = None
+        for _ in range(len(expected_ids) + 1):
+            response = self._make_request(url=url)
+            assert response.status_code == status.HTTP_200_OK
+            response_data = self._get_response_data(response)
+            assert response_data['count'] == len(expected_ids)
+            assert len(response_data['results']) <= page_size
+            ids.extend(result['id'] for result in response_data['results'])
+
+            url = response_data['next']
+            if not url:
+                break
+
+        assert ids == expected_ids
+
+    def test_next_link_preserves_filters(self, monkeypatch):
+        """Test that the next link includes the filters of the current request."""
+        monkeypatch.setattr(views.IProjectModifiedSinceViewSet, 'page_size', 1)
+        with freeze_time(datetime(2017, 1, 1)):
+            InvestmentProjectFactory()
+        with freeze_time(datetime(2018, 1, 1)):
+            InvestmentProjectFactory.create_batch(2)
+
+        response = self._make_request({'modified_on__gte': '2017-12-31T00:00:00'})
+        response_data = self._get_response_data(response)
+        assert 'modified_on__gte=2017-12-31T00%3A00%3A00' in response_data['next']
+
+        response = self._make_request(url=response_data['next'])
+        response_data = self._get_response_data(response)
+        assert len(response_data['results']) == 1
+        assert response_data['results'][0]['modified_on'].startswith('2018-01-01')
+
+    @pytest.mark.parametrize('cursor', ('invalid', 'WyJ4IiwgInkiXQ=='))
+    def test_invalid_cursor(self, cursor):
+        """Test that a 404 is returned for an invalid cursor."""
+        response = self._make_request({'cursor': cursor})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_response_body(self):
+        """Test the representation of a project (including related objects)."""
+        adviser = AdviserFactory(first_name='Adam', last_name='Smith')
+        project = InvestmentProjectFactory(client_relationship_manager=adviser)
+        InvestmentProjectTeamMemberFactory(
+            investment_project=project,
+            adviser=adviser,
+            role='Sector adviser',
+        )
+
+        response = self._make_request()
+        assert response.status_code == status.HTTP_200_OK
+        results = self._get_response_data(response)['results']
+        assert len(results) == 1
+
+        result = results[0]
+        assert result['id'] == str(project.pk)
+        assert result['name'] == project.name
+        assert result['project_code'] == project.project_code
+        assert result['stage'] == {
+            'id': str(project.stage.pk),
+            'name': project.stage.name,
+        }
+        assert result['investor_company'] == {
+            'id': str(project.investor_company.pk),
+            'name': project.investor_company.name,
+        }
+        assert result['client_relationship_manager'] == {
+            'id': str(adviser.pk),
+            'name': 'Adam Smith',
+            'first_name': 'Adam',
+            'last_name': 'Smith',
+        }
+        assert result['sector'] == {
+            'id': str(project.sector.pk),
+            'name': project.sector.name,
+        }
+        assert result['country_lost_to'] is None
+        assert result['business_activities'] == [
+            {
+                'id': constants.InvestmentBusinessActivity.retail.value.id,
+                'name': constants.InvestmentBusinessActivity.retail.value.name,
+            },
+        ]
+        assert result['client_contacts'] == sorted(
+            (
+                {'id': str(contact.pk), 'name': contact.name}
+                for contact in project.client_contacts.all()
+            ),
+            key=lambda item: (item['name'], item['id']),
+        )
+        assert result['team_members'] == [
+            {
+                'adviser': {
+                    'id': str(adviser.pk),
+                    'name': 'Adam Smith',
+                    'first_name': 'Adam',
+                    'last_name': 'Smith',
+                },
+                'role': 'Sector adviser',
+            },
+        ]
+
+    @pytest.mark.parametrize(
+        'factory_class',
+        (
+            InvestmentProjectFactory,
+            AssignPMInvestmentProjectFactory,
+            ActiveInvestmentProjectFactory,
+            VerifyWinInvestmentProjectFactory,
+            WonInvestmentProjectFactory,
+        ),
+    )
+    @pytest.mark.parametrize('is_streamlined_flow_active', (False, True))
+    def test_response_body_matches_serializer(self, factory_class, is_streamlined_flow_active):
+        """
+        Test that projects have the same representation as in IProjectSerializer (including
+        the completeness fields and the stage log).
+        """
+        if is_streamlined_flow_active:
+            FeatureFlagFactory(code=FEATURE_FLAG_STREAMLINED_FLOW)
+
+        with freeze_time(datetime(2017, 1, 1)):
+            associated_project = InvestmentProjectFactory()
+
+        with freeze_time(datetime(2019, 1, 1, 1, 2, 3, 456789)):
+            project = factory_class(associated_non_fdi_r_and_d_project=associated_project)
+            InvestmentProjectStageLog.objects.create(
+                investment_project=project,
+                stage_id=constants.InvestmentProjectStage.prospect.value.id,
+                created_on=datetime(2018, 1, 1, tzinfo=utc),
+            )
+            InvestmentProjectTeamMemberFactory(investment_project=project)
+
+        # Make sure that IDs are UUIDs (rather than strings) when using the serialiser
+        project.refresh_from_db()
+
+        response = self._make_request({'modified_on__gte': '2018-12-31T00:00:00'})
+        assert response.status_code == status.HTTP_200_OK
+        results = self._get_response_data(response)['results']
+
+        # Serialised without a request, so that the permission-dependent field is included
+        expected_result = json.loads(JSONRenderer().render(IProjectSerializer(project).data))
+        del expected_result['archived_documents_url_path']
+
+        assert len(results) == 1
+        assert _sort_lists(results[0]) == _sort_lists(expected_result)
+
+    def test_error_while_serialising(self, monkeypatch):
+        """Test that errors result in an error response rather than a truncated one."""
+        monkeypatch.setattr(
+            'datahub.investment.project.modified_since._get_stage_logs',
+            mock.Mock(side_effect=ValueError),
+        )
+        InvestmentProjectFactory()
+
+        with pytest.raises(ValueError):
+            self._make_request()
+
+
+def _sort_lists(value):
+    """Recursively sorts the lists in a representation (so that they can be compared)."""
+    if isinstance(value, dict):
+        return {key: _sort_lists(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return sorted((_sort_lists(item) for item in value), key=json.dumps)
+
+    return value
 
 
 class TestAddTeamMemberView(APITestMixin):
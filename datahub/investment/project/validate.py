@@ -122,21 +122,35 @@ class InvestmentProjectStageValidationConfig:
         }
 
 
-def validate(instance=None, update_data=None, fields=None, next_stage=False):
+def validate(
+    instance=None,
+    update_data=None,
+    fields=None,
+    next_stage=False,
+    validation_config=None,
+):
     """Validates an investment project for the current stage.
 
     :param instance:    Model instance (for update operations only)
     :param update_data: New data to update or create the instance with
     :param fields:      Fields to restrict validation to
     :param next_stage:  Perform validation for the next stage (rather than the current stage)
+    :param validation_config: InvestmentProjectStageValidationConfig instance to use (so that
+                        feature flags can be checked once when validating many projects)
     :return:            dict containing errors for incomplete fields
     """
+    if validation_config is None:
+        validation_config = InvestmentProjectStageValidationConfig()
+
     combiner = DataCombiner(instance, update_data, model=InvestmentProject)
     desired_stage = combiner.get_value('stage') or Stage.prospect.value
-    desired_stage_order = _get_desired_stage_order(desired_stage, next_stage)
+    desired_stage_order = _get_desired_stage_order(
+        desired_stage,
+        next_stage,
+        validation_config.is_streamlined_flow,
+    )
 
     errors = {}
-    validation_config = InvestmentProjectStageValidationConfig()
 
     for field, req_stage in validation_config.get_required_fields_after_stage().items():
         if _should_skip_rule(field, fields, desired_stage_order, req_stage.order):
@@ -170,12 +184,10 @@ def _check_rule(combiner, rule):
     return value == rule.condition
 
 
-def _get_desired_stage_order(desired_stage, next_stage):
+def _get_desired_stage_order(desired_stage, next_stage, is_streamlined_flow_active):
     if not next_stage:
         return desired_stage.order
 
-    is_streamlined_flow_active = is_feature_flag_active(FEATURE_FLAG_STREAMLINED_FLOW)
-
     if is_streamlined_flow_active and str(desired_stage.id) == Stage.prospect.value.id:
         return desired_stage.order + 200.0
 
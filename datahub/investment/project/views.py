@@ -1,18 +1,33 @@
 """Investment views."""
 from django.db import transaction
 from django.db.models import Prefetch
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, IsoDateTimeFilter
 from oauth2_provider.contrib.rest_framework.permissions import IsAuthenticatedOrTokenHasScope
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import OrderingFilter
-from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.viewsets import GenericViewSet
 
 from datahub.core.audit import AuditViewSet
 from datahub.core.mixins import ArchivableViewSetMixin
+from datahub.core.pagination import EstimatedCountPagination
 from datahub.core.viewsets import CoreViewSet
-from datahub.investment.project.models import InvestmentProject, InvestmentProjectTeamMember
+from datahub.investment.project.models import (
+    InvestmentProject,
+    InvestmentProjectStageLog,
+    InvestmentProjectTeamMember,
+)
+from datahub.investment.project.modified_since import (
+    decode_cursor,
+    encode_cursor,
+    encode_json_page,
+    get_modified_since_queryset,
+    get_projects,
+    PAGE_SIZE,
+)
 from datahub.investment.project.permissions import (
     InvestmentProjectModelPermissions,
     InvestmentProjectTeamMemberModelPermissions,
@@ -28,6 +43,7 @@ from datahub.investment.project.serializers import (
 from datahub.oauth.scopes import Scope
 
 _team_member_queryset = InvestmentProjectTeamMember.objects.select_related('adviser')
+_stage_log_queryset = InvestmentProjectStageLog.objects.select_related('stage')
 
 
 class IProjectAuditViewSet(AuditViewSet):
@@ -77,20 +93,27 @@ class IProjectViewSet(ArchivableViewSetMixin, CoreViewSet):
     serializer_class = IProjectSerializer
     queryset = InvestmentProject.objects.select_related(
         'archived_by',
+        'associated_non_fdi_r_and_d_project__investmentprojectcode',
+        'associated_non_fdi_r_and_d_project',
         'average_salary',
         'client_relationship_manager__dit_team',
         'client_relationship_manager',
+        'country_investment_originates_from',
         'country_lost_to',
         'fdi_type',
+        'fdi_value',
         'intermediate_company',
         'investment_type',
         'investmentprojectcode',
+        'investor_company__address_country',
         'investor_company',
         'investor_type',
         'level_of_involvement',
+        'likelihood_to_land',
         'project_assurance_adviser__dit_team',
         'project_assurance_adviser',
         'project_manager__dit_team',
+        'project_manager_request_status',
         'project_manager',
         'referral_source_activity_marketing',
         'referral_source_activity_website',
@@ -106,12 +129,11 @@ class IProjectViewSet(ArchivableViewSetMixin, CoreViewSet):
         'client_contacts',
         'competitor_countries',
         'delivery_partners',
-        'sector__parent__parent',
-        'sector__parent',
         'sector',
         'strategic_drivers',
         'uk_region_locations',
         Prefetch('team_members', queryset=_team_member_queryset),
+        Prefetch('stage_log', queryset=_stage_log_queryset),
     )
     filter_backends = (
         DjangoFilterBackend,
@@ -120,6 +142,12 @@ class IProjectViewSet(ArchivableViewSetMixin, CoreViewSet):
     )
     filterset_fields = ('investor_company_id',)
     ordering = ('-created_on',)
+    pagination_class = EstimatedCountPagination
+    # See datahub.core.instrumentation
+    query_budget = {
+        'list': 50,
+        'retrieve': 50,
+    }
 
     def get_view_name(self):
         """Returns the view set name for the DRF UI."""
@@ -144,33 +172,65 @@ class _ModifiedOnFilter(FilterSet):
         fields = ()
 
 
-class _SinglePagePaginator(BasePagination):
-    """Paginator that returns all items in a single page.
-
-    The purpose of this is to wrap the results in a dict with count and results keys,
-    for consistency with other endpoints.
+class IProjectModifiedSinceViewSet(GenericViewSet):
     """
+    View set for the modified-since endpoint (intended for use by Data Hub MI).
 
-    def paginate_queryset(self, queryset, request, view=None):
-        return queryset
-
-    def get_paginated_response(self, data):
-        return Response({
-            'count': len(data),
-            'results': data,
-        })
-
-
-class IProjectModifiedSinceViewSet(IProjectViewSet):
-    """View set for the modified-since endpoint (intended for use by Data Hub MI)."""
+    Results are returned one page at a time, using keyset pagination on (modified_on, id).
+    The count key contains the total number of results, and the next key contains the URL of
+    the next page (or null if there are no more results).
+    """
 
     permission_classes = (IsAuthenticatedOrTokenHasScope,)
     required_scopes = (Scope.mi,)
-    pagination_class = _SinglePagePaginator
+    queryset = InvestmentProject.objects.all()
 
     filter_backends = (DjangoFilterBackend,)
-    filterset_fields = None
     filterset_class = _ModifiedOnFilter
+    cursor_query_param = 'cursor'
+    page_size = PAGE_SIZE
+
+    def get_view_name(self):
+        """Returns the view set name for the DRF UI."""
+        return 'Investment projects modified since'
+
+    def list(self, request, *args, **kwargs):
+        """
+        Streams a page of results as JSON.
+
+        The page is fetched and serialised before the response starts, so that errors result
+        in an error response rather than a truncated response body.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        values_queryset = get_modified_since_queryset(
+            queryset,
+            self.page_size,
+            after=self._get_cursor(),
+        )
+        projects = get_projects(values_queryset)
+        parts = encode_json_page(queryset.count(), projects, self._get_next_url(projects))
+
+        return StreamingHttpResponse(parts, content_type='application/json')
+
+    def _get_cursor(self):
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise NotFound('Invalid cursor.')
+
+    def _get_next_url(self, projects):
+        if len(projects) < self.page_size:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(projects[-1]),
+        )
 
 
 class IProjectTeamMembersViewSet(CoreViewSet):
@@ -9,6 +9,11 @@ class MetadataConfig(AppConfig):
     name = 'datahub.metadata'
 
     def ready(self):
-        """Calls the autodiscover logic after all apps are loaded."""
+        """
+        Calls the autodiscover logic after all apps are loaded and registers the signals for
+        this app.
+        """
         super().ready()
         self.module.autodiscover()
+
+        import datahub.metadata.signals  # noqa: F401
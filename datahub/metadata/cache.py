@@ -0,0 +1,208 @@
+from collections import namedtuple
+from threading import RLock
+from time import monotonic
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from datahub.core.models import BaseConstantModel
+from datahub.metadata.models import Sector
+
+
+class VersionedInProcessCache:
+    """
+    Cache of (small amounts of) database data held in the memory of the current process.
+
+    The data is loaded lazily using load() on first access and then reused.
+
+    To tell other processes that their copy is out of date, a version stored in the Django
+    cache is changed by invalidate(). So that every access does not result in a round trip
+    to the Django cache, the version is checked at most every version_check_interval
+    seconds.
+
+    Subclasses must define version_cache_key and load() (which must return a mapping).
+    """
+
+    version_cache_key = None
+    version_check_interval = 30
+
+    def __init__(self):
+        """Initialises the cache (without loading any data)."""
+        self._lock = RLock()
+        self._data = None
+        self._version = None
+        self._version_checked_on = None
+
+    def load(self):
+        """Loads the data from the database."""
+        raise NotImplementedError
+
+    def get(self, key):
+        """
+        Gets an item from the cached data.
+
+        The data is reloaded once if the item isn't found, as it may have been recently
+        created by another process.
+
+        :returns: the item, or None if it does not exist
+        """
+        item = self.get_data().get(key)
+        if item is None:
+            self.reload()
+            item = self.get_data().get(key)
+        return item
+
+    def get_data(self):
+        """Returns the cached data, loading it first if required."""
+        with self._lock:
+            if self._data is None or self._is_out_of_date():
+                self.reload()
+            return self._data
+
+    def reload(self):
+        """Unconditionally reloads the data from the database."""
+        with self._lock:
+            # The version is retrieved before loading the data so that any concurrent
+            # change is picked up on the next version check
+            self._version = cache.get(self.version_cache_key)
+            self._version_checked_on = monotonic()
+            self._data = self.load()
+
+    def clear(self):
+        """Clears the data cached in this process."""
+        with self._lock:
+            self._data = None
+
+    def invalidate(self):
+        """
+        Clears the data cached in this process and (once the current transaction has been
+        committed) tells other processes to reload their copy.
+        """
+        self.clear()
+        transaction.on_commit(self._change_version)
+
+    def _change_version(self):
+        cache.set(self.version_cache_key, uuid4().hex, timeout=None)
+
+    def _is_out_of_date(self):
+        now = monotonic()
+        if now - self._version_checked_on < self.version_check_interval:
+            return False
+
+        self._version_checked_on = now
+        return cache.get(self.version_cache_key) != self._version
+
+
+SectorTreeNode = namedtuple(
+    'SectorTreeNode',
+    ['id', 'parent_id', 'name', 'top_level_sector_id', 'ancestor_ids'],
+)
+
+
+class SectorTreeCache(VersionedInProcessCache):
+    """
+    In-process cache of the whole sector tree.
+
+    This is used to look up the names and ancestors of sectors without querying the database
+    (e.g. when building search documents).
+    """
+
+    version_cache_key = 'metadata-sector-tree-version'
+
+    def load(self):
+        """Loads all sectors from the database, keyed by ID."""
+        rows = Sector._base_manager.values_list(
+            'id',
+            'parent_id',
+            'full_name',
+            'top_level_sector_id',
+        )
+        parent_ids = {row[0]: row[1] for row in rows}
+
+        return {
+            sector_id: SectorTreeNode(
+                sector_id,
+                parent_id,
+                full_name,
+                top_level_sector_id,
+                _get_ancestor_ids(sector_id, parent_ids),
+            )
+            for sector_id, parent_id, full_name, top_level_sector_id in rows
+        }
+
+
+def _get_ancestor_ids(sector_id, parent_ids):
+    """Returns the IDs of the ancestors of a sector, starting with the top-level sector."""
+    ancestor_ids = []
+    parent_id = parent_ids.get(sector_id)
+    while parent_id is not None and parent_id not in ancestor_ids:
+        ancestor_ids.append(parent_id)
+        parent_id = parent_ids.get(parent_id)
+    return tuple(reversed(ancestor_ids))
+
+
+class ConstantModelCache(VersionedInProcessCache):
+    """In-process cache of the names of all objects of a constant model, keyed by ID."""
+
+    def __init__(self, model):
+        """Initialises the cache for a particular BaseConstantModel subclass."""
+        super().__init__()
+        self.model = model
+        self.version_cache_key = f'metadata-constant-model-version-{model._meta.label_lower}'
+
+    def load(self):
+        """Loads the IDs and names of all objects (including disabled ones)."""
+        return dict(self.model._base_manager.values_list('id', 'name'))
+
+
+class ConstantModelCacheRegistry:
+    """
+    Registry of ConstantModelCache instances (one per BaseConstantModel subclass).
+
+    Caches are created (and their data loaded) on first use.
+    """
+
+    def __init__(self):
+        """Initialises the registry."""
+        self._caches = {}
+        self._lock = RLock()
+
+    def get_cache(self, model):
+        """Gets the cache for a model."""
+        if not issubclass(model, BaseConstantModel):
+            raise TypeError(f'{model.__name__} is not a constant model')
+
+        with self._lock:
+            if model not in self._caches:
+                self._caches[model] = ConstantModelCache(model)
+            return self._caches[model]
+
+    def get_id_name_dict(self, model, pk):
+        """
+        Gets a dictionary with id and name keys for an object of a constant model without
+        querying the database (in the steady state).
+
+        :returns: the dictionary, or None if pk is None or the object does not exist
+        """
+        if pk is None:
+            return None
+
+        # Normalise the ID (e.g. when a UUID field has been set to a string)
+        pk = model._meta.pk.to_python(pk)
+        name = self.get_cache(model).get(pk)
+        if name is None:
+            return None
+
+        return {
+            'id': str(pk),
+            'name': name,
+        }
+
+    def invalidate(self, model):
+        """Invalidates the cache for a model (in this process and others)."""
+        self.get_cache(model).invalidate()
+
+
+sector_tree_cache = SectorTreeCache()
+constant_model_cache = ConstantModelCacheRegistry()
@@ -37,7 +37,6 @@ registry.register(
     model=models.Sector,
     queryset=models.Sector.objects.select_related(
         'parent',
-        'parent__parent',
     ),
     serializer=SectorSerializer,
 )
@@ -0,0 +1,25 @@
+# Generated by Django 2.2 on 2019-05-07 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0025_update_sector_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sector',
+            name='full_name',
+            field=models.TextField(blank=True, default='', editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='sector',
+            name='top_level_sector',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='metadata.Sector'),
+        ),
+    ]
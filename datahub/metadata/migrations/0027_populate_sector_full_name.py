@@ -0,0 +1,32 @@
+# Generated by Django 2.2 on 2019-05-07 10:14
+
+from django.db import migrations
+
+
+POPULATE_SECTOR_FULL_NAMES_SQL = """
+WITH RECURSIVE sector_path (id, full_name, top_level_sector_id) AS (
+    SELECT id, segment::text, id
+    FROM metadata_sector
+    WHERE parent_id IS NULL
+  UNION ALL
+    SELECT child.id, sector_path.full_name || ' : ' || child.segment,
+        sector_path.top_level_sector_id
+    FROM metadata_sector AS child
+    INNER JOIN sector_path ON child.parent_id = sector_path.id
+)
+UPDATE metadata_sector
+SET full_name = sector_path.full_name, top_level_sector_id = sector_path.top_level_sector_id
+FROM sector_path
+WHERE metadata_sector.id = sector_path.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0026_add_sector_full_name'),
+    ]
+
+    operations = [
+        migrations.RunSQL(POPULATE_SECTOR_FULL_NAMES_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2 on 2026-10-19 12:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0027_populate_sector_full_name'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='team',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='metadata_team_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
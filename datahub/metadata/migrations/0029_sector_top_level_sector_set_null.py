@@ -0,0 +1,19 @@
+# Generated by Django 2.2 on 2026-10-19 14:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0028_add_team_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sector',
+            name='top_level_sector',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='metadata.Sector'),
+        ),
+    ]
@@ -4,7 +4,6 @@ from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from model_utils import Choices
 from mptt.models import MPTTModel, TreeForeignKey
@@ -40,6 +39,17 @@ class Sector(MPTTModel, DisableableModel):
         'self', null=True, blank=True, related_name='children',
         on_delete=models.PROTECT,
     )
+    # full_name and top_level_sector are materialised from the tree and kept up to date by
+    # the receivers in datahub.metadata.signals
+    full_name = models.TextField(blank=True, editable=False)
+    top_level_sector = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        on_delete=models.SET_NULL,
+    )
 
     def __str__(self):
         """Human-readable representation."""
@@ -48,11 +58,20 @@ class Sector(MPTTModel, DisableableModel):
             '(disabled)' if self.disabled_on else None,
         )
 
-    @cached_property
+    @property
     def name(self):
         """
         Full name of the sector in the form of a path.
 
+        This is read from the materialised full_name column. Sectors that have not been
+        saved yet fall back to building the path from their parents.
+        """
+        return self.full_name or self.build_full_name()
+
+    def build_full_name(self):
+        """
+        Builds the full name of the sector by following parent links.
+
         self.get_ancestors() is not used as it's incompatible with pre-fetching.
         """
         ancestors = self._get_ancestors_using_parent(include_self=True)
@@ -169,6 +188,8 @@ class Team(BaseConstantModel):
     class Meta(BaseConstantModel.Meta):
         indexes = [
             GinIndex(fields=['tags']),
+            # Used by the adviser autocomplete (see datahub.company.autocomplete)
+            GinIndex(fields=['name'], name='metadata_team_name_trgm', opclasses=['gin_trgm_ops']),
         ]
 
 
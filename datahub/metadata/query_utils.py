@@ -1,45 +1,44 @@
-from django.db.models import F, Func, OuterRef, Subquery, TextField, Value
+from django.db import connection
 
 from datahub.metadata.models import Sector
 
 
-class _SectorStringAgg(Func):
-    function = 'STRING_AGG'
-    template = '%(function)s(%(expressions)s ORDER BY "lft")'
-
-
-def get_sector_name_subquery(relation_name=None):
+# Recomputes the materialised full_name and top_level_sector_id columns of all sectors.
+#
+# parent_id is followed (rather than the MPTT columns) so that the result is correct even
+# when the tree columns have not been rebuilt yet (e.g. when loading fixtures).
+UPDATE_SECTOR_FULL_NAMES_SQL = """
+WITH RECURSIVE sector_path (id, full_name, top_level_sector_id) AS (
+    SELECT id, segment::text, id
+    FROM metadata_sector
+    WHERE parent_id IS NULL
+  UNION ALL
+    SELECT child.id, sector_path.full_name || %(separator)s || child.segment,
+        sector_path.top_level_sector_id
+    FROM metadata_sector AS child
+    INNER JOIN sector_path ON child.parent_id = sector_path.id
+)
+UPDATE metadata_sector
+SET full_name = sector_path.full_name, top_level_sector_id = sector_path.top_level_sector_id
+FROM sector_path
+WHERE metadata_sector.id = sector_path.id
+    AND (
+        metadata_sector.full_name IS DISTINCT FROM sector_path.full_name
+        OR metadata_sector.top_level_sector_id IS DISTINCT FROM sector_path.top_level_sector_id
+    )
+"""
+
+
+def update_sector_full_names():
     """
-    Generates a subquery that can be used to add sector names to a query set as an annotation.
-
-    Usage examples:
-
-        Sector.objects.annotate(name=get_sector_name_subquery())
-        Company.objects.annotate(sector_name=get_sector_name_subquery('sector'))
+    Updates the materialised full name and top-level sector of all sectors whose values are
+    out of date.
 
-    The generated SQL expression for the column (in the first example) will be similar to:
+    The sector table is small, so the whole tree is processed in a single statement (which
+    also takes care of descendants of renamed or moved sectors).
 
-        SELECT STRING_AGG(U0."segment", ' : ' ORDER BY "lft") AS "name"
-        FROM "metadata_sector" U0
-        WHERE (
-            U0."lft" <= ("metadata_sector"."lft")
-            AND U0."rght" >= ("metadata_sector"."rght")
-            AND U0."tree_id" = ("metadata_sector"."tree_id")
-        )
-
-    (Refer to the django-mptt documentation for information on what the lft, rght and tree_id
-    columns mean.)
-
-    (The base manager is used here to avoid the default ordering being added to the query.)
+    :returns: the number of sectors updated
     """
-    outer_ref_prefix = f'{relation_name}__' if relation_name is not None else ''
-
-    subquery = Sector._base_manager.annotate(
-        name=_SectorStringAgg(F('segment'), Value(Sector.PATH_SEPARATOR)),
-    ).filter(
-        lft__lte=OuterRef(f'{outer_ref_prefix}lft'),
-        rght__gte=OuterRef(f'{outer_ref_prefix}rght'),
-        tree_id=OuterRef(f'{outer_ref_prefix}tree_id'),
-    ).values('name')
-
-    return Subquery(subquery, output_field=TextField())
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_SECTOR_FULL_NAMES_SQL, {'separator': Sector.PATH_SEPARATOR})
+        return cursor.rowcount
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from datahub.core.models import BaseConstantModel
+from datahub.metadata.cache import constant_model_cache, sector_tree_cache
+from datahub.metadata.models import Sector
+from datahub.metadata.query_utils import update_sector_full_names
+
+SECTOR_FULL_NAME_SOURCE_FIELDS = {'segment', 'parent'}
+
+
+@receiver(post_save, sender=Sector, dispatch_uid='sector_post_save')
+def sector_post_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Updates the materialised full names of sectors when a sector is saved.
+
+    As the full names of descendants are also affected when a sector is renamed or moved,
+    all out-of-date sectors are updated (rather than just the one saved).
+
+    This also runs for fixtures loaded using manage.py loaddata (i.e. when kwargs['raw'] is
+    True), as parent links are followed rather than the MPTT tree columns.
+    """
+    if update_fields is not None and not SECTOR_FULL_NAME_SOURCE_FIELDS & set(update_fields):
+        return
+
+    update_sector_full_names()
+    instance.refresh_from_db(fields=('full_name', 'top_level_sector'))
+    sector_tree_cache.invalidate()
+
+
+@receiver(post_delete, sender=Sector, dispatch_uid='sector_post_delete')
+def sector_post_delete(sender, **kwargs):
+    """Invalidates the cached sector tree when a sector is deleted."""
+    sector_tree_cache.invalidate()
+
+
+@receiver(post_save, dispatch_uid='constant_model_post_save')
+@receiver(post_delete, dispatch_uid='constant_model_post_delete')
+def constant_model_post_save_or_delete(sender, **kwargs):
+    """
+    Invalidates the cached objects of a constant model when one of its objects is saved or
+    deleted.
+
+    (These receivers are connected to all models as there are constant models in many apps.)
+    """
+    if issubclass(sender, BaseConstantModel):
+        constant_model_cache.invalidate(sender)
@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+import pytest
+
+from datahub.core.constants import Country as CountryConstant
+from datahub.metadata.cache import (
+    constant_model_cache,
+    sector_tree_cache,
+    VersionedInProcessCache,
+)
+from datahub.metadata.models import Country, Sector
+from datahub.metadata.test.factories import SectorFactory, TeamFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class _CountingCache(VersionedInProcessCache):
+    version_cache_key = 'test-cache-version'
+
+    def __init__(self):
+        super().__init__()
+        self.load_count = 0
+
+    def load(self):
+        self.load_count += 1
+        return self.load_count
+
+
+class TestVersionedInProcessCache:
+    """Tests for VersionedInProcessCache."""
+
+    def test_loads_once(self):
+        """Test that data is only loaded on first access."""
+        cache = _CountingCache()
+
+        assert cache.get_data() == 1
+        assert cache.get_data() == 1
+
+    def test_clear(self):
+        """Test that data is reloaded after the cache has been cleared."""
+        cache = _CountingCache()
+        cache.get_data()
+        cache.clear()
+
+        assert cache.get_data() == 2
+
+    @patch('datahub.metadata.cache.cache')
+    @patch('datahub.metadata.cache.monotonic')
+    def test_reloads_when_version_changes(self, mocked_monotonic, mocked_django_cache):
+        """
+        Test that data is reloaded when the version in the Django cache changes, once the
+        version check interval has elapsed.
+        """
+        mocked_monotonic.return_value = 0
+        mocked_django_cache.get.return_value = 'v1'
+        cache = _CountingCache()
+        cache.get_data()
+
+        mocked_django_cache.get.return_value = 'v2'
+        assert cache.get_data() == 1
+
+        mocked_monotonic.return_value = cache.version_check_interval
+        assert cache.get_data() == 2
+
+
+class TestSectorTreeCache:
+    """Tests for the sector tree cache."""
+
+    def test_get(self):
+        """Test that the name, top-level sector and ancestors of a sector are returned."""
+        grandparent = SectorFactory()
+        parent = SectorFactory(parent=grandparent)
+        sector = SectorFactory(parent=parent)
+
+        node = sector_tree_cache.get(sector.pk)
+
+        assert node.name == sector.name
+        assert node.parent_id == parent.pk
+        assert node.top_level_sector_id == grandparent.pk
+        assert node.ancestor_ids == (grandparent.pk, parent.pk)
+
+    def test_invalidated_on_save(self):
+        """Test that the cache is updated when a sector is renamed."""
+        sector = SectorFactory()
+        sector_tree_cache.get(sector.pk)
+
+        sector.segment = 'new name'
+        sector.save()
+
+        assert sector_tree_cache.get(sector.pk).name == 'new name'
+
+    def test_get_non_existent(self):
+        """Test that None is returned for a non-existent sector."""
+        sector = SectorFactory()
+        sector_pk = sector.pk
+        sector.delete()
+
+        assert sector_tree_cache.get(sector_pk) is None
+
+
+class TestConstantModelCache:
+    """Tests for the constant model cache."""
+
+    def test_get_id_name_dict(self):
+        """Test that a dictionary with the ID and name of an object is returned."""
+        country = CountryConstant.united_kingdom.value
+
+        assert constant_model_cache.get_id_name_dict(Country, country.id) == {
+            'id': str(country.id),
+            'name': country.name,
+        }
+
+    def test_get_id_name_dict_none(self):
+        """Test that None is returned if the ID is None."""
+        assert constant_model_cache.get_id_name_dict(Country, None) is None
+
+    def test_get_id_name_dict_does_not_query_once_loaded(self, django_assert_num_queries):
+        """Test that no queries are made once the cache has been loaded."""
+        country = CountryConstant.united_kingdom.value
+        constant_model_cache.get_id_name_dict(Country, country.id)
+
+        with django_assert_num_queries(0):
+            constant_model_cache.get_id_name_dict(Country, country.id)
+
+    def test_invalidated_on_save(self):
+        """Test that the cache is updated when an object is renamed."""
+        team = TeamFactory()
+        constant_model_cache.get_id_name_dict(team.__class__, team.pk)
+
+        team.name = 'new name'
+        team.save()
+
+        assert constant_model_cache.get_id_name_dict(team.__class__, team.pk) == {
+            'id': str(team.pk),
+            'name': 'new name',
+        }
+
+    def test_non_constant_model(self):
+        """Test that an error is raised for models that aren't constant models."""
+        with pytest.raises(TypeError):
+            constant_model_cache.get_cache(Sector)
@@ -1,7 +1,9 @@
 import pytest
+from django.db.models import ProtectedError
 from mptt.exceptions import InvalidMove
 
 from datahub.core.exceptions import DataHubException
+from datahub.metadata.models import Sector
 from datahub.metadata.test.factories import SectorFactory
 
 pytestmark = pytest.mark.django_db
@@ -31,6 +33,72 @@ def test_sector_name_level_two():
     assert sector.name == f'{grandparent.segment} : {parent.segment} : {sector.segment}'
 
 
+def test_sector_name_unsaved():
+    """Test that the path of an unsaved sector is built using its parents."""
+    parent = SectorFactory()
+    sector = SectorFactory.build(parent=parent)
+
+    assert sector.name == f'{parent.segment} : {sector.segment}'
+
+
+def test_sector_top_level_sector():
+    """Test that the top-level sector is set on save for sectors at all levels."""
+    grandparent = SectorFactory()
+    parent = SectorFactory(parent=grandparent)
+    sector = SectorFactory(parent=parent)
+
+    assert grandparent.top_level_sector == grandparent
+    assert parent.top_level_sector == grandparent
+    assert sector.top_level_sector == grandparent
+
+
+def test_sector_delete_follows_parent_protection():
+    """
+    Test that deleting a top-level sector with descendants is prevented by the parent link,
+    rather than cascading through top_level_sector.
+    """
+    grandparent = SectorFactory()
+    parent = SectorFactory(parent=grandparent)
+    sector = SectorFactory(parent=parent)
+
+    with pytest.raises(ProtectedError):
+        grandparent.delete()
+
+    sector.delete()
+    assert set(Sector.objects.filter(pk__in=(grandparent.pk, parent.pk, sector.pk))) == {
+        grandparent,
+        parent,
+    }
+
+
+def test_sector_full_name_updated_for_descendants_on_rename():
+    """Test that renaming a sector updates the stored full names of its descendants."""
+    grandparent = SectorFactory()
+    parent = SectorFactory(parent=grandparent)
+    sector = SectorFactory(parent=parent)
+
+    grandparent.segment = 'renamed'
+    grandparent.save()
+
+    sector.refresh_from_db()
+    assert sector.full_name == f'renamed : {parent.segment} : {sector.segment}'
+
+
+def test_sector_full_name_updated_for_descendants_on_move():
+    """Test that moving a sector updates its descendants' full names and top-level sector."""
+    old_root = SectorFactory()
+    new_root = SectorFactory()
+    parent = SectorFactory(parent=old_root)
+    sector = SectorFactory(parent=parent)
+
+    parent.parent = new_root
+    parent.save()
+
+    sector.refresh_from_db()
+    assert sector.full_name == f'{new_root.segment} : {parent.segment} : {sector.segment}'
+    assert sector.top_level_sector == new_root
+
+
 def test_sector_save_recursive_via_parent():
     """
     Test that it's not possible to save a sector when it's part of a recursive hierarchy.
@@ -51,7 +119,7 @@ def test_sector_name_recursive_via_parent_unsaved():
     sector = SectorFactory(parent=parent)
     parent.parent = sector
     with pytest.raises(DataHubException):
-        sector.name
+        sector.build_full_name()
 
 
 def test_sector_save_recursive():
@@ -70,4 +138,4 @@ def test_sector_name_level_recursive_unsaved():
     sector = SectorFactory()
     sector.parent = sector
     with pytest.raises(DataHubException):
-        sector.name
+        sector.build_full_name()
@@ -1,60 +1,25 @@
 import pytest
 
 from datahub.metadata.models import Sector
-from datahub.metadata.query_utils import get_sector_name_subquery
+from datahub.metadata.query_utils import update_sector_full_names
 from datahub.metadata.test.factories import SectorFactory
 
 pytestmark = pytest.mark.django_db
 
 
-def test_annotated_sector_name_root_node():
-    """Test the sector name annotation for a sector at root level."""
-    sector = SectorFactory(parent=None)
-    annotated_sector = Sector.objects.annotate(
-        name_annotation=get_sector_name_subquery(),
-    ).get(
-        pk=sector.pk,
-    )
-
-    assert annotated_sector.name_annotation == sector.name
-
-
-def test_annotated_sector_name_level_one():
-    """Test the sector name annotation for a sector one level deep."""
-    parent = SectorFactory()
-    sector = SectorFactory(parent=parent)
-    annotated_sector = Sector.objects.annotate(
-        name_annotation=get_sector_name_subquery(),
-    ).get(
-        pk=sector.pk,
-    )
-
-    assert annotated_sector.name_annotation == sector.name
-
-
-def test_annotated_sector_name_level_two():
-    """Test the sector name annotation for a sector two levels deep."""
+def test_update_sector_full_names():
+    """Test that out-of-date sector full names and top-level sectors are updated."""
     grandparent = SectorFactory()
     parent = SectorFactory(parent=grandparent)
     sector = SectorFactory(parent=parent)
-    annotated_sector = Sector.objects.annotate(
-        name_annotation=get_sector_name_subquery(),
-    ).get(
-        pk=sector.pk,
+    Sector.objects.filter(pk__in=(parent.pk, sector.pk)).update(
+        full_name='',
+        top_level_sector=None,
     )
 
-    assert annotated_sector.name_annotation == sector.name
-
-
-def test_annotated_sector_name_via_relation():
-    """Test the sector name annotation via a relation."""
-    grandparent = SectorFactory()
-    parent = SectorFactory(parent=grandparent)
-    sector = SectorFactory(parent=parent)
-    annotated_sector = Sector.objects.annotate(
-        parent_name_annotation=get_sector_name_subquery('parent'),
-    ).get(
-        pk=sector.pk,
-    )
+    assert update_sector_full_names() == 2
 
-    assert annotated_sector.parent_name_annotation == parent.name
+    sector.refresh_from_db()
+    assert sector.full_name == f'{grandparent.segment} : {parent.segment} : {sector.segment}'
+    assert sector.top_level_sector == grandparent
+    assert update_sector_full_names() == 0
@@ -11,7 +11,6 @@ from datahub.core.query_utils import (
 )
 from datahub.investment.project.models import InvestmentProject
 from datahub.investment.project.query_utils import get_project_code_expression
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.mi_dashboard.constants import (
     NO_FDI_VALUE_ASSIGNED,
     NO_SECTOR_ASSIGNED,
@@ -157,7 +156,7 @@ class ETLInvestmentProjects(ETLBase):
             status_collapsed=get_collapse_status_name_expression(),
             project_url=get_front_end_url_expression('investmentproject', 'pk'),
             sector_name=Coalesce(
-                get_sector_name_subquery('sector'),
+                'sector__full_name',
                 Value(NO_SECTOR_ASSIGNED),
             ),
             top_level_sector_name=get_top_level_sector_expression(),
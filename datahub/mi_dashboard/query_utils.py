@@ -5,9 +5,7 @@ from django.db.models import (
     DateField,
     DurationField,
     F,
-    OuterRef,
     Q,
-    Subquery,
     Value,
     When,
 )
@@ -15,7 +13,6 @@ from django.db.models.functions import Cast, Coalesce, Concat, ExtractYear, Null
 
 from datahub.investment.project.constants import Involvement
 from datahub.investment.project.models import IProjectAbstract
-from datahub.metadata.models import Sector
 from datahub.mi_dashboard.constants import NO_SECTOR_ASSIGNED, NO_SECTOR_CLUSTER_ASSIGNED
 
 
@@ -42,26 +39,16 @@ def get_level_of_involvement_simplified_expression():
 
 def get_top_level_sector_expression():
     """Get top-level sector value."""
-    subquery = Sector.objects.filter(
-        parent_id__isnull=True,
-        tree_id=OuterRef('sector__tree_id'),
-    ).values('segment')
-
     return Coalesce(
-        Subquery(subquery, output_field=CharField()),
+        'sector__top_level_sector__segment',
         Value(NO_SECTOR_ASSIGNED),
     )
 
 
 def get_sector_cluster_expression(field):
     """Get sector cluster value."""
-    subquery = Sector.objects.filter(
-        parent_id__isnull=True,
-        tree_id=OuterRef(f'{field}__tree_id'),
-    ).values('sector_cluster__name')
-
     return Coalesce(
-        Subquery(subquery, output_field=CharField()),
+        f'{field}__top_level_sector__sector_cluster__name',
         Value(NO_SECTOR_CLUSTER_ASSIGNED),
     )
 
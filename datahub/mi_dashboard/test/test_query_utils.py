@@ -12,7 +12,6 @@ from datahub.core.query_utils import (
 from datahub.investment.project.constants import Involvement
 from datahub.investment.project.models import InvestmentProject
 from datahub.investment.project.test.factories import InvestmentProjectFactory
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.metadata.test.factories import SectorFactory
 from datahub.mi_dashboard.constants import NO_SECTOR_CLUSTER_ASSIGNED
 from datahub.mi_dashboard.query_utils import (
@@ -63,7 +62,6 @@ def test_get_sector_cluster_from_project_sector(sector_cluster_id, expected):
         sector_id=sector.id,
     )
     query = InvestmentProject.objects.annotate(
-        sector_name=get_sector_name_subquery('sector'),
         sector_cluster=get_sector_cluster_expression('sector'),
     ).values('sector_cluster')
 
@@ -0,0 +1 @@
+default_app_config = 'datahub.oauth.apps.OAuthConfig'
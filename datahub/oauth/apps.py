@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class OAuthConfig(AppConfig):
+    """Configuration class for this app."""
+
+    name = 'datahub.oauth'
+
+    def ready(self):
+        """Registers the signal receivers for this app.
+
+        This is the preferred way to register signal receivers in the Django documentation.
+        """
+        import datahub.oauth.signals  # noqa: F401
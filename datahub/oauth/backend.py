@@ -1,10 +1,18 @@
+from functools import partial
+
 from django.http.multipartparser import parse_header
 from oauth2_provider.oauth2_backends import OAuthLibCore
+from oauthlib.common import Request
 from rest_framework import HTTP_HEADER_ENCODING
 
+from datahub.oauth.cache import access_token_cache, get_bearer_token
+
 
 class ContentTypeAwareOAuthLibCore(OAuthLibCore):
-    """Extends the default OAuthLibCore to limit the use of request body."""
+    """
+    Extends the default OAuthLibCore to limit the use of request body and to cache the results
+    of access token validation.
+    """
 
     def extract_body(self, request):
         """
@@ -17,3 +25,34 @@ class ContentTypeAwareOAuthLibCore(OAuthLibCore):
         if base_media_type == 'application/x-www-form-urlencoded':
             return request.POST.items()
         return ()
+
+    def verify_request(self, request, scopes):
+        """
+        Verifies a request with an access token.
+
+        When no scopes are required, the result of validating the access token is cached
+        (see datahub.oauth.cache).
+        """
+        uri, http_method, body, headers = self._extract_params(request)
+        verify = partial(
+            self.server.verify_request,
+            uri,
+            http_method,
+            body,
+            headers,
+            scopes=scopes,
+        )
+
+        token = get_bearer_token(Request(uri, http_method, body, headers))
+        if scopes or not token:
+            return verify()
+
+        return access_token_cache.verify_request(
+            token,
+            uri,
+            http_method,
+            body,
+            headers,
+            scopes,
+            verify,
+        )
@@ -0,0 +1,239 @@
+"""
+Cache of the results of access token validation.
+
+Without this, every API request validates its bearer token against the AccessToken table
+and, when single sign-on is enabled and the token is unknown or has expired locally, makes a
+synchronous HTTP request to the SSO introspection endpoint.
+
+The results of validating a token are stored in the Django cache (keyed by a hash of the
+token):
+
+- valid tokens for at most settings.OAUTH2_TOKEN_CACHE_TIMEOUT seconds, and never beyond the
+  expiry of the token
+- invalid tokens for settings.OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT seconds (so that repeated
+  requests with an invalid token don't each result in an introspection request)
+
+For valid tokens, only the ID, scope and expiry of the access token and the IDs of its user
+and application are cached (so that the user's details are not stored in the cache). The user
+is loaded by primary key when a cached result is used.
+
+Concurrent validations of the same token in the same process are deduplicated, so that only
+one thread validates the token while the others wait for the result to be cached.
+
+Cached results are deleted when the access token is changed or deleted, or when its user is
+changed (see datahub.oauth.signals).
+
+Caching is only used when no scopes are required by the validation (which is the case when
+authenticating using Django REST framework).
+"""
+from collections import Counter
+from hashlib import sha256
+from threading import Event, Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import now
+from oauth2_provider.models import AccessToken
+from oauthlib.common import Request
+
+# Maximum number of seconds to wait for another thread validating the same token
+VALIDATION_WAIT_TIMEOUT = 10
+
+INVALID_TOKEN_ERROR = {
+    'error': 'invalid_token',
+    'error_description': 'The access token is invalid.',
+}
+
+
+class AccessTokenCache:
+    """
+    Cache of the results of access token validation.
+
+    In-process metrics are kept in the metrics attribute (a Counter) with the following keys:
+
+    - hits: valid tokens found in the cache
+    - invalid_hits: invalid tokens found in the cache
+    - misses: validations not found in the cache (resulting in a database lookup and
+      possibly an introspection request)
+    - coalesced: validations that waited for another thread validating the same token
+    """
+
+    def __init__(self):
+        """Initialises the cache."""
+        self.metrics = Counter()
+        self._lock = Lock()
+        self._in_progress = {}
+
+    def verify_request(self, token, uri, http_method, body, headers, scopes, verify):
+        """
+        Verifies a request with a bearer token, using the cached validation result if there
+        is one.
+
+        :param verify: function that verifies the request without the cache, returning a
+            (valid, oauthlib request) tuple
+        :returns: (valid, oauthlib request) tuple
+        """
+        cache_key = _get_cache_key(token)
+
+        cached_result = self._get_cached_result(cache_key)
+        if cached_result is None and not self._wait_for_validation_in_progress(cache_key):
+            return self._verify_and_cache(cache_key, verify)
+
+        if cached_result is None:
+            cached_result = self._get_cached_result(cache_key)
+
+        if cached_result is None:
+            # The other thread's result wasn't cached (e.g. if it is still in progress,
+            # or the Django cache is disabled)
+            return verify()
+
+        return _make_request_from_cached_result(
+            cached_result,
+            token,
+            uri,
+            http_method,
+            body,
+            headers,
+            scopes,
+        )
+
+    def invalidate(self, token):
+        """Deletes the cached validation result for a token."""
+        cache_key = _get_cache_key(token)
+        cache.delete(cache_key)
+        transaction.on_commit(lambda: cache.delete(cache_key))
+
+    def _get_cached_result(self, cache_key):
+        cached_result = cache.get(cache_key)
+        if cached_result is None:
+            return None
+
+        is_valid, _ = cached_result
+        if is_valid:
+            self._increment_metric('hits')
+        else:
+            self._increment_metric('invalid_hits')
+
+        return cached_result
+
+    def _wait_for_validation_in_progress(self, cache_key):
+        """
+        Waits for another thread that is validating the same token (if there is one).
+
+        Otherwise, this thread is registered as validating the token.
+
+        :returns: True if this thread waited, False if this thread should validate the token
+        """
+        with self._lock:
+            in_progress_event = self._in_progress.get(cache_key)
+            if in_progress_event is None:
+                self._in_progress[cache_key] = Event()
+                return False
+
+        self._increment_metric('coalesced')
+        in_progress_event.wait(timeout=VALIDATION_WAIT_TIMEOUT)
+        return True
+
+    def _verify_and_cache(self, cache_key, verify):
+        self._increment_metric('misses')
+
+        try:
+            valid, request = verify()
+            _cache_result(cache_key, valid, request)
+            return valid, request
+        finally:
+            with self._lock:
+                in_progress_event = self._in_progress.pop(cache_key)
+            in_progress_event.set()
+
+    def _increment_metric(self, name):
+        with self._lock:
+            self.metrics[name] += 1
+
+
+def get_bearer_token(request):
+    """
+    Gets the bearer token from an oauthlib request (in the same way as
+    oauthlib.oauth2.rfc6749.tokens.BearerToken).
+    """
+    if 'Authorization' in request.headers:
+        authorization = request.headers['Authorization']
+        return authorization[7:] if authorization.startswith('Bearer ') else None
+
+    return request.access_token
+
+
+def _get_cache_key(token):
+    token_hash = sha256(token.encode('utf-8')).hexdigest()
+    return f'oauth-access-token-{token_hash}'
+
+
+def _cache_result(cache_key, valid, request):
+    if valid:
+        access_token = request.access_token
+        seconds_until_expiry = int((access_token.expires - now()).total_seconds())
+        timeout = min(settings.OAUTH2_TOKEN_CACHE_TIMEOUT, seconds_until_expiry)
+        if timeout > 0:
+            cached_access_token = {
+                'id': access_token.pk,
+                'scope': access_token.scope,
+                'expires': access_token.expires,
+                'user_id': access_token.user_id,
+                'application_id': access_token.application_id,
+            }
+            cache.set(cache_key, (True, cached_access_token), timeout=timeout)
+        return
+
+    oauth2_error = getattr(request, 'oauth2_error', None) or INVALID_TOKEN_ERROR
+    timeout = settings.OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT
+    if timeout > 0:
+        cache.set(cache_key, (False, oauth2_error), timeout=timeout)
+
+
+def _make_request_from_cached_result(
+    cached_result,
+    token,
+    uri,
+    http_method,
+    body,
+    headers,
+    scopes,
+):
+    """
+    Creates an oauthlib request with the same attributes as
+    OAuth2Validator.validate_bearer_token() would set (apart from client, which is not used
+    when authenticating using Django REST framework).
+
+    The access token is recreated from the cached values (without querying the database), and
+    its user (if it has one) is loaded by primary key. Its application is only loaded if
+    accessed.
+    """
+    is_valid, value = cached_result
+    request = Request(uri, http_method, body, headers)
+    request.scopes = scopes
+
+    if not is_valid:
+        request.oauth2_error = value
+        return False, request
+
+    access_token = AccessToken(token=token, **value)
+    if access_token.is_expired():
+        request.oauth2_error = INVALID_TOKEN_ERROR
+        return False, request
+
+    if access_token.user_id is not None:
+        user_model = get_user_model()
+        try:
+            access_token.user = user_model.objects.get(pk=access_token.user_id)
+        except user_model.DoesNotExist:
+            request.oauth2_error = INVALID_TOKEN_ERROR
+            return False, request
+
+    request.user = access_token.user
+    request.access_token = access_token
+    return True, request
+
+
+access_token_cache = AccessTokenCache()
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oauth2_provider.models import AccessToken
+
+from datahub.oauth.cache import access_token_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=AccessToken, dispatch_uid='access_token_post_save_cache')
+def access_token_post_save(sender, instance, created, **kwargs):
+    """
+    Deletes the cached validation result for an access token when it is changed.
+
+    (New access tokens can't have a cached valid result.)
+    """
+    if not created:
+        access_token_cache.invalidate(instance.token)
+
+
+@receiver(post_delete, sender=AccessToken, dispatch_uid='access_token_post_delete_cache')
+def access_token_post_delete(sender, instance, **kwargs):
+    """Deletes the cached validation result for an access token when it is deleted."""
+    access_token_cache.invalidate(instance.token)
+
+
+@receiver(post_save, sender=User, dispatch_uid='adviser_post_save_access_token_cache')
+def adviser_post_save(sender, instance, created, update_fields, **kwargs):
+    """
+    Deletes the cached validation results for the access tokens of an adviser when the adviser
+    is changed (e.g. when they are deactivated).
+
+    Changes that only update the last login time are ignored.
+    """
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+
+    tokens = AccessToken.objects.filter(user=instance).values_list('token', flat=True)
+    for token in tokens:
+        access_token_cache.invalidate(token)
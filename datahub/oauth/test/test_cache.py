@@ -0,0 +1,340 @@
+import json
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Event, Thread
+from time import sleep
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.utils.timezone import now
+from oauth2_provider.models import AccessToken
+from oauth2_provider.oauth2_backends import get_oauthlib_core
+from oauth2_provider.settings import oauth2_settings
+from oauthlib.common import Request
+
+from datahub.company.test.factories import AdviserFactory
+from datahub.oauth.cache import _get_cache_key, access_token_cache, AccessTokenCache
+from datahub.oauth.test.factories import AccessTokenFactory, ApplicationFactory
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('local_memory_cache'),
+]
+
+INTROSPECTION_AUTH_TOKEN = 'introspection-auth-token'
+
+
+class _IntrospectionServer(HTTPServer):
+    """
+    Local stand-in for the SSO token introspection endpoint (RFC 7662).
+
+    Responses for active tokens are added to the tokens dict; all other tokens are inactive.
+    """
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _IntrospectionRequestHandler)
+        self.tokens = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}/o/introspect/'
+
+
+class _IntrospectionRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):  # noqa: N802
+        content_length = int(self.headers['Content-Length'])
+        data = parse_qs(self.rfile.read(content_length).decode('utf-8'))
+        token = data['token'][0]
+        self.server.requests.append(token)
+
+        if self.headers['Authorization'] != f'Bearer {INTROSPECTION_AUTH_TOKEN}':
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        response_data = self.server.tokens.get(token, {'active': False})
+        response_body = json.dumps(response_data).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def log_message(self, format, *args):
+        """Disables logging of requests."""
+
+
+@pytest.fixture
+def introspection_server(monkeypatch):
+    """Starts a local introspection server and configures django-oauth-toolkit to use it."""
+    server = _IntrospectionServer()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(
+        oauth2_settings,
+        'RESOURCE_SERVER_INTROSPECTION_URL',
+        server.url,
+        raising=False,
+    )
+    monkeypatch.setattr(
+        oauth2_settings,
+        'RESOURCE_SERVER_AUTH_TOKEN',
+        INTROSPECTION_AUTH_TOKEN,
+        raising=False,
+    )
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(local_memory_cache):
+    """
+    Clears the cache and resets the metrics of the access token cache.
+
+    (LocMemCache instances share their data, so cached tokens would otherwise be carried over
+    from other tests.)
+    """
+    cache.clear()
+    access_token_cache.metrics.clear()
+    yield
+    access_token_cache.metrics.clear()
+
+
+def _add_active_token(server, adviser, expires_in=timedelta(hours=1)):
+    token = f'sso-token-{len(server.tokens)}'
+    server.tokens[token] = {
+        'active': True,
+        'username': adviser.email,
+        'scope': 'read',
+        'exp': int((now() + expires_in).timestamp()),
+    }
+    return token
+
+
+def _verify_request(token):
+    request = RequestFactory().get('/v3/company', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return get_oauthlib_core().verify_request(request, scopes=[])
+
+
+class TestVerifyRequest:
+    """Tests for access token caching in ContentTypeAwareOAuthLibCore.verify_request()."""
+
+    def test_introspected_token_is_cached(self, introspection_server, django_assert_num_queries):
+        """Test that a token is only introspected once and is then served from the cache."""
+        adviser = AdviserFactory()
+        token = _add_active_token(introspection_server, adviser)
+
+        valid, request = _verify_request(token)
+        assert valid
+        assert request.user == adviser
+        assert introspection_server.requests == [token]
+
+        # Only the user is loaded
+        with django_assert_num_queries(1):
+            valid, request = _verify_request(token)
+
+        assert valid
+        assert request.user == adviser
+        assert request.access_token.token == token
+        assert introspection_server.requests == [token]
+        assert access_token_cache.metrics == {'misses': 1, 'hits': 1}
+
+    def test_local_token_is_cached(self, django_assert_num_queries):
+        """Test that a token in the database is only looked up once."""
+        adviser = AdviserFactory()
+        access_token = AccessTokenFactory(user=adviser)
+
+        valid, _ = _verify_request(access_token.token)
+        assert valid
+
+        # Only the user is loaded
+        with django_assert_num_queries(1):
+            valid, request = _verify_request(access_token.token)
+
+        assert valid
+        assert request.user == adviser
+        assert request.access_token.pk == access_token.pk
+        assert request.access_token.token == access_token.token
+
+    def test_only_token_details_are_cached(self):
+        """Test that the user and application of a token are not stored in the cache."""
+        adviser = AdviserFactory()
+        application = ApplicationFactory()
+        access_token = AccessTokenFactory(user=adviser, application=application, scope='read')
+
+        valid, _ = _verify_request(access_token.token)
+        assert valid
+
+        assert cache.get(_get_cache_key(access_token.token)) == (
+            True,
+            {
+                'id': access_token.pk,
+                'scope': 'read',
+                'expires': access_token.expires,
+                'user_id': adviser.pk,
+                'application_id': application.pk,
+            },
+        )
+
+    def test_token_without_user_is_cached(self, django_assert_num_queries):
+        """Test that a token without a user (e.g. a client credentials token) is cached."""
+        access_token = AccessTokenFactory(application=ApplicationFactory())
+
+        valid, _ = _verify_request(access_token.token)
+        assert valid
+
+        with django_assert_num_queries(0):
+            valid, request = _verify_request(access_token.token)
+
+        assert valid
+        assert request.user is None
+        assert request.access_token.application_id == access_token.application_id
+
+    def test_invalid_token_is_cached(self, introspection_server, django_assert_num_queries):
+        """Test that an invalid token is only introspected once."""
+        valid, request = _verify_request('invalid-token')
+        assert not valid
+        assert request.oauth2_error['error'] == 'invalid_token'
+
+        with django_assert_num_queries(0):
+            valid, request = _verify_request('invalid-token')
+
+        assert not valid
+        assert request.oauth2_error['error'] == 'invalid_token'
+        assert introspection_server.requests == ['invalid-token']
+        assert access_token_cache.metrics == {'misses': 1, 'invalid_hits': 1}
+
+    def test_does_not_cache_invalid_tokens_if_disabled(self, introspection_server, settings):
+        """Test that invalid tokens are not cached if OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT is 0."""
+        settings.OAUTH2_INVALID_TOKEN_CACHE_TIMEOUT = 0
+
+        _verify_request('invalid-token')
+        _verify_request('invalid-token')
+
+        assert introspection_server.requests == ['invalid-token', 'invalid-token']
+
+    def test_cache_not_used_when_scopes_required(self):
+        """Test that the cache is not used when scopes are required."""
+        access_token = AccessTokenFactory(user=AdviserFactory(), scope='read')
+        request = RequestFactory().get(
+            '/v3/company',
+            HTTP_AUTHORIZATION=f'Bearer {access_token.token}',
+        )
+
+        valid, _ = get_oauthlib_core().verify_request(request, scopes=['read'])
+
+        assert valid
+        assert not access_token_cache.metrics
+
+    def test_token_deleted(self):
+        """Test that the cached result is deleted when the access token is deleted."""
+        access_token = AccessTokenFactory(user=AdviserFactory())
+        valid, _ = _verify_request(access_token.token)
+        assert valid
+
+        access_token.delete()
+
+        valid, _ = _verify_request(access_token.token)
+        assert not valid
+
+    def test_token_expired(self):
+        """Test that the cached result is deleted when the access token is made to expire."""
+        access_token = AccessTokenFactory(user=AdviserFactory())
+        valid, _ = _verify_request(access_token.token)
+        assert valid
+
+        access_token.expires = now() - timedelta(seconds=1)
+        access_token.save()
+
+        valid, _ = _verify_request(access_token.token)
+        assert not valid
+
+    def test_adviser_deactivated(self):
+        """Test that the cached result is deleted when the user of the token is changed."""
+        adviser = AdviserFactory()
+        access_token = AccessTokenFactory(user=adviser)
+        _, request = _verify_request(access_token.token)
+        assert request.user.is_active
+
+        adviser.is_active = False
+        adviser.save()
+
+        _, request = _verify_request(access_token.token)
+        assert not request.user.is_active
+
+
+class TestAccessTokenCache:
+    """Tests for AccessTokenCache."""
+
+    @pytest.mark.parametrize(
+        'expires_in,expected_timeout',
+        (
+            (timedelta(hours=1), 60),
+            (timedelta(seconds=30, milliseconds=500), 30),
+        ),
+    )
+    def test_timeout_is_bounded_by_expiry(self, expires_in, expected_timeout):
+        """Test that valid tokens are not cached beyond their expiry."""
+        access_token = AccessToken(token='token', expires=now() + expires_in)
+        verify = Mock(return_value=(True, Mock(access_token=access_token)))
+
+        with patch('datahub.oauth.cache.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            AccessTokenCache().verify_request('token', '/', 'GET', '', {}, [], verify)
+
+        _, kwargs = mock_cache.set.call_args
+        assert kwargs['timeout'] == expected_timeout
+
+    def test_concurrent_validations_are_deduplicated(self):
+        """Test that only one thread validates a token when there are concurrent requests."""
+        access_token = AccessToken(token='token', expires=now() + timedelta(hours=1))
+        verify_started = Event()
+        can_finish = Event()
+        verify_calls = []
+
+        def verify():
+            verify_calls.append(None)
+            verify_started.set()
+            can_finish.wait(timeout=5)
+            request = Request('/')
+            request.access_token = access_token
+            return True, request
+
+        token_cache = AccessTokenCache()
+        results = []
+
+        def verify_request():
+            results.append(
+                token_cache.verify_request('token', '/', 'GET', '', {}, [], verify),
+            )
+
+        threads = [Thread(target=verify_request) for _ in range(5)]
+        threads[0].start()
+        assert verify_started.wait(timeout=5)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        while token_cache.metrics['coalesced'] < 4:
+            sleep(0.01)
+
+        can_finish.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(verify_calls) == 1
+        assert len(results) == 5
+        assert all(valid for valid, _ in results)
+        assert all(request.access_token.token == 'token' for _, request in results)
+        assert token_cache.metrics == {'misses': 1, 'coalesced': 4, 'hits': 4}
@@ -0,0 +1,99 @@
+import json
+import time
+import urllib.parse
+from logging import getLogger
+
+import requests
+from notifications_python_client.authentication import create_jwt_token
+from notifications_python_client.errors import HTTPError, InvalidResponse
+from notifications_python_client.notifications import NotificationsAPIClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = getLogger(__name__)
+
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+# Statuses that indicate that the request was not processed, so that it is safe to retry
+# POST requests (without sending duplicate emails)
+#
+# 502 and 504 are not included as the request may have been processed by the API (in which
+# case retrying it would send a duplicate email)
+RETRY_STATUSES = (429, 503)
+REQUEST_TIMEOUT = 15  # seconds
+
+
+def create_session(pool_maxsize):
+    """
+    Creates a requests session with a connection pool of the specified size, which retries
+    requests that failed to connect or were rejected with a retryable status.
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        status=MAX_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        method_whitelist=frozenset({'GET', 'POST'}),
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PooledNotificationsAPIClient(NotificationsAPIClient):
+    """
+    GOV.UK Notify API client that sends requests using a shared session (so that connections
+    are reused) and retries failed requests where it's safe to do so.
+
+    This is the same as NotificationsAPIClient except that request() uses the session rather
+    than requests.request().
+    """
+
+    def __init__(self, api_key, base_url, pool_maxsize):
+        """Initialises the client and its session."""
+        super().__init__(api_key, base_url=base_url)
+        self.session = create_session(pool_maxsize)
+
+    def request(self, method, url, data=None, params=None):
+        """Sends a request to the Notify API, returning the decoded response body."""
+        api_token = create_jwt_token(self.api_key, self.service_id)
+        kwargs = {
+            'headers': self.generate_headers(api_token),
+            'timeout': REQUEST_TIMEOUT,
+        }
+
+        if data is not None:
+            kwargs['data'] = json.dumps(data)
+
+        if params is not None:
+            kwargs['params'] = params
+
+        url = urllib.parse.urljoin(str(self.base_url), str(url))
+
+        start_time = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as exc:
+            api_error = HTTPError.create(exc)
+            logger.error(
+                f'API {method} request on {url} failed with {api_error.status_code} '
+                f'{api_error.message!r}',
+            )
+            raise api_error
+        finally:
+            elapsed_time = time.monotonic() - start_time
+            logger.debug(f'API {method} request on {url} finished in {elapsed_time}')
+
+        if response.status_code == 204:
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            raise InvalidResponse(response, message='No JSON response object could be decoded')
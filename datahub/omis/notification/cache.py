@@ -0,0 +1,33 @@
+from datahub.metadata.cache import VersionedInProcessCache
+from datahub.omis.market.models import Market
+from datahub.omis.region.models import UKRegionalSettings
+
+
+class MarketManagerEmailCache(VersionedInProcessCache):
+    """In-process cache of the manager email of each OMIS market, keyed by country ID."""
+
+    version_cache_key = 'omis-notification-market-manager-email-version'
+
+    def load(self):
+        """Loads the manager emails of all markets."""
+        return dict(Market.objects.values_list('country_id', 'manager_email'))
+
+
+class RegionalManagerEmailsCache(VersionedInProcessCache):
+    """In-process cache of the manager emails of each UK region, keyed by UK region ID."""
+
+    version_cache_key = 'omis-notification-regional-manager-emails-version'
+
+    def load(self):
+        """Loads the manager emails of all UK regions with OMIS settings."""
+        return {
+            uk_region_id: tuple(manager_emails)
+            for uk_region_id, manager_emails in UKRegionalSettings.objects.values_list(
+                'uk_region_id',
+                'manager_emails',
+            )
+        }
+
+
+market_manager_email_cache = MarketManagerEmailCache()
+regional_manager_emails_cache = RegionalManagerEmailsCache()
@@ -6,14 +6,19 @@ from unittest import mock
 from django.conf import settings
 from notifications_python_client.notifications import NotificationsAPIClient
 
-from datahub.core.thread_pool import submit_to_thread_pool
-from datahub.omis.market.models import Market
+from datahub.core.thread_pool import get_thread_pool
+from datahub.omis.notification.api_client import PooledNotificationsAPIClient
+from datahub.omis.notification.cache import (
+    market_manager_email_cache,
+    regional_manager_emails_cache,
+)
 from datahub.omis.notification.constants import Template
-from datahub.omis.region.models import UKRegionalSettings
 
 
 logger = getLogger(__name__)
 
+THREAD_POOL_NAME = 'omis-notifications'
+
 
 def send_email(client, **kwargs):
     """Send email and catch potential errors."""
@@ -26,6 +31,59 @@ def send_email(client, **kwargs):
     client.send_email_notification(**data)
 
 
+def send_emails(client, messages):
+    """
+    Send a batch of emails.
+
+    A failure to send one email does not stop the others from being sent. The first error
+    (if any) is re-raised once all emails have been attempted.
+    """
+    first_error = None
+
+    for message in messages:
+        try:
+            send_email(client, **message)
+        except Exception as exc:
+            logger.exception(
+                f'Failed to send OMIS notification using template {message["template_id"]}',
+            )
+            first_error = first_error or exc
+
+    if first_error:
+        raise first_error
+
+
+class NotificationBatch:
+    """
+    Collects the emails to send for an order event.
+
+    Only the first email for each recipient and template is kept (e.g. if an adviser is both
+    an assignee and a subscriber of an order, or if an email address is listed more than once
+    in the settings).
+    """
+
+    def __init__(self):
+        """Initialises an empty batch."""
+        self._messages = {}
+
+    def add(self, email_address, template_id, personalisation):
+        """Adds an email to the batch, unless the recipient already has one."""
+        key = ((email_address or '').lower(), template_id)
+        self._messages.setdefault(
+            key,
+            {
+                'email_address': email_address,
+                'template_id': template_id,
+                'personalisation': personalisation,
+            },
+        )
+
+    @property
+    def messages(self):
+        """The emails in the batch, in the order they were added."""
+        return list(self._messages.values())
+
+
 class Notify:
     """
     Used to send notifications when something happens to an order.
@@ -33,6 +91,10 @@ class Notify:
     The GOV.UK notification key can be set in settings.OMIS_NOTIFICATION_API_KEY,
     if empty, the client will be mocked and no notification will be sent.
 
+    All emails for an event are collected into a NotificationBatch and sent using a single
+    task in the OMIS notifications thread pool. The API client uses a pooled session (shared
+    by the threads in the pool) that retries requests that were not processed.
+
     E.g.
         notify = Notify()
         notify.order_created(order)
@@ -41,8 +103,10 @@ class Notify:
     def __init__(self):
         """Init underlying notification client."""
         if settings.OMIS_NOTIFICATION_API_KEY:
-            self.client = NotificationsAPIClient(
+            self.client = PooledNotificationsAPIClient(
                 settings.OMIS_NOTIFICATION_API_KEY,
+                base_url=settings.OMIS_NOTIFICATION_API_BASE_URL,
+                pool_maxsize=settings.THREAD_POOLS[THREAD_POOL_NAME]['max_workers'],
             )
         else:
             self.client = mock.Mock(spec_set=NotificationsAPIClient)
@@ -55,9 +119,11 @@ class Notify:
                 stacklevel=2,
             )
 
-    def _send_email(self, **kwargs):
-        """Send email in a separate thread."""
-        submit_to_thread_pool(send_email, self.client, **kwargs)
+    def _send_batch(self, batch):
+        """Send the emails in a batch in a separate thread (using the OMIS notifications pool)."""
+        messages = batch.messages
+        if messages:
+            get_thread_pool(THREAD_POOL_NAME).submit(send_emails, self.client, messages)
 
     def _prepare_personalisation(self, order, data=None):
         """Prepare the personalisation data with common values."""
@@ -77,21 +143,58 @@ class Notify:
 
     def _get_all_advisers(self, order):
         """
-        :returns: all advisers on the order
+        :returns: all advisers on the order (each adviser is only returned once, even if
+            they are both an assignee and a subscriber)
         """
-        return itertools.chain(
-            (item.adviser for item in order.assignees.all()),
-            (item.adviser for item in order.subscribers.all()),
+        advisers = {}
+        for item in itertools.chain(
+            order.assignees.select_related('adviser'),
+            order.subscribers.select_related('adviser'),
+        ):
+            advisers.setdefault(item.adviser_id, item.adviser)
+        return advisers.values()
+
+    def _add_to_customer_and_advisers(
+        self,
+        batch,
+        order,
+        customer_template,
+        adviser_template,
+        extra_adviser_data=None,
+    ):
+        """Add emails for the customer and all advisers on the order to a batch."""
+        batch.add(
+            email_address=order.get_current_contact_email(),
+            template_id=customer_template.value,
+            personalisation=self._prepare_personalisation(
+                order,
+                {
+                    'recipient name': order.contact.name,
+                    'embedded link': order.get_public_facing_url(),
+                },
+            ),
         )
+        self._add_to_advisers(batch, order, adviser_template, extra_adviser_data)
 
-    def order_info(self, order, what_happened, why, to_email=None, to_name=None):
-        """
-        Send a notification of type info related to the order `order`
-        specifying what happened, the reason and optionally who to send it to.
-        """
+    def _add_to_advisers(self, batch, order, template, extra_data=None):
+        """Add emails for all advisers on the order to a batch."""
+        for adviser in self._get_all_advisers(order):
+            batch.add(
+                email_address=adviser.get_current_email(),
+                template_id=template.value,
+                personalisation=self._prepare_personalisation(
+                    order,
+                    {
+                        'recipient name': adviser.name,
+                        **(extra_data or {}),
+                    },
+                ),
+            )
+
+    def _add_order_info(self, batch, order, what_happened, why, to_email=None, to_name=None):
         receipient_email = to_email or settings.OMIS_NOTIFICATION_ADMIN_EMAIL
 
-        self._send_email(
+        batch.add(
             email_address=receipient_email,
             template_id=Template.generic_order_info.value,
             personalisation=self._prepare_personalisation(
@@ -104,21 +207,26 @@ class Notify:
             ),
         )
 
-    def _order_created_for_post_managers(self, order):
+    def order_info(self, order, what_happened, why, to_email=None, to_name=None):
+        """
+        Send a notification of type info related to the order `order`
+        specifying what happened, the reason and optionally who to send it to.
+        """
+        batch = NotificationBatch()
+        self._add_order_info(batch, order, what_happened, why, to_email, to_name)
+        self._send_batch(batch)
+
+    def _order_created_for_post_managers(self, batch, order):
         """
         Notify the related overseas manager that a new order has been created
         if that manager exists or fall back to notifying the OMIS admin
         that something is not right.
         """
-        try:
-            market = order.primary_market.market
-            manager_email = market.manager_email
-        except Market.DoesNotExist:
-            market = None
-            manager_email = ''
+        # None if there is no market for the country
+        manager_email = market_manager_email_cache.get_data().get(order.primary_market_id)
 
         if manager_email:
-            self._send_email(
+            batch.add(
                 email_address=manager_email,
                 template_id=Template.order_created_for_post_manager.value,
                 personalisation=self._prepare_personalisation(
@@ -135,7 +243,7 @@ class Notify:
                 'what_happened': "We couldn't notify the overseas manager",
             }
 
-            if not market:
+            if manager_email is None:
                 data['why'] = (
                     f'country {order.primary_market.name} '
                     "doesn't have an OMIS market defined"
@@ -146,28 +254,23 @@ class Notify:
                     'could be found. Please log into the admin and add one'
                 )
 
-            self.order_info(**data)
+            self._add_order_info(batch, **data)
 
-    def _order_created_for_regional_managers(self, order):
+    def _order_created_for_regional_managers(self, batch, order):
         """
         Notify the related regional managers that a new order has been created.
         """
         # no UK region specified for this order => skip
-        if not order.uk_region:
+        if not order.uk_region_id:
             return
 
-        # no settings for this UK region => skip
-        try:
-            regional_settings = order.uk_region.omis_settings
-        except UKRegionalSettings.DoesNotExist:
-            return
-
-        # no email addresses for this UK region => skip
-        if not regional_settings.manager_emails:
+        # no settings or email addresses for this UK region => skip
+        manager_emails = regional_manager_emails_cache.get_data().get(order.uk_region_id)
+        if not manager_emails:
             return
 
-        for manager_email in regional_settings.manager_emails:
-            self._send_email(
+        for manager_email in manager_emails:
+            batch.add(
                 email_address=manager_email,
                 template_id=Template.order_created_for_regional_manager.value,
                 personalisation=self._prepare_personalisation(
@@ -183,12 +286,15 @@ class Notify:
         """
         Notify post managers and regional managers that a new order has been created.
         """
-        self._order_created_for_post_managers(order)
-        self._order_created_for_regional_managers(order)
+        batch = NotificationBatch()
+        self._order_created_for_post_managers(batch, order)
+        self._order_created_for_regional_managers(batch, order)
+        self._send_batch(batch)
 
     def adviser_added(self, order, adviser, by, creation_date):
         """Send a notification when an adviser is added to an order."""
-        self._send_email(
+        batch = NotificationBatch()
+        batch.add(
             email_address=adviser.get_current_email(),
             template_id=Template.you_have_been_added_for_adviser.value,
             personalisation=self._prepare_personalisation(
@@ -200,174 +306,99 @@ class Notify:
                 },
             ),
         )
+        self._send_batch(batch)
 
     def adviser_removed(self, order, adviser):
         """Send a notification when an adviser is removed from an order."""
-        self._send_email(
+        batch = NotificationBatch()
+        batch.add(
             email_address=adviser.get_current_email(),
             template_id=Template.you_have_been_removed_for_adviser.value,
             personalisation=self._prepare_personalisation(
                 order, {'recipient name': adviser.name},
             ),
         )
+        self._send_batch(batch)
 
     def order_paid(self, order):
         """
         Send a notification to the customer and the advisers
         that the order has just been marked as paid.
         """
-        #  notify customer
-        self._send_email(
-            email_address=order.get_current_contact_email(),
-            template_id=Template.order_paid_for_customer.value,
-            personalisation=self._prepare_personalisation(
-                order,
-                {
-                    'recipient name': order.contact.name,
-                    'embedded link': order.get_public_facing_url(),
-                },
-            ),
+        batch = NotificationBatch()
+        self._add_to_customer_and_advisers(
+            batch,
+            order,
+            Template.order_paid_for_customer,
+            Template.order_paid_for_adviser,
         )
-
-        #  notify advisers
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.order_paid_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order, {'recipient name': adviser.name},
-                ),
-            )
+        self._send_batch(batch)
 
     def order_completed(self, order):
         """
         Send a notification to the advisers that the order has
         just been marked as completed.
         """
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.order_completed_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order, {'recipient name': adviser.name},
-                ),
-            )
+        batch = NotificationBatch()
+        self._add_to_advisers(batch, order, Template.order_completed_for_adviser)
+        self._send_batch(batch)
 
     def order_cancelled(self, order):
         """
         Send a notification to the customer and the advisers
         that the order has just been cancelled.
         """
-        #  notify customer
-        self._send_email(
-            email_address=order.get_current_contact_email(),
-            template_id=Template.order_cancelled_for_customer.value,
-            personalisation=self._prepare_personalisation(
-                order,
-                {
-                    'recipient name': order.contact.name,
-                    'embedded link': order.get_public_facing_url(),
-                },
-            ),
+        batch = NotificationBatch()
+        self._add_to_customer_and_advisers(
+            batch,
+            order,
+            Template.order_cancelled_for_customer,
+            Template.order_cancelled_for_adviser,
         )
-
-        #  notify advisers
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.order_cancelled_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order, {'recipient name': adviser.name},
-                ),
-            )
+        self._send_batch(batch)
 
     def quote_generated(self, order):
         """
         Send a notification to the customer and the advisers
         that a quote has just been created and needs to be accepted.
         """
-        #  notify customer
-        self._send_email(
-            email_address=order.get_current_contact_email(),
-            template_id=Template.quote_sent_for_customer.value,
-            personalisation=self._prepare_personalisation(
-                order,
-                {
-                    'recipient name': order.contact.name,
-                    'embedded link': order.get_public_facing_url(),
-                },
-            ),
+        batch = NotificationBatch()
+        self._add_to_customer_and_advisers(
+            batch,
+            order,
+            Template.quote_sent_for_customer,
+            Template.quote_sent_for_adviser,
         )
-
-        #  notify advisers
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.quote_sent_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order, {'recipient name': adviser.name},
-                ),
-            )
+        self._send_batch(batch)
 
     def quote_accepted(self, order):
         """
         Send a notification to the customer and the advisers
         that a quote has just been accepted.
         """
-        #  notify customer
-        self._send_email(
-            email_address=order.get_current_contact_email(),
-            template_id=Template.quote_accepted_for_customer.value,
-            personalisation=self._prepare_personalisation(
-                order,
-                {
-                    'recipient name': order.contact.name,
-                    'embedded link': order.get_public_facing_url(),
-                },
-            ),
+        batch = NotificationBatch()
+        self._add_to_customer_and_advisers(
+            batch,
+            order,
+            Template.quote_accepted_for_customer,
+            Template.quote_accepted_for_adviser,
         )
-
-        #  notify advisers
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.quote_accepted_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order, {'recipient name': adviser.name},
-                ),
-            )
+        self._send_batch(batch)
 
     def quote_cancelled(self, order, by):
         """
         Send a notification to the customer and the advisers
         that a quote has just been cancelled.
         """
-        #  notify customer
-        self._send_email(
-            email_address=order.get_current_contact_email(),
-            template_id=Template.quote_cancelled_for_customer.value,
-            personalisation=self._prepare_personalisation(
-                order,
-                {
-                    'recipient name': order.contact.name,
-                    'embedded link': order.get_public_facing_url(),
-                },
-            ),
+        batch = NotificationBatch()
+        self._add_to_customer_and_advisers(
+            batch,
+            order,
+            Template.quote_cancelled_for_customer,
+            Template.quote_cancelled_for_adviser,
+            extra_adviser_data={'canceller': by.name},
         )
-
-        #  notify advisers
-        for adviser in self._get_all_advisers(order):
-            self._send_email(
-                email_address=adviser.get_current_email(),
-                template_id=Template.quote_cancelled_for_adviser.value,
-                personalisation=self._prepare_personalisation(
-                    order,
-                    {
-                        'recipient name': adviser.name,
-                        'canceller': by.name,
-                    },
-                ),
-            )
+        self._send_batch(batch)
 
 
 notify = Notify()
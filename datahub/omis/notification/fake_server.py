@@ -0,0 +1,111 @@
+"""
+Fake GOV.UK Notify API server for load testing OMIS notifications locally.
+
+It accepts (and discards) requests to send emails, responding in the same way as the real
+API. A delay and a proportion of failed (503 by default) responses can be configured to
+simulate a slow or overloaded API.
+
+To use it, set OMIS_NOTIFICATION_API_BASE_URL to the URL of the server and
+OMIS_NOTIFICATION_API_KEY to any well-formed key (e.g. FAKE_API_KEY).
+"""
+import json
+import random
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from threading import Lock
+from uuid import uuid4
+
+logger = getLogger(__name__)
+
+FAKE_API_KEY = (
+    'fake-00000000-0000-0000-0000-000000000000-00000000-0000-0000-0000-000000000000'
+)
+EMAIL_NOTIFICATIONS_PATH = '/v2/notifications/email'
+
+
+class FakeNotifyRequestHandler(BaseHTTPRequestHandler):
+    """Handles requests to the fake Notify API."""
+
+    def do_POST(self):  # noqa: N802
+        """Handles a request to send a notification."""
+        content_length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(content_length)
+        server = self.server
+
+        if server.delay_secs:
+            time.sleep(server.delay_secs)
+
+        if self.path != EMAIL_NOTIFICATIONS_PATH:
+            self._send_json(HTTPStatus.NOT_FOUND, {'errors': [{'message': 'Not found'}]})
+            return
+
+        if random.random() < server.failure_rate:
+            server.record('failed')
+            self._send_json(
+                server.failure_status,
+                {
+                    'errors': [
+                        {'error': server.failure_status.phrase, 'message': 'Try again later'},
+                    ],
+                },
+            )
+            return
+
+        notification = json.loads(body)
+        server.record('sent')
+        self._send_json(
+            HTTPStatus.CREATED,
+            {
+                'id': str(uuid4()),
+                'reference': notification.get('reference'),
+                'content': {'subject': 'Fake notification', 'body': '', 'from_email': ''},
+                'template': {'id': notification['template_id'], 'version': 1, 'uri': ''},
+                'uri': '',
+            },
+        )
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Logs requests at debug level (rather than writing them to stderr)."""
+        logger.debug(format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeNotifyServer(ThreadingHTTPServer):
+    """Threaded HTTP server for the fake Notify API that counts the requests it handles."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        delay_secs=0,
+        failure_rate=0,
+        failure_status=HTTPStatus.SERVICE_UNAVAILABLE,
+    ):
+        """Initialises the server (listening on address, a (host, port) tuple)."""
+        super().__init__(address, FakeNotifyRequestHandler)
+        self.delay_secs = delay_secs
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._counts_lock = Lock()
+        self.counts = {'sent': 0, 'failed': 0}
+
+    @property
+    def url(self):
+        """The base URL of the server."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def record(self, outcome):
+        """Increments the count of requests with an outcome."""
+        with self._counts_lock:
+            self.counts[outcome] += 1
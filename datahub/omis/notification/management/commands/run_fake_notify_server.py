@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from datahub.omis.notification.fake_server import FAKE_API_KEY, FakeNotifyServer
+
+
+class Command(BaseCommand):
+    """Command to run a fake GOV.UK Notify API server for load testing."""
+
+    help = (
+        'Runs a fake GOV.UK Notify API server for load testing OMIS notifications. Set '
+        'OMIS_NOTIFICATION_API_BASE_URL to the URL of the server, and '
+        f'OMIS_NOTIFICATION_API_KEY to {FAKE_API_KEY}.'
+    )
+
+    def add_arguments(self, parser):
+        """Define extra arguments."""
+        parser.add_argument('--host', default='127.0.0.1', help='The host to listen on.')
+        parser.add_argument('--port', type=int, default=8025, help='The port to listen on.')
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0,
+            help='The number of seconds to wait before responding to each request.',
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0,
+            help='The proportion of requests (between 0 and 1) to respond to with a 503.',
+        )
+
+    def handle(self, *args, **options):
+        """Run the server until interrupted."""
+        server = FakeNotifyServer(
+            (options['host'], options['port']),
+            delay_secs=options['delay'],
+            failure_rate=options['failure_rate'],
+        )
+        self.stdout.write(f'Fake Notify server listening on {server.url}')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(
+                f'Sent: {server.counts["sent"]}, failed: {server.counts["failed"]}',
+            )
@@ -4,6 +4,11 @@ from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from datahub.omis.market.models import Market
+from datahub.omis.notification.cache import (
+    market_manager_email_cache,
+    regional_manager_emails_cache,
+)
 from datahub.omis.notification.client import notify
 from datahub.omis.order.models import Order, OrderAssignee, OrderSubscriber
 from datahub.omis.order.signals import (
@@ -14,6 +19,7 @@ from datahub.omis.order.signals import (
     quote_cancelled,
     quote_generated,
 )
+from datahub.omis.region.models import UKRegionalSettings
 
 
 @receiver(post_save, sender=Order, dispatch_uid='notify_post_save_order')
@@ -93,3 +99,28 @@ def notify_post_quote_accepted(sender, order, **kwargs):
 def notify_post_quote_cancelled(sender, order, by, **kwargs):
     """Notify people that a quote has been cancelled."""
     transaction.on_commit(partial(notify.quote_cancelled, order, by))
+
+
+@receiver(post_save, sender=Market, dispatch_uid='invalidate_market_cache_post_save')
+@receiver(post_delete, sender=Market, dispatch_uid='invalidate_market_cache_post_delete')
+def invalidate_market_manager_email_cache(sender, **kwargs):
+    """Invalidates the cached market manager emails when a market is saved or deleted."""
+    market_manager_email_cache.invalidate()
+
+
+@receiver(
+    post_save,
+    sender=UKRegionalSettings,
+    dispatch_uid='invalidate_regional_settings_cache_post_save',
+)
+@receiver(
+    post_delete,
+    sender=UKRegionalSettings,
+    dispatch_uid='invalidate_regional_settings_cache_post_delete',
+)
+def invalidate_regional_manager_emails_cache(sender, **kwargs):
+    """
+    Invalidates the cached regional manager emails when UK regional settings are saved or
+    deleted.
+    """
+    regional_manager_emails_cache.invalidate()
@@ -0,0 +1,17 @@
+import pytest
+
+from datahub.omis.notification.cache import (
+    market_manager_email_cache,
+    regional_manager_emails_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_notification_caches():
+    """
+    Clears the cached market and regional settings before each test (as changes rolled back
+    at the end of a test do not invalidate the caches).
+    """
+    market_manager_email_cache.clear()
+    regional_manager_emails_cache.clear()
+    yield
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+from threading import Thread
+
+import pytest
+from notifications_python_client.errors import HTTPError
+
+from datahub.omis.notification.api_client import PooledNotificationsAPIClient
+from datahub.omis.notification.fake_server import FAKE_API_KEY, FakeNotifyServer
+
+
+@pytest.fixture
+def fake_notify_server():
+    """Runs a fake Notify server in a background thread."""
+    server = FakeNotifyServer(('127.0.0.1', 0))
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api_client(fake_notify_server, monkeypatch):
+    """Creates an API client for the fake Notify server (without back-off between retries)."""
+    monkeypatch.setattr('datahub.omis.notification.api_client.RETRY_BACKOFF_FACTOR', 0)
+    return PooledNotificationsAPIClient(
+        FAKE_API_KEY,
+        base_url=fake_notify_server.url,
+        pool_maxsize=2,
+    )
+
+
+class TestPooledNotificationsAPIClient:
+    """Tests for PooledNotificationsAPIClient (using the fake Notify server)."""
+
+    def test_send_email(self, api_client, fake_notify_server):
+        """Test that emails are sent using the same session."""
+        for _ in range(3):
+            response = api_client.send_email_notification(
+                email_address='test@example.com',
+                template_id='test-template',
+                personalisation={'name': 'test'},
+            )
+            assert response['template']['id'] == 'test-template'
+
+        assert fake_notify_server.counts == {'sent': 3, 'failed': 0}
+
+    @pytest.mark.parametrize(
+        'failure_status',
+        (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE),
+    )
+    def test_retries_unavailable_errors(self, api_client, fake_notify_server, failure_status):
+        """Test that requests are retried when the API is unavailable."""
+        fake_notify_server.failure_rate = 1
+        fake_notify_server.failure_status = failure_status
+
+        with pytest.raises(HTTPError) as excinfo:
+            api_client.send_email_notification(
+                email_address='test@example.com',
+                template_id='test-template',
+            )
+
+        assert excinfo.value.status_code == failure_status
+        # The original request and three retries
+        assert fake_notify_server.counts == {'sent': 0, 'failed': 4}
+
+    @pytest.mark.parametrize(
+        'failure_status',
+        (HTTPStatus.BAD_GATEWAY, HTTPStatus.GATEWAY_TIMEOUT),
+    )
+    def test_does_not_retry_gateway_errors(self, api_client, fake_notify_server, failure_status):
+        """
+        Test that requests are not retried after gateway errors (as the email may have been
+        sent).
+        """
+        fake_notify_server.failure_rate = 1
+        fake_notify_server.failure_status = failure_status
+
+        with pytest.raises(HTTPError) as excinfo:
+            api_client.send_email_notification(
+                email_address='test@example.com',
+                template_id='test-template',
+            )
+
+        assert excinfo.value.status_code == failure_status
+        assert fake_notify_server.counts == {'sent': 0, 'failed': 1}
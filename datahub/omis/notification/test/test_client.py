@@ -8,7 +8,7 @@ from django.conf import settings
 from datahub.company.test.factories import AdviserFactory
 from datahub.core.constants import UKRegion
 from datahub.omis.market.models import Market
-from datahub.omis.notification.client import notify, send_email
+from datahub.omis.notification.client import notify, send_email, send_emails
 from datahub.omis.notification.constants import Template
 from datahub.omis.order.test.factories import (
     OrderAssigneeCompleteFactory,
@@ -56,6 +56,29 @@ class TestSendEmail:
         )
 
 
+class TestSendEmails:
+    """Tests for sending batches of emails."""
+
+    def test_continues_after_failure(self):
+        """
+        Test that if an email in a batch fails to send, the remaining emails are still sent
+        and the error is re-raised.
+        """
+        notify_client = mock.Mock()
+        notify_client.send_email_notification.side_effect = [ValueError(), None]
+        messages = [
+            {'email_address': 'test1@example.com', 'template_id': 'template'},
+            {'email_address': 'test2@example.com', 'template_id': 'template'},
+        ]
+
+        with pytest.raises(ValueError):
+            send_emails(notify_client, messages)
+
+        assert notify_client.send_email_notification.call_args_list == [
+            mock.call(**message) for message in messages
+        ]
+
+
 @pytest.mark.usefixtures('synchronous_thread_pool')
 class TestNotifyOrderInfo:
     """Tests for generic notifications related to an order."""
@@ -187,6 +210,34 @@ class TestNotifyOrderCreated:
             assert call_args['email_address'] == regional_manager_emails[index]
             assert call_args['template_id'] == Template.order_created_for_regional_manager.value
 
+    def test_duplicate_regional_manager_emails_removed(self):
+        """
+        Test that `.order_created` only sends one email to each manager, even if an email
+        address is listed more than once.
+        """
+        market = Market.objects.first()
+        market.manager_email = 'manager@test.com'
+        market.save()
+
+        UKRegionalSettings.objects.create(
+            uk_region_id=UKRegion.london.value.id,
+            manager_emails=['reg1@email.com', 'REG1@email.com', 'reg2@email.com'],
+        )
+
+        order = OrderFactory(
+            primary_market_id=market.country.pk,
+            uk_region_id=UKRegion.london.value.id,
+        )
+
+        notify.client.reset_mock()
+
+        notify.order_created(order)
+
+        assert [
+            call_args[1]['email_address']
+            for call_args in notify.client.send_email_notification.call_args_list
+        ] == ['manager@test.com', 'reg1@email.com', 'reg2@email.com']
+
     def test_email_sent_to_omis_admin_if_no_manager(self):
         """
         Test that `.order_created` sends an email to the OMIS admin email
@@ -385,6 +436,32 @@ class TestNotifyOrderPaid:
             assert call['personalisation']['recipient name'] == item.adviser.name
             assert call['personalisation']['embedded link'] == order.get_datahub_frontend_url()
 
+    def test_duplicate_advisers_notified_once(self):
+        """
+        Test that calling `order_paid` sends only one email to an adviser who is both an
+        assignee and a subscriber, and that all emails are sent in one batch.
+        """
+        order = OrderPaidFactory(assignees=[])
+        assignee = OrderAssigneeFactory(order=order)
+        OrderSubscriberFactory(order=order, adviser=assignee.adviser)
+
+        notify.client.reset_mock()
+
+        with mock.patch(
+            'datahub.omis.notification.client.send_emails',
+            wraps=send_emails,
+        ) as send_emails_mock:
+            notify.order_paid(order)
+
+        assert send_emails_mock.call_count == 1
+        assert [
+            call_args[1]['email_address']
+            for call_args in notify.client.send_email_notification.call_args_list
+        ] == [
+            order.get_current_contact_email(),
+            assignee.adviser.get_current_email(),
+        ]
+
 
 @pytest.mark.usefixtures('synchronous_thread_pool')
 class TestNotifyOrderCompleted:
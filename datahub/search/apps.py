@@ -41,7 +41,22 @@ class SearchApp:
 
     @classmethod
     def get_signal_receivers(cls):
-        """Returns the signal receivers for this search app."""
+        """
+        Returns the signal receivers for this search app.
+
+        These are the receivers declared in the signals submodule of the app, and the receivers
+        for the related objects its documents depend on (see datahub.search.dependencies).
+        """
+        from datahub.search.dependencies import get_dependency_signal_receivers
+
+        return (
+            *cls.get_declared_signal_receivers(),
+            *get_dependency_signal_receivers(cls),
+        )
+
+    @classmethod
+    def get_declared_signal_receivers(cls):
+        """Returns the signal receivers declared in the signals submodule of this search app."""
         return cls._load_submodule('signals').receivers
 
     @classmethod
@@ -0,0 +1,315 @@
+import os
+import random
+import time
+from collections import Counter
+from logging import getLogger
+from threading import Event, Lock, Thread
+
+from django.conf import settings
+from elasticsearch.helpers import streaming_bulk
+
+from datahub.search.elasticsearch import get_client
+
+logger = getLogger(__name__)
+
+# 'N/A' is the status used by the Elasticsearch client for connection errors and timeouts
+RETRYABLE_STATUSES = {429, 502, 503, 504, 'N/A'}
+BULK_INDEX_TIMEOUT_SECS = 300
+
+
+class BulkIndexer:
+    """
+    Long-lived, thread-safe buffer of Elasticsearch bulk actions.
+
+    Actions added using add() are sent to Elasticsearch in one bulk request once the buffer
+    reaches max_actions actions or max_bytes bytes, or when the oldest buffered action is
+    older than max_buffer_secs seconds (checked by a background thread).
+
+    Only actions rejected with a transient error (such as a 429 response or a timeout) are
+    retried, using exponential back-off with full jitter. Actions that still fail after
+    max_retries retries (or fail with any other error) are logged, and passed to the error
+    callback of the add() call they were added in (if there is one) so that they can be
+    resynced in some other way.
+
+    If the same document is added more than once before a flush, only the latest action is
+    sent.
+    """
+
+    def __init__(
+        self,
+        max_actions=None,
+        max_bytes=None,
+        max_buffer_secs=None,
+        max_retries=None,
+        initial_backoff_secs=None,
+        max_backoff_secs=None,
+        client=None,
+    ):
+        """Initialises the indexer, using settings for any unspecified thresholds."""
+        self.max_actions = max_actions or settings.ES_BULK_INDEXER_MAX_ACTIONS
+        self.max_bytes = max_bytes or settings.ES_BULK_INDEXER_MAX_BYTES
+        self.max_buffer_secs = max_buffer_secs or settings.ES_BULK_INDEXER_MAX_BUFFER_SECS
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.ES_BULK_INDEXER_MAX_RETRIES
+        )
+        self.initial_backoff_secs = (
+            initial_backoff_secs or settings.ES_BULK_INDEXER_INITIAL_BACKOFF_SECS
+        )
+        self.max_backoff_secs = max_backoff_secs or settings.ES_BULK_INDEXER_MAX_BACKOFF_SECS
+        self._client = client
+
+        self._buffer_lock = Lock()
+        # Serialises flushes so that actions for the same document are sent in order
+        self._flush_lock = Lock()
+        self._actions = {}
+        self._callbacks = []
+        self._buffered_bytes = 0
+        self._oldest_action_added_on = None
+        self._stats = Counter()
+
+        self._closed = Event()
+        self._flush_thread = None
+
+    @property
+    def client(self):
+        """The Elasticsearch client used to send bulk requests."""
+        return self._client or get_client()
+
+    @property
+    def num_buffered_actions(self):
+        """The number of actions waiting to be sent."""
+        with self._buffer_lock:
+            return len(self._actions)
+
+    def get_stats(self):
+        """
+        Returns a copy of the counters for this indexer.
+
+        The counters are:
+            flushes: number of flushes that sent at least one action
+            actions_sent: number of actions sent (including retries)
+            actions_indexed: number of actions that succeeded
+            retries: number of retried bulk requests
+            actions_retried: number of actions that were retried
+            actions_rejected: number of actions that failed permanently
+        """
+        with self._buffer_lock:
+            return dict(self._stats)
+
+    def add(self, actions, callback=None, error_callback=None):
+        """
+        Adds actions to the buffer.
+
+        :param actions: a list of bulk actions (e.g. as returned by
+            BaseESModel.db_objects_to_es_documents())
+        :param callback: optional callable that is called with the list of actions once
+            all of them have been successfully sent to Elasticsearch
+        :param error_callback: optional callable that is called with the list of actions
+            that failed permanently (if any of them did)
+        """
+        self._ensure_flush_thread_started()
+        serializer = self.client.transport.serializer
+
+        with self._buffer_lock:
+            if not self._actions:
+                self._oldest_action_added_on = time.monotonic()
+
+            for action in actions:
+                key = _get_action_key(action)
+                previous_size = self._actions[key][1] if key in self._actions else 0
+                size = len(serializer.dumps(action.get('_source', {})))
+                self._actions[key] = (action, size)
+                self._buffered_bytes += size - previous_size
+
+            if callback or error_callback:
+                self._callbacks.append((callback, error_callback, actions))
+
+            should_flush = (
+                len(self._actions) >= self.max_actions
+                or self._buffered_bytes >= self.max_bytes
+            )
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Sends all buffered actions to Elasticsearch."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                actions = [action for action, _ in self._actions.values()]
+                callbacks = self._callbacks
+                self._actions = {}
+                self._callbacks = []
+                self._buffered_bytes = 0
+                self._oldest_action_added_on = None
+
+            if not actions:
+                return
+
+            try:
+                failed_keys = self._send_with_retries(actions)
+            except Exception:
+                logger.exception('Bulk indexer flush failed')
+                failed_keys = {_get_action_key(action) for action in actions}
+                self._increment_stats(actions_rejected=len(actions))
+
+            with self._buffer_lock:
+                self._stats['flushes'] += 1
+
+        for callback, error_callback, callback_actions in callbacks:
+            failed_actions = [
+                action for action in callback_actions if _get_action_key(action) in failed_keys
+            ]
+            callback_to_call = error_callback if failed_actions else callback
+            if not callback_to_call:
+                continue
+
+            try:
+                callback_to_call(failed_actions or callback_actions)
+            except Exception:
+                logger.exception('Bulk indexer callback failed')
+
+    def close(self):
+        """Flushes any buffered actions and stops the background flush thread."""
+        self._closed.set()
+        self.flush()
+
+    def _send_with_retries(self, actions):
+        """
+        Sends actions to Elasticsearch, retrying those that failed with a transient error.
+
+        :returns: the keys of actions that failed permanently
+        """
+        pending = actions
+        failed_keys = set()
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                backoff = min(
+                    self.max_backoff_secs,
+                    self.initial_backoff_secs * 2 ** (attempt - 1),
+                )
+                time.sleep(random.uniform(0, backoff))
+                self._increment_stats(retries=1, actions_retried=len(pending))
+
+            retryable, permanently_failed = self._send(pending)
+            failed_keys.update(_get_action_key(action) for action, _ in permanently_failed)
+            _log_failures(permanently_failed)
+
+            if not retryable:
+                return failed_keys
+
+            pending = [action for action, _ in retryable]
+
+        failed_keys.update(_get_action_key(action) for action in pending)
+        _log_failures(retryable)
+        self._increment_stats(actions_rejected=len(pending))
+        return failed_keys
+
+    def _send(self, actions):
+        """
+        Sends one round of bulk requests.
+
+        :returns: a tuple of lists of (action, error info) pairs for retryable and
+            permanently failed actions
+        """
+        retryable = []
+        permanently_failed = []
+        results = streaming_bulk(
+            self.client,
+            actions,
+            chunk_size=self.max_actions,
+            max_chunk_bytes=settings.ES_BULK_MAX_CHUNK_BYTES,
+            raise_on_error=False,
+            raise_on_exception=False,
+            request_timeout=BULK_INDEX_TIMEOUT_SECS,
+        )
+
+        # streaming_bulk() yields one result per action, in the same order as the actions
+        for action, (ok, result) in zip(actions, results):
+            if ok:
+                continue
+
+            _, info = next(iter(result.items()))
+            if info.get('status') in RETRYABLE_STATUSES:
+                retryable.append((action, info))
+            else:
+                permanently_failed.append((action, info))
+
+        self._increment_stats(
+            actions_sent=len(actions),
+            actions_indexed=len(actions) - len(retryable) - len(permanently_failed),
+            actions_rejected=len(permanently_failed),
+        )
+        return retryable, permanently_failed
+
+    def _increment_stats(self, **counts):
+        with self._buffer_lock:
+            self._stats.update(counts)
+
+    def _ensure_flush_thread_started(self):
+        if self._flush_thread is not None:
+            return
+
+        with self._buffer_lock:
+            if self._flush_thread is None:
+                self._flush_thread = Thread(
+                    target=self._flush_periodically,
+                    name='search-bulk-indexer',
+                    daemon=True,
+                )
+                self._flush_thread.start()
+
+    def _flush_periodically(self):
+        interval = self.max_buffer_secs / 2
+        while not self._closed.wait(interval):
+            with self._buffer_lock:
+                added_on = self._oldest_action_added_on
+
+            if added_on is not None and time.monotonic() - added_on >= self.max_buffer_secs:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('Periodic flush of bulk indexer failed')
+
+
+def _get_action_key(action):
+    return action.get('_index'), action.get('_type'), action['_id']
+
+
+def _log_failures(failures):
+    for action, info in failures:
+        logger.error(
+            f'Failed to index document {action["_id"]} in {action.get("_index")}: '
+            f'{info.get("status")} {info.get("error")}',
+        )
+
+
+_indexer = None
+_indexer_pid = None
+_indexer_lock = Lock()
+
+
+def get_bulk_indexer():
+    """
+    Gets the bulk indexer for the current process, creating it if necessary.
+
+    A new indexer is created after a fork (e.g. in each Celery worker process), as the
+    background flush thread is not inherited by child processes.
+    """
+    global _indexer, _indexer_pid
+
+    with _indexer_lock:
+        if _indexer is None or _indexer_pid != os.getpid():
+            _indexer = BulkIndexer()
+            _indexer_pid = os.getpid()
+        return _indexer
+
+
+def flush_bulk_indexer():
+    """Flushes the bulk indexer for the current process (if one has been created)."""
+    with _indexer_lock:
+        indexer = _indexer if _indexer_pid == os.getpid() else None
+
+    if indexer:
+        indexer.close()
@@ -1,4 +1,10 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from functools import partial
 from logging import getLogger
+from time import perf_counter
+
+from django.db import connection
 
 from datahub.core.utils import slice_iterable_into_chunks
 from datahub.search.elasticsearch import bulk
@@ -9,46 +15,77 @@ PROGRESS_INTERVAL = 20000
 BULK_INDEX_TIMEOUT_SECS = 300
 
 
-def sync_app(search_app, batch_size=None, post_batch_callback=None):
-    """Syncs objects for an app to ElasticSearch in batches of batch_size."""
+def sync_app(
+    search_app,
+    batch_size=None,
+    post_batch_callback=None,
+    num_workers=1,
+    progress_callback=None,
+    bulk_request_limiter=None,
+):
+    """
+    Syncs objects for an app to ElasticSearch in batches of batch_size.
+
+    If provided, progress_callback is called with the number of rows processed so far and the
+    total number of rows at the start and after each batch.
+
+    If num_workers is greater than one, batches are synced concurrently using that many
+    threads (each with its own database connection). post_batch_callback must be thread-safe
+    in that case.
+
+    If provided, bulk_request_limiter is called to get a context manager that is held while
+    each bulk request is sent (and post_batch_callback is called). This can be used to limit the
+    number of concurrent bulk requests.
+    """
     model_name = search_app.es_model.__name__
     batch_size = batch_size or search_app.bulk_batch_size
     logger.info(f'Processing {model_name} records, using batch size {batch_size}')
 
     read_indices, write_index = search_app.es_model.get_read_and_write_indices()
 
+    start_time = perf_counter()
     num_source_rows_processed = 0
     num_objects_synced = 0
     total_rows = search_app.queryset.count()
+    if progress_callback:
+        progress_callback(0, total_rows)
+
     it = search_app.queryset.values_list('pk', flat=True).iterator(chunk_size=batch_size)
     batches = slice_iterable_into_chunks(it, batch_size)
-    for batch in batches:
-        objs = search_app.queryset.filter(pk__in=batch)
-
-        num_actions = sync_objects(
-            search_app.es_model,
-            objs,
-            read_indices,
-            write_index,
-            post_batch_callback=post_batch_callback,
-        )
-
+    batch_results = _sync_batches(
+        search_app,
+        batches,
+        read_indices,
+        write_index,
+        post_batch_callback,
+        num_workers,
+        bulk_request_limiter,
+    )
+    for num_rows, num_actions in batch_results:
         emit_progress = (
             (num_source_rows_processed + num_actions) // PROGRESS_INTERVAL
             - num_source_rows_processed // PROGRESS_INTERVAL
             > 0
         )
 
-        num_source_rows_processed += len(batch)
+        num_source_rows_processed += num_rows
         num_objects_synced += num_actions
 
+        if progress_callback:
+            progress_callback(num_source_rows_processed, total_rows)
+
         if emit_progress:
             logger.info(
                 f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} '
                 f'{num_source_rows_processed*100//total_rows}%',
             )
 
-    logger.info(f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} 100%.')
+    elapsed_time = perf_counter() - start_time
+    logger.info(
+        f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} 100% in '
+        f'{elapsed_time:.1f}s ({num_source_rows_processed / max(elapsed_time, 0.001):.0f} '
+        f'rows/s).',
+    )
     if num_source_rows_processed != num_objects_synced:
         logger.warning(
             f'{num_source_rows_processed - num_objects_synced} deleted objects detected while '
@@ -56,19 +93,97 @@ def sync_app(search_app, batch_size=None, post_batch_callback=None):
         )
 
 
-def sync_objects(es_model, model_objects, read_indices, write_index, post_batch_callback=None):
-    """Syncs an iterable of model instances to Elasticsearch."""
+def _sync_batches(
+    search_app,
+    batches,
+    read_indices,
+    write_index,
+    post_batch_callback,
+    num_workers,
+    bulk_request_limiter,
+):
+    """
+    Syncs batches of primary keys, yielding the number of rows and actions for each batch as
+    it completes.
+
+    When using multiple workers, at most num_workers batches are in progress at once (so that
+    primary keys aren't read from the database faster than they can be synced).
+    """
+    def _sync_batch(batch):
+        objs = search_app.queryset.filter(pk__in=batch)
+        num_actions = sync_objects(
+            search_app.es_model,
+            objs,
+            read_indices,
+            write_index,
+            post_batch_callback=post_batch_callback,
+            bulk_request_limiter=bulk_request_limiter,
+        )
+        return len(batch), num_actions
+
+    if num_workers <= 1:
+        yield from map(_sync_batch, batches)
+        return
+
+    def _sync_batch_in_thread(batch):
+        try:
+            return _sync_batch(batch)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='search-sync') as executor:
+        pending = set()
+        for batch in batches:
+            if len(pending) >= num_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+
+            pending.add(executor.submit(_sync_batch_in_thread, batch))
+
+        yield from (future.result() for future in wait(pending).done)
+
+
+def sync_objects(
+    es_model,
+    model_objects,
+    read_indices,
+    write_index,
+    post_batch_callback=None,
+    indexer=None,
+    indexer_error_callback=None,
+    bulk_request_limiter=None,
+):
+    """
+    Syncs an iterable of model instances to Elasticsearch.
+
+    If a bulk indexer is provided, the actions are added to its buffer (and post_batch_callback
+    is called once they have been sent) instead of being sent immediately. If any of them fail
+    permanently, indexer_error_callback (if provided) is called with the failed actions instead.
+
+    If provided, bulk_request_limiter is called to get a context manager that is held while the
+    bulk request is sent (and post_batch_callback is called). It's not used with a bulk indexer.
+    """
     actions = list(
         es_model.db_objects_to_es_documents(model_objects, index=write_index),
     )
     num_actions = len(actions)
-    bulk(
-        actions=actions,
-        chunk_size=num_actions,
-        request_timeout=BULK_INDEX_TIMEOUT_SECS,
-    )
 
-    if post_batch_callback:
-        post_batch_callback(read_indices, write_index, actions)
+    if indexer is not None:
+        callback = None
+        if post_batch_callback:
+            callback = partial(post_batch_callback, read_indices, write_index)
+
+        indexer.add(actions, callback=callback, error_callback=indexer_error_callback)
+        return num_actions
+
+    with (bulk_request_limiter or nullcontext)():
+        bulk(
+            actions=actions,
+            chunk_size=num_actions,
+            request_timeout=BULK_INDEX_TIMEOUT_SECS,
+        )
+
+        if post_batch_callback:
+            post_batch_callback(read_indices, write_index, actions)
 
     return num_actions
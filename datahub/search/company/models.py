@@ -1,5 +1,6 @@
 import itertools
 from functools import partial
+from operator import attrgetter
 
 from elasticsearch_dsl import Boolean, Completion, Date, Keyword, Text
 
@@ -116,27 +117,30 @@ class Company(BaseESModel):
         'suggest': get_suggestions,
         'address': partial(dict_utils.address_dict, prefix='address'),
         'registered_address': partial(dict_utils.address_dict, prefix='registered_address'),
+        'business_type': dict_utils.computed_constant_id_name_dict('business_type'),
+        'companies_house_data': lambda obj: dict_utils.ch_company_dict(obj.companies_house_data),
+        'employee_range': dict_utils.computed_constant_id_name_dict('employee_range'),
+        'export_experience_category': dict_utils.computed_constant_id_name_dict(
+            'export_experience_category',
+        ),
+        'headquarter_type': dict_utils.computed_constant_id_name_dict('headquarter_type'),
+        'trading_address_country': dict_utils.computed_constant_id_name_dict(
+            'trading_address_country',
+        ),
+        'turnover_range': dict_utils.computed_constant_id_name_dict('turnover_range'),
+        'uk_based': attrgetter('uk_based'),
+        'uk_region': dict_utils.computed_constant_id_name_dict('uk_region'),
     }
 
     MAPPINGS = {
         'archived_by': dict_utils.contact_or_adviser_dict,
-        'business_type': dict_utils.id_name_dict,
-        'companies_house_data': dict_utils.ch_company_dict,
-        'employee_range': dict_utils.id_name_dict,
-        'export_experience_category': dict_utils.id_name_dict,
         'export_to_countries': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
         'future_interest_countries': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
         'global_headquarters': dict_utils.id_name_dict,
-        'headquarter_type': dict_utils.id_name_dict,
         'sector': dict_utils.sector_dict,
 
         # TODO: delete once the migration to address and registered address is complete
         'registered_address_country': dict_utils.id_name_dict,
-        'trading_address_country': dict_utils.id_name_dict,
-
-        'turnover_range': dict_utils.id_name_dict,
-        'uk_based': bool,
-        'uk_region': dict_utils.id_name_dict,
     }
 
     SEARCH_FIELDS = (
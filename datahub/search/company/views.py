@@ -1,4 +1,4 @@
-from django.db.models.expressions import Case, Value, When
+from django.db.models.expressions import Case, F, Value, When
 from django.db.models.fields import CharField
 from django.db.models.functions import Cast, Concat, Upper
 
@@ -10,7 +10,6 @@ from datahub.core.hawk_receiver import (
     HawkScopePermission,
 )
 from datahub.core.query_utils import get_front_end_url_expression
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.oauth.scopes import Scope
 from datahub.search.company import CompanySearchApp
 from datahub.search.company.serializers import (
@@ -170,7 +169,7 @@ class SearchCompanyExportAPIView(SearchCompanyAPIViewMixin, SearchExportAPIView)
     queryset = DBCompany.objects.annotate(
         link=get_front_end_url_expression('company', 'pk'),
         upper_headquarter_type_name=Upper('headquarter_type__name'),
-        sector_name=get_sector_name_subquery('sector'),
+        sector_name=F('sector__full_name'),
         # get company.turnover if set else company.turnover_range
         turnover_value=Case(
             When(
@@ -63,7 +63,6 @@ class Contact(BaseESModel):
         'archived_by': dict_utils.contact_or_adviser_dict,
         'company': dict_utils.company_dict,
         'created_by': dict_utils.adviser_dict_with_team,
-        'title': dict_utils.id_name_dict,
     }
 
     COMPUTED_MAPPINGS = {
@@ -74,7 +73,8 @@ class Contact(BaseESModel):
         'address_postcode': contact_dict_utils.computed_address_field('address_postcode'),
         'address_country': contact_dict_utils.computed_address_field('address_country'),
         'company_sector': dict_utils.computed_nested_sector_dict('company.sector'),
-        'company_uk_region': dict_utils.computed_nested_id_name_dict('company.uk_region'),
+        'company_uk_region': dict_utils.computed_constant_id_name_dict('company.uk_region'),
+        'title': dict_utils.computed_constant_id_name_dict('title'),
     }
 
     SEARCH_FIELDS = (
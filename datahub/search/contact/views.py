@@ -10,7 +10,6 @@ from datahub.core.query_utils import (
     get_top_related_expression_subquery,
 )
 from datahub.interaction.models import Interaction as DBInteraction
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.oauth.scopes import Scope
 from datahub.search.contact import ContactSearchApp
 from datahub.search.contact.serializers import SearchContactQuerySerializer
@@ -86,7 +85,7 @@ class SearchContactExportAPIView(SearchContactAPIViewMixin, SearchExportAPIView)
     queryset = DBContact.objects.annotate(
         name=get_full_name_expression(),
         link=get_front_end_url_expression('contact', 'pk'),
-        company_sector_name=get_sector_name_subquery('company__sector'),
+        company_sector_name=F('company__sector__full_name'),
         company_link=get_front_end_url_expression('company', 'company__pk'),
         computed_country_name=Case(
             When(address_same_as_company=True, then='company__address_country__name'),
@@ -0,0 +1,352 @@
+"""
+Dependency graph of search documents on the related objects they copy data from.
+
+Documents such as contacts embed data from other models (e.g. the name of the contact's
+company). The edges of the graph are worked out from each search app:
+
+- MAPPINGS entries for relation fields of the search app's model
+- the source_fields of MAPPINGS and COMPUTED_MAPPINGS functions (see dict_utils.reads_fields())
+- the select_related() and prefetch_related() lookups of SearchApp.queryset
+
+Each edge has a path (in Django lookup format) from the search app's model to the source model,
+and the fields of the source model that the documents use (or None if they are not known,
+in which case any change is assumed to be relevant).
+
+MAPPINGS keys must be fields of the search app's model, as what a property reads can't be
+worked out. Properties should instead be mapped in COMPUTED_MAPPINGS using a function that
+declares the fields it reads (e.g. dict_utils.computed_constant_id_name_dict()).
+
+When a source object changes, the primary keys of the affected documents are resolved using
+one query per edge, and the documents are resynced in batches by a single Celery task.
+
+Constant models (and models in the metadata app) are not included in the graph as they rarely
+change. Models that a search app already has explicit signal receivers for (including the
+search app's own model) are also not included.
+"""
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from itertools import groupby
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.signals import post_save
+
+from datahub.core.models import BaseConstantModel
+from datahub.search.apps import get_search_apps
+from datahub.search.field_tracking import get_tracked_attnames, have_fields_changed
+from datahub.search.signals import SignalReceiver
+from datahub.search.sync_object import sync_dependent_objects_by_paths_async
+
+EXCLUDED_SOURCE_APP_LABELS = frozenset({'metadata'})
+
+DependencyEdge = namedtuple(
+    'DependencyEdge',
+    (
+        'search_app',
+        'source_model',
+        'path',
+        'tracked_fields',
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def get_dependency_edges(search_app):
+    """
+    Gets the edges of the dependency graph for a search app.
+
+    :returns: tuple of DependencyEdge instances (sorted by source model label and path)
+    """
+    model = search_app.queryset.model
+    excluded_models = {
+        model,
+        *(receiver.sender for receiver in search_app.get_declared_signal_receivers()),
+    }
+
+    known_fields_by_path, unknown_paths = _get_source_fields_by_path(search_app)
+    models_by_path = {
+        path: _get_model_for_path(model, path)
+        for path in (*known_fields_by_path, *unknown_paths)
+    }
+
+    known_fields_by_model = defaultdict(set)
+    for path, field_names in known_fields_by_path.items():
+        known_fields_by_model[models_by_path[path]].update(field_names)
+
+    edges = []
+
+    for path, source_model in models_by_path.items():
+        if source_model is None or source_model in excluded_models:
+            continue
+
+        if _is_excluded_source_model(source_model):
+            continue
+
+        if path in known_fields_by_path:
+            field_names = known_fields_by_path[path]
+        else:
+            # Assume that the path uses the same fields of the source model as other paths
+            # (e.g. a lambda in MAPPINGS that uses contact_or_adviser_dict())
+            field_names = known_fields_by_model.get(source_model)
+
+        edges.append(
+            DependencyEdge(
+                search_app,
+                source_model,
+                path,
+                _get_concrete_field_names(source_model, field_names),
+            ),
+        )
+
+    return tuple(sorted(edges, key=lambda edge: (edge.source_model._meta.label, edge.path)))
+
+
+@lru_cache(maxsize=None)
+def get_dependency_graph():
+    """
+    Gets the dependency graph for all search apps.
+
+    :returns: dict of source model to a tuple of DependencyEdge instances
+    """
+    graph = defaultdict(list)
+
+    for search_app in get_search_apps():
+        for edge in get_dependency_edges(search_app):
+            graph[edge.source_model].append(edge)
+
+    return {source_model: tuple(edges) for source_model, edges in graph.items()}
+
+
+def get_dependent_pks(search_app, paths, source_pks):
+    """
+    Gets the primary keys of the documents of a search app that depend on some source objects.
+
+    One query is made per path.
+
+    :returns: sorted list of primary keys
+    """
+    queryset = search_app.queryset.select_related(None).prefetch_related(None)
+    pks = set()
+
+    for path in paths:
+        pks.update(
+            queryset.filter(
+                **{f'{path}{LOOKUP_SEP}in': source_pks},
+            ).values_list('pk', flat=True),
+        )
+
+    return sorted(pks)
+
+
+def sync_dependent_objects_async(source_model, source_pks, changed_fields=None):
+    """
+    Resyncs (asynchronously) the documents that depend on some source objects.
+
+    One Celery task is scheduled per affected search app.
+
+    This is intended for use after bulk updates (which do not send post_save signals), and
+    should normally be called using transaction.on_commit().
+
+    :param changed_fields: the fields that were changed, or None if not known
+    """
+    edges = get_dependency_graph().get(source_model, ())
+    if changed_fields is not None:
+        edges = [edge for edge in edges if _edge_uses_fields(edge, changed_fields)]
+
+    for search_app, app_edges in groupby(edges, key=lambda edge: edge.search_app):
+        sync_dependent_objects_by_paths_async(
+            search_app,
+            [edge.path for edge in app_edges],
+            source_pks,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_dependency_signal_receivers(search_app):
+    """
+    Gets the signal receivers that resync the documents of a search app when their source
+    objects change.
+
+    One receiver is created per source model. Saves that create source objects are ignored, as
+    no documents can depend on a new object until another object is saved with a reference to
+    it (which resyncs that object itself).
+    """
+    edges_by_source_model = groupby(
+        get_dependency_edges(search_app),
+        key=lambda edge: edge.source_model,
+    )
+    receivers = []
+
+    for source_model, edges in edges_by_source_model:
+        edges = tuple(edges)
+        tracked_fields = _get_combined_tracked_fields(edges)
+
+        receiver = SignalReceiver(
+            post_save,
+            source_model,
+            _make_receiver_func(search_app, edges),
+            tracked_fields=tracked_fields,
+            ignore_created=True,
+        )
+        receiver.search_app = search_app
+        receivers.append(receiver)
+
+    return tuple(receivers)
+
+
+def _make_receiver_func(search_app, edges):
+    def sync_dependent_objects(instance):
+        paths = [
+            edge.path for edge in edges
+            if edge.tracked_fields is None or have_fields_changed(instance, edge.tracked_fields)
+        ]
+        if not paths:
+            return
+
+        transaction.on_commit(
+            lambda: sync_dependent_objects_by_paths_async(search_app, paths, [instance.pk]),
+        )
+
+    return sync_dependent_objects
+
+
+def _get_source_fields_by_path(search_app):
+    """
+    Collects the paths to related objects used by a search app's documents.
+
+    :returns: (dict of path to set of field names, set of paths with unknown fields)
+    :raises ImproperlyConfigured: if a MAPPINGS key is not a field of the search app's model
+    """
+    model = search_app.queryset.model
+    es_model = search_app.es_model
+    known_fields_by_path = defaultdict(set)
+    all_paths = set()
+
+    for field_name, func in es_model.MAPPINGS.items():
+        try:
+            model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f'{es_model.__name__}.MAPPINGS key {field_name!r} is not a field of '
+                f'{model._meta.label}. Map it in COMPUTED_MAPPINGS using a function that '
+                f'declares the fields it reads (see dict_utils.reads_fields()).',
+            )
+
+        if _get_model_for_path(model, field_name) is None:
+            continue
+
+        all_paths.add(field_name)
+        for path, field_names in getattr(func, 'source_fields', ()):
+            known_fields_by_path[_join_path(field_name, path)].update(field_names)
+
+    for func in es_model.COMPUTED_MAPPINGS.values():
+        for path, field_names in getattr(func, 'source_fields', ()):
+            if path:
+                known_fields_by_path[path].update(field_names)
+
+    all_paths.update(known_fields_by_path)
+    all_paths.update(_get_queryset_paths(search_app.queryset.all()))
+
+    # Include intermediate objects (e.g. company for company__sector)
+    for path in list(all_paths):
+        parts = path.split(LOOKUP_SEP)
+        all_paths.update(LOOKUP_SEP.join(parts[:index]) for index in range(1, len(parts)))
+
+    return dict(known_fields_by_path), all_paths - known_fields_by_path.keys()
+
+
+def _get_queryset_paths(queryset):
+    """Gets the select_related() and prefetch_related() lookups of a queryset."""
+    paths = list(_flatten_select_related(queryset.query.select_related))
+
+    for lookup in queryset._prefetch_related_lookups:
+        if not isinstance(lookup, Prefetch):
+            paths.append(lookup)
+            continue
+
+        paths.append(lookup.prefetch_through)
+        if lookup.queryset is not None:
+            paths.extend(
+                _join_path(lookup.prefetch_through, path)
+                for path in _get_queryset_paths(lookup.queryset)
+            )
+
+    return paths
+
+
+def _flatten_select_related(select_related, prefix=''):
+    if not isinstance(select_related, dict):
+        return
+
+    for field_name, nested_select_related in select_related.items():
+        path = _join_path(prefix, field_name)
+        yield path
+        yield from _flatten_select_related(nested_select_related, prefix=path)
+
+
+def _get_model_for_path(model, path):
+    """Gets the model at the end of a path, or None if the path isn't a relation."""
+    for field_name in path.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+
+        if not field.is_relation or field.related_model is None:
+            return None
+
+        model = field.related_model
+
+    return model
+
+
+def _get_concrete_field_names(model, field_names):
+    """
+    Filters out non-field names (e.g. properties), as those can't be tracked.
+
+    Returns None if there are no field names (so that any change is treated as relevant).
+    """
+    if not field_names:
+        return None
+
+    concrete_field_names = set()
+    for field_name in field_names:
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+
+        if not field.concrete:
+            return None
+
+        concrete_field_names.add(field_name)
+
+    return frozenset(concrete_field_names)
+
+
+def _get_combined_tracked_fields(edges):
+    if any(edge.tracked_fields is None for edge in edges):
+        return None
+
+    return tuple(sorted(set().union(*(edge.tracked_fields for edge in edges))))
+
+
+def _edge_uses_fields(edge, field_names):
+    if edge.tracked_fields is None:
+        return True
+
+    changed_attnames = get_tracked_attnames(edge.source_model, field_names)
+    return bool(changed_attnames & get_tracked_attnames(edge.source_model, edge.tracked_fields))
+
+
+def _is_excluded_source_model(model):
+    return (
+        issubclass(model, BaseConstantModel)
+        or model._meta.app_label in EXCLUDED_SOURCE_APP_LABELS
+    )
+
+
+def _join_path(*parts):
+    return LOOKUP_SEP.join(part for part in parts if part)
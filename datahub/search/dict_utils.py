@@ -1,3 +1,22 @@
+from datahub.metadata.cache import constant_model_cache, sector_tree_cache
+
+
+def reads_fields(*field_names, path=''):
+    """
+    Decorator that records the fields of related objects that a mapping function reads.
+
+    path is the path (in Django lookup format) from the value passed to the function to the
+    object the fields belong to. Fields of the value itself have an empty path.
+
+    This information is used to work out which changes to related objects affect search
+    documents (see datahub.search.dependencies).
+    """
+    def decorator(func):
+        func.source_fields = (*getattr(func, 'source_fields', ()), (path, field_names))
+        return func
+    return decorator
+
+
 def _attrgetter_with_default(attr, default):
     """
     It returns a function that can be called with an object to get the value
@@ -9,6 +28,7 @@ def _attrgetter_with_default(attr, default):
     return _getter
 
 
+@reads_fields('name')
 def id_name_dict(obj):
     """Creates dictionary with selected field from supplied object."""
     if obj is None:
@@ -20,6 +40,35 @@ def id_name_dict(obj):
     }
 
 
+def computed_constant_id_name_dict(field_path):
+    """
+    Creates a function that returns a dictionary with id and name keys for a foreign key to a
+    constant model (a BaseConstantModel subclass).
+
+    The name is looked up in the in-process constant model cache using the foreign key
+    value, so the related object does not need to be fetched (or joined).
+
+    field_path can also refer to a field of a related object using the
+    'nested_object.nested_field' format.
+    """
+    *nested_fields, field_name = field_path.split('.')
+
+    @reads_fields(field_name, path='__'.join(nested_fields))
+    def get_dict(obj):
+        for nested_field in nested_fields:
+            obj = getattr(obj, nested_field)
+            if obj is None:
+                return None
+
+        field = obj._meta.get_field(field_name)
+        return constant_model_cache.get_id_name_dict(
+            field.related_model,
+            getattr(obj, field.attname),
+        )
+
+    return get_dict
+
+
 def id_name_list_of_dicts(manager):
     """Creates a list of dicts with ID and name keys from a manager."""
     return _list_of_dicts(id_name_dict, manager)
@@ -76,6 +125,7 @@ def address_dict(obj, prefix='address'):
     return None
 
 
+@reads_fields('name', 'trading_names')
 def company_dict(obj):
     """Creates dictionary for a company field."""
     if obj is None:
@@ -88,6 +138,7 @@ def company_dict(obj):
     }
 
 
+@reads_fields('first_name', 'last_name')
 def contact_or_adviser_dict(obj, include_dit_team=False):
     """Creates dictionary with selected field from supplied object."""
     if obj is None:
@@ -108,11 +159,13 @@ def contact_or_adviser_dict(obj, include_dit_team=False):
     return data
 
 
+@reads_fields('first_name', 'last_name')
 def contact_or_adviser_list_of_dicts(manager):
     """Creates a list of dicts from a manager for contacts or advisers."""
     return _list_of_dicts(contact_or_adviser_dict, manager)
 
 
+@reads_fields('first_name', 'last_name', 'dit_team')
 def adviser_dict_with_team(obj):
     """Creates a dictionary with adviser names fields and the adviser's team."""
     return contact_or_adviser_dict(obj, include_dit_team=True)
@@ -120,11 +173,12 @@ def adviser_dict_with_team(obj):
 
 def _computed_nested_dict(nested_field, dict_func):
     """Creates a dictionary from a nested field using dict_func."""
-    def get_dict(obj):
-        fields = nested_field.split('.', maxsplit=1)
-        if len(fields) != 2:
-            raise ValueError("nested_field must be in 'nested_object.nested_field' format.")
+    fields = nested_field.split('.', maxsplit=1)
+    if len(fields) != 2:
+        raise ValueError("nested_field must be in 'nested_object.nested_field' format.")
 
+    @reads_fields(fields[1], path=fields[0])
+    def get_dict(obj):
         related_object = getattr(obj, fields[0])
         if related_object is None:
             return None
@@ -148,6 +202,7 @@ def computed_nested_sector_dict(nested_field):
     return _computed_nested_dict(nested_field, sector_dict)
 
 
+@reads_fields('company_number')
 def ch_company_dict(obj):
     """Creates dictionary from a company with id and company_number keys."""
     if obj is None:
@@ -159,6 +214,7 @@ def ch_company_dict(obj):
     }
 
 
+@reads_fields('name', 'cdms_project_code')
 def investment_project_dict(obj):
     """Creates dictionary from an investment project containing id, name and project_code."""
     if obj is None:
@@ -172,16 +228,26 @@ def investment_project_dict(obj):
 
 
 def sector_dict(obj):
-    """Creates a dictionary for a sector."""
+    """
+    Creates a dictionary for a sector.
+
+    Ancestors are looked up in the in-process sector tree cache to avoid a query per sector.
+    """
     if obj is None:
         return None
 
+    node = sector_tree_cache.get(obj.id)
+    if node is not None:
+        ancestor_ids = node.ancestor_ids
+    else:
+        ancestor_ids = [ancestor.id for ancestor in obj.get_ancestors()]
+
     return {
         'id': str(obj.id),
         'name': obj.name,
         'ancestors': [{
-            'id': str(ancestor.id),
-        } for ancestor in obj.get_ancestors()],
+            'id': str(ancestor_id),
+        } for ancestor_id in ancestor_ids],
     }
 
 
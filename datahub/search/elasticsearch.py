@@ -1,14 +1,25 @@
 from contextlib import contextmanager
 from logging import getLogger
+from time import perf_counter
 
 from django.conf import settings
+from elasticsearch import Transport
 from elasticsearch.helpers import bulk as es_bulk
 from elasticsearch_dsl import analysis, Index
 from elasticsearch_dsl.connections import connections
 
+from datahub.core.instrumentation import record_es_request
+
 
 logger = getLogger(__name__)
 
+# Settings used while a new index is being populated, to speed up bulk indexing.
+# (Refreshes are instead performed explicitly, and replicas are created once loading has
+# finished.)
+BULK_LOAD_INDEX_SETTINGS = {
+    'refresh_interval': '-1',
+    'number_of_replicas': 0,
+}
 
 # Normalises values to improve sorting (by keeping e, E, è, ê etc. together)
 lowercase_asciifolding_normalizer = analysis.normalizer(
@@ -70,11 +81,24 @@ ANALYZERS = (
 )
 
 
+class InstrumentedTransport(Transport):
+    """Transport that records requests against the current API request (if there is one)."""
+
+    def perform_request(self, *args, **kwargs):
+        """Performs a request, recording the time taken."""
+        start_time = perf_counter()
+        response = super().perform_request(*args, **kwargs)
+        took = response.get('took') if isinstance(response, dict) else None
+        record_es_request(perf_counter() - start_time, took=took)
+        return response
+
+
 def configure_connection():
     """Configure Elasticsearch default connection."""
     connections_default = {
         'hosts': [settings.ES_URL],
         'verify_certs': settings.ES_VERIFY_CERTS,
+        'transport_class': InstrumentedTransport,
     }
     connections.configure(default=connections_default)
 
@@ -119,6 +143,56 @@ def delete_index(index_name):
     client.indices.delete(index_name)
 
 
+def refresh_index(index_name):
+    """Refreshes an index, making all operations performed on it visible to searches."""
+    client = get_client()
+    client.indices.refresh(index=index_name)
+
+
+def update_index_settings(index_name, index_settings):
+    """Updates dynamic settings of an existing index."""
+    client = get_client()
+    client.indices.put_settings(
+        index=index_name,
+        body={
+            'index': index_settings,
+        },
+    )
+
+
+def get_normal_index_settings():
+    """
+    Gets the values that the settings overridden during bulk loading normally have.
+
+    Settings not in ES_INDEX_SETTINGS are returned as None, which resets them to the
+    Elasticsearch default.
+    """
+    return {key: settings.ES_INDEX_SETTINGS.get(key) for key in BULK_LOAD_INDEX_SETTINGS}
+
+
+@contextmanager
+def bulk_load_mode(index_name):
+    """
+    Returns a context manager that disables refreshes and replicas for an index while
+    documents are bulk loaded into it.
+
+    When the context manager exits (including because of an error), the normal settings are
+    restored and the index is refreshed.
+
+    Usage example:
+        with bulk_load_mode('an-index'):
+            bulk(actions=...)
+    """
+    logger.info(f'Enabling bulk-load mode for the {index_name} index...')
+    update_index_settings(index_name, BULK_LOAD_INDEX_SETTINGS)
+    try:
+        yield
+    finally:
+        logger.info(f'Restoring normal settings for the {index_name} index...')
+        update_index_settings(index_name, get_normal_index_settings())
+        refresh_index(index_name)
+
+
 def get_indices_for_aliases(*alias_names):
     """Gets the indices referenced by one or more aliases."""
     client = get_client()
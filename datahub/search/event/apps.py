@@ -10,13 +10,7 @@ class EventSearchApp(SearchApp):
     es_model = Event
     view_permissions = ('event.view_event',)
     queryset = DBEvent.objects.select_related(
-        'address_country',
-        'event_type',
-        'location_type',
         'organiser',
-        'lead_team',
-        'uk_region',
-        'service',
     ).prefetch_related(
         'related_programmes',
         'teams',
@@ -40,18 +40,19 @@ class Event(BaseESModel):
     uk_region = fields.id_name_partial_field()
 
     MAPPINGS = {
-        'address_country': dict_utils.id_name_dict,
-        'event_type': dict_utils.id_name_dict,
-        'lead_team': dict_utils.id_name_dict,
-        'location_type': dict_utils.id_name_dict,
         'organiser': dict_utils.contact_or_adviser_dict,
         'related_programmes': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
-        'service': dict_utils.id_name_dict,
         'teams': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
-        'uk_region': dict_utils.id_name_dict,
     }
 
-    COMPUTED_MAPPINGS = {}
+    COMPUTED_MAPPINGS = {
+        'address_country': dict_utils.computed_constant_id_name_dict('address_country'),
+        'event_type': dict_utils.computed_constant_id_name_dict('event_type'),
+        'lead_team': dict_utils.computed_constant_id_name_dict('lead_team'),
+        'location_type': dict_utils.computed_constant_id_name_dict('location_type'),
+        'service': dict_utils.computed_constant_id_name_dict('service'),
+        'uk_region': dict_utils.computed_constant_id_name_dict('uk_region'),
+    }
 
     SEARCH_FIELDS = (
         'id',
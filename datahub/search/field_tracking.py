@@ -0,0 +1,110 @@
+"""
+Field-level dirty tracking for models that feed search documents.
+
+When fields of a model are tracked, the values of those fields are recorded when an instance
+is loaded (post_init). When the instance is saved (pre_save), the fields whose values have
+changed since the last load or save are recorded on the instance, so that post_save signal
+receivers can check if any fields they're interested in have changed.
+
+This is used by SignalReceiver to avoid scheduling syncs to Elasticsearch for saves that
+don't affect any search documents (e.g. an adviser logging in).
+"""
+from copy import copy
+from threading import Lock
+
+from django.db.models.signals import post_init, pre_save
+
+_SNAPSHOT_ATTR = '_search_tracked_field_values'
+_CHANGED_FIELDS_ATTR = '_search_changed_fields'
+
+# Mapping of model to the attnames of its tracked fields
+_tracked_fields = {}
+_lock = Lock()
+
+
+def track_fields(model, field_names):
+    """
+    Starts tracking changes to fields of a model.
+
+    Field names can be the names of concrete fields (including foreign keys). This can be
+    called multiple times for the same model (the fields are combined).
+
+    :raises FieldDoesNotExist: if a field does not exist
+    """
+    attnames = {model._meta.get_field(field_name).attname for field_name in field_names}
+
+    with _lock:
+        if model not in _tracked_fields:
+            _tracked_fields[model] = frozenset()
+            post_init.connect(
+                _record_field_values,
+                sender=model,
+                dispatch_uid=f'search_field_tracking_post_init_{model._meta.label}',
+            )
+            pre_save.connect(
+                _record_changed_fields,
+                sender=model,
+                dispatch_uid=f'search_field_tracking_pre_save_{model._meta.label}',
+            )
+
+        _tracked_fields[model] |= attnames
+
+
+def get_tracked_attnames(model, field_names):
+    """Converts field names to attnames (e.g. sector to sector_id)."""
+    return frozenset(model._meta.get_field(field_name).attname for field_name in field_names)
+
+
+def have_fields_changed(instance, field_names):
+    """
+    Checks if any of the specified (tracked) fields have changed in the most recent save of
+    an instance.
+
+    If changes to any of the fields weren't tracked for the save (for example, for an instance
+    of a model that isn't tracked), the fields are assumed to have changed.
+    """
+    changed_fields = getattr(instance, _CHANGED_FIELDS_ATTR, None)
+    if changed_fields is None:
+        return True
+
+    model = type(instance)
+    attnames = get_tracked_attnames(model, field_names)
+    if not attnames <= _tracked_fields.get(model, frozenset()):
+        return True
+
+    return bool(attnames & changed_fields)
+
+
+def _record_field_values(sender, instance, **kwargs):
+    # Deferred fields are not recorded (and so are treated as changed when saved)
+    loaded_field_values = instance.__dict__
+    setattr(
+        instance,
+        _SNAPSHOT_ATTR,
+        {
+            attname: copy(loaded_field_values[attname])
+            for attname in _tracked_fields[sender]
+            if attname in loaded_field_values
+        },
+    )
+
+
+def _record_changed_fields(sender, instance, **kwargs):
+    snapshot = getattr(instance, _SNAPSHOT_ATTR, {})
+    current_values = instance.__dict__
+
+    changed_fields = frozenset(
+        attname for attname in _tracked_fields[sender]
+        if attname not in snapshot or snapshot[attname] != current_values.get(attname)
+    )
+
+    setattr(instance, _CHANGED_FIELDS_ATTR, changed_fields)
+    setattr(
+        instance,
+        _SNAPSHOT_ATTR,
+        {
+            attname: copy(current_values[attname])
+            for attname in _tracked_fields[sender]
+            if attname in current_values
+        },
+    )
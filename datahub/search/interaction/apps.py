@@ -19,17 +19,9 @@ class InteractionSearchApp(SearchApp):
     queryset = DBInteraction.objects.select_related(
         'company',
         'company__sector',
-        'company__sector__parent',
-        'company__sector__parent__parent',
         'dit_adviser',
-        'dit_team',
-        'communication_channel',
         'investment_project',
         'investment_project__sector',
-        'investment_project__sector__parent',
-        'investment_project__sector__parent__parent',
-        'service',
-        'service_delivery_status',
         'event',
     ).prefetch_related(
         'contacts',
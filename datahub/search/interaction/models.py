@@ -77,17 +77,13 @@ class Interaction(BaseESModel):
 
     MAPPINGS = {
         'company': dict_utils.company_dict,
-        'communication_channel': dict_utils.id_name_dict,
         'contacts': dict_utils.contact_or_adviser_list_of_dicts,
         'dit_adviser': dict_utils.contact_or_adviser_dict,
         'dit_participants': _dit_participant_list,
-        'dit_team': dict_utils.id_name_dict,
         'event': dict_utils.id_name_dict,
         'investment_project': dict_utils.id_name_dict,
         'policy_areas': dict_utils.id_name_list_of_dicts,
         'policy_issue_types': dict_utils.id_name_list_of_dicts,
-        'service': dict_utils.id_name_dict,
-        'service_delivery_status': dict_utils.id_name_dict,
     }
 
     COMPUTED_MAPPINGS = {
@@ -96,6 +92,14 @@ class Interaction(BaseESModel):
             'investment_project.sector',
         ),
         'is_event': attrgetter('is_event'),
+        'communication_channel': dict_utils.computed_constant_id_name_dict(
+            'communication_channel',
+        ),
+        'dit_team': dict_utils.computed_constant_id_name_dict('dit_team'),
+        'service': dict_utils.computed_constant_id_name_dict('service'),
+        'service_delivery_status': dict_utils.computed_constant_id_name_dict(
+            'service_delivery_status',
+        ),
     }
 
     SEARCH_FIELDS = (
@@ -1,3 +1,5 @@
+from django.db.models import F
+
 from datahub.core.query_utils import (
     get_choices_as_case_expression,
     get_front_end_url_expression,
@@ -5,7 +7,6 @@ from datahub.core.query_utils import (
     get_string_agg_subquery,
 )
 from datahub.interaction.models import Interaction as DBInteraction
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.oauth.scopes import Scope
 from datahub.search.interaction import InteractionSearchApp
 from datahub.search.interaction.serializers import SearchInteractionQuerySerializer
@@ -87,7 +88,7 @@ class SearchInteractionExportAPIView(SearchInteractionAPIViewMixin, SearchExport
 
     queryset = DBInteraction.objects.annotate(
         company_link=get_front_end_url_expression('company', 'company__pk'),
-        company_sector_name=get_sector_name_subquery('company__sector'),
+        company_sector_name=F('company__sector__full_name'),
         contact_names=get_string_agg_subquery(
             DBInteraction,
             get_full_name_expression(
@@ -30,26 +30,14 @@ class InvestmentSearchApp(SearchApp):
     export_permission = f'investment.{InvestmentProjectPermission.export}'
     queryset = DBInvestmentProject.objects.select_related(
         'archived_by',
-        'average_salary',
         'client_relationship_manager',
-        'fdi_type',
         'intermediate_company',
-        'investment_type',
         'investmentprojectcode',
         'investor_company',
-        'investor_type',
-        'level_of_involvement',
         'project_assurance_adviser',
         'project_manager',
-        'referral_source_activity',
-        'referral_source_activity_marketing',
-        'referral_source_activity_website',
         'referral_source_adviser',
         'sector',
-        'sector__parent',
-        'sector__parent__parent',
-        'specific_programme',
-        'stage',
         'uk_company',
     ).prefetch_related(
         'actual_uk_regions',
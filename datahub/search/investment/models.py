@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from elasticsearch_dsl import Boolean, Date, Double, Integer, Keyword, Long, Object, Text
 
 from datahub.search import dict_utils
@@ -143,35 +145,19 @@ class InvestmentProject(BaseESModel):
         ],
         'archived_by': dict_utils.contact_or_adviser_dict,
         'associated_non_fdi_r_and_d_project': dict_utils.investment_project_dict,
-        'average_salary': dict_utils.id_name_dict,
         'business_activities': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
-        'client_contacts': lambda col: [dict_utils.contact_or_adviser_dict(c) for c in col.all()],
+        'client_contacts': dict_utils.contact_or_adviser_list_of_dicts,
         'client_relationship_manager': dict_utils.adviser_dict_with_team,
-        'country_lost_to': dict_utils.id_name_dict,
-        'country_investment_originates_from': dict_utils.id_name_dict,
         'created_by': dict_utils.adviser_dict_with_team,
         'delivery_partners': lambda col: [
             dict_utils.id_name_dict(c) for c in col.all()
         ],
-        'fdi_type': dict_utils.id_name_dict,
-        'fdi_value': dict_utils.id_name_dict,
         'intermediate_company': dict_utils.id_name_dict,
-        'investment_type': dict_utils.id_name_dict,
         'investor_company': dict_utils.id_name_dict,
-        'investor_company_country': dict_utils.id_name_dict,
-        'investor_type': dict_utils.id_name_dict,
-        'level_of_involvement': dict_utils.id_name_dict,
-        'likelihood_to_land': dict_utils.id_name_dict,
         'project_assurance_adviser': dict_utils.adviser_dict_with_team,
-        'project_code': str,
         'project_manager': dict_utils.adviser_dict_with_team,
-        'referral_source_activity': dict_utils.id_name_dict,
-        'referral_source_activity_marketing': dict_utils.id_name_dict,
-        'referral_source_activity_website': dict_utils.id_name_dict,
         'referral_source_adviser': dict_utils.contact_or_adviser_dict,
         'sector': dict_utils.sector_dict,
-        'specific_programme': dict_utils.id_name_dict,
-        'stage': dict_utils.id_name_dict,
         'team_members': lambda col: [
             dict_utils.contact_or_adviser_dict(c.adviser, include_dit_team=True) for c in col.all()
         ],
@@ -181,6 +167,35 @@ class InvestmentProject(BaseESModel):
         ],
     }
 
+    COMPUTED_MAPPINGS = {
+        'average_salary': dict_utils.computed_constant_id_name_dict('average_salary'),
+        'country_investment_originates_from': dict_utils.computed_constant_id_name_dict(
+            'country_investment_originates_from',
+        ),
+        'country_lost_to': dict_utils.computed_constant_id_name_dict('country_lost_to'),
+        'fdi_type': dict_utils.computed_constant_id_name_dict('fdi_type'),
+        'fdi_value': dict_utils.computed_constant_id_name_dict('fdi_value'),
+        'investment_type': dict_utils.computed_constant_id_name_dict('investment_type'),
+        'investor_company_country': dict_utils.computed_constant_id_name_dict(
+            'investor_company.address_country',
+        ),
+        'investor_type': dict_utils.computed_constant_id_name_dict('investor_type'),
+        'level_of_involvement': dict_utils.computed_constant_id_name_dict('level_of_involvement'),
+        'likelihood_to_land': dict_utils.computed_constant_id_name_dict('likelihood_to_land'),
+        'project_code': attrgetter('project_code'),
+        'referral_source_activity': dict_utils.computed_constant_id_name_dict(
+            'referral_source_activity',
+        ),
+        'referral_source_activity_marketing': dict_utils.computed_constant_id_name_dict(
+            'referral_source_activity_marketing',
+        ),
+        'referral_source_activity_website': dict_utils.computed_constant_id_name_dict(
+            'referral_source_activity_website',
+        ),
+        'specific_programme': dict_utils.computed_constant_id_name_dict('specific_programme'),
+        'stage': dict_utils.computed_constant_id_name_dict('stage'),
+    }
+
     SEARCH_FIELDS = (
         'id',
         'name',
@@ -1,8 +1,6 @@
 from django.db import transaction
-from django.db.models.query_utils import Q
 from django.db.models.signals import post_delete, post_save
 
-from datahub.company.models import Advisor
 from datahub.investment.project.models import (
     InvestmentProject as DBInvestmentProject,
     InvestmentProjectTeamMember,
@@ -25,34 +23,10 @@ def investment_project_sync_es(instance):
     transaction.on_commit(sync_es_wrapper)
 
 
-def investment_project_sync_es_adviser_change(instance):
-    """
-    post_save handler for advisers, to make sure that any projects they're linked to are
-    resynced.
-
-    This is primarily to update the teams stored against the project in ES.
-    """
-    def sync_es_wrapper():
-        queryset = DBInvestmentProject.objects.filter(
-            Q(created_by_id=instance.pk)
-            | Q(client_relationship_manager_id=instance.pk)
-            | Q(project_manager_id=instance.pk)
-            | Q(project_assurance_adviser_id=instance.pk)
-            | Q(team_members__adviser_id=instance.pk),
-        )
-
-        for project in queryset:
-            sync_object_async(
-                InvestmentSearchApp,
-                project.pk,
-            )
-
-    transaction.on_commit(sync_es_wrapper)
-
-
+# Investment projects are resynced when their advisers etc. change via the dependency graph
+# (see datahub.search.dependencies)
 receivers = (
     SignalReceiver(post_save, DBInvestmentProject, investment_project_sync_es),
     SignalReceiver(post_save, InvestmentProjectTeamMember, investment_project_sync_es),
     SignalReceiver(post_delete, InvestmentProjectTeamMember, investment_project_sync_es),
-    SignalReceiver(post_save, Advisor, investment_project_sync_es_adviser_change),
 )
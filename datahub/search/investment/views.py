@@ -1,4 +1,4 @@
-from django.db.models import Case, Max, When
+from django.db.models import Case, F, Max, When
 
 from datahub.core.query_utils import (
     get_aggregate_subquery,
@@ -9,7 +9,6 @@ from datahub.core.query_utils import (
 )
 from datahub.investment.project.models import InvestmentProject as DBInvestmentProject
 from datahub.investment.project.query_utils import get_project_code_expression
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.oauth.scopes import Scope
 from datahub.search.investment import InvestmentSearchApp
 from datahub.search.investment.serializers import SearchInvestmentProjectQuerySerializer
@@ -109,7 +108,7 @@ class SearchInvestmentExportAPIView(SearchInvestmentProjectAPIViewMixin, SearchE
             DBInvestmentProject,
             Max('interactions__date'),
         ),
-        sector_name=get_sector_name_subquery('sector'),
+        sector_name=F('sector__full_name'),
         team_member_names=get_string_agg_subquery(
             DBInvestmentProject,
             get_full_name_expression('team_members__adviser'),
@@ -51,7 +51,6 @@ class LargeInvestorProfile(BaseESModel):
 
     _MAIN_FIELD_MAPPINGS = {
         'asset_classes_of_interest': _get_many_to_many_list,
-        'country_of_origin': dict_utils.id_name_dict,
         'investor_company': dict_utils.company_dict,
         'created_by': dict_utils.adviser_dict_with_team,
     }
@@ -77,6 +76,12 @@ class LargeInvestorProfile(BaseESModel):
         'other_countries_being_considered': _get_many_to_many_list,
     }
 
+    COMPUTED_MAPPINGS = {
+        'country_of_origin': dict_utils.computed_constant_id_name_dict(
+            'investor_company.address_country',
+        ),
+    }
+
     MAPPINGS = {
         **_MAIN_FIELD_MAPPINGS,
         **_DETAIL_FIELD_MAPPINGS,
@@ -1,13 +1,17 @@
 from logging import getLogger
+from time import sleep
 
 from django.core.management.base import BaseCommand, CommandError
 from django_pglocks import advisory_lock
 
 from datahub.search.apps import are_apps_initialised, get_search_apps, get_search_apps_by_name
 from datahub.search.migrate import migrate_apps
+from datahub.search.migration_progress import format_progress, get_app_progress
 
 logger = getLogger(__name__)
 
+PROGRESS_POLL_INTERVAL_SECS = 30
+
 
 class Command(BaseCommand):
     """
@@ -34,15 +38,66 @@ See docs/Elasticsearch migrations.md for further details."""
             choices=[search_app.name for search_app in get_search_apps()],
             help='Search apps to migrate. If empty, all are migrated.',
         )
+        parser.add_argument(
+            '--max-workers',
+            type=int,
+            help='Total number of threads to use to resync the search apps being migrated '
+                 '(defaults to the ES_MIGRATION_MAX_WORKERS setting).',
+        )
+        parser.add_argument(
+            '--progress',
+            action='store_true',
+            help='Only display the progress of the most recent migration of each search app.',
+        )
+        parser.add_argument(
+            '--wait',
+            action='store_true',
+            help='Display progress until all started migrations have completed.',
+        )
 
     def handle(self, *args, **options):
         """Executes the command."""
         apps = get_search_apps_by_name(options['model'])
 
+        if options['progress']:
+            self._display_progress([app.name for app in apps])
+            return
+
         if not are_apps_initialised(apps):
             raise CommandError(
                 f'Index and mapping not initialised, please run `init_es` first.',
             )
 
         with advisory_lock('leeloo_migrate_es'):
-            migrate_apps(apps)
+            migrated_app_names = migrate_apps(apps, max_workers=options['max_workers'])
+
+        if options['wait']:
+            self._wait_for_completion(migrated_app_names)
+
+    def _wait_for_completion(self, app_names):
+        while not self._display_progress(app_names):
+            sleep(PROGRESS_POLL_INTERVAL_SECS)
+
+        self.stdout.write('All migrations complete')
+
+    def _display_progress(self, app_names):
+        """
+        Displays the progress of the resyncs of a number of search apps.
+
+        :returns: whether all the resyncs have completed
+        """
+        progress_list = get_app_progress(app_names)
+        app_names_with_progress = {progress.app_name for progress in progress_list}
+        not_started_app_names = [
+            app_name for app_name in app_names if app_name not in app_names_with_progress
+        ]
+
+        for app_name in not_started_app_names:
+            self.stdout.write(f'{app_name}: not started')
+
+        for line in format_progress(progress_list):
+            self.stdout.write(line)
+
+        return not not_started_app_names and all(
+            progress.is_complete for progress in progress_list
+        )
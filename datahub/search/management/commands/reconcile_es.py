@@ -0,0 +1,60 @@
+from logging import getLogger, WARNING
+
+from django.core.management.base import BaseCommand, CommandError
+
+from datahub.search.apps import are_apps_initialised, get_search_apps, get_search_apps_by_name
+from datahub.search.reconcile import reconcile_apps
+
+
+class Command(BaseCommand):
+    """
+    Command that reconciles Elasticsearch documents with the database.
+
+    Missing and stale documents are resynced and orphaned documents are deleted.
+    """
+
+    def add_arguments(self, parser):
+        """Handle arguments."""
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            help='Batch size - number of documents fixed at a time (defaults to per-model '
+                 'defaults)',
+        )
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=[search_app.name for search_app in get_search_apps()],
+            help='Search model to reconcile. If empty, it reconciles all',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift without fixing it.',
+        )
+
+    def handle(self, *args, **options):
+        """Handle."""
+        es_logger = getLogger('elasticsearch')
+        es_logger.setLevel(WARNING)
+
+        apps = get_search_apps_by_name(options['model'])
+
+        if not are_apps_initialised(apps):
+            raise CommandError(
+                'Index and mapping not initialised, please run `init_es` first.',
+            )
+
+        stats_by_app = reconcile_apps(
+            apps,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+
+        for app_name, stats in stats_by_app.items():
+            if stats is None:
+                self.stdout.write(f'{app_name}: skipped (migration in progress)')
+                continue
+
+            formatted_stats = ', '.join(f'{key}: {value}' for key, value in stats.items())
+            self.stdout.write(f'{app_name}: {formatted_stats}')
@@ -1,40 +1,128 @@
 from logging import getLogger
+from time import perf_counter
+
+from django.conf import settings
 
 from datahub.core.exceptions import DataHubException
-from datahub.search.elasticsearch import create_index, start_alias_transaction
+from datahub.search.elasticsearch import create_index, get_client, start_alias_transaction
+from datahub.search.migration_progress import clear_app_progress
 from datahub.search.tasks import complete_model_migration
 
 logger = getLogger(__name__)
 
 
-def migrate_apps(apps):
-    """Migrates all search apps to new indices if their mappings are out of date."""
+def migrate_apps(apps, max_workers=None):
+    """
+    Migrates all search apps to new indices if their mappings are out of date.
+
+    The resyncs of the apps being migrated run in parallel (in separate Celery tasks), using
+    a total of at most max_workers sync threads (ES_MIGRATION_MAX_WORKERS by default). Apps are
+    prioritised in descending order of index size, so that the longest resyncs start first.
+
+    If there are no more apps being migrated than max_workers, the threads are divided between
+    the apps, with larger apps getting any remainder. Otherwise, each resync uses one thread
+    and the apps are divided into max_workers queues, each of which is resynced one app at a
+    time.
+
+    :returns: the names of the apps being migrated
+    """
     logger.info('Starting search app migration')
+    max_workers = max_workers or settings.ES_MIGRATION_MAX_WORKERS
+
+    apps_to_migrate = []
     for app in apps:
-        migrate_app(app)
+        if _is_migration_pending(app):
+            apps_to_migrate.append(app)
+        else:
+            logger.info(f'{app.name} search app is up to date')
+
+    apps_to_migrate.sort(key=_get_index_size, reverse=True)
+
+    for num_workers, queued_apps in _plan_resyncs(apps_to_migrate, max_workers):
+        for app in queued_apps:
+            _prepare_migration(app)
+
+        _schedule_resyncs(queued_apps, num_workers)
 
+    return [app.name for app in apps_to_migrate]
 
-def migrate_app(search_app):
-    """Migrates a search app to a new index (if its mapping is out of date)."""
+
+def migrate_app(search_app, num_workers=1):
+    """
+    Migrates a search app to a new index (if its mapping is out of date).
+
+    num_workers is the number of threads to use when resyncing the app.
+    """
+    if _prepare_migration(search_app):
+        _schedule_resyncs([search_app], num_workers)
+
+
+def _prepare_migration(search_app):
+    """
+    Creates a new index for a search app and updates its aliases (if its mapping is out of
+    date).
+
+    :returns: whether the app needs to be resynced
+    """
     app_name = search_app.name
     es_model = search_app.es_model
 
     if es_model.is_migration_needed():
         _perform_migration(search_app)
-        return
+        return True
 
     if es_model.was_migration_started():
         logger.info(f'Possibly incomplete {app_name} search app migration detected')
-        _schedule_resync(search_app)
-        return
+        return True
 
     logger.info(f'{app_name} search app is up to date')
+    return False
+
+
+def _is_migration_pending(search_app):
+    es_model = search_app.es_model
+    return es_model.is_migration_needed() or es_model.was_migration_started()
+
+
+def _get_index_size(search_app):
+    """Gets the number of documents currently referenced by the read alias of a search app."""
+    client = get_client()
+    response = client.count(index=search_app.es_model.get_read_alias())
+    return response['count']
+
+
+def _plan_resyncs(apps, max_workers):
+    """
+    Divides apps (in priority order) into queues of resyncs that run in parallel, so that no
+    more than max_workers threads are used in total.
+
+    :returns: list of (number of workers, apps in the queue) tuples
+    """
+    if len(apps) <= max_workers:
+        return [
+            (num_workers, [app])
+            for app, num_workers in zip(apps, _allocate_workers(len(apps), max_workers))
+        ]
+
+    # Assign the apps to the queues in turn, so that the largest apps start first
+    return [(1, apps[index::max_workers]) for index in range(max_workers)]
+
+
+def _allocate_workers(num_apps, max_workers):
+    """
+    Divides a budget of workers between a number of apps (in priority order).
+
+    num_apps must not be greater than max_workers.
+    """
+    base_allocation, remainder = divmod(max_workers, num_apps)
+    return [base_allocation + (index < remainder) for index in range(num_apps)]
 
 
 def _perform_migration(search_app):
     app_name = search_app.name
     es_model = search_app.es_model
     logger.info(f'Migrating the {app_name} search app')
+    start_time = perf_counter()
 
     read_alias_name = es_model.get_read_alias()
     write_alias_name = es_model.get_write_alias()
@@ -50,6 +138,8 @@ def _perform_migration(search_app):
 
     logger.info(f'Updating aliases for the {app_name} search app')
 
+    # The index is created with its normal settings, and is only put into bulk-load mode by
+    # the resync task (so that it is never left in bulk-load mode if the task doesn't run)
     create_index(new_index_name, es_model._doc_type.mapping)
 
     with start_alias_transaction() as alias_transaction:
@@ -57,11 +147,34 @@ def _perform_migration(search_app):
         alias_transaction.associate_indices_with_alias(write_alias_name, [new_index_name])
         alias_transaction.dissociate_indices_from_alias(write_alias_name, [current_write_index])
 
-    _schedule_resync(search_app)
+    logger.info(
+        f'Created the {new_index_name} index for the {app_name} search app in '
+        f'{perf_counter() - start_time:.1f}s',
+    )
+
+
+def _schedule_resyncs(search_apps, num_workers):
+    """
+    Schedules the resyncs of a queue of search apps, which are resynced one after another
+    (each using num_workers threads).
+    """
+    app_names = [search_app.name for search_app in search_apps]
+    logger.info(
+        f'Scheduling resync and clean-up for the {", ".join(app_names)} search app(s) using '
+        f'{num_workers} worker(s)',
+    )
 
+    for app_name in app_names:
+        clear_app_progress(app_name)
 
-def _schedule_resync(search_app):
-    logger.info(f'Scheduling resync and clean-up for the {search_app.name} search app')
+    first_app, *queued_apps = search_apps
     complete_model_migration.apply_async(
-        args=(search_app.name, search_app.es_model.get_target_mapping_hash()),
+        args=(first_app.name, first_app.es_model.get_target_mapping_hash()),
+        kwargs={
+            'num_workers': num_workers,
+            'queued_migrations': [
+                (search_app.name, search_app.es_model.get_target_mapping_hash())
+                for search_app in queued_apps
+            ],
+        },
     )
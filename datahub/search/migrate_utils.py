@@ -1,32 +1,82 @@
+from functools import partial
 from logging import getLogger
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
 
 from datahub.core.exceptions import DataHubException
+from datahub.core.locks import advisory_lock_pool
 from datahub.search.bulk_sync import sync_app
 from datahub.search.deletion import delete_documents
 from datahub.search.elasticsearch import (
+    bulk_load_mode,
     delete_index,
     get_aliases_for_index,
+    refresh_index,
     start_alias_transaction,
 )
+from datahub.search.migration_progress import (
+    complete_app_progress,
+    start_app_progress,
+    update_app_progress,
+)
 
 
 BULK_DELETION_TIMEOUT_SECS = 300
+MIGRATION_BULK_REQUEST_LOCK_NAME = 'leeloo-search-migration-bulk-request'
+MIGRATION_REFRESH_CACHE_KEY_PREFIX = 'search-migration-refresh'
 logger = getLogger(__name__)
 
 
-def resync_after_migrate(search_app):
+def resync_after_migrate(search_app, num_workers=1):
     """
     Completes a migration by performing a full resync, updating aliases and removing old indices.
+
+    The resync is performed with the new index in bulk-load mode. Its normal settings are
+    restored (and it is refreshed) before the read alias stops referencing the old indices,
+    even if the resync fails.
+
+    The number of concurrent bulk requests sent by all migration resyncs (in all processes) is
+    limited to settings.ES_MIGRATION_MAX_BULK_REQUESTS.
+
+    Progress is recorded in the cache (see datahub.search.migration_progress).
     """
-    if not search_app.es_model.was_migration_started():
+    es_model = search_app.es_model
+    if not es_model.was_migration_started():
         logger.warning(
             f'No pending migration detected for the {search_app.name} search app, aborting '
             f'resync...',
         )
         return
 
-    sync_app(search_app, post_batch_callback=delete_from_secondary_indices_callback)
+    start_time = perf_counter()
+    start_app_progress(search_app.name)
+    _, write_index = es_model.get_read_and_write_indices()
+
+    with bulk_load_mode(write_index):
+        sync_app(
+            search_app,
+            post_batch_callback=refresh_and_delete_from_secondary_indices_callback,
+            num_workers=num_workers,
+            progress_callback=partial(update_app_progress, search_app.name),
+            bulk_request_limiter=partial(
+                advisory_lock_pool,
+                MIGRATION_BULK_REQUEST_LOCK_NAME,
+                settings.ES_MIGRATION_MAX_BULK_REQUESTS,
+            ),
+        )
+        resync_time = perf_counter()
+
     _clean_up_aliases_and_indices(search_app)
+    complete_app_progress(search_app.name)
+    end_time = perf_counter()
+
+    logger.info(
+        f'Resync of the {search_app.name} search app completed in '
+        f'{end_time - start_time:.1f}s (sync: {resync_time - start_time:.1f}s, '
+        f'finalisation: {end_time - resync_time:.1f}s)',
+    )
 
 
 def _clean_up_aliases_and_indices(search_app):
@@ -61,3 +111,35 @@ def delete_from_secondary_indices_callback(read_indices, write_index, actions):
     remove_indices = read_indices - {write_index}
     for index in remove_indices:
         delete_documents(index, actions)
+
+
+def refresh_and_delete_from_secondary_indices_callback(read_indices, write_index, actions):
+    """
+    Variant of delete_from_secondary_indices_callback() for use while the write index is in
+    bulk-load mode.
+
+    As automatic refreshes are disabled in bulk-load mode, the write index is refreshed before
+    documents are deleted from the other indices, so that synced documents don't disappear
+    from search results until the end of the migration.
+
+    To avoid undoing the benefit of bulk-load mode, the write index is refreshed at most once
+    every settings.ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS seconds (by all processes), so
+    synced documents may be missing from search results for up to that long.
+    """
+    if read_indices - {write_index}:
+        _refresh_index_if_due(write_index)
+
+    delete_from_secondary_indices_callback(read_indices, write_index, actions)
+
+
+def _refresh_index_if_due(index_name):
+    """
+    Refreshes an index unless it has already been refreshed by this function (in any process)
+    in the last settings.ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS seconds.
+    """
+    cache_key = f'{MIGRATION_REFRESH_CACHE_KEY_PREFIX}-{index_name}'
+    timeout = settings.ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS
+
+    # cache.add() only succeeds if the key is not already set
+    if cache.add(cache_key, True, timeout=timeout):
+        refresh_index(index_name)
@@ -0,0 +1,154 @@
+from collections import namedtuple
+from datetime import timedelta
+from time import time
+
+from django.core.cache import cache
+
+PROGRESS_CACHE_KEY_PREFIX = 'search-migration-progress'
+
+
+class AppMigrationProgress(
+    namedtuple(
+        'AppMigrationProgress',
+        ['app_name', 'total', 'synced', 'started_on', 'completed_on'],
+    ),
+):
+    """
+    Progress of the resync of a single search app during a migration.
+
+    started_on and completed_on are Unix timestamps (completed_on is None if the resync is
+    still in progress).
+    """
+
+    @property
+    def is_complete(self):
+        """Whether the resync has finished."""
+        return self.completed_on is not None
+
+    @property
+    def percentage(self):
+        """The percentage of documents synced so far."""
+        if self.is_complete:
+            return 100
+        if not self.total:
+            return 0
+        return min(self.synced * 100 // self.total, 99)
+
+
+OverallMigrationProgress = namedtuple(
+    'OverallMigrationProgress',
+    ['total', 'synced', 'elapsed_secs', 'docs_per_sec', 'eta_secs'],
+)
+
+
+def start_app_progress(app_name):
+    """Records that the resync of a search app has started."""
+    cache.set(
+        _get_cache_key(app_name),
+        {
+            'total': 0,
+            'synced': 0,
+            'started_on': time(),
+            'completed_on': None,
+        },
+        timeout=None,
+    )
+
+
+def clear_app_progress(app_name):
+    """Clears any recorded progress for a search app (e.g. when scheduling a new resync)."""
+    cache.delete(_get_cache_key(app_name))
+
+
+def update_app_progress(app_name, synced, total):
+    """
+    Records the number of documents synced so far for a search app.
+
+    This is intended to be used as the progress_callback for sync_app().
+    """
+    key = _get_cache_key(app_name)
+    progress = cache.get(key)
+    if progress is None:
+        return
+
+    cache.set(key, {**progress, 'synced': synced, 'total': total}, timeout=None)
+
+
+def complete_app_progress(app_name):
+    """Records that the resync of a search app has finished."""
+    key = _get_cache_key(app_name)
+    progress = cache.get(key)
+    if progress is None:
+        return
+
+    cache.set(key, {**progress, 'completed_on': time()}, timeout=None)
+
+
+def get_app_progress(app_names):
+    """
+    Gets the progress of the most recent resync of each of a number of search apps.
+
+    :returns: a list of AppMigrationProgress instances (apps without any recorded progress are
+        omitted)
+    """
+    cache_keys = {app_name: _get_cache_key(app_name) for app_name in app_names}
+    cached_values = cache.get_many(cache_keys.values())
+
+    return [
+        AppMigrationProgress(app_name=app_name, **cached_values[cache_key])
+        for app_name, cache_key in cache_keys.items()
+        if cache_key in cached_values
+    ]
+
+
+def get_overall_progress(app_progress_list, now=None):
+    """
+    Combines the progress of multiple search app resyncs.
+
+    The ETA is estimated using the overall rate since the earliest resync started.
+    """
+    if not app_progress_list:
+        return OverallMigrationProgress(0, 0, 0, None, None)
+
+    now = now or time()
+    total = sum(progress.total for progress in app_progress_list)
+    synced = sum(progress.synced for progress in app_progress_list)
+    started_on = min(progress.started_on for progress in app_progress_list)
+    ended_on = max(progress.completed_on or now for progress in app_progress_list)
+    elapsed_secs = max(ended_on - started_on, 0)
+    docs_per_sec = synced / elapsed_secs if elapsed_secs and synced else None
+
+    if all(progress.is_complete for progress in app_progress_list):
+        eta_secs = 0
+    elif docs_per_sec:
+        eta_secs = max(total - synced, 0) / docs_per_sec
+    else:
+        eta_secs = None
+
+    return OverallMigrationProgress(total, synced, elapsed_secs, docs_per_sec, eta_secs)
+
+
+def format_progress(app_progress_list, now=None):
+    """Formats the progress of multiple search app resyncs as a list of lines of text."""
+    lines = [
+        f'{progress.app_name}: {progress.synced}/{progress.total} documents '
+        f'{progress.percentage}%{" (complete)" if progress.is_complete else ""}'
+        for progress in app_progress_list
+    ]
+
+    overall = get_overall_progress(app_progress_list, now=now)
+    rate = f'{overall.docs_per_sec:.0f} documents/s' if overall.docs_per_sec else 'unknown rate'
+    eta = _format_secs(overall.eta_secs) if overall.eta_secs is not None else 'unknown'
+    lines.append(
+        f'Overall: {overall.synced}/{overall.total} documents in '
+        f'{_format_secs(overall.elapsed_secs)} ({rate}), ETA {eta}',
+    )
+    return lines
+
+
+def _format_secs(secs):
+    return str(timedelta(seconds=round(secs)))
+
+
+def _get_cache_key(app_name):
+    return f'{PROGRESS_CACHE_KEY_PREFIX}-{app_name}'
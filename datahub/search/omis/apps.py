@@ -21,7 +21,6 @@ class OrderSearchApp(SearchApp):
         'company',
         'contact',
         'created_by',
-        'primary_market',
         'sector',
     ).prefetch_related(
         'service_types',
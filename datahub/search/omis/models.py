@@ -67,9 +67,7 @@ class Order(BaseESModel):
         'company': dict_utils.company_dict,
         'contact': dict_utils.contact_or_adviser_dict,
         'created_by': dict_utils.adviser_dict_with_team,
-        'primary_market': dict_utils.id_name_dict,
         'sector': dict_utils.sector_dict,
-        'uk_region': dict_utils.id_name_dict,
         'service_types': lambda col: [dict_utils.id_name_dict(c) for c in col.all()],
         'subscribers': lambda col: [
             dict_utils.contact_or_adviser_dict(c.adviser, include_dit_team=True) for c in col.all()
@@ -77,14 +75,18 @@ class Order(BaseESModel):
         'assignees': lambda col: [
             dict_utils.contact_or_adviser_dict(c.adviser, include_dit_team=True) for c in col.all()
         ],
-        'billing_address_country': dict_utils.id_name_dict,
         'completed_by': dict_utils.contact_or_adviser_dict,
         'cancelled_by': dict_utils.contact_or_adviser_dict,
-        'cancellation_reason': dict_utils.id_name_dict,
     }
 
     COMPUTED_MAPPINGS = {
         'payment_due_date': lambda x: x.invoice.payment_due_date if x.invoice else None,
+        'billing_address_country': dict_utils.computed_constant_id_name_dict(
+            'billing_address_country',
+        ),
+        'cancellation_reason': dict_utils.computed_constant_id_name_dict('cancellation_reason'),
+        'primary_market': dict_utils.computed_constant_id_name_dict('primary_market'),
+        'uk_region': dict_utils.computed_constant_id_name_dict('uk_region'),
     }
 
     SEARCH_FIELDS = (
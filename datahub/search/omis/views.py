@@ -1,4 +1,4 @@
-from django.db.models import DecimalField, OuterRef, Subquery, Sum
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
 from django.db.models.functions import Cast
 
 from datahub.core.query_utils import (
@@ -6,7 +6,6 @@ from datahub.core.query_utils import (
     get_front_end_url_expression,
     get_full_name_expression,
 )
-from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.oauth.scopes import Scope
 from datahub.omis.order.models import Order as DBOrder
 from datahub.omis.order.query_utils import get_lead_order_assignee_name_subquery
@@ -126,7 +125,7 @@ class SearchOrderExportAPIView(SearchOrderAPIViewMixin, SearchExportAPIView):
         ),
         status_name=get_choices_as_case_expression(DBOrder, 'status'),
         link=get_front_end_url_expression('order', 'pk'),
-        sector_name=get_sector_name_subquery('sector'),
+        sector_name=F('sector__full_name'),
         company_link=get_front_end_url_expression('company', 'company__pk'),
         contact_name=get_full_name_expression('contact'),
         contact_link=get_front_end_url_expression('contact', 'contact__pk'),
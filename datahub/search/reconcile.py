@@ -0,0 +1,275 @@
+"""
+Reconciliation of Elasticsearch documents with the database.
+
+Rather than resyncing every object, (primary key, modified_on) pairs are streamed from the
+database and from Elasticsearch (both sorted by primary key as a string) and merge-joined.
+Only documents that are missing or stale are resynced, and orphaned documents (whose objects
+no longer exist) are deleted.
+
+If the model of a search app doesn't have a modified_on field, only missing and orphaned
+documents are detected.
+
+Note that documents are not detected as stale if only the related objects they copy data
+from have changed (datahub.search.dependencies takes care of those changes).
+"""
+from collections import Counter
+from logging import getLogger
+from time import perf_counter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, UUIDField
+from django.db.models.functions import Cast
+from django.utils.dateparse import parse_datetime
+
+from datahub.core.utils import slice_iterable_into_chunks
+from datahub.search.deletion import delete_documents
+from datahub.search.elasticsearch import get_client
+from datahub.search.sync_object import sync_objects_by_pk
+
+logger = getLogger(__name__)
+
+MODIFIED_ON_FIELD = 'modified_on'
+ES_PAGE_SIZE = 5000
+
+# Drift statistic keys
+CHECKED = 'checked'
+MISSING = 'missing'
+STALE = 'stale'
+ORPHANED = 'orphaned'
+
+
+def reconcile_app(search_app, batch_size=None, dry_run=False):
+    """
+    Reconciles the Elasticsearch documents of a search app with the database.
+
+    Missing and stale documents are resynced, and orphaned documents are deleted, in batches of
+    batch_size (defaulting to the bulk batch size of the search app).
+
+    Search apps with a migration in progress are skipped (as their documents will be resynced
+    by the migration).
+
+    :param dry_run: if True, drift is only reported (and not fixed)
+    :returns: dict of drift statistics (the number of database objects checked, and the number
+        of missing, stale and orphaned documents), or None if the search app was skipped
+    """
+    es_model = search_app.es_model
+    batch_size = batch_size or search_app.bulk_batch_size
+    read_indices, write_index = es_model.get_read_and_write_indices()
+
+    if read_indices != {write_index}:
+        logger.warning(
+            f'Skipping reconciliation of the {search_app.name} search app as a migration is in '
+            f'progress',
+        )
+        return None
+
+    logger.info(f'Reconciling {search_app.name} search app...')
+    start_time = perf_counter()
+
+    compare_modified_on = _has_modified_on(search_app)
+    db_rows = _iter_db_rows(search_app, batch_size, compare_modified_on)
+    es_rows = _iter_es_rows(write_index, compare_modified_on)
+
+    stats = Counter({CHECKED: 0, MISSING: 0, STALE: 0, ORPHANED: 0})
+    fixer = _DriftFixer(search_app, write_index, batch_size, dry_run)
+
+    for pk, db_modified_on, es_hit in _merge_join(db_rows, es_rows):
+        if db_modified_on is not _NOT_IN_DB:
+            stats[CHECKED] += 1
+
+        drift_type = _get_drift_type(db_modified_on, es_hit, compare_modified_on)
+        if drift_type:
+            stats[drift_type] += 1
+            fixer.add(drift_type, pk, es_hit)
+
+    fixer.flush()
+
+    elapsed_time = perf_counter() - start_time
+    logger.info(
+        f'{search_app.name} search app reconciled in {elapsed_time:.1f}s - checked: '
+        f'{stats[CHECKED]}, missing: {stats[MISSING]}, stale: {stats[STALE]}, '
+        f'orphaned: {stats[ORPHANED]}' + (' (dry run)' if dry_run else ''),
+    )
+    return dict(stats)
+
+
+def reconcile_apps(search_apps, batch_size=None, dry_run=False):
+    """
+    Reconciles the Elasticsearch documents of multiple search apps with the database.
+
+    :returns: dict of search app name to drift statistics (see reconcile_app())
+    """
+    return {
+        search_app.name: reconcile_app(search_app, batch_size=batch_size, dry_run=dry_run)
+        for search_app in search_apps
+    }
+
+
+class _DriftFixer:
+    """Resyncs missing and stale documents, and deletes orphaned documents, in batches."""
+
+    def __init__(self, search_app, index, batch_size, dry_run):
+        """Initialises the instance."""
+        self.search_app = search_app
+        self.index = index
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.pks_to_sync = []
+        self.orphaned_hits = []
+
+    def add(self, drift_type, pk, es_hit):
+        """Adds a drifted document, fixing a batch of documents if the batch size is reached."""
+        if self.dry_run:
+            return
+
+        if drift_type == ORPHANED:
+            self.orphaned_hits.append(es_hit)
+        else:
+            self.pks_to_sync.append(pk)
+
+        if len(self.pks_to_sync) >= self.batch_size or len(self.orphaned_hits) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Fixes any buffered documents."""
+        if self.pks_to_sync:
+            sync_objects_by_pk(self.search_app, self.pks_to_sync)
+            self.pks_to_sync = []
+
+        if self.orphaned_hits:
+            _delete_orphans(self.search_app, self.index, self.orphaned_hits)
+            self.orphaned_hits = []
+
+
+class _NotInDB:
+    def __repr__(self):
+        return '<not in DB>'
+
+
+_NOT_IN_DB = _NotInDB()
+
+
+def _merge_join(db_rows, es_rows):
+    """
+    Merge-joins two streams sorted by primary key (as a string).
+
+    db_rows is an iterable of (pk, modified_on) tuples and es_rows is an iterable of
+    (pk, hit) tuples.
+
+    :returns: iterator of (pk, modified_on or _NOT_IN_DB, hit or None) tuples
+    """
+    db_iter = iter(db_rows)
+    es_iter = iter(es_rows)
+    db_row = next(db_iter, None)
+    es_row = next(es_iter, None)
+
+    while db_row is not None or es_row is not None:
+        if es_row is None or (db_row is not None and db_row[0] < es_row[0]):
+            yield db_row[0], db_row[1], None
+            db_row = next(db_iter, None)
+        elif db_row is None or es_row[0] < db_row[0]:
+            yield es_row[0], _NOT_IN_DB, es_row[1]
+            es_row = next(es_iter, None)
+        else:
+            yield db_row[0], db_row[1], es_row[1]
+            db_row = next(db_iter, None)
+            es_row = next(es_iter, None)
+
+
+def _iter_db_rows(search_app, batch_size, include_modified_on):
+    """
+    Streams (pk as a string, modified_on) tuples from the database, sorted by primary key as a
+    string.
+
+    UUID primary keys sort the same way as their string representations, so can use the
+    primary key index. Other primary keys are cast to strings.
+    """
+    queryset = search_app.queryset.select_related(None).prefetch_related(None)
+
+    if isinstance(queryset.model._meta.pk, UUIDField):
+        queryset = queryset.order_by('pk')
+    else:
+        queryset = queryset.annotate(
+            pk_str=Cast('pk', output_field=CharField()),
+        ).order_by('pk_str')
+
+    fields = ('pk', MODIFIED_ON_FIELD) if include_modified_on else ('pk',)
+    for row in queryset.values_list(*fields).iterator(chunk_size=batch_size):
+        yield str(row[0]), row[1] if include_modified_on else None
+
+
+def _iter_es_rows(index, include_modified_on):
+    """
+    Streams (id, hit) tuples from an Elasticsearch index, sorted by ID.
+
+    search_after is used (rather than a scroll) as the results need to be sorted.
+    """
+    client = get_client()
+    body = {
+        'query': {'match_all': {}},
+        'sort': [{'id': 'asc'}],
+        '_source': [MODIFIED_ON_FIELD] if include_modified_on else False,
+        'size': ES_PAGE_SIZE,
+    }
+
+    while True:
+        hits = client.search(index=index, body=body)['hits']['hits']
+
+        for hit in hits:
+            yield hit['_id'], hit
+
+        if len(hits) < ES_PAGE_SIZE:
+            return
+
+        body['search_after'] = hits[-1]['sort']
+
+
+def _get_drift_type(db_modified_on, es_hit, compare_modified_on):
+    if db_modified_on is _NOT_IN_DB:
+        return ORPHANED
+
+    if es_hit is None:
+        return MISSING
+
+    if compare_modified_on and db_modified_on != _get_es_modified_on(es_hit):
+        return STALE
+
+    return None
+
+
+def _get_es_modified_on(hit):
+    value = hit.get('_source', {}).get(MODIFIED_ON_FIELD)
+    return parse_datetime(value) if value else None
+
+
+def _has_modified_on(search_app):
+    try:
+        search_app.queryset.model._meta.get_field(MODIFIED_ON_FIELD)
+    except FieldDoesNotExist:
+        return False
+
+    return MODIFIED_ON_FIELD in search_app.es_model._doc_type.mapping
+
+
+def _delete_orphans(search_app, index, hits):
+    """
+    Deletes orphaned documents.
+
+    Objects created after the database stream started could appear to be orphaned, so such
+    objects are resynced instead.
+    """
+    pks = [hit['_id'] for hit in hits]
+    existing_pks = set()
+
+    for batch in slice_iterable_into_chunks(pks, search_app.bulk_batch_size):
+        existing_pks.update(
+            str(pk) for pk in search_app.queryset.filter(pk__in=batch).values_list(
+                'pk',
+                flat=True,
+            )
+        )
+
+    delete_documents(index, [hit for hit in hits if hit['_id'] not in existing_pks])
+
+    if existing_pks:
+        sync_objects_by_pk(search_app, sorted(existing_pks))
@@ -2,7 +2,10 @@ from contextlib import contextmanager
 from logging import getLogger
 from threading import local
 
+from django.db.models.signals import post_save
+
 from datahub.search.apps import get_search_apps
+from datahub.search.field_tracking import get_tracked_attnames, have_fields_changed, track_fields
 
 logger = getLogger(__name__)
 
@@ -19,27 +22,54 @@ class SignalReceiver:
 
     The receivers attribute of that module should be a sequence of SignalReceiver instances which
     are automatically connected and disconnected as needed.
+
+    For post_save receivers, tracked_fields can be used to specify the fields of the sender
+    that feed the search documents being synced. Saves of existing objects that don't change
+    any of those fields are then ignored. (Saves that create objects are not ignored unless
+    ignore_created is True, e.g. for receivers that sync objects that depend on the sender and
+    so can't depend on a new instance yet.)
     """
 
-    def __init__(self, signal, sender, receiver_func):
+    def __init__(
+        self,
+        signal,
+        sender,
+        receiver_func,
+        tracked_fields=None,
+        ignore_created=False,
+    ):
         """Initialises the instance."""
+        if tracked_fields is not None and signal is not post_save:
+            raise ValueError('tracked_fields can only be used with post_save')
+
+        if ignore_created and signal is not post_save:
+            raise ValueError('ignore_created can only be used with post_save')
+
         self.is_connected = False
         self.search_app = None
         self.signal = signal
         self.sender = sender
+        self.tracked_fields = tracked_fields
+        self.ignore_created = ignore_created
         self._receiver_func = receiver_func
         self._thread_locals = local()
 
     @property
     def _dispatch_uid(self):
-        return (
+        dispatch_uid = (
             f'{id(self.signal):x}'
             f'__{self._receiver_func.__module__}.{self._receiver_func.__name__}'
             f'__{self.sender.__name__}'
         )
+        if self.search_app:
+            dispatch_uid += f'__{self.search_app.name}'
+        return dispatch_uid
 
     def connect(self):
         """Connects the signal receiver (for all threads)."""
+        if self.tracked_fields is not None:
+            track_fields(self.sender, self.tracked_fields)
+
         self.signal.connect(
             self.on_signal_received,
             sender=self.sender,
@@ -84,9 +114,24 @@ class SignalReceiver:
 
     def on_signal_received(self, sender, instance, **kwargs):
         """Callback function passed to the signal."""
-        if self.is_enabled:
+        if self.is_enabled and self._is_relevant_change(instance, **kwargs):
             self._receiver_func(instance)
 
+    def _is_relevant_change(self, instance, created=False, update_fields=None, **kwargs):
+        if created:
+            return not self.ignore_created
+
+        if self.tracked_fields is None:
+            return True
+
+        if update_fields is not None:
+            updated_attnames = get_tracked_attnames(self.sender, update_fields)
+            tracked_attnames = get_tracked_attnames(self.sender, self.tracked_fields)
+            if not updated_attnames & tracked_attnames:
+                return False
+
+        return have_fields_changed(instance, self.tracked_fields)
+
 
 @contextmanager
 def disable_search_signal_receivers(sender):
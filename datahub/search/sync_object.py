@@ -1,18 +1,32 @@
+from functools import partial
 from logging import getLogger
 
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.search.bulk_sync import sync_objects
-from datahub.search.migrate_utils import delete_from_secondary_indices_callback
-from datahub.search.tasks import sync_object_task, sync_related_objects_task
+from datahub.search.migrate_utils import (
+    refresh_and_delete_from_secondary_indices_callback,
+)
+from datahub.search.tasks import (
+    sync_dependent_objects_task,
+    sync_object_task,
+    sync_objects_task,
+)
 
 logger = getLogger(__name__)
 
 
-def sync_object(search_app, pk):
+def sync_object(search_app, pk, indexer=None):
     """
     Syncs a single object to Elasticsearch.
 
+    If a bulk indexer is provided, the object is added to its buffer rather than being sent
+    immediately. If the indexer then fails to index it, the object is resynced using
+    sync_objects_async() (so that the failure is retried by Celery rather than only logged).
+
     This function is migration-safe – if a migration is in progress, the object is added to the
-    new index and then deleted from the old index.
+    new index and then deleted from the old index. (As the new index may be in bulk-load mode
+    with automatic refreshes disabled, it is refreshed first, but only if it hasn't been
+    refreshed in the last settings.ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS seconds.)
     """
     es_model = search_app.es_model
     read_indices, write_index = es_model.get_read_and_write_indices()
@@ -23,10 +37,33 @@ def sync_object(search_app, pk):
         [obj],
         read_indices,
         write_index,
-        post_batch_callback=delete_from_secondary_indices_callback,
+        post_batch_callback=refresh_and_delete_from_secondary_indices_callback,
+        indexer=indexer,
+        indexer_error_callback=partial(_resync_failed_actions_async, search_app),
     )
 
 
+def sync_objects_by_pk(search_app, pks):
+    """
+    Syncs multiple objects to Elasticsearch, in batches of the bulk batch size of the search app.
+
+    Objects that no longer exist are ignored.
+
+    This function is migration-safe in the same way as sync_object().
+    """
+    es_model = search_app.es_model
+    read_indices, write_index = es_model.get_read_and_write_indices()
+
+    for batch in slice_iterable_into_chunks(pks, search_app.bulk_batch_size):
+        sync_objects(
+            es_model,
+            search_app.queryset.filter(pk__in=batch),
+            read_indices,
+            write_index,
+            post_batch_callback=refresh_and_delete_from_secondary_indices_callback,
+        )
+
+
 def sync_object_async(search_app, pk):
     """
     Syncs a single object to Elasticsearch asynchronously (by scheduling a Celery task).
@@ -44,30 +81,55 @@ def sync_object_async(search_app, pk):
     )
 
 
-def sync_related_objects_async(related_obj, related_obj_field_name, related_obj_filter=None):
+def sync_objects_async(search_app, pks):
     """
-    Syncs objects related to another object via a specified field.
+    Syncs multiple objects to Elasticsearch asynchronously (by scheduling a single Celery task).
 
-    For example, this function would sync the interactions of a company if given the following
-    arguments:
-        related_obj=company
-        related_obj_field_name='interactions'
-
-    This function is normally used by signal receivers to copy new or updated related objects to
-    Elasticsearch.
+    This is intended for use after bulk updates (which do not send post_save signals), and
+    should normally be called using transaction.on_commit().
     """
-    kwargs = {'related_obj_filter': related_obj_filter} if related_obj_filter else {}
-
-    result = sync_related_objects_task.apply_async(
-        args=(
-            related_obj._meta.label,
-            str(related_obj.pk),
-            related_obj_field_name,
-        ),
-        kwargs=kwargs,
+    pks = [str(pk) for pk in pks]
+    if not pks:
+        return
+
+    result = sync_objects_task.apply_async(args=(search_app.name, pks))
+    logger.info(
+        f'Task {result.id} scheduled to synchronise {len(pks)} objects for search app '
+        f'{search_app.name}',
     )
 
+
+def sync_dependent_objects_by_paths_async(search_app, paths, source_pks):
+    """
+    Syncs the objects of a search app that depend on some source objects via the specified
+    paths asynchronously (by scheduling a single Celery task).
+
+    For example, this function would sync the contacts of some companies if given the
+    following arguments:
+        search_app=ContactSearchApp
+        paths=['company']
+        source_pks=[company.pk for company in companies]
+
+    This function is normally used by the receivers of the dependency graph (see
+    datahub.search.dependencies), and should normally be called using transaction.on_commit().
+    """
+    source_pks = [str(pk) for pk in source_pks]
+    if not source_pks:
+        return
+
+    result = sync_dependent_objects_task.apply_async(
+        args=(search_app.name, list(paths), source_pks),
+    )
     logger.info(
-        f'Task {result.id} scheduled to synchronise {related_obj_field_name} for object'
-        f' {related_obj.pk}',
+        f'Task {result.id} scheduled to synchronise objects for search app {search_app.name} '
+        f'depending on {len(source_pks)} objects via {", ".join(paths)}',
+    )
+
+
+def _resync_failed_actions_async(search_app, actions):
+    pks = [action['_id'] for action in actions]
+    logger.warning(
+        f'Scheduling a resync of {len(pks)} objects for search app {search_app.name} that '
+        f'failed to be indexed',
     )
+    sync_objects_async(search_app, pks)
@@ -1,9 +1,11 @@
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
 from celery.utils.log import get_task_logger
 from django.apps import apps
 from django_pglocks import advisory_lock
 
 from datahub.search.apps import get_search_app, get_search_app_by_model, get_search_apps
+from datahub.search.bulk_indexer import flush_bulk_indexer, get_bulk_indexer
 from datahub.search.bulk_sync import sync_app
 from datahub.search.migrate_utils import resync_after_migrate
 
@@ -39,21 +41,115 @@ def sync_model(search_app_name):
     sync_app(search_app)
 
 
+@shared_task(acks_late=True, priority=9)
+def reconcile_all_models():
+    """
+    Task that starts sub-tasks to reconcile the Elasticsearch documents of all models with the
+    database.
+
+    This replaces the nightly full resync (sync_all_models).
+
+    priority is set to the lowest priority (for Redis, 0 is the highest priority).
+    """
+    for search_app in get_search_apps():
+        reconcile_model.apply_async(
+            args=(search_app.name,),
+        )
+
+
+@shared_task(acks_late=True, priority=9, queue='long-running')
+def reconcile_model(search_app_name):
+    """
+    Task that reconciles the Elasticsearch documents of a single model with the database.
+
+    Only missing or stale documents are resynced, and orphaned documents are deleted.
+
+    :returns: dict of drift statistics (see datahub.search.reconcile.reconcile_app())
+    """
+    from datahub.search.reconcile import reconcile_app
+
+    search_app = get_search_app(search_app_name)
+
+    with advisory_lock(f'leeloo-reconcile_model-{search_app_name}', wait=False) as lock_held:
+        if not lock_held:
+            logger.warning(
+                f'Another reconcile_model task is in progress for the {search_app_name} '
+                f'search app. Aborting...',
+            )
+            return None
+
+        return reconcile_app(search_app)
+
+
 @shared_task(acks_late=True, max_retries=15, autoretry_for=(Exception,), retry_backoff=1)
 def sync_object_task(search_app_name, pk):
     """
     Syncs a single object to Elasticsearch.
 
-    If an error occurs, the task will be automatically retried with an exponential back-off.
-    The wait between attempts is approximately 2 ** attempt_num seconds (with some jitter
-    added).
+    The document is added to the bulk indexer of the worker process, which sends it (along
+    with documents from other tasks) to Elasticsearch shortly afterwards. The bulk indexer
+    retries documents rejected with transient Elasticsearch errors itself. If the document
+    still can't be indexed, a sync_objects_task is scheduled for it.
+
+    Note that as the task completes before the document is sent, a document still in the
+    buffer is lost if the worker process is killed (at most
+    settings.ES_BULK_INDEXER_MAX_BUFFER_SECS seconds' worth, and the buffer is flushed when the
+    worker shuts down normally). Any such drift is corrected by reconcile_all_models.
+
+    If any other error occurs, the task will be automatically retried with an exponential
+    back-off. The wait between attempts is approximately 2 ** attempt_num seconds (with some
+    jitter added).
 
     This task is named sync_object_task to avoid a conflict with sync_object.
     """
     from datahub.search.sync_object import sync_object
 
     search_app = get_search_app(search_app_name)
-    sync_object(search_app, pk)
+    sync_object(search_app, pk, indexer=get_bulk_indexer())
+
+
+@shared_task(acks_late=True, max_retries=15, autoretry_for=(Exception,), retry_backoff=1)
+def sync_objects_task(search_app_name, pks):
+    """
+    Syncs multiple objects of a search app to Elasticsearch in batches.
+
+    This is used when many objects have been updated at once (e.g. using QuerySet.update()),
+    to avoid scheduling a task per object.
+
+    If an error occurs, the task will be automatically retried with an exponential back-off.
+    """
+    from datahub.search.sync_object import sync_objects_by_pk
+
+    search_app = get_search_app(search_app_name)
+    sync_objects_by_pk(search_app, pks)
+
+
+@shared_task(
+    acks_late=True,
+    max_retries=15,
+    priority=6,
+    autoretry_for=(Exception,),
+    retry_backoff=1,
+)
+def sync_dependent_objects_task(search_app_name, paths, source_pks):
+    """
+    Syncs the objects of a search app that depend on some source objects via the specified
+    paths (see datahub.search.dependencies).
+
+    The primary keys of the objects are resolved using one query per path, and the objects
+    are then synced in batches.
+
+    Note that a lower priority (higher number) is used for syncing dependent objects, as syncing
+    them is less important than syncing the primary object that was modified.
+
+    If an error occurs, the task will be automatically retried with an exponential back-off.
+    """
+    from datahub.search.dependencies import get_dependent_pks
+    from datahub.search.sync_object import sync_objects_by_pk
+
+    search_app = get_search_app(search_app_name)
+    pks = get_dependent_pks(search_app, paths, source_pks)
+    sync_objects_by_pk(search_app, pks)
 
 
 @shared_task(
@@ -74,6 +170,9 @@ def sync_related_objects_task(
     """
     Syncs objects related to another object via a specified field.
 
+    This is no longer scheduled (sync_dependent_objects_task is used instead), but is kept so
+    that tasks already in the queue during a deployment can still be processed.
+
     For example, this task would sync the interactions of a company if given the following
     arguments:
         related_model_label='company.Company'
@@ -107,9 +206,22 @@ def sync_related_objects_task(
     default_retry_delay=60,
     queue='long-running',
 )
-def complete_model_migration(self, search_app_name, new_mapping_hash):
+def complete_model_migration(
+    self,
+    search_app_name,
+    new_mapping_hash,
+    num_workers=1,
+    queued_migrations=(),
+):
     """
     Completes a migration by performing a full resync, updating aliases and removing old indices.
+
+    num_workers is the number of threads used to sync documents (allocated by migrate_apps()).
+
+    queued_migrations is a list of (search app name, new mapping hash) pairs of other search
+    apps to resync (using the same number of threads) once this one has finished. The next
+    one is scheduled even if this resync fails, so that one failure doesn't block the rest of
+    the queue.
     """
     search_app = get_search_app(search_app_name)
     if search_app.es_model.get_target_mapping_hash() != new_mapping_hash:
@@ -122,12 +234,37 @@ Rescheduling the {search_app_name} search app migration to attempt to resolve th
         logger.warning(warning_message)
         raise self.retry()
 
-    with advisory_lock(f'leeloo-resync_after_migrate-{search_app_name}', wait=False) as lock_held:
-        if not lock_held:
-            logger.warning(
-                f'Another complete_model_migration task is in progress for the {search_app_name} '
-                f'search app. Aborting...',
-            )
-            return
+    try:
+        lock_name = f'leeloo-resync_after_migrate-{search_app_name}'
+        with advisory_lock(lock_name, wait=False) as lock_held:
+            if not lock_held:
+                logger.warning(
+                    f'Another complete_model_migration task is in progress for the '
+                    f'{search_app_name} search app. Aborting...',
+                )
+                return
+
+            resync_after_migrate(search_app, num_workers=num_workers)
+    finally:
+        _schedule_next_migration(queued_migrations, num_workers)
+
+
+def _schedule_next_migration(queued_migrations, num_workers):
+    if not queued_migrations:
+        return
+
+    (search_app_name, new_mapping_hash), *remaining_migrations = queued_migrations
+    complete_model_migration.apply_async(
+        args=(search_app_name, new_mapping_hash),
+        kwargs={
+            'num_workers': num_workers,
+            'queued_migrations': remaining_migrations,
+        },
+    )
+
 
-        resync_after_migrate(search_app)
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_bulk_indexer_on_shutdown(**kwargs):
+    """Sends any buffered bulk indexer actions to Elasticsearch when a worker shuts down."""
+    flush_bulk_indexer()
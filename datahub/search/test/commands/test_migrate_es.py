@@ -0,0 +1,72 @@
+from io import StringIO
+from unittest import mock
+
+from django.core import management
+
+from datahub.search.management.commands import migrate_es
+from datahub.search.migration_progress import AppMigrationProgress
+
+
+@mock.patch('datahub.search.management.commands.migrate_es.migrate_apps')
+@mock.patch('datahub.search.management.commands.migrate_es.advisory_lock')
+@mock.patch(
+    'datahub.search.management.commands.migrate_es.are_apps_initialised',
+    mock.Mock(return_value=True),
+)
+def test_migrate_es(advisory_lock_mock, migrate_apps_mock):
+    """Test that the command migrates the specified apps using the specified worker budget."""
+    management.call_command(migrate_es.Command(), model=['company'], max_workers=3)
+
+    migrate_apps_mock.assert_called_once_with(mock.ANY, max_workers=3)
+    apps = migrate_apps_mock.call_args[0][0]
+    assert [app.name for app in apps] == ['company']
+
+
+@mock.patch('datahub.search.management.commands.migrate_es.migrate_apps')
+@mock.patch('datahub.search.management.commands.migrate_es.get_app_progress')
+def test_migrate_es_progress(get_app_progress_mock, migrate_apps_mock):
+    """Test that --progress displays progress without migrating any apps."""
+    get_app_progress_mock.return_value = [
+        AppMigrationProgress('company', 10, 5, 1000.0, None),
+    ]
+    stdout = StringIO()
+
+    management.call_command(
+        migrate_es.Command(),
+        model=['company', 'contact'],
+        progress=True,
+        stdout=stdout,
+    )
+
+    migrate_apps_mock.assert_not_called()
+    lines = stdout.getvalue().splitlines()
+    assert lines[:2] == [
+        'contact: not started',
+        'company: 5/10 documents 50%',
+    ]
+    assert lines[2].startswith('Overall: 5/10 documents')
+
+
+@mock.patch('datahub.search.management.commands.migrate_es.sleep')
+@mock.patch('datahub.search.management.commands.migrate_es.migrate_apps')
+@mock.patch('datahub.search.management.commands.migrate_es.get_app_progress')
+@mock.patch('datahub.search.management.commands.migrate_es.advisory_lock', mock.MagicMock())
+@mock.patch(
+    'datahub.search.management.commands.migrate_es.are_apps_initialised',
+    mock.Mock(return_value=True),
+)
+def test_migrate_es_wait(get_app_progress_mock, migrate_apps_mock, sleep_mock):
+    """Test that --wait displays progress until all started migrations have completed."""
+    migrate_apps_mock.return_value = ['company']
+    get_app_progress_mock.side_effect = [
+        [],
+        [AppMigrationProgress('company', 10, 5, 1000.0, None)],
+        [AppMigrationProgress('company', 10, 10, 1000.0, 1010.0)],
+    ]
+    stdout = StringIO()
+
+    management.call_command(migrate_es.Command(), wait=True, stdout=stdout)
+
+    assert get_app_progress_mock.call_count == 3
+    assert sleep_mock.call_count == 2
+    assert stdout.getvalue().splitlines()[-1] == 'All migrations complete'
@@ -0,0 +1,61 @@
+from unittest import mock
+
+import pytest
+from django.core import management
+from django.core.management.base import CommandError
+
+from datahub.search.apps import get_search_apps
+from datahub.search.management.commands import reconcile_es
+
+
+@mock.patch(
+    'datahub.search.apps.index_exists',
+    mock.Mock(return_value=False),
+)
+def test_fails_if_index_doesnt_exist():
+    """Tests that if the index doesn't exist, reconcile_es fails."""
+    with pytest.raises(CommandError):
+        management.call_command(reconcile_es.Command())
+
+
+@mock.patch('datahub.search.management.commands.reconcile_es.reconcile_apps')
+@mock.patch(
+    'datahub.search.apps.index_exists',
+    mock.Mock(return_value=True),
+)
+def test_reconcile_es(reconcile_apps_mock, capsys):
+    """Tests that all search apps are reconciled and the drift is reported."""
+    reconcile_apps_mock.return_value = {
+        'company': {'checked': 2, 'missing': 1, 'stale': 0, 'orphaned': 0},
+        'contact': None,
+    }
+
+    management.call_command(reconcile_es.Command(), batch_size=10, dry_run=True)
+
+    reconcile_apps_mock.assert_called_once_with(
+        list(get_search_apps()),
+        batch_size=10,
+        dry_run=True,
+    )
+    stdout = capsys.readouterr().out
+    assert 'company: checked: 2, missing: 1, stale: 0, orphaned: 0' in stdout
+    assert 'contact: skipped (migration in progress)' in stdout
+
+
+@pytest.mark.parametrize(
+    'search_model',
+    (app.name for app in get_search_apps()),
+)
+@mock.patch('datahub.search.management.commands.reconcile_es.reconcile_apps')
+@mock.patch(
+    'datahub.search.apps.index_exists',
+    mock.Mock(return_value=True),
+)
+def test_reconcile_one_model(reconcile_apps_mock, search_model):
+    """Test that --model can be used to specify what to reconcile."""
+    reconcile_apps_mock.return_value = {}
+
+    management.call_command(reconcile_es.Command(), model=[search_model])
+
+    search_apps = reconcile_apps_mock.call_args[0][0]
+    assert [search_app.name for search_app in search_apps] == [search_model]
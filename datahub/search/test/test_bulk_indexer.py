@@ -0,0 +1,243 @@
+import json
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from datahub.search.bulk_indexer import BulkIndexer
+
+
+def _make_action(doc_id, index='index', **source):
+    return {
+        '_index': index,
+        '_type': 'test-type',
+        '_id': doc_id,
+        '_source': source,
+    }
+
+
+def _make_result(action, status):
+    ok = isinstance(status, int) and 200 <= status < 300
+    return ok, {
+        'index': {
+            '_index': action['_index'],
+            '_id': action['_id'],
+            'status': status,
+            **({} if ok else {'error': 'error'}),
+        },
+    }
+
+
+class _MockStreamingBulk:
+    """Mock for streaming_bulk() that returns statuses from a list of status maps."""
+
+    def __init__(self, *statuses_by_id):
+        self.statuses_by_id = list(statuses_by_id)
+        self.calls = []
+
+    def __call__(self, client, actions, **kwargs):
+        self.calls.append([action['_id'] for action in actions])
+        statuses = self.statuses_by_id.pop(0) if self.statuses_by_id else {}
+        return (_make_result(action, statuses.get(action['_id'], 201)) for action in actions)
+
+
+@pytest.fixture
+def mock_client():
+    """A mock Elasticsearch client that serialises using JSON."""
+    client = Mock()
+    client.transport.serializer.dumps = json.dumps
+    yield client
+
+
+def _make_indexer(client, **kwargs):
+    return BulkIndexer(
+        max_actions=kwargs.pop('max_actions', 10),
+        max_bytes=kwargs.pop('max_bytes', 1024 * 1024),
+        max_buffer_secs=kwargs.pop('max_buffer_secs', 60),
+        max_retries=kwargs.pop('max_retries', 3),
+        initial_backoff_secs=0.001,
+        max_backoff_secs=0.001,
+        client=client,
+    )
+
+
+class TestBulkIndexer:
+    """Tests for BulkIndexer."""
+
+    def test_does_not_flush_below_thresholds(self, monkeypatch, mock_client):
+        """Test that actions are buffered until a threshold is reached."""
+        streaming_bulk_mock = _MockStreamingBulk()
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        indexer = _make_indexer(mock_client)
+
+        indexer.add([_make_action(1), _make_action(2)])
+
+        assert not streaming_bulk_mock.calls
+        assert indexer.num_buffered_actions == 2
+
+        indexer.flush()
+
+        assert streaming_bulk_mock.calls == [[1, 2]]
+        assert indexer.num_buffered_actions == 0
+
+    def test_flushes_on_max_actions(self, monkeypatch, mock_client):
+        """Test that the buffer is flushed once max_actions actions have been added."""
+        streaming_bulk_mock = _MockStreamingBulk()
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        indexer = _make_indexer(mock_client, max_actions=2)
+
+        indexer.add([_make_action(1)])
+        indexer.add([_make_action(2)])
+
+        assert streaming_bulk_mock.calls == [[1, 2]]
+        assert indexer.get_stats() == {
+            'actions_indexed': 2,
+            'actions_rejected': 0,
+            'actions_sent': 2,
+            'flushes': 1,
+        }
+
+    def test_flushes_on_max_bytes(self, monkeypatch, mock_client):
+        """Test that the buffer is flushed once max_bytes bytes have been added."""
+        streaming_bulk_mock = _MockStreamingBulk()
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        indexer = _make_indexer(mock_client, max_bytes=50)
+
+        indexer.add([_make_action(1, name='a' * 20)])
+        assert not streaming_bulk_mock.calls
+
+        indexer.add([_make_action(2, name='b' * 20)])
+        assert streaming_bulk_mock.calls == [[1, 2]]
+
+    def test_flushes_periodically(self, monkeypatch, mock_client):
+        """Test that buffered actions are flushed once they are older than max_buffer_secs."""
+        streaming_bulk_mock = _MockStreamingBulk()
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        indexer = _make_indexer(mock_client, max_buffer_secs=0.05)
+
+        indexer.add([_make_action(1)])
+
+        deadline = time.monotonic() + 5
+        while indexer.num_buffered_actions and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        indexer.close()
+        assert streaming_bulk_mock.calls == [[1]]
+
+    def test_only_sends_latest_action_for_document(self, monkeypatch, mock_client):
+        """Test that only the latest action for a document is sent."""
+        streaming_bulk_mock = Mock(return_value=iter([(True, {'index': {'status': 200}})]))
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        indexer = _make_indexer(mock_client)
+
+        indexer.add([_make_action(1, name='old')])
+        indexer.add([_make_action(1, name='new')])
+        indexer.flush()
+
+        assert streaming_bulk_mock.call_args[0][1] == [_make_action(1, name='new')]
+
+    def test_retries_only_rejected_actions(self, monkeypatch, mock_client):
+        """Test that only actions rejected with a transient error are retried."""
+        streaming_bulk_mock = _MockStreamingBulk({2: 429}, {2: 'N/A'})
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        callback = Mock()
+        indexer = _make_indexer(mock_client)
+
+        actions = [_make_action(1), _make_action(2), _make_action(3)]
+        indexer.add(actions, callback=callback)
+        indexer.flush()
+
+        assert streaming_bulk_mock.calls == [[1, 2, 3], [2], [2]]
+        callback.assert_called_once_with(actions)
+        assert indexer.get_stats() == {
+            'actions_indexed': 3,
+            'actions_rejected': 0,
+            'actions_retried': 2,
+            'actions_sent': 5,
+            'flushes': 1,
+            'retries': 2,
+        }
+
+    @pytest.mark.parametrize(
+        'statuses,expected_calls,expected_retries',
+        (
+            # non-retryable error
+            (({1: 400},), [[1, 2]], 0),
+            # transient error that does not go away
+            (({1: 429},) * 4, [[1, 2], [1], [1], [1]], 3),
+        ),
+    )
+    def test_failed_actions(
+        self,
+        monkeypatch,
+        mock_client,
+        statuses,
+        expected_calls,
+        expected_retries,
+    ):
+        """
+        Test that callbacks are not called for actions that fail permanently, and that those
+        actions are recorded as rejected.
+        """
+        streaming_bulk_mock = _MockStreamingBulk(*statuses)
+        monkeypatch.setattr('datahub.search.bulk_indexer.streaming_bulk', streaming_bulk_mock)
+        failed_action_callback = Mock()
+        successful_action_callback = Mock()
+        indexer = _make_indexer(mock_client)
+
+        indexer.add([_make_action(1)], callback=failed_action_callback)
+        indexer.add([_make_action(2)], callback=successful_action_callback)
+        indexer.flush()
+
+        assert streaming_bulk_mock.calls == expected_calls
+        failed_action_callback.assert_not_called()
+        successful_action_callback.assert_called_once()
+        stats = indexer.get_stats()
+        assert stats['actions_rejected'] == 1
+        assert stats.get('retries', 0) == expected_retries
+
+    @pytest.mark.parametrize(
+        'streaming_bulk_side_effect',
+        (
+            _MockStreamingBulk({1: 400}),
+            Mock(side_effect=ValueError('Test error')),
+        ),
+    )
+    def test_error_callbacks(self, monkeypatch, mock_client, streaming_bulk_side_effect):
+        """
+        Test that error callbacks are called with the actions that failed permanently (or that
+        could not be sent), and that callbacks are not called for those actions.
+        """
+        monkeypatch.setattr(
+            'datahub.search.bulk_indexer.streaming_bulk',
+            streaming_bulk_side_effect,
+        )
+        callback = Mock()
+        error_callback = Mock()
+        indexer = _make_indexer(mock_client)
+
+        action = _make_action(1)
+        indexer.add([action], callback=callback, error_callback=error_callback)
+        indexer.flush()
+
+        callback.assert_not_called()
+        error_callback.assert_called_once_with([action])
+        assert indexer.get_stats()['actions_rejected'] == 1
+
+    def test_error_callbacks_not_called_on_success(self, monkeypatch, mock_client):
+        """Test that error callbacks are not called if all actions succeed."""
+        monkeypatch.setattr(
+            'datahub.search.bulk_indexer.streaming_bulk',
+            _MockStreamingBulk({1: 400}),
+        )
+        callback = Mock()
+        error_callback = Mock()
+        indexer = _make_indexer(mock_client)
+
+        actions = [_make_action(2), _make_action(3)]
+        indexer.add([_make_action(1)])
+        indexer.add(actions, callback=callback, error_callback=error_callback)
+        indexer.flush()
+
+        callback.assert_called_once_with(actions)
+        error_callback.assert_not_called()
@@ -93,3 +93,28 @@ def test_sync_app_uses_latest_data(monkeypatch, setup_es):
         id=company.pk,
     )
     assert fetched_company['_source']['name'] == 'new name'
+
+
+def test_sync_app_with_multiple_workers(monkeypatch):
+    """
+    Test that sync_app() syncs all batches when using multiple workers, and reports progress.
+    """
+    bulk_mock = Mock()
+    monkeypatch.setattr('datahub.search.bulk_sync.bulk', bulk_mock)
+    progress_callback = Mock()
+    search_app = create_mock_search_app(
+        queryset=MockQuerySet([Mock(id=index) for index in range(5)]),
+    )
+
+    sync_app(search_app, batch_size=2, num_workers=2, progress_callback=progress_callback)
+
+    synced_ids = {
+        action['_id']
+        for call_args in bulk_mock.call_args_list
+        for action in call_args[1]['actions']
+    }
+    assert bulk_mock.call_count == 3
+    assert synced_ids == set(range(5))
+    assert progress_callback.call_args_list[0][0] == (0, 5)
+    assert progress_callback.call_args_list[-1][0] == (5, 5)
+    assert progress_callback.call_count == 4
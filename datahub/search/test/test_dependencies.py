@@ -0,0 +1,269 @@
+from unittest.mock import call, Mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from datahub.company.models import Advisor, Company, Contact
+from datahub.company.test.factories import CompanyFactory, ContactFactory
+from datahub.core import constants
+from datahub.core.models import BaseConstantModel
+from datahub.investment.investor_profile.test.factories import LargeInvestorProfileFactory
+from datahub.investment.project.models import InvestmentProject, InvestmentProjectTeamMember
+from datahub.search.contact import ContactSearchApp
+from datahub.search.dependencies import (
+    get_dependency_edges,
+    get_dependency_signal_receivers,
+    get_dependent_pks,
+    sync_dependent_objects_async,
+)
+from datahub.search.interaction import InteractionSearchApp
+from datahub.search.investment import InvestmentSearchApp
+from datahub.search.large_investor_profile import LargeInvestorProfileSearchApp
+from datahub.search.test.search_support.models import RelatedModel, SimpleModel
+from datahub.search.test.search_support.relatedmodel import RelatedModelSearchApp
+
+
+def _get_edges_by_path(search_app, source_model):
+    return {
+        edge.path: edge.tracked_fields
+        for edge in get_dependency_edges(search_app)
+        if edge.source_model is source_model
+    }
+
+
+class TestGetDependencyEdges:
+    """Tests for the derivation of the dependency graph from search apps."""
+
+    def test_contact(self):
+        """Test that contacts depend on the company fields they copy."""
+        assert _get_edges_by_path(ContactSearchApp, Company) == {
+            'company': {
+                'name',
+                'trading_names',
+                'sector',
+                'uk_region',
+                'address_1',
+                'address_2',
+                'address_town',
+                'address_county',
+                'address_postcode',
+                'address_country',
+            },
+        }
+
+    def test_interaction(self):
+        """Test that interactions depend on their company, contacts and investment project."""
+        assert _get_edges_by_path(InteractionSearchApp, Company) == {
+            'company': {'name', 'trading_names', 'sector'},
+        }
+        assert _get_edges_by_path(InteractionSearchApp, Contact) == {
+            'contacts': {'first_name', 'last_name'},
+        }
+        assert _get_edges_by_path(InteractionSearchApp, InvestmentProject) == {
+            'investment_project': {'name', 'sector'},
+        }
+
+    def test_investment_project_advisers(self):
+        """
+        Test that investment projects depend on their advisers (including team members, which
+        are used via a lambda in MAPPINGS).
+        """
+        adviser_fields = {'first_name', 'last_name', 'dit_team'}
+        edges = _get_edges_by_path(InvestmentSearchApp, Advisor)
+
+        assert edges['created_by'] == adviser_fields
+        assert edges['project_manager'] == adviser_fields
+        assert edges['team_members__adviser'] == adviser_fields
+        assert not _get_edges_by_path(InvestmentSearchApp, InvestmentProjectTeamMember)
+
+    def test_investment_project_investor_company(self):
+        """Test that investment projects depend on the name and country of their investor."""
+        edges = _get_edges_by_path(InvestmentSearchApp, Company)
+
+        assert edges['investor_company'] == {'name', 'address_country'}
+
+    def test_large_investor_profile(self):
+        """
+        Test that large investor profiles depend on their investor company (including its
+        country, which is used for country_of_origin).
+        """
+        assert _get_edges_by_path(LargeInvestorProfileSearchApp, Company) == {
+            'investor_company': {'name', 'trading_names', 'address_country'},
+        }
+
+    def test_excludes_constant_and_own_models(self, search_app):
+        """Test that constant models and the search app's own model are not included."""
+        for edge in get_dependency_edges(search_app):
+            assert not issubclass(edge.source_model, BaseConstantModel)
+            assert edge.source_model._meta.app_label != 'metadata'
+            assert edge.source_model is not search_app.queryset.model
+
+    def test_raises_error_for_mapping_of_non_field(self):
+        """
+        Test that an error is raised if a MAPPINGS key is not a field (e.g. a property), as
+        the fields it reads can't be worked out.
+        """
+        class ESModel:
+            MAPPINGS = {'simpleton_name': str}
+            COMPUTED_MAPPINGS = {}
+
+        search_app = Mock(queryset=RelatedModel.objects.all(), es_model=ESModel)
+        search_app.get_declared_signal_receivers.return_value = ()
+
+        with pytest.raises(ImproperlyConfigured):
+            get_dependency_edges(search_app)
+
+
+def _connect_dependency_signal_receivers(search_app):
+    receivers = get_dependency_signal_receivers(search_app)
+    for receiver in receivers:
+        receiver.connect()
+
+    yield receivers
+
+    for receiver in receivers:
+        receiver.disconnect()
+
+
+@pytest.mark.django_db
+def test_get_dependent_pks():
+    """Test that the primary keys of dependent objects are resolved."""
+    simpletons = SimpleModel.objects.bulk_create([SimpleModel(), SimpleModel()])
+    relations = [RelatedModel.objects.create(simpleton=simpleton) for simpleton in simpletons]
+    RelatedModel.objects.create()
+
+    pks = get_dependent_pks(
+        RelatedModelSearchApp,
+        ['simpleton'],
+        [simpleton.pk for simpleton in simpletons],
+    )
+
+    assert pks == sorted(relation.pk for relation in relations)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('synchronous_on_commit')
+class TestDependencySignalReceivers:
+    """Tests for the signal receivers of the dependency graph."""
+
+    @pytest.fixture
+    def contact_receivers(self):
+        """Connects the dependency signal receivers for contacts."""
+        yield from _connect_dependency_signal_receivers(ContactSearchApp)
+
+    @pytest.fixture
+    def large_investor_profile_receivers(self):
+        """Connects the dependency signal receivers for large investor profiles."""
+        yield from _connect_dependency_signal_receivers(LargeInvestorProfileSearchApp)
+
+    @pytest.fixture
+    def sync_mock(self, monkeypatch):
+        """Mocks sync_dependent_objects_by_paths_async()."""
+        sync_mock = Mock()
+        monkeypatch.setattr(
+            'datahub.search.dependencies.sync_dependent_objects_by_paths_async',
+            sync_mock,
+        )
+        return sync_mock
+
+    def test_syncs_on_relevant_change(self, contact_receivers, sync_mock):
+        """Test that contacts are resynced when a company field they use is changed."""
+        company = CompanyFactory()
+
+        company.address_town = 'New town'
+        company.save()
+
+        sync_mock.assert_called_once_with(ContactSearchApp, ['company'], [company.pk])
+
+    def test_syncs_on_change_of_field_read_by_computed_mapping(
+        self,
+        large_investor_profile_receivers,
+        sync_mock,
+    ):
+        """
+        Test that large investor profiles are resynced when the country of their investor
+        company (used for country_of_origin) is changed.
+        """
+        investor_profile = LargeInvestorProfileFactory()
+        company = investor_profile.investor_company
+
+        company.address_country_id = constants.Country.japan.value.id
+        company.save()
+
+        sync_mock.assert_called_once_with(
+            LargeInvestorProfileSearchApp,
+            ['investor_company'],
+            [company.pk],
+        )
+
+    def test_does_not_sync_on_irrelevant_change(self, contact_receivers, sync_mock):
+        """Test that contacts are not resynced when other company fields are changed."""
+        company = CompanyFactory()
+
+        company.description = 'New description'
+        company.save()
+
+        sync_mock.assert_not_called()
+
+    def test_does_not_sync_on_create(self, contact_receivers, sync_mock):
+        """Test that nothing is resynced when a company is created."""
+        CompanyFactory()
+
+        sync_mock.assert_not_called()
+
+    def test_does_not_sync_on_create_with_untracked_fields(
+        self,
+        contact_receivers,
+        sync_mock,
+        monkeypatch,
+    ):
+        """
+        Test that nothing is resynced when a company is created, even if the changes to the
+        fields used by contacts aren't known.
+        """
+        monkeypatch.setattr(
+            'datahub.search.dependencies.have_fields_changed',
+            Mock(return_value=True),
+        )
+
+        CompanyFactory()
+
+        sync_mock.assert_not_called()
+
+    def test_does_not_sync_dependencies_of_own_model(self, contact_receivers, sync_mock):
+        """Test that saving a contact does not trigger dependency receivers."""
+        contact = ContactFactory()
+
+        contact.first_name = 'New name'
+        contact.save()
+
+        sync_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    'changed_fields,expected_paths',
+    (
+        (None, ['company']),
+        (('name',), ['company']),
+        (('description',), None),
+    ),
+)
+def test_sync_dependent_objects_async(monkeypatch, changed_fields, expected_paths):
+    """Test that bulk updates only resync the documents that use the changed fields."""
+    sync_mock = Mock()
+    monkeypatch.setattr(
+        'datahub.search.dependencies.sync_dependent_objects_by_paths_async',
+        sync_mock,
+    )
+
+    sync_dependent_objects_async(Company, ['pk'], changed_fields=changed_fields)
+
+    contact_calls = [
+        mock_call for mock_call in sync_mock.call_args_list
+        if mock_call[0][0] is ContactSearchApp
+    ]
+
+    if expected_paths is None:
+        assert not contact_calls
+    else:
+        assert contact_calls == [call(ContactSearchApp, expected_paths, ['pk'])]
@@ -3,6 +3,7 @@ from unittest import mock
 import pytest
 from pytest import raises
 
+from datahub.company.test.factories import CompanyFactory
 from datahub.core.test_utils import construct_mock
 from datahub.search import dict_utils
 
@@ -366,3 +367,36 @@ def test_nested_id_name_dict_raises_exception_on_invalid_argument():
 
     with raises(ValueError):
         dict_utils.computed_nested_id_name_dict('company')(obj)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'field_path,get_expected_object',
+    (
+        ('uk_region', lambda company: company.uk_region),
+        ('global_headquarters.uk_region', lambda company: company.global_headquarters.uk_region),
+        ('business_type', lambda company: None),
+    ),
+)
+def test_computed_constant_id_name_dict(field_path, get_expected_object):
+    """Test that computed_constant_id_name_dict() returns the ID and name of a constant."""
+    company = CompanyFactory(
+        business_type_id=None,
+        global_headquarters=CompanyFactory(),
+    )
+    expected_object = get_expected_object(company)
+    expected_dict = dict_utils.id_name_dict(expected_object)
+
+    assert dict_utils.computed_constant_id_name_dict(field_path)(company) == expected_dict
+
+
+@pytest.mark.django_db
+def test_computed_constant_id_name_dict_nested_none():
+    """
+    Test that computed_constant_id_name_dict() returns None if a nested object does not
+    exist.
+    """
+    company = CompanyFactory(global_headquarters=None)
+
+    get_dict = dict_utils.computed_constant_id_name_dict('global_headquarters.uk_region')
+    assert get_dict(company) is None
@@ -46,6 +46,7 @@ def test_configure_connection(connections, settings):
     connections.configure.assert_called_with(default={
         'hosts': [settings.ES_URL],
         'verify_certs': settings.ES_VERIFY_CERTS,
+        'transport_class': elasticsearch.InstrumentedTransport,
     })
 
 
@@ -281,3 +282,72 @@ def test_create_alias(mock_es_client):
 
     elasticsearch.associate_index_with_alias(alias_name, index_name)
     client.indices.put_alias.assert_called_with(index_name, alias_name)
+
+
+@pytest.mark.parametrize('raise_error', (False, True))
+def test_bulk_load_mode(monkeypatch, mock_es_client, raise_error):
+    """
+    Test that bulk_load_mode() disables refreshes and replicas, and then restores the normal
+    settings and refreshes the index (even if an error occurs).
+    """
+    monkeypatch.setattr(
+        'django.conf.settings.ES_INDEX_SETTINGS',
+        {
+            'number_of_replicas': 1,
+            'refresh_interval': '5s',
+        },
+    )
+    client = mock_es_client.return_value
+
+    try:
+        with elasticsearch.bulk_load_mode('test-index'):
+            client.indices.put_settings.assert_called_once_with(
+                index='test-index',
+                body={
+                    'index': {
+                        'refresh_interval': '-1',
+                        'number_of_replicas': 0,
+                    },
+                },
+            )
+            client.indices.refresh.assert_not_called()
+            if raise_error:
+                raise ValueError
+    except ValueError:
+        assert raise_error
+
+    client.indices.put_settings.assert_called_with(
+        index='test-index',
+        body={
+            'index': {
+                'refresh_interval': '5s',
+                'number_of_replicas': 1,
+            },
+        },
+    )
+    client.indices.refresh.assert_called_once_with(index='test-index')
+
+
+@pytest.mark.parametrize(
+    'response,expected_took',
+    (
+        ({'took': 5}, 5),
+        (True, None),
+    ),
+)
+def test_instrumented_transport_records_requests(monkeypatch, response, expected_took):
+    """Test that InstrumentedTransport records requests (and took values if present)."""
+    monkeypatch.setattr(
+        'elasticsearch.Transport.perform_request',
+        mock.Mock(return_value=response),
+    )
+    record_es_request_mock = mock.Mock()
+    monkeypatch.setattr(
+        'datahub.search.elasticsearch.record_es_request',
+        record_es_request_mock,
+    )
+    transport = elasticsearch.InstrumentedTransport([{'host': 'localhost'}])
+
+    assert transport.perform_request('GET', '/_search') == response
+
+    record_es_request_mock.assert_called_once_with(mock.ANY, took=expected_took)
@@ -0,0 +1,140 @@
+from unittest.mock import Mock
+
+import pytest
+from django.db.models.signals import post_delete, post_save
+
+from datahub.search.field_tracking import have_fields_changed, track_fields
+from datahub.search.signals import SignalReceiver
+from datahub.search.test.search_support.models import RelatedModel, SimpleModel
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tracked_receiver():
+    """Connects a receiver for SimpleModel that tracks the name field."""
+    callback = Mock(__name__='callback')
+    receiver = SignalReceiver(post_save, SimpleModel, callback, tracked_fields=('name',))
+    receiver.connect()
+    yield receiver, callback
+    receiver.disconnect()
+
+
+class TestFieldTracking:
+    """Tests for field-level dirty tracking."""
+
+    def test_unchanged_save(self):
+        """Test that saving an unchanged instance is not treated as a change."""
+        track_fields(SimpleModel, ('name',))
+        obj = SimpleModel.objects.create(name='old')
+
+        obj = SimpleModel.objects.get(pk=obj.pk)
+        obj.save()
+
+        assert not have_fields_changed(obj, ('name',))
+
+    def test_changed_save(self):
+        """Test that changes are detected, and that the next save starts afresh."""
+        track_fields(SimpleModel, ('name',))
+        obj = SimpleModel.objects.create(name='old')
+
+        obj.name = 'new'
+        obj.save()
+        assert have_fields_changed(obj, ('name',))
+
+        obj.save()
+        assert not have_fields_changed(obj, ('name',))
+
+    def test_foreign_key(self):
+        """Test that foreign keys can be tracked using their field names."""
+        track_fields(RelatedModel, ('simpleton',))
+        obj = RelatedModel.objects.create()
+
+        obj.simpleton = SimpleModel.objects.create()
+        obj.save()
+
+        assert have_fields_changed(obj, ('simpleton',))
+
+    def test_deferred_field(self):
+        """Test that deferred fields are assumed to have changed."""
+        track_fields(SimpleModel, ('name',))
+        obj = SimpleModel.objects.create(name='old')
+
+        obj = SimpleModel.objects.only('pk').get(pk=obj.pk)
+        obj.save()
+
+        assert have_fields_changed(obj, ('name',))
+
+    def test_untracked_instance(self):
+        """Test that fields are assumed to have changed if changes weren't tracked."""
+        obj = Mock(spec=[])
+        assert have_fields_changed(obj, ('name',))
+
+
+class TestSignalReceiverTrackedFields:
+    """Tests for SignalReceiver with tracked_fields."""
+
+    def test_called_on_create(self, tracked_receiver):
+        """Test that the receiver is called when an object is created."""
+        _, callback = tracked_receiver
+
+        SimpleModel.objects.create(name='name')
+
+        callback.assert_called_once()
+
+    def test_called_on_change(self, tracked_receiver):
+        """Test that the receiver is called when a tracked field is changed."""
+        obj = SimpleModel.objects.create(name='old')
+        _, callback = tracked_receiver
+        callback.reset_mock()
+
+        obj.name = 'new'
+        obj.save()
+
+        callback.assert_called_once_with(obj)
+
+    def test_not_called_without_change(self, tracked_receiver):
+        """Test that the receiver is not called when no tracked field has changed."""
+        obj = SimpleModel.objects.create(name='old')
+        _, callback = tracked_receiver
+        callback.reset_mock()
+
+        SimpleModel.objects.get(pk=obj.pk).save()
+
+        callback.assert_not_called()
+
+    def test_not_called_for_untracked_update_fields(self, tracked_receiver):
+        """Test that the receiver is not called when only untracked fields are saved."""
+        obj = SimpleModel.objects.create(name='old')
+        _, callback = tracked_receiver
+        callback.reset_mock()
+
+        obj.name = 'new'
+        obj.save(update_fields=('modified_on',))
+
+        callback.assert_not_called()
+
+    def test_not_called_on_create_if_ignore_created(self):
+        """Test that the receiver is not called on create if ignore_created is True."""
+        callback = Mock(__name__='callback')
+        receiver = SignalReceiver(post_save, SimpleModel, callback, ignore_created=True)
+        receiver.connect()
+
+        try:
+            obj = SimpleModel.objects.create(name='old')
+            callback.assert_not_called()
+
+            obj.save()
+            callback.assert_called_once_with(obj)
+        finally:
+            receiver.disconnect()
+
+    def test_ignore_created_requires_post_save(self):
+        """Test that ignore_created can only be used with post_save."""
+        with pytest.raises(ValueError):
+            SignalReceiver(post_delete, SimpleModel, Mock(), ignore_created=True)
+
+    def test_tracked_fields_require_post_save(self):
+        """Test that tracked fields can only be used with post_save."""
+        with pytest.raises(ValueError):
+            SignalReceiver(post_delete, SimpleModel, Mock(), tracked_fields=('name',))
@@ -10,11 +10,99 @@ from datahub.search.test.utils import create_mock_search_app
 
 def test_migrate_apps(monkeypatch):
     """Test that migrate_apps() migrates the correct apps."""
-    migrate_app_mock = Mock()
-    monkeypatch.setattr('datahub.search.migrate.migrate_app', migrate_app_mock)
-    apps = {app.name for app in list(get_search_apps())[:2]}
-    migrate_apps(apps)
-    assert {args[0][0] for args in migrate_app_mock.call_args_list} == apps
+    prepare_migration_mock = Mock(return_value=True)
+    monkeypatch.setattr('datahub.search.migrate._prepare_migration', prepare_migration_mock)
+    migrate_model_task_mock = Mock()
+    monkeypatch.setattr('datahub.search.migrate.complete_model_migration', migrate_model_task_mock)
+    monkeypatch.setattr('datahub.search.migrate._get_index_size', Mock(return_value=0))
+    apps = list(get_search_apps())[:2]
+    for app in apps:
+        monkeypatch.setattr(app.es_model, 'is_migration_needed', Mock(return_value=True))
+
+    migrated_app_names = migrate_apps(apps)
+
+    assert set(migrated_app_names) == {app.name for app in apps}
+    assert {args[0][0] for args in prepare_migration_mock.call_args_list} == set(apps)
+    assert {
+        call_args[1]['args'][0] for call_args in migrate_model_task_mock.apply_async.call_args_list
+    } == {app.name for app in apps}
+
+
+@pytest.mark.parametrize(
+    'max_workers,expected_resyncs',
+    (
+        # The budget is divided between the apps needing migration, largest first
+        (
+            7,
+            [
+                ('large', 3, []),
+                ('medium', 2, []),
+                ('small', 2, []),
+            ],
+        ),
+        (
+            4,
+            [
+                ('large', 2, []),
+                ('medium', 1, []),
+                ('small', 1, []),
+            ],
+        ),
+        # With fewer workers than apps, the apps are queued (and one worker is used per app)
+        (
+            2,
+            [
+                ('large', 1, [('small', 'new-hash')]),
+                ('medium', 1, []),
+            ],
+        ),
+        (
+            1,
+            [
+                ('large', 1, [('medium', 'new-hash'), ('small', 'new-hash')]),
+            ],
+        ),
+    ),
+)
+def test_migrate_apps_prioritises_by_size(
+    monkeypatch,
+    mock_es_client,
+    max_workers,
+    expected_resyncs,
+):
+    """
+    Test that migrate_apps() migrates apps needing migration in descending order of index size,
+    without using more than the worker budget in total.
+    """
+    monkeypatch.setattr('datahub.search.migrate._prepare_migration', Mock(return_value=True))
+    migrate_model_task_mock = Mock()
+    monkeypatch.setattr('datahub.search.migrate.complete_model_migration', migrate_model_task_mock)
+
+    sizes = {'small': 10, 'large': 1000, 'medium': 100, 'up-to-date': 10000}
+    apps = []
+    for name in sizes:
+        app = create_mock_search_app(
+            target_mapping_hash='mapping-hash' if name == 'up-to-date' else 'new-hash',
+        )
+        app.name = name
+        app.es_model.get_read_alias.return_value = f'{name}-read-alias'
+        apps.append(app)
+
+    mock_es_client.return_value.count.side_effect = lambda index: {
+        'count': sizes[index[:-len('-read-alias')]],
+    }
+
+    migrated_app_names = migrate_apps(apps, max_workers=max_workers)
+
+    assert migrated_app_names == ['large', 'medium', 'small']
+    assert [
+        (
+            call_args[1]['args'][0],
+            call_args[1]['kwargs']['num_workers'],
+            call_args[1]['kwargs']['queued_migrations'],
+        )
+        for call_args in migrate_model_task_mock.apply_async.call_args_list
+    ] == expected_resyncs
 
 
 def test_migrate_app_with_app_needing_migration(monkeypatch, mock_es_client):
@@ -37,7 +125,10 @@ def test_migrate_app_with_app_needing_migration(monkeypatch, mock_es_client):
 
     migrate_app(mock_app)
 
-    create_index_mock.assert_called_once_with(new_index, mock_app.es_model._doc_type.mapping)
+    create_index_mock.assert_called_once_with(
+        new_index,
+        mock_app.es_model._doc_type.mapping,
+    )
 
     mock_client.indices.update_aliases.assert_called_once_with(
         body={
@@ -66,6 +157,7 @@ def test_migrate_app_with_app_needing_migration(monkeypatch, mock_es_client):
 
     migrate_model_task_mock.apply_async.assert_called_once_with(
         args=(mock_app.name, target_hash),
+        kwargs={'num_workers': 1, 'queued_migrations': []},
     )
 
 
@@ -121,6 +213,7 @@ def test_migrate_app_with_app_in_inconsistent_state(monkeypatch, mock_es_client)
 
     migrate_model_task_mock.apply_async.assert_called_once_with(
         args=(mock_app.name, target_hash),
+        kwargs={'num_workers': 1, 'queued_migrations': []},
     )
 
 
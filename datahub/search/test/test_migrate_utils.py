@@ -1,16 +1,26 @@
-from unittest.mock import ANY, Mock
+from unittest.mock import ANY, call, MagicMock, Mock
 
 import pytest
 
 from datahub.core.exceptions import DataHubException
 from datahub.core.test_utils import MockQuerySet
 from datahub.search.migrate_utils import (
-    delete_from_secondary_indices_callback,
+    MIGRATION_BULK_REQUEST_LOCK_NAME,
+    refresh_and_delete_from_secondary_indices_callback,
     resync_after_migrate,
 )
 from datahub.search.test.utils import create_mock_search_app
 
 
+@pytest.fixture
+def advisory_lock_pool_mock(monkeypatch):
+    """Replaces the advisory lock pool used to limit concurrent bulk requests with a mock."""
+    advisory_lock_pool_mock = MagicMock()
+    monkeypatch.setattr('datahub.search.migrate_utils.advisory_lock_pool', advisory_lock_pool_mock)
+    yield advisory_lock_pool_mock
+
+
+@pytest.mark.usefixtures('advisory_lock_pool_mock')
 class TestResyncAfterMigrate:
     """Tests for resync_after_migrate()"""
 
@@ -94,6 +104,128 @@ class TestResyncAfterMigrate:
         assert mock_client.indices.delete.call_count == 1
         mock_client.indices.delete.assert_any_call('index2')
 
+    def test_resync_limits_concurrent_bulk_requests(
+        self,
+        monkeypatch,
+        mock_es_client,
+        advisory_lock_pool_mock,
+    ):
+        """
+        Test that resync_after_migrate() holds a lock from the shared pool of size
+        ES_MIGRATION_MAX_BULK_REQUESTS while sending each bulk request.
+        """
+        monkeypatch.setattr('django.conf.settings.ES_MIGRATION_MAX_BULK_REQUESTS', 3)
+        index_bulk_mock = Mock()
+        monkeypatch.setattr('datahub.search.bulk_sync.bulk', index_bulk_mock)
+        monkeypatch.setattr('datahub.search.deletion.bulk', Mock(return_value=(True, ())))
+        monkeypatch.setattr(
+            'datahub.search.migrate_utils.get_aliases_for_index',
+            Mock(return_value=set()),
+        )
+        mock_app = create_mock_search_app(
+            read_indices={'index1', 'index2'},
+            write_index='index1',
+            queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+            bulk_batch_size=1,
+        )
+
+        resync_after_migrate(mock_app)
+
+        assert index_bulk_mock.call_count == 2
+        assert advisory_lock_pool_mock.call_args_list == [
+            call(MIGRATION_BULK_REQUEST_LOCK_NAME, 3),
+            call(MIGRATION_BULK_REQUEST_LOCK_NAME, 3),
+        ]
+        assert advisory_lock_pool_mock.return_value.__enter__.call_count == 2
+
+    def test_resync_uses_bulk_load_mode(self, monkeypatch, mock_es_client):
+        """
+        Test that resync_after_migrate() syncs the app with the write index in bulk-load mode,
+        and restores the normal index settings and refreshes the index before updating the
+        read alias.
+        """
+        monkeypatch.setattr(
+            'django.conf.settings.ES_INDEX_SETTINGS',
+            {
+                'number_of_replicas': 2,
+            },
+        )
+        mock_client = mock_es_client.return_value
+        sync_app_mock = Mock()
+        monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
+        monkeypatch.setattr(
+            'datahub.search.migrate_utils.get_aliases_for_index',
+            Mock(return_value=set()),
+        )
+
+        # Record the order of the calls made to the client
+        sync_app_mock.side_effect = lambda *args, **kwargs: mock_client.sync_app()
+
+        mock_app = create_mock_search_app(
+            read_indices={'index1', 'index2'},
+            write_index='index1',
+        )
+
+        resync_after_migrate(mock_app)
+
+        assert [call[0] for call in mock_client.method_calls] == [
+            'indices.put_settings',
+            'sync_app',
+            'indices.put_settings',
+            'indices.refresh',
+            'indices.update_aliases',
+            'indices.delete',
+        ]
+
+        put_settings_calls = mock_client.indices.put_settings.call_args_list
+        assert put_settings_calls[0][1] == {
+            'index': 'index1',
+            'body': {
+                'index': {
+                    'refresh_interval': '-1',
+                    'number_of_replicas': 0,
+                },
+            },
+        }
+        assert put_settings_calls[1][1] == {
+            'index': 'index1',
+            'body': {
+                'index': {
+                    'refresh_interval': None,
+                    'number_of_replicas': 2,
+                },
+            },
+        }
+        mock_client.indices.refresh.assert_called_once_with(index='index1')
+
+    def test_resync_restores_settings_on_error(self, monkeypatch, mock_es_client):
+        """
+        Test that if syncing fails, resync_after_migrate() restores the normal settings of the
+        write index but does not update the read alias.
+        """
+        mock_client = mock_es_client.return_value
+        sync_app_mock = Mock(side_effect=ValueError)
+        monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
+
+        mock_app = create_mock_search_app(
+            read_indices={'index1', 'index2'},
+            write_index='index1',
+        )
+
+        with pytest.raises(ValueError):
+            resync_after_migrate(mock_app)
+
+        assert mock_client.indices.put_settings.call_count == 2
+        assert mock_client.indices.put_settings.call_args_list[1][1]['body'] == {
+            'index': {
+                'refresh_interval': None,
+                'number_of_replicas': 0,
+            },
+        }
+        mock_client.indices.refresh.assert_called_once_with(index='index1')
+        mock_client.indices.update_aliases.assert_not_called()
+        mock_client.indices.delete.assert_not_called()
+
     def test_resync_with_deletion_error(self, monkeypatch, mock_es_client):
         """
         Test that resync_after_migrate() raises an exception when there is an error deleting
@@ -146,7 +278,10 @@ class TestResyncAfterMigrate:
 
         sync_app_mock.assert_called_once_with(
             mock_app,
-            post_batch_callback=delete_from_secondary_indices_callback,
+            post_batch_callback=refresh_and_delete_from_secondary_indices_callback,
+            num_workers=1,
+            progress_callback=ANY,
+            bulk_request_limiter=ANY,
         )
 
         mock_client.indices.update_aliases.assert_called_once_with(
@@ -220,5 +355,94 @@ class TestResyncAfterMigrate:
         # changed while sync_app was running
         sync_app_mock.assert_called_once_with(
             mock_app,
-            post_batch_callback=delete_from_secondary_indices_callback,
+            post_batch_callback=refresh_and_delete_from_secondary_indices_callback,
+            num_workers=1,
+            progress_callback=ANY,
+            bulk_request_limiter=ANY,
         )
+
+    def test_resync_without_pending_migration(self, monkeypatch, mock_es_client):
+        """
+        Test that if there is no pending migration, the app is not resynced and the settings
+        of its index are not changed.
+        """
+        sync_app_mock = Mock()
+        monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
+        mock_client = mock_es_client.return_value
+        mock_app = create_mock_search_app(
+            read_indices={'index1'},
+            write_index='index1',
+        )
+
+        resync_after_migrate(mock_app)
+
+        sync_app_mock.assert_not_called()
+        mock_client.indices.put_settings.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    'read_indices,write_index,expected_refreshes,expected_deletions',
+    (
+        (
+            {'index1', 'index2'},
+            'index1',
+            1,
+            1,
+        ),
+        (
+            {'index1'},
+            'index1',
+            0,
+            0,
+        ),
+    ),
+)
+def test_refresh_and_delete_from_secondary_indices_callback(
+    monkeypatch,
+    mock_es_client,
+    read_indices,
+    write_index,
+    expected_refreshes,
+    expected_deletions,
+):
+    """
+    Test that refresh_and_delete_from_secondary_indices_callback() refreshes the write index
+    before deleting documents from other indices (and does nothing if there are no other
+    indices).
+    """
+    delete_documents_mock = Mock()
+    monkeypatch.setattr('datahub.search.migrate_utils.delete_documents', delete_documents_mock)
+    mock_client = mock_es_client.return_value
+    actions = [{'_id': 1, '_type': 'test-type'}]
+
+    refresh_and_delete_from_secondary_indices_callback(read_indices, write_index, actions)
+
+    assert mock_client.indices.refresh.call_count == expected_refreshes
+    assert delete_documents_mock.call_count == expected_deletions
+
+
+@pytest.mark.usefixtures('local_memory_cache')
+def test_refresh_and_delete_from_secondary_indices_callback_throttles_refreshes(
+    monkeypatch,
+    mock_es_client,
+):
+    """
+    Test that refresh_and_delete_from_secondary_indices_callback() refreshes the write index
+    at most once in ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS seconds, but deletes documents from
+    the other indices every time.
+    """
+    monkeypatch.setattr('django.conf.settings.ES_MIGRATION_MIN_REFRESH_INTERVAL_SECS', 60)
+    delete_documents_mock = Mock()
+    monkeypatch.setattr('datahub.search.migrate_utils.delete_documents', delete_documents_mock)
+    mock_client = mock_es_client.return_value
+    actions = [{'_id': 1, '_type': 'test-type'}]
+
+    for _ in range(3):
+        refresh_and_delete_from_secondary_indices_callback({'index1', 'index2'}, 'index2', actions)
+    refresh_and_delete_from_secondary_indices_callback({'index3', 'index4'}, 'index4', actions)
+
+    assert mock_client.indices.refresh.call_args_list == [
+        call(index='index2'),
+        call(index='index4'),
+    ]
+    assert delete_documents_mock.call_count == 4
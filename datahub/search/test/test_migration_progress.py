@@ -0,0 +1,126 @@
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from datahub.search.migration_progress import (
+    AppMigrationProgress,
+    clear_app_progress,
+    complete_app_progress,
+    format_progress,
+    get_app_progress,
+    get_overall_progress,
+    start_app_progress,
+    update_app_progress,
+)
+
+
+@pytest.fixture
+def mock_time(monkeypatch):
+    """Patches time() so that it returns a controllable value."""
+    time_mock = Mock(return_value=1000.0)
+    monkeypatch.setattr('datahub.search.migration_progress.time', time_mock)
+    yield time_mock
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    """Uses a local-memory cache (as the dummy cache is used in tests by default)."""
+    cache = LocMemCache('test-migration-progress', {})
+    cache.clear()
+    monkeypatch.setattr('datahub.search.migration_progress.cache', cache)
+    yield cache
+
+
+class TestAppProgress:
+    """Tests for recording and retrieving the progress of search app resyncs."""
+
+    def test_records_progress(self, mock_time):
+        """Test that progress is recorded for each stage of a resync."""
+        start_app_progress('app1')
+        assert get_app_progress(['app1']) == [
+            AppMigrationProgress('app1', 0, 0, 1000.0, None),
+        ]
+
+        update_app_progress('app1', 50, 200)
+        assert get_app_progress(['app1']) == [
+            AppMigrationProgress('app1', 200, 50, 1000.0, None),
+        ]
+
+        mock_time.return_value = 1100.0
+        complete_app_progress('app1')
+        progress = get_app_progress(['app1'])
+        assert progress == [
+            AppMigrationProgress('app1', 200, 50, 1000.0, 1100.0),
+        ]
+        assert progress[0].is_complete
+
+    def test_omits_apps_without_progress(self, mock_time):
+        """Test that apps without any recorded progress are omitted."""
+        start_app_progress('app1')
+        start_app_progress('app2')
+        clear_app_progress('app2')
+
+        assert [progress.app_name for progress in get_app_progress(['app1', 'app2'])] == [
+            'app1',
+        ]
+
+    def test_ignores_updates_for_apps_not_started(self):
+        """Test that updates are ignored for apps without a started resync."""
+        update_app_progress('app1', 50, 200)
+        complete_app_progress('app1')
+
+        assert get_app_progress(['app1']) == []
+
+    @pytest.mark.parametrize(
+        'synced,total,completed_on,expected_percentage',
+        (
+            (0, 0, None, 0),
+            (50, 200, None, 25),
+            (200, 200, None, 99),
+            (200, 200, 1100.0, 100),
+        ),
+    )
+    def test_percentage(self, synced, total, completed_on, expected_percentage):
+        """Test the calculation of the percentage of documents synced."""
+        progress = AppMigrationProgress('app1', total, synced, 1000.0, completed_on)
+        assert progress.percentage == expected_percentage
+
+
+class TestOverallProgress:
+    """Tests for get_overall_progress() and format_progress()."""
+
+    def test_in_progress(self):
+        """Test that the rate and ETA are calculated from the combined progress of all apps."""
+        progress_list = [
+            AppMigrationProgress('app1', 1000, 1000, 1000.0, 1050.0),
+            AppMigrationProgress('app2', 3000, 1000, 1020.0, None),
+        ]
+
+        assert get_overall_progress(progress_list, now=1100.0) == (4000, 2000, 100.0, 20.0, 100.0)
+        assert format_progress(progress_list, now=1100.0) == [
+            'app1: 1000/1000 documents 100% (complete)',
+            'app2: 1000/3000 documents 33%',
+            'Overall: 2000/4000 documents in 0:01:40 (20 documents/s), ETA 0:01:40',
+        ]
+
+    def test_complete(self):
+        """Test that the ETA is zero once all apps have completed."""
+        progress_list = [
+            AppMigrationProgress('app1', 100, 100, 1000.0, 1010.0),
+        ]
+
+        overall_progress = get_overall_progress(progress_list, now=2000.0)
+        assert overall_progress.elapsed_secs == 10.0
+        assert overall_progress.eta_secs == 0
+
+    def test_not_started(self):
+        """Test that the rate and ETA are unknown before any documents have been synced."""
+        progress_list = [
+            AppMigrationProgress('app1', 100, 0, 1000.0, None),
+        ]
+
+        assert format_progress(progress_list, now=1000.0) == [
+            'app1: 0/100 documents 0%',
+            'Overall: 0/100 documents in 0:00:00 (unknown rate), ETA unknown',
+        ]
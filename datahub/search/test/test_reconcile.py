@@ -0,0 +1,110 @@
+from unittest.mock import Mock
+
+import pytest
+from django.utils.timezone import now
+
+from datahub.company.models import Company
+from datahub.company.test.factories import CompanyFactory
+from datahub.search.company import CompanySearchApp
+from datahub.search.reconcile import _merge_join, _NOT_IN_DB, reconcile_app
+from datahub.search.signals import disable_search_signal_receivers
+from datahub.search.sync_object import sync_objects_by_pk
+from datahub.search.test.utils import create_mock_search_app, doc_exists
+
+
+def test_merge_join():
+    """Test that two sorted streams are merge-joined on primary key."""
+    db_rows = [('a', 1), ('b', 2), ('d', 4)]
+    es_rows = [('b', 'hit-b'), ('c', 'hit-c'), ('d', 'hit-d'), ('e', 'hit-e')]
+
+    assert list(_merge_join(db_rows, es_rows)) == [
+        ('a', 1, None),
+        ('b', 2, 'hit-b'),
+        ('c', _NOT_IN_DB, 'hit-c'),
+        ('d', 4, 'hit-d'),
+        ('e', _NOT_IN_DB, 'hit-e'),
+    ]
+
+
+def test_skips_app_with_migration_in_progress():
+    """Test that search apps with a migration in progress are skipped."""
+    queryset = Mock()
+    search_app = create_mock_search_app(
+        read_indices=('index1', 'index2'),
+        write_index='index2',
+        queryset=queryset,
+    )
+
+    assert reconcile_app(search_app) is None
+    assert not queryset.method_calls
+
+
+@pytest.mark.django_db
+class TestReconcileApp:
+    """Tests for reconcile_app()."""
+
+    @pytest.fixture
+    def drifted_companies(self, setup_es):
+        """Creates companies whose documents are in sync, missing, stale and orphaned."""
+        in_sync_company = CompanyFactory()
+
+        with disable_search_signal_receivers(Company):
+            missing_company = CompanyFactory()
+
+        stale_company = CompanyFactory()
+        Company.objects.filter(pk=stale_company.pk).update(name='new name', modified_on=now())
+
+        orphaned_company = CompanyFactory()
+        Company.objects.filter(pk=orphaned_company.pk).delete()
+
+        setup_es.indices.refresh()
+
+        return {
+            'in_sync': in_sync_company,
+            'missing': missing_company,
+            'stale': stale_company,
+            'orphaned': orphaned_company,
+        }
+
+    def test_fixes_drift(self, setup_es, drifted_companies, monkeypatch):
+        """Test that missing and stale documents are synced and orphans are deleted."""
+        sync_objects_by_pk_mock = Mock(wraps=sync_objects_by_pk)
+        monkeypatch.setattr('datahub.search.reconcile.sync_objects_by_pk', sync_objects_by_pk_mock)
+
+        stats = reconcile_app(CompanySearchApp)
+        setup_es.indices.refresh()
+
+        assert stats == {'checked': 3, 'missing': 1, 'stale': 1, 'orphaned': 1}
+        synced_pks = {
+            pk
+            for call in sync_objects_by_pk_mock.call_args_list
+            for pk in call[0][1]
+        }
+        assert synced_pks == {
+            str(drifted_companies['missing'].pk),
+            str(drifted_companies['stale'].pk),
+        }
+
+        assert doc_exists(setup_es, CompanySearchApp, drifted_companies['missing'].pk)
+        assert not doc_exists(setup_es, CompanySearchApp, drifted_companies['orphaned'].pk)
+
+        stale_doc = setup_es.get(
+            index=CompanySearchApp.es_model.get_write_index(),
+            doc_type=CompanySearchApp.name,
+            id=drifted_companies['stale'].pk,
+        )
+        assert stale_doc['_source']['name'] == 'new name'
+
+        # Running again should find no drift
+        assert reconcile_app(CompanySearchApp) == {
+            'checked': 3, 'missing': 0, 'stale': 0, 'orphaned': 0,
+        }
+
+    def test_dry_run(self, setup_es, drifted_companies):
+        """Test that drift is only reported in a dry run."""
+        stats = reconcile_app(CompanySearchApp, dry_run=True)
+        setup_es.indices.refresh()
+
+        assert stats == {'checked': 3, 'missing': 1, 'stale': 1, 'orphaned': 1}
+        assert not doc_exists(setup_es, CompanySearchApp, drifted_companies['missing'].pk)
+        assert doc_exists(setup_es, CompanySearchApp, drifted_companies['orphaned'].pk)
@@ -1,10 +1,19 @@
+from unittest.mock import Mock
+
 import pytest
 
-from datahub.search.sync_object import sync_object_async, sync_related_objects_async
+from datahub.search.migrate_utils import refresh_and_delete_from_secondary_indices_callback
+from datahub.search.sync_object import (
+    sync_dependent_objects_by_paths_async,
+    sync_object,
+    sync_object_async,
+    sync_objects_async,
+    sync_objects_by_pk,
+)
 from datahub.search.test.search_support.models import RelatedModel, SimpleModel
 from datahub.search.test.search_support.relatedmodel import RelatedModelSearchApp
 from datahub.search.test.search_support.simplemodel import SimpleModelSearchApp
-from datahub.search.test.utils import doc_exists
+from datahub.search.test.utils import create_mock_search_app, doc_exists
 
 
 @pytest.mark.django_db
@@ -18,16 +27,83 @@ def test_sync_object_task_syncs_using_celery(setup_es):
 
 
 @pytest.mark.django_db
-def test_sync_related_objects_syncs_using_celery(setup_es):
-    """Test that related objects can be synced to Elasticsearch using Celery."""
+def test_sync_objects_task_syncs_using_celery(setup_es):
+    """Test that multiple objects can be synced to Elasticsearch using a single Celery task."""
+    objs = [SimpleModel.objects.create() for _ in range(3)]
+    unsynced_obj = SimpleModel.objects.create()
+
+    sync_objects_async(SimpleModelSearchApp, [obj.pk for obj in objs])
+    setup_es.indices.refresh()
+
+    assert all(doc_exists(setup_es, SimpleModelSearchApp, obj.pk) for obj in objs)
+    assert not doc_exists(setup_es, SimpleModelSearchApp, unsynced_obj.pk)
+
+
+@pytest.mark.django_db
+def test_sync_dependent_objects_syncs_using_celery(setup_es):
+    """Test that dependent objects can be synced to Elasticsearch using Celery."""
     simpleton = SimpleModel.objects.create()
     relation_1 = RelatedModel.objects.create(simpleton=simpleton)
     relation_2 = RelatedModel.objects.create(simpleton=simpleton)
     unrelated_obj = RelatedModel.objects.create()
 
-    sync_related_objects_async(simpleton, 'relatedmodel_set')
+    sync_dependent_objects_by_paths_async(RelatedModelSearchApp, ['simpleton'], [simpleton.pk])
     setup_es.indices.refresh()
 
     assert doc_exists(setup_es, RelatedModelSearchApp, relation_1.pk)
     assert doc_exists(setup_es, RelatedModelSearchApp, relation_2.pk)
     assert not doc_exists(setup_es, RelatedModelSearchApp, unrelated_obj.pk)
+
+
+@pytest.mark.parametrize(
+    'sync_func,arg',
+    (
+        (sync_object, 1),
+        (sync_objects_by_pk, [1, 2]),
+    ),
+)
+def test_sync_refreshes_write_index_before_deleting_from_old_indices(
+    monkeypatch,
+    sync_func,
+    arg,
+):
+    """
+    Test that objects synced during a migration are deleted from the old indices using
+    refresh_and_delete_from_secondary_indices_callback(), as the new index may be in
+    bulk-load mode.
+    """
+    sync_objects_mock = Mock()
+    monkeypatch.setattr('datahub.search.sync_object.sync_objects', sync_objects_mock)
+    mock_app = create_mock_search_app(
+        read_indices={'index1', 'index2'},
+        write_index='index2',
+        queryset=Mock(),
+    )
+
+    sync_func(mock_app, arg)
+
+    _, kwargs = sync_objects_mock.call_args
+    assert kwargs['post_batch_callback'] is refresh_and_delete_from_secondary_indices_callback
+
+
+def test_sync_object_resyncs_objects_that_fail_to_be_indexed(monkeypatch):
+    """
+    Test that if an object synced using a bulk indexer fails to be indexed, a resync of the
+    object is scheduled.
+    """
+    sync_objects_mock = Mock()
+    monkeypatch.setattr('datahub.search.sync_object.sync_objects', sync_objects_mock)
+    sync_objects_task_mock = Mock()
+    monkeypatch.setattr('datahub.search.sync_object.sync_objects_task', sync_objects_task_mock)
+    mock_app = create_mock_search_app(
+        read_indices={'index1'},
+        write_index='index1',
+        queryset=Mock(),
+    )
+
+    sync_object(mock_app, 1, indexer=Mock())
+
+    _, kwargs = sync_objects_mock.call_args
+    kwargs['indexer_error_callback']([{'_index': 'index1', '_id': 1}])
+
+    sync_objects_task_mock.apply_async.assert_called_once_with(args=(mock_app.name, ['1']))
@@ -6,7 +6,10 @@ import pytest
 from datahub.search.apps import get_search_apps
 from datahub.search.tasks import (
     complete_model_migration,
+    reconcile_all_models,
+    reconcile_model,
     sync_all_models,
+    sync_dependent_objects_task,
     sync_model,
     sync_object_task,
     sync_related_objects_task,
@@ -42,6 +45,31 @@ def test_sync_all_models(monkeypatch):
     assert tasks_created == {app.name for app in get_search_apps()}
 
 
+def test_reconcile_all_models(monkeypatch):
+    """Test that the reconcile_all_models task starts sub-tasks to reconcile all models."""
+    reconcile_model_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.reconcile_model', reconcile_model_mock)
+
+    reconcile_all_models.apply()
+    tasks_created = {
+        call[1]['args'][0] for call in reconcile_model_mock.apply_async.call_args_list
+    }
+    assert tasks_created == {app.name for app in get_search_apps()}
+
+
+@pytest.mark.django_db
+def test_reconcile_model(monkeypatch):
+    """Test that the reconcile_model task reconciles the model and returns drift statistics."""
+    stats = {'checked': 1, 'missing': 0, 'stale': 0, 'orphaned': 0}
+    reconcile_app_mock = Mock(return_value=stats)
+    monkeypatch.setattr('datahub.search.reconcile.reconcile_app', reconcile_app_mock)
+
+    result = reconcile_model.apply(args=(SimpleModelSearchApp.name,))
+
+    reconcile_app_mock.assert_called_once_with(SimpleModelSearchApp)
+    assert result.get() == stats
+
+
 @pytest.mark.django_db
 def test_sync_object_task_syncs(setup_es):
     """Test that the object task syncs an object to Elasticsearch."""
@@ -62,6 +90,33 @@ def test_sync_object_task_retries_on_error(monkeypatch, setup_es):
     assert sync_object_mock.call_count == 2
 
 
+@pytest.mark.django_db
+def test_sync_dependent_objects_task_syncs(monkeypatch):
+    """Test that objects depending on the source objects are synced in a batch."""
+    sync_objects_by_pk_mock = Mock()
+    monkeypatch.setattr(
+        'datahub.search.sync_object.sync_objects_by_pk',
+        sync_objects_by_pk_mock,
+    )
+
+    simpletons = SimpleModel.objects.bulk_create([SimpleModel(), SimpleModel()])
+    relations = [RelatedModel.objects.create(simpleton=simpleton) for simpleton in simpletons]
+    RelatedModel.objects.create()  # Unrelated object, should not get synced
+
+    sync_dependent_objects_task.apply(
+        args=(
+            RelatedModelSearchApp.name,
+            ['simpleton'],
+            [str(simpleton.pk) for simpleton in simpletons],
+        ),
+    )
+
+    sync_objects_by_pk_mock.assert_called_once_with(
+        RelatedModelSearchApp,
+        sorted(relation.pk for relation in relations),
+    )
+
+
 @pytest.mark.django_db
 def test_sync_related_objects_task_syncs(monkeypatch):
     """Test that related objects are synced to Elasticsearch."""
@@ -100,7 +155,7 @@ def test_complete_model_migration(monkeypatch):
     monkeypatch.setattr('datahub.search.tasks.get_search_app', get_search_app_mock)
 
     complete_model_migration.apply(args=('test-app', 'target-hash'))
-    resync_after_migrate_mock.assert_called_once_with(mock_app)
+    resync_after_migrate_mock.assert_called_once_with(mock_app, num_workers=1)
 
 
 @pytest.mark.django_db
@@ -161,3 +216,37 @@ def test_complete_model_migration_with_mapping_hash_mismatch(monkeypatch):
     retry_mock.assert_called_once()
 
     resync_after_migrate_mock.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('resync_error', (None, ValueError()))
+def test_complete_model_migration_resyncs_queued_apps(monkeypatch, resync_error):
+    """
+    Test that the complete_model_migration task resyncs queued search apps one after another
+    (using the same number of workers), even if a resync fails.
+    """
+    resynced_app_names = []
+
+    def _resync_after_migrate(search_app, num_workers):
+        resynced_app_names.append((search_app.name, num_workers))
+        if resync_error:
+            raise resync_error
+
+    monkeypatch.setattr('datahub.search.tasks.resync_after_migrate', _resync_after_migrate)
+
+    def _get_search_app(search_app_name):
+        mock_app = create_mock_search_app(target_mapping_hash=f'{search_app_name}-hash')
+        mock_app.name = search_app_name
+        return mock_app
+
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', _get_search_app)
+
+    complete_model_migration.apply(
+        args=('app-1', 'app-1-hash'),
+        kwargs={
+            'num_workers': 2,
+            'queued_migrations': [('app-2', 'app-2-hash'), ('app-3', 'app-3-hash')],
+        },
+    )
+
+    assert resynced_app_names == [('app-1', 2), ('app-2', 2), ('app-3', 2)]
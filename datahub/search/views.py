@@ -48,6 +48,8 @@ class SearchBasicAPIView(APIView):
 
     required_scopes = (Scope.internal_front_end,)
     http_method_names = ('get',)
+    # See datahub.core.instrumentation
+    query_budget = 15
 
     def get(self, request, format=None):
         """Performs basic search."""
@@ -110,6 +112,8 @@ class SearchAPIView(APIView):
     fields_to_exclude = None
 
     http_method_names = ('post',)
+    # See datahub.core.instrumentation
+    query_budget = 15
 
     def _get_filter_data(self, validated_data):
         """Returns filter data."""